@@ -1,96 +1,162 @@
 import os
+import csv
 import logging
-from typing import Dict, List, Optional
-import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .sentence_chunker import word_spans
 
 # Setup logging
 logger = logging.getLogger("AmalgumAnalyzer")
 
+# Weighted register markers: marker<TAB>register<TAB>weight (markers are 1+ tokens)
+DEFAULT_LEXICON_PATH = Path(__file__).resolve().parent.parent / "data" / "register_lexicon.tsv"
+
+# Classification margin, in weighted marker hits per 1,000 tokens
+CLASSIFICATION_MARGIN = 5.0
+
+
+class RegisterLexicon:
+    """
+    Marker index + weight matrix. Each marker (a token tuple) maps to a row of
+    `weights` (one column per register), so a text's scores are the sum of the
+    rows of the markers it contains: a sparse-vector dot product.
+    """
+
+    def __init__(self, entries: Sequence[tuple[str, str, float]]):
+        self.registers: list[str] = sorted({register for _, register, _ in entries})
+        column = {register: i for i, register in enumerate(self.registers)}
+        self.index: dict[tuple[str, ...], int] = {}
+        rows: list[np.ndarray] = []
+        for marker, register, weight in entries:
+            tokens = tuple(w.lower() for _, _, w in word_spans(marker))
+            if not tokens:
+                continue
+            if tokens not in self.index:
+                self.index[tokens] = len(rows)
+                rows.append(np.zeros(len(self.registers), dtype=np.float64))
+            rows[self.index[tokens]][column[register]] = weight
+        self.weights = np.vstack(rows) if rows else np.zeros((0, len(self.registers)), dtype=np.float64)
+        self.max_order = max((len(k) for k in self.index), default=0)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @classmethod
+    def from_tsv(cls, path: str | Path) -> "RegisterLexicon":
+        entries: list[tuple[str, str, float]] = []
+        with open(path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f, delimiter="\t"):
+                try:
+                    entries.append((row["marker"], row["register"], float(row["weight"])))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        return cls(entries)
+
+    def marker_ids(self, tokens: Sequence[str]) -> list[int]:
+        """Row id of every marker occurrence (all orders, so overlapping markers each count)."""
+        index = self.index
+        ids: list[int] = []
+        n = len(tokens)
+        for i in range(n):
+            for order in range(1, min(self.max_order, n - i) + 1):
+                row = index.get(tuple(tokens[i:i + order]))
+                if row is not None:
+                    ids.append(row)
+        return ids
+
+
+_LEXICONS: dict[str, RegisterLexicon] = {}
+
+
+def load_lexicon(path: str | Path = DEFAULT_LEXICON_PATH) -> RegisterLexicon:
+    """Loaded once per process per lexicon file."""
+    key = os.fspath(path)
+    if key not in _LEXICONS:
+        _LEXICONS[key] = RegisterLexicon.from_tsv(path)
+        logger.info(f"📚 AMALGUM register lexicon loaded: {len(_LEXICONS[key])} markers, registers {_LEXICONS[key].registers}")
+    return _LEXICONS[key]
+
+
+def _tokens(text: str) -> list[str]:
+    return [w.lower() for _, _, w in word_spans(text)]
+
+
 class AmalgumAnalyzer:
     """
     Simulates the AMALGUM corpus analysis for register detection (Academic vs Conversational).
-    
-    Since the full AMALGUM corpus is large, this version bootstraps with a 
-    seed dictionary of register-specific markers.
+
+    Markers and weights come from an external lexicon (data/register_lexicon.tsv);
+    scores are weighted marker hits per 1,000 tokens, so long and short texts compare.
     """
-    
-    def __init__(self):
-        self._load_seed_data()
-        
-    def _load_seed_data(self):
-        """
-        Loads a seed list of words/ngrams that are strongly associated 
-        with either Academic or Conversational registers.
-        """
-        # In a full implementation, this would load from a large N-gram DB
-        self.academic_markers = {
-            "moreover": 0.8,
-            "however": 0.6,
-            "therefore": 0.8,
-            "startlingly": 0.9,
-            "consequently": 0.8,
-            "in conclusion": 0.9,
-            "according to": 0.7,
-            "analysis": 0.6,
-            "hypothesis": 0.7,
-            "demonstrate": 0.6
-        }
-        
-        self.conversational_markers = {
-            "like": 0.5,
-            "maybe": 0.4,
-            "stuff": 0.7,
-            "kind of": 0.6,
-            "sort of": 0.6,
-            "you know": 0.7,
-            "basically": 0.5,
-            "actually": 0.4,
-            "pretty much": 0.6
-        }
-        logger.info("📚 AMALGUM Seed Data Loaded (Academic & Conversational markers)")
+
+    def __init__(self, lexicon_path: str | Path = DEFAULT_LEXICON_PATH):
+        self.lexicon = load_lexicon(lexicon_path)
+
+    def _scores(self, raw: np.ndarray, token_count: int) -> Dict[str, float]:
+        scale = 1000.0 / token_count if token_count else 0.0
+        return {register: round(float(raw[i]) * scale, 2) for i, register in enumerate(self.lexicon.registers)}
+
+    def _profile(self, scores: Dict[str, float], token_count: int) -> Dict[str, Any]:
+        return {"scores": scores, "tokens": token_count, "classification": self._classify(scores)}
 
     def analyze_register(self, text: str) -> Dict[str, float]:
         """
-        Analyzes the text and returns a 'register score' dictionary.
+        Analyzes the text and returns a 'register score' dictionary (per 1,000 tokens).
         High academic_score = more formal.
         High casual_score = more informal.
         """
-        text_lower = text.lower()
-        
-        academic_score = 0.0
-        casual_score = 0.0
-        
-        # Check markers
-        for marker, weight in self.academic_markers.items():
-            if marker in text_lower:
-                academic_score += weight
-                
-        for marker, weight in self.conversational_markers.items():
-            if marker in text_lower:
-                casual_score += weight
-                
-        # Normalize roughly by length or just return raw scores for now
-        # For this MVP, we just return the raw accumulation
-        return {
-            "academic": round(academic_score, 2),
-            "conversational": round(casual_score, 2)
-        }
-
-    def get_genre_classification(self, text: str) -> str:
+        return self.register_profile(text)["scores"]
+
+    def register_profile(self, text: str) -> Dict[str, Any]:
+        """Scores, token count and classification of one text (same shape as each analyze_turns entry)."""
+        tokens = _tokens(text)
+        ids = self.lexicon.marker_ids(tokens)
+        raw = self.lexicon.weights[ids].sum(axis=0) if ids else np.zeros(len(self.lexicon.registers))
+        return self._profile(self._scores(raw, len(tokens)), len(tokens))
+
+    def analyze_turns(self, turns: Sequence[str]) -> List[Dict[str, Any]]:
         """
-        Returns 'Academic', 'Conversational', or 'Neutral' based on scores.
+        Per-turn register scores + classification. All marker hits of all turns
+        are accumulated in one `np.add.at` over a (turns x registers) matrix.
         """
-        scores = self.analyze_register(text)
-        aca = scores['academic']
-        conv = scores['conversational']
-        
-        if aca > conv + 0.5:
+        token_counts: list[int] = []
+        ids: list[int] = []
+        owners: list[int] = []
+        for t, text in enumerate(turns):
+            tokens = _tokens(text)
+            token_counts.append(len(tokens))
+            turn_ids = self.lexicon.marker_ids(tokens)
+            ids.extend(turn_ids)
+            owners.extend([t] * len(turn_ids))
+
+        raw = np.zeros((len(turns), len(self.lexicon.registers)), dtype=np.float64)
+        if ids:
+            np.add.at(raw, np.asarray(owners), self.lexicon.weights[ids])
+
+        return [{"turn": t, **self._profile(self._scores(raw[t], count), count)} for t, count in enumerate(token_counts)]
+
+    @staticmethod
+    def _classify(scores: Dict[str, float]) -> str:
+        aca = scores.get('academic', 0.0)
+        conv = scores.get('conversational', 0.0)
+
+        if aca > conv + CLASSIFICATION_MARGIN:
             return "Academic"
-        elif conv > aca + 0.5:
+        elif conv > aca + CLASSIFICATION_MARGIN:
             return "Conversational"
         else:
             return "Neutral"
 
+    def get_genre_classification(self, text: str, scores: Optional[Dict[str, float]] = None) -> str:
+        """
+        Returns 'Academic', 'Conversational', or 'Neutral' based on scores.
+        Pass `scores` from analyze_register to avoid scoring the text twice.
+        """
+        return self._classify(scores if scores is not None else self.analyze_register(text))
+
     def analyze(self, text: str) -> Dict[str, float]:
         """Standard interface alias."""
         return self.analyze_register(text)
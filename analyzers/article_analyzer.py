@@ -1,9 +1,10 @@
 import re
-import json
 import logging
-from pathlib import Path
 from typing import Any, final
 
+from .rule_pack import get_rules, scan_rules
+from .sentence_cache import analyze_sentences, rules_version
+
 logger = logging.getLogger("ArticleAnalyzer")
 
 @final
@@ -26,52 +27,48 @@ class ArticleAnalyzer:
         self.an_exceptions = ["hour", "honest", "heir", "honor"] 
         self.a_exceptions = ["university", "united", "unique", "useful", "usage", "eu", "one", "utopia", "union", "unit", "user", "unicorn", "uniform"]
         
-        # --- Unified Phenomena Setup ---
-        self.json_rules = []
-        self._load_unified_rules()
+        # --- Unified Phenomena Setup (the current rule-pack snapshot) ---
+        rules = get_rules()
+        self.json_rules = rules.article
+        self.rules_version = rules_version(__file__, salt=rules.salt)
 
-    def _load_unified_rules(self):
-        """Loads article-specific rules from the unified_phenomena.json definition."""
-        try:
-            # Path relative to this file: ../data/unified_phenomena.json
-            base_path = Path(__file__).resolve().parent.parent / "data" / "unified_phenomena.json"
-            if base_path.exists():
-                with open(base_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                count = 0
-                for item in data:
-                    # Filter for Article/Grammar rules relevant to articles
-                    subcat = item.get("subcategory", "")
-                    cat = item.get("publicCategory", "")
-                    name = item.get("itemName", "").lower()
-                    
-                    is_article_rule = (
-                        "Article" in subcat or 
-                        "Article" in cat or 
-                        "article" in name
-                    )
-                    
-                    if is_article_rule and item.get("triggerPattern"):
-                        try:
-                            self.json_rules.append({
-                                "regex": re.compile(item["triggerPattern"], re.IGNORECASE),
-                                "meta": item
-                            })
-                            count += 1
-                        except re.error:
-                            logger.warning(f"Invalid regex for {item.get('phenomenon_id')}")
-                            
-                logger.info(f"📚 ArticleAnalyzer loaded {count} advanced rules from Unified Phenomena.")
-            else:
-                logger.warning("⚠️ unified_phenomena.json not found. Advanced article rules disabled.")
-                
-        except Exception as e:
-            logger.error(f"Failed to load unified rules: {e}")
+    def analyze(self, text: str) -> list[dict[str, Any]]:
+        """
+        Phonetic a/an errors first, then unified rule matches in rule order.
+        Per-sentence hits come from the sentence cache; the cross-sentence dedupe runs on the stitched result.
+        """
+        hits = analyze_sentences(text, "articles", self.rules_version, self._scan)
+        hits.sort(key=lambda h: (h["rule"], h["start"]))
 
-    def analyze(self, text: str) -> list[dict[str, str]]:
         errors = []
-        
+        for hit in hits:
+            rule = hit.pop("rule")
+            if rule < 0:
+                errors.append(hit)
+                continue
+            p_meta = self.json_rules[rule]["meta"]
+            rule_hash = self.json_rules[rule]["hash"]
+            # Avoid dupes if same text caught by basic rule
+            matched_text = text[hit["start"]:hit["end"]]
+            if not any(e['match'] == matched_text for e in errors):
+                errors.append({
+                    "item": p_meta.get("itemName"),
+                    "match": matched_text,
+                    "correction": p_meta.get("exampleCorrections", "").split('|')[0], # Take first correction hint
+                    "explanation": p_meta.get("l1Interference") or p_meta.get("explanation") or "Article usage error.",
+                    "source": "UnifiedPhenomena",
+                    "phenomenon_id": p_meta.get("phenomenon_id"),
+                    "rule_hash": rule_hash,
+                    "start": hit["start"],
+                    "end": hit["end"]
+                })
+
+        return errors
+
+    def _scan(self, text: str) -> list[dict[str, Any]]:
+        """Raw hits: full phonetic errors (rule -1) and unified rule spans (rule = json_rules index)."""
+        hits = []
+
         # 1. Standard 'a/an' Check
         matches = re.finditer(r'\b(a|an)\s+([a-z]+)\b', text, re.IGNORECASE)
         for match in matches:
@@ -80,41 +77,34 @@ class ArticleAnalyzer:
             needs_an = self._starts_with_vowel_sound(next_word)
             
             if article == "a" and needs_an:
-                errors.append({
+                hits.append({
+                    "rule": -1,
                     "item": f"{article} {next_word}",
                     "match": f"{article} {next_word}",
                     "correction": f"an {next_word}",
                     "explanation": f"Use 'an' before '{next_word}' because it starts with a vowel sound.",
-                    "source": "PhoneticRule"
+                    "source": "PhoneticRule",
+                    "phenomenon_id": "art_a_an",
+                    "start": match.start(),
+                    "end": match.end()
                 })
             elif article == "an" and not needs_an:
-                errors.append({
+                hits.append({
+                    "rule": -1,
                     "item": f"{article} {next_word}",
                     "match": f"{article} {next_word}",
                     "correction": f"a {next_word}",
                     "explanation": f"Use 'a' before '{next_word}' because it starts with a consonant sound.",
-                    "source": "PhoneticRule"
+                    "source": "PhoneticRule",
+                    "phenomenon_id": "art_a_an",
+                    "start": match.start(),
+                    "end": match.end()
                 })
 
         # 2. Unified Phenomena Check (PATSI)
-        for rule in self.json_rules:
-            pattern = rule["regex"]
-            p_meta = rule["meta"]
-            
-            p_matches = pattern.finditer(text)
-            for pm in p_matches:
-                # Avoid dupes if same text caught by basic rule
-                matched_text = pm.group(0)
-                if not any(e['match'] == matched_text for e in errors):
-                     errors.append({
-                        "item": p_meta.get("itemName"),
-                        "match": matched_text,
-                        "correction": p_meta.get("exampleCorrections", "").split('|')[0], # Take first correction hint
-                        "explanation": p_meta.get("l1Interference") or p_meta.get("explanation") or "Article usage error.",
-                        "source": "UnifiedPhenomena"
-                    })
+        hits.extend(scan_rules(self.json_rules, text))
 
-        return errors
+        return hits
 
     @final
     def _starts_with_vowel_sound(self, word: str) -> bool:
@@ -1,5 +1,8 @@
 import logging
-from typing import Optional, Any
+from typing import Optional, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .tutor_baseline import TutorBaseline
 
 logger = logging.getLogger("ComparativeAnalyzer")
 
@@ -12,95 +15,95 @@ class ComparativeAnalyzer:
     def __init__(self):
         pass
 
-    def analyze(self, tutor_text: str, student_text: str) -> dict[str, dict[str, float]]:
+    @staticmethod
+    def speaker_metrics(text: str, pos_analyzer: Any = None, ngram_analyzer: Any = None) -> tuple[dict[str, Any], Any]:
+        """
+        Per-speaker block (length, diversity, naturalness, POS ratios) and the
+        speaker's n-gram profile. Also what the tutor baseline accumulates.
+        """
+        from .pos_analyzer import POSAnalyzer
+        from .ngram_analyzer import NgramAnalyzer
+
+        pos_analyzer = pos_analyzer or POSAnalyzer()
+        ngram_analyzer = ngram_analyzer or NgramAnalyzer()
+
+        # === Basic Stats ===
+        words = text.split()
+        word_count = len(words)
+        avg_word_len = sum(len(w) for w in words) / max(word_count, 1)
+
+        # === POS Ratios ===
+        pos = pos_analyzer.get_summary(text)
+
+        # === N-gram Naturalness (profile shared with the overlap below) ===
+        profile = ngram_analyzer.profile(text)
+        ngram_data = ngram_analyzer.get_summary(profile)
+
+        # === Sentence Complexity (avg words per sentence as proxy) ===
+        sentences = text.count('.') + text.count('!') + text.count('?')
+        avg_sentence_len = word_count / max(sentences, 1)
+
+        # === Lexical Diversity (Type-Token Ratio) ===
+        ttr = len(set(w.lower() for w in words)) / max(word_count, 1)
+
+        return {
+            "word_count": word_count,
+            "avg_word_length": round(avg_word_len, 2),
+            "avg_sentence_length": round(avg_sentence_len, 2),
+            "lexical_diversity": round(ttr, 3),
+            "naturalness_score": ngram_data['naturalness_score'],
+            "verb_ratio": pos['verb_ratio'],
+            "noun_ratio": pos['noun_ratio'],
+            "adjective_ratio": pos['adjective_ratio'],
+        }, profile
+
+    def analyze(self, tutor_text: str, student_text: str, baseline: Optional["TutorBaseline"] = None) -> dict[str, dict[str, Any]]:
         """
         Performs a comprehensive comparison between tutor and student speech.
         Returns metrics for both, plus a comparison delta.
+        With a ready tutor baseline, the tutor side is read from it instead of
+        being recomputed from this session's tutor turns.
         """
-        from textblob import TextBlob
         from .pos_analyzer import POSAnalyzer
         from .ngram_analyzer import NgramAnalyzer
         
         pos_analyzer = POSAnalyzer()
         ngram_analyzer = NgramAnalyzer()
         
-        # === Basic Stats ===
-        tutor_words = tutor_text.split()
-        student_words = student_text.split()
-        
-        tutor_word_count = len(tutor_words)
-        student_word_count = len(student_words)
-        
-        tutor_avg_word_len = sum(len(w) for w in tutor_words) / max(tutor_word_count, 1)
-        student_avg_word_len = sum(len(w) for w in student_words) / max(student_word_count, 1)
-        
-        # === POS Ratios ===
-        tutor_pos = pos_analyzer.get_summary(tutor_text)
-        student_pos = pos_analyzer.get_summary(student_text)
-        
-        # === N-gram Naturalness ===
-        tutor_ngram_data = ngram_analyzer.get_summary(tutor_text)
-        student_ngram_data = ngram_analyzer.get_summary(student_text)
+        student, student_profile = self.speaker_metrics(student_text, pos_analyzer, ngram_analyzer)
+
+        if baseline is not None and baseline.ready:
+            tutor = baseline.reference()
+            tutor_bigrams = baseline.bigrams
+            # Share of the student's bigrams the tutor has used in any merged session
+            total = student_profile.total(2)
+            shared = sum(count for gram, count in student_profile.counts[2].items() if " ".join(gram) in tutor_bigrams)
+            tutor_overlap_ratio = shared / total if total else 0.0
+            reference = baseline.describe()
+        else:
+            tutor, tutor_profile = self.speaker_metrics(tutor_text, pos_analyzer, ngram_analyzer)
+            # Share of the student's bigrams that the tutor also used
+            tutor_overlap_ratio = student_profile.overlap(tutor_profile, n=2)
+            reference = {"source": "session", "sessions": baseline.sessions if baseline is not None else 0}
         
         # DEBUG LOGS FOR AUDIT
-        print(f"DEBUG: Tutor Ngram Data: {tutor_ngram_data}")
-        print(f"DEBUG: Student Ngram Data: {student_ngram_data}")
-        
-        # === Sentence Complexity (avg words per sentence as proxy) ===
-        tutor_sentences = tutor_text.count('.') + tutor_text.count('!') + tutor_text.count('?')
-        student_sentences = student_text.count('.') + student_text.count('!') + student_text.count('?')
+        logger.debug(f"Tutor metrics: {tutor}")
+        logger.debug(f"Student metrics: {student}")
         
-        tutor_avg_sentence_len = tutor_word_count / max(tutor_sentences, 1)
-        student_avg_sentence_len = student_word_count / max(student_sentences, 1)
-        
-        # === Lexical Diversity (Type-Token Ratio) ===
-        tutor_unique = len(set(w.lower() for w in tutor_words))
-        student_unique = len(set(w.lower() for w in student_words))
-        
-        tutor_ttr = tutor_unique / max(tutor_word_count, 1)
-        student_ttr = student_unique / max(student_word_count, 1)
-        
-        # === NEW: Direct Tutor Overlap (Personalized Naturalness) ===
-        tutor_bigrams_list = ngram_analyzer.get_bigrams(tutor_text)
-        student_bigrams_list = ngram_analyzer.get_bigrams(student_text)
-        
-        tutor_bigrams_set = set(tutor_bigrams_list)
-        
-        # Calculate overlap
-        overlap_bigrams = [bg for bg in student_bigrams_list if bg in tutor_bigrams_set]
-        overlap_count = len(overlap_bigrams)
-        tutor_overlap_ratio = overlap_count / max(len(student_bigrams_list), 1)
+        student["tutor_overlap_score"] = round(tutor_overlap_ratio * 100, 1) # 0-100%
         
         # === Build Result ===
         result = {
-            "tutor": {
-                "word_count": tutor_word_count,
-                "avg_word_length": round(tutor_avg_word_len, 2),
-                "avg_sentence_length": round(tutor_avg_sentence_len, 2),
-                "lexical_diversity": round(tutor_ttr, 3),
-                "naturalness_score": tutor_ngram_data['naturalness_score'],
-                "verb_ratio": tutor_pos['verb_ratio'],
-                "noun_ratio": tutor_pos['noun_ratio'],
-                "adjective_ratio": tutor_pos['adjective_ratio'],
-            },
-            "student": {
-                "word_count": student_word_count,
-                "avg_word_length": round(student_avg_word_len, 2),
-                "avg_sentence_length": round(student_avg_sentence_len, 2),
-                "lexical_diversity": round(student_ttr, 3),
-                "naturalness_score": student_ngram_data['naturalness_score'],
-                "verb_ratio": student_pos['verb_ratio'],
-                "noun_ratio": student_pos['noun_ratio'],
-                "adjective_ratio": student_pos['adjective_ratio'],
-                "tutor_overlap_score": round(tutor_overlap_ratio * 100, 1) # 0-100%
-            },
+            "tutor": tutor,
+            "student": student,
             "comparison": {
-                "word_count_ratio": round(student_word_count / max(tutor_word_count, 1), 2),
-                "naturalness_gap": round(tutor_ngram_data['naturalness_score'] - student_ngram_data['naturalness_score'], 3),
-                "lexical_diversity_gap": round(tutor_ttr - student_ttr, 3),
-                "avg_sentence_length_gap": round(tutor_avg_sentence_len - student_avg_sentence_len, 2),
+                "word_count_ratio": round(student['word_count'] / max(tutor['word_count'], 1), 2),
+                "naturalness_gap": round(tutor['naturalness_score'] - student['naturalness_score'], 3),
+                "lexical_diversity_gap": round(tutor['lexical_diversity'] - student['lexical_diversity'], 3),
+                "avg_sentence_length_gap": round(tutor['avg_sentence_length'] - student['avg_sentence_length'], 2),
                 "tutor_overlap_pct": round(tutor_overlap_ratio * 100, 1)
-            }
+            },
+            "reference": reference,
         }
         
         return result
@@ -127,8 +130,8 @@ class ComparativeAnalyzer:
 | Word Count          | {tutor['word_count']} | {student['word_count']} |          |
 """
 
-    def compare(self, student_data: dict[str, Any], tutor_data: dict[str, Any]) -> dict[str, Any]:
+    def compare(self, student_data: dict[str, Any], tutor_data: dict[str, Any], baseline: Optional["TutorBaseline"] = None) -> dict[str, Any]:
         """
         Alias for pipeline compatibility. Extracts text and runs analyze().
         """
-        return self.analyze(tutor_data.get('text', ''), student_data.get('text', ''))
+        return self.analyze(tutor_data.get('text', ''), student_data.get('text', ''), baseline=baseline)
@@ -1,8 +1,15 @@
 import json
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, TYPE_CHECKING
 from pathlib import Path
 
+import numpy as np
+
+from .word_timeline import WordTimeline
+
+if TYPE_CHECKING:
+    from .tutor_baseline import TutorBaseline
+
 logger = logging.getLogger("FluencyAnalyzer")
 
 class FluencyAnalyzer:
@@ -15,29 +22,29 @@ class FluencyAnalyzer:
     def __init__(self, pause_threshold_ms: int = 300):
         self.pause_threshold = pause_threshold_ms
 
-    def analyze_hesitation(self, words: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def analyze_hesitation(self, words: List[Dict[str, Any]] | WordTimeline) -> Dict[str, Any]:
         """
         Calculates statistical hesitation before words.
         Returns a list of 'Difficulty Targets' where the student struggled.
+        Accepts a flat word list or a prebuilt WordTimeline.
         """
-        hesitations = []
-        total_pause_time = 0
+        timeline = self._as_timeline(words)
+        gaps = timeline.gaps()
         
-        for i in range(1, len(words)):
-            current = words[i]
-            prev = words[i-1]
-            
-            # AssemblyAI provides 'start' and 'end' in ms
-            gap = current.get("start", 0) - prev.get("end", 0)
-            
-            if gap > self.pause_threshold:
-                hesitations.append({
-                    "word": current.get("text"),
-                    "pre_word_gap_ms": gap,
-                    "timestamp_ms": current.get("start"),
-                    "speaker": current.get("speaker")
-                })
-                total_pause_time += gap
+        # AssemblyAI provides 'start' and 'end' in ms
+        with np.errstate(invalid='ignore'):
+            idx = np.flatnonzero(gaps > self.pause_threshold) + 1
+
+        hesitations = [
+            {
+                "word": timeline.texts[i],
+                "pre_word_gap_ms": float(gaps[i - 1]),
+                "timestamp_ms": float(timeline.start[i]),
+                "speaker": timeline.speakers[timeline.speaker_id[i]]
+            }
+            for i in idx.tolist()
+        ]
+        total_pause_time = float(gaps[idx - 1].sum()) if idx.size else 0
 
         return {
             "struggle_points": hesitations,
@@ -46,27 +53,38 @@ class FluencyAnalyzer:
             "avg_gap_ms": total_pause_time / len(hesitations) if hesitations else 0
         }
 
-    def calculate_articulation_rate(self, words: List[Dict[str, Any]]) -> float:
+    def calculate_articulation_rate(self, words: List[Dict[str, Any]] | WordTimeline) -> float:
         """Calculates WPM (Words Per Minute) excluding long silence."""
-        if not words: return 0.0
-        
-        duration_ms = words[-1].get("end", 0) - words[0].get("start", 0)
-        if duration_ms == 0: return 0.0
-        
-        # (Total words / duration in minutes)
-        return (len(words) / (duration_ms / 60000))
+        return self._as_timeline(words).wpm()
 
-    def compare_to_native(self, student_words: List[Dict[str, Any]], tutor_words: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def compare_to_native(
+        self,
+        student_words: List[Dict[str, Any]] | WordTimeline,
+        tutor_words: List[Dict[str, Any]] | WordTimeline | None = None,
+        baseline: "TutorBaseline | None" = None,
+    ) -> Dict[str, Any]:
         """
         The TRUE Naturalness Score.
         Compares the student's timing metrics against the tutor's native baseline.
+        A ready TutorBaseline supplies the tutor WPM (mean over past sessions);
+        otherwise it is measured from this session's tutor words.
         """
         s_rate = self.calculate_articulation_rate(student_words)
-        t_rate = self.calculate_articulation_rate(tutor_words)
+        if baseline is not None and baseline.ready and baseline.stats["wpm"].n:
+            t_rate = baseline.mean("wpm")
+            source = "baseline"
+        else:
+            t_rate = self.calculate_articulation_rate(tutor_words or [])
+            source = "session"
         
         return {
             "student_wpm": round(s_rate, 2),
             "tutor_wpm": round(t_rate, 2),
             "fluency_ratio": round(s_rate / t_rate, 2) if t_rate > 0 else 0,
-            "naturalness_delta": round(t_rate - s_rate, 2)
+            "naturalness_delta": round(t_rate - s_rate, 2),
+            "tutor_wpm_source": source
         }
+
+    @staticmethod
+    def _as_timeline(words: List[Dict[str, Any]] | WordTimeline) -> WordTimeline:
+        return words if isinstance(words, WordTimeline) else WordTimeline.from_words(words)
@@ -1,64 +1,149 @@
-
+import json
 import logging
 import re
+from pathlib import Path
 from typing import Any, final, List, Dict
-from collections.abc import Mapping
-from textblob import TextBlob
+
+from .sentence_cache import analyze_sentences, rules_version
+from .sentence_chunker import split_sentences, word_spans
 
 logger = logging.getLogger("LearnerErrorAnalyzer")
 
+DEFAULT_PATTERNS_PATH = Path(__file__).resolve().parent.parent / "data" / "learner_error_patterns.json"
+
+# `\b(is|are|was) ` or `\bmuch ` at the start of a pattern: the whole first word(s) it can match.
+# The anchor must be followed by a space, `\b` or `\s`, so `(information)s` is not anchored on "information".
+_ALTERNATION_ANCHOR_RE = re.compile(r"^\\b\(([a-z']+(?:\|[a-z']+)*)\)(?=[ ]|\\[bs]|$)")
+_WORD_ANCHOR_RE = re.compile(r"^\\b([a-z']+)(?=[ ]|\\[bs]|$)")
+# Numbered/named backreferences: group numbers shift once a pattern is pasted into a bucket regex
+_GROUP_REF_RE = re.compile(r"\\[1-9]|\\g<|\(\?P=")
+
+
+def _anchors(pattern: str) -> set[str] | None:
+    """First words a pattern must start with, or None if that can't be read off the source."""
+    m = _ALTERNATION_ANCHOR_RE.match(pattern) or _WORD_ANCHOR_RE.match(pattern)
+    return set(m.group(1).split("|")) if m else None
+
+
+class _PatternIndex:
+    """
+    Pattern table compiled for a single pass over the text.
+    Anchored patterns are bucketed by first word; each bucket is one regex of optional
+    named lookaheads, so one `match()` at a word start reports every pattern (and span)
+    that fires there. Patterns without a readable anchor, or with backreferences or
+    named groups, are scanned on their own.
+    """
+
+    def __init__(self, entries: list[dict[str, Any]]):
+        self.entries = entries
+        self.by_anchor: dict[str, tuple[re.Pattern[str], list[tuple[str, int]]]] = {}
+        self.unanchored: list[tuple[int, re.Pattern[str]]] = []
+
+        buckets: dict[str, list[int]] = {}
+        for idx, entry in enumerate(entries):
+            try:
+                compiled = re.compile(entry["pattern"], re.IGNORECASE)
+            except re.error as e:
+                logger.warning(f"Skipping invalid learner pattern {entry.get('id')}: {e}")
+                continue
+            anchors = _anchors(entry["pattern"])
+            # Backreferences and named groups (names collide within a bucket) only work on their own
+            if anchors is None or compiled.groupindex or _GROUP_REF_RE.search(entry["pattern"]):
+                self.unanchored.append((idx, compiled))
+                continue
+            for anchor in anchors:
+                buckets.setdefault(anchor, []).append(idx)
+
+        combined_cache: dict[tuple[int, ...], tuple[re.Pattern[str], list[tuple[str, int]]]] = {}
+        for anchor, indices in buckets.items():
+            key = tuple(indices)
+            if key not in combined_cache:
+                groups = [(f"p{idx}", idx) for idx in indices]
+                source = "".join(f"(?:(?=(?P<{name}>{entries[idx]['pattern']})))?" for name, idx in groups)
+                combined_cache[key] = (re.compile(source, re.IGNORECASE), groups)
+            self.by_anchor[anchor] = combined_cache[key]
+
+    def scan(self, text: str) -> list[tuple[int, int, int]]:
+        """(entry index, start, end) for every match, ordered by entry then position."""
+        hits: list[tuple[int, int, int]] = []
+        last_end: dict[int, int] = {}
+        for start, _, word in word_spans(text):
+            word = word.lower()
+            # "don't" is one word, but "it's" can also start a pattern anchored on "it"
+            keys = {word, word.split("'", 1)[0]} if "'" in word else (word,)
+            for key in keys:
+                probe = self.by_anchor.get(key)
+                if probe is None:
+                    continue
+                regex, groups = probe
+                m = regex.match(text, start)
+                if m is None:
+                    continue
+                for name, idx in groups:
+                    s, e = m.span(name)
+                    # Keep finditer semantics: a pattern's matches never overlap each other
+                    if s >= 0 and s >= last_end.get(idx, 0):
+                        hits.append((idx, s, e))
+                        last_end[idx] = e
+        for idx, compiled in self.unanchored:
+            hits.extend((idx, m.start(), m.end()) for m in compiled.finditer(text))
+        hits.sort()
+        return hits
+
+
+_INDEXES: dict[str, _PatternIndex] = {}
+
+
+def load_pattern_index(path: str | Path = DEFAULT_PATTERNS_PATH) -> _PatternIndex:
+    """Compiled once per process per pattern file."""
+    key = str(path)
+    if key not in _INDEXES:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        _INDEXES[key] = _PatternIndex(entries)
+        logger.info(f"📚 Compiled {len(entries)} learner error patterns ({len(_INDEXES[key].by_anchor)} anchors)")
+    return _INDEXES[key]
+
+
 @final
 class LearnerErrorAnalyzer:
     """
     Analyzes text for common ESL learner errors based on PELIC patterns and common L1 interference.
     Now includes extensive regex-based detection for "thousands of errors".
+    The pattern table lives in data/learner_error_patterns.json.
     """
 
-    def __init__(self):
-        # Regex patterns for common errors
-        self.patterns = [
-            (r"\b(is|are|was|were) (have|has|had)\b", "Double Verb Error", "Do not combine 'to be' with 'have' (e.g., 'is have')."),
-            (r"\b(does|do|did) (is|are|am)\b", "Auxiliary Error", "Do not combine 'do' with 'be'."),
-            (r"\b(more|most) (better|best|worse|worst)\b", "Double Comparative", "Redundant comparative/superlative."),
-            (r"\b(can|could|should|would|must|might) to \w+", "Modal Error", "Modals are followed by base verb, not infinitive with 'to'."),
-            (r"\b(information|furniture|advice|equipment|knowledge|traffic)s\b", "Uncountable Noun", "This noun is uncountable and cannot be pluralized."),
-            (r"\b(i|he|she|it|we|they) is \w+ing\b", "Progressive Tense (Possible)", "Check if subject matches verb (e.g., 'I is' -> 'I am')."), # Simplified check
-            (r"\b(don't|doesn't|didn't) (nothing|no|never|none)\b", "Double Negative", "Avoid double negatives in standard English."),
-            (r"\b(people|children|men|women|teeth|feet)s\b", "Irregular Plural", "Double plural marking on irregular noun."),
-            (r"\bmuch (people|books|chairs|days)\b", "Countable Quantifier", "Use 'many' with countable nouns."),
-            (r"\b(depend|relies) of\b", "Preposition Error", "Use 'depend on' or 'rely on'."),
-            (r"\b(married|engaged) with\b", "Preposition Error", "Use 'married/engaged to'."),
-            (r"\b(good|bad) in\b", "Preposition Error", "Use 'good/bad at' (skills)."),
-            (r"\b(arrive) at (London|Paris|NY|Rome)\b", "Preposition Error", "Use 'arrive in' for cities/countries."),
-            (r"\b(lose|waste) time (to do|doing)\b", "Collocation", "Waste time doing something."), # Complex check
-            (r"\b(make) (a)? question\b", "Collocation", "Use 'ask a question'."),
-            (r"\b(do) (a)? mistake\b", "Collocation", "Use 'make a mistake'."),
-            (r"\b(explain) (me|him|her|us|them)\b", "Datative Shift Error", "Explain cannot take direct object pronoun like 'explain me'. Use 'explain to me'."),
-            (r"\b(suggest|recommend) (me|him|her)\b", "Datative Shift Error", "Use 'suggest to me' or subjunctive clause."),
-        ]
+    def __init__(self, patterns_path: str | Path = DEFAULT_PATTERNS_PATH):
+        self.index = load_pattern_index(patterns_path)
+        self.patterns = self.index.entries
+        self.rules_version = rules_version(__file__, patterns_path)
 
     def _check_regex_errors(self, text: str) -> List[Dict[str, Any]]:
         errors = []
-        text_lower = text.lower()
-        for pattern, cat, expl in self.patterns:
-            matches = re.finditer(pattern, text_lower)
-            for match in matches:
-                errors.append({
-                    "item": match.group(0),
-                    "match": match.group(0),
-                    "category": cat,
-                    "correction": "Check grammar", # Generic for regex, can get specific
-                    "explanation": expl
-                })
+        for idx, start, end in self.index.scan(text):
+            entry = self.patterns[idx]
+            matched = text[start:end].lower()
+            errors.append({
+                "item": matched,
+                "match": matched,
+                "category": entry["category"],
+                "correction": entry.get("correction", "Check grammar"), # Generic for regex, can get specific
+                "explanation": entry["explanation"],
+                "pattern_id": entry.get("id"),
+                "start": start,
+                "end": end
+            })
         return errors
 
-    def _check_missing_subject(self, blob: Any) -> List[Dict[str, Any]]:
+    def _check_missing_subject(self, text: str) -> List[Dict[str, Any]]:
         """Detects sentences starting with 'Is' or 'Are' (typical L1 Spanish/Portuguese error)."""
         errors = []
-        for sentence in blob.sentences:
-            if not sentence.words: continue
-            first_word = str(sentence.words[0]).lower()
-            if first_word in ['is', 'are', 'was', 'were'] and str(sentence).strip().endswith("?"):
+        for s_start, s_end, sentence in split_sentences(text):
+            words = word_spans(text, s_start, s_end)
+            if not words: continue
+            w_start, w_end, word = words[0]
+            first_word = word.lower()
+            if first_word in ['is', 'are', 'was', 'were'] and sentence.strip().endswith("?"):
                 pass # Question form is valid: "Is he here?"
             elif first_word in ['is', 'are', 'was', 'were']:
                  # Heuristic: Statement starting with Is/Are is likely Pro-drop error
@@ -67,21 +152,26 @@ class LearnerErrorAnalyzer:
                     "match": first_word,
                     "category": "Missing Subject",
                     "correction": f"It {first_word}",
-                    "explanation": f"Sentence starts with '{first_word}'. Likely missing dummy subject 'It'."
+                    "explanation": f"Sentence starts with '{first_word}'. Likely missing dummy subject 'It'.",
+                    "start": w_start,
+                    "end": w_end
                 })
         return errors
 
     def analyze(self, text: str) -> List[Dict[str, Any]]:
         """
         Main entry point for morphological/syntactic analysis.
+        Sentences seen before (same patterns) come from the sentence cache.
         """
+        return analyze_sentences(text, "learner_errors", self.rules_version, self._analyze_text, batch=False)
+
+    def _analyze_text(self, text: str) -> List[Dict[str, Any]]:
         errors = []
-        
-        # 1. Regex Checks
+
+        # 1. Regex Checks (single pass over the text)
         errors.extend(self._check_regex_errors(text))
-        
-        # 2. TextBlob Checks
-        blob = TextBlob(text)
-        errors.extend(self._check_missing_subject(blob))
-        
+
+        # 2. Sentence-initial checks (shared segmentation)
+        errors.extend(self._check_missing_subject(text))
+
         return errors
@@ -3,7 +3,16 @@ import os
 import json
 import re
 from typing import List, Dict, Set, Optional, Any
-import nltk
+
+from .pos_tagger import get_pos_tagger
+
+# Parsed vocabularies keyed by path. Shared by every engine in the process (and,
+# when preloaded before forking, by every worker via copy-on-write).
+# Ranked lists keep file order (NGSL headword order, COCA frequency rank).
+_VOCAB_CACHE: Dict[str, Set[str]] = {}
+_RANKED_CACHE: Dict[str, List[str]] = {}
+_NGSL_RANK_CACHE: Dict[str, Dict[str, int]] = {}
+_COMBINED_CACHE: Dict[tuple, List[str]] = {}
 
 class LexicalEngine:
     """
@@ -16,6 +25,9 @@ class LexicalEngine:
         self.fuzzy_threshold = fuzzy_threshold
         self.ngsl_vocab: Set[str] = set()
         self.coca_vocab: Set[str] = set()
+        self.ngsl_ranked: List[str] = []
+        self.coca_ranked: List[str] = []
+        self.ngsl_rank: Dict[str, int] = {}  # form -> 1-based rank of its NGSL headword
         self.combined_vocab_list: List[str] = []
         
         # Default paths if not provided (based on gitenglishhub structure)
@@ -23,30 +35,49 @@ class LexicalEngine:
         ngsl_path = ngsl_path or os.path.join(base_lexical, "NGSL_1.2_lemmatized_for_teaching.csv")
         coca_path = coca_path or os.path.join(base_lexical, "COCA-60000-Vocabulary-List.txt")
 
-        if os.path.exists(ngsl_path):
-            self.ngsl_vocab = self._load_ngsl(ngsl_path)
-            
-        if os.path.exists(coca_path):
-            self.coca_vocab = self._load_coca(coca_path)
-            
-        self.combined_vocab_list = list(self.ngsl_vocab.union(self.coca_vocab))
+        if ngsl_path not in _VOCAB_CACHE and os.path.exists(ngsl_path):
+            _RANKED_CACHE[ngsl_path], _NGSL_RANK_CACHE[ngsl_path] = self._load_ngsl(ngsl_path)
+            _VOCAB_CACHE[ngsl_path] = set(_RANKED_CACHE[ngsl_path])
+        if ngsl_path in _VOCAB_CACHE:
+            self.ngsl_vocab = _VOCAB_CACHE[ngsl_path]
+            self.ngsl_ranked = _RANKED_CACHE[ngsl_path]
+            self.ngsl_rank = _NGSL_RANK_CACHE[ngsl_path]
 
-    def _load_ngsl(self, path: str) -> Set[str]:
-        vocab = set()
+        if coca_path not in _VOCAB_CACHE and os.path.exists(coca_path):
+            _RANKED_CACHE[coca_path] = self._load_coca(coca_path)
+            _VOCAB_CACHE[coca_path] = set(_RANKED_CACHE[coca_path])
+        if coca_path in _VOCAB_CACHE:
+            self.coca_vocab = _VOCAB_CACHE[coca_path]
+            self.coca_ranked = _RANKED_CACHE[coca_path]
+
+        combined_key = (ngsl_path, coca_path)
+        if combined_key not in _COMBINED_CACHE:
+            # NGSL first, then the rest of COCA by rank
+            _COMBINED_CACHE[combined_key] = list(dict.fromkeys(self.ngsl_ranked + self.coca_ranked))
+        self.combined_vocab_list = _COMBINED_CACHE[combined_key]
+
+    def _load_ngsl(self, path: str) -> tuple[List[str], Dict[str, int]]:
+        """Forms in file order, plus each form's headword rank (row number, 1-based)."""
+        ranked: Dict[str, None] = {}
+        ranks: Dict[str, int] = {}
         try:
             with open(path, 'r', encoding='utf-8') as f:
                 reader = csv.reader(f)
+                headword_rank = 0
                 for row in reader:
                     if not row or row[0].startswith('#'):
                         continue
+                    headword_rank += 1
                     for item in row:
                         word = item.strip().lower()
-                        if word: vocab.add(word)
+                        if word:
+                            ranked[word] = None
+                            ranks.setdefault(word, headword_rank)
         except Exception: pass
-        return vocab
+        return list(ranked), ranks
 
-    def _load_coca(self, path: str) -> Set[str]:
-        vocab = set()
+    def _load_coca(self, path: str) -> List[str]:
+        ranked: Dict[str, None] = {}
         try:
             with open(path, 'r', encoding='utf-8') as f:
                 for line in f:
@@ -56,9 +87,9 @@ class LexicalEngine:
                     parts = line.split()
                     if len(parts) >= 3:
                         word = parts[2].strip().lower()
-                        if word.isalpha(): vocab.add(word)
+                        if word.isalpha(): ranked[word] = None
         except Exception: pass
-        return vocab
+        return list(ranked)
 
     def find_fuzzy_match(self, word: str) -> Optional[str]:
         """
@@ -141,16 +172,10 @@ class LexicalEngine:
         # Extract text tokens for POS tagging
         tokens = [w.get('text', '').strip(".,?!\"'") for w in validated]
         
-        # Download NLTK data if needed (idempotent-ish check)
-        try:
-            nltk.data.find('taggers/averaged_perceptron_tagger_eng')
-        except LookupError:
-            nltk.download('averaged_perceptron_tagger_eng', quiet=True)
-            
-        # Run POS tagging
+        # Run POS tagging (shared tagger, loaded once per process)
         try:
-            pos_tags = nltk.pos_tag(tokens)
-        except Exception: # Fallback if download failed
+            pos_tags = get_pos_tagger().tag(tokens)
+        except Exception: # Fallback if the tagger is unavailable
              pos_tags = [(t, 'NN') for t in tokens]
 
         reconstructed = []
@@ -0,0 +1,159 @@
+"""
+Live Session Analytics.
+Incremental metrics for the streaming websocket server. Each end-of-turn
+event is folded into running totals at O(turn) cost, and a compact delta
+is returned for broadcast to the UI.
+"""
+
+import logging
+import re
+from collections import Counter
+from typing import Any, Mapping
+
+import numpy as np
+
+from .word_timeline import WordTimeline
+
+logger = logging.getLogger("LiveSessionAnalytics")
+
+FILLERS = ['um', 'uh', 'like', 'you know', 'so', 'well', 'actually']
+_FILLER_RE = re.compile(r'\b(' + '|'.join(re.escape(f) for f in FILLERS) + r')\b')
+_TOKEN_RE = re.compile(r"[a-z']+")
+
+# Pause histogram bucket edges (ms). Last bucket is open-ended.
+PAUSE_BUCKETS_MS = (300, 500, 1000, 2000)
+
+
+class _SpeakerTotals:
+    """Running counters for one speaker."""
+
+    def __init__(self) -> None:
+        self.turns = 0
+        self.words = 0
+        self.speaking_ms = 0.0
+        self.pause_count = 0
+        self.pause_ms = 0.0
+        self.pause_histogram = [0] * len(PAUSE_BUCKETS_MS)
+        self.fillers: Counter[str] = Counter()
+        self.types: set[str] = set()
+        self.tokens = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        minutes = self.speaking_ms / 60000.0
+        return {
+            'turns': self.turns,
+            'words': self.words,
+            'wpm': round(self.words / minutes, 1) if minutes > 0.001 else 0.0,
+            'pauses': self.pause_count,
+            'average_pause_ms': round(self.pause_ms / self.pause_count, 1) if self.pause_count else 0.0,
+            'pause_histogram': dict(zip(_bucket_labels(), self.pause_histogram)),
+            'fillers': sum(self.fillers.values()),
+            'filler_percentage': round(sum(self.fillers.values()) / self.words * 100, 2) if self.words else 0,
+            'lexical_diversity': round(len(self.types) / self.tokens, 3) if self.tokens else 0,
+        }
+
+
+def _bucket_labels() -> list[str]:
+    edges = list(PAUSE_BUCKETS_MS)
+    labels = [f"{lo}-{hi}ms" for lo, hi in zip(edges, edges[1:])]
+    labels.append(f"{edges[-1]}ms+")
+    return labels
+
+
+class LiveSessionAnalytics:
+    """
+    Running fluency/error signals for one live lesson.
+    Call `update_turn()` on every end-of-turn event; it returns the delta to broadcast.
+    Speaker labels ("B" or "Speaker B") resolve to names through `speaker_map`;
+    the one named `student_name` is the student in the talk ratio.
+    """
+
+    def __init__(self, student_name: str, speaker_map: Mapping[str, str] | None = None, matcher: Any | None = None, pause_threshold_ms: int = 300):
+        self.student_name = student_name
+        self.speaker_map = dict(speaker_map or {})
+        self.matcher = matcher
+        self.pause_threshold = pause_threshold_ms
+        self.speakers: dict[str, _SpeakerTotals] = {}
+        self.phenomena: Counter[str] = Counter()
+
+    def update_turn(self, turn: dict[str, Any]) -> dict[str, Any]:
+        """Folds one finished turn into the running totals and returns the delta."""
+        speaker = str(turn.get('speaker', 'Unknown'))
+        text = str(turn.get('transcript', ''))
+        text_lower = text.lower()
+        words = turn.get('words') or []
+        totals = self.speakers.setdefault(speaker, _SpeakerTotals())
+
+        # 1. Timing (this turn only)
+        timeline = WordTimeline.from_words(words)
+        pauses = timeline.pause_durations(self.pause_threshold)
+        speaking_ms = float(np.nan_to_num(timeline.turn_end[0] - timeline.turn_start[0])) if len(timeline) else 0.0
+        bucket_idx = np.clip(np.searchsorted(PAUSE_BUCKETS_MS, pauses, side='right') - 1, 0, None)
+        histogram = np.bincount(bucket_idx, minlength=len(PAUSE_BUCKETS_MS))
+
+        # 2. Lexis
+        tokens = _TOKEN_RE.findall(text_lower)
+        new_types = set(tokens) - totals.types
+        fillers = Counter(_FILLER_RE.findall(text_lower))
+
+        # 3. Phenomena (pattern cost scales with the turn, not the session)
+        matches: list[dict[str, Any]] = []
+        if self.matcher is not None and text:
+            try:
+                matches = self.matcher.match(text)
+            except Exception as e:
+                logger.warning(f"Live phenomena match failed: {e}")
+
+        totals.turns += 1
+        totals.words += len(words) if words else len(tokens)
+        totals.speaking_ms += max(speaking_ms, 0.0)
+        totals.pause_count += int(pauses.size)
+        totals.pause_ms += float(pauses.sum())
+        totals.pause_histogram = [a + int(b) for a, b in zip(totals.pause_histogram, histogram)]
+        totals.fillers.update(fillers)
+        totals.types |= new_types
+        totals.tokens += len(tokens)
+        for m in matches:
+            self.phenomena[str(m.get('phenomenon_id') or m.get('item'))] += 1
+
+        return {
+            'message_type': 'live_metrics',
+            'turn_order': turn.get('turn_order'),
+            'speaker': speaker,
+            'turn': {
+                'words': len(words) if words else len(tokens),
+                'wpm': round(timeline.wpm(), 1),
+                'pauses': int(pauses.size),
+                'fillers': dict(fillers),
+                'new_types': len(new_types),
+                'phenomena': [{'phenomenon_id': m.get('phenomenon_id'), 'item': m.get('item')} for m in matches],
+            },
+            'totals': {
+                'speakers': {label: s.snapshot() for label, s in self.speakers.items()},
+                'talk_ratio': self.talk_ratio(),
+                'top_phenomena': dict(self.phenomena.most_common(5)),
+            }
+        }
+
+    def speaker_name(self, label: str) -> str:
+        short = label.removeprefix("Speaker ").strip()
+        return self.speaker_map.get(label) or self.speaker_map.get(short) or label
+
+    def is_student(self, label: str) -> bool:
+        return self.speaker_name(label).strip().lower() == self.student_name.strip().lower()
+
+    def talk_ratio(self) -> dict[str, float]:
+        """Student vs everyone else (teacher) share of words."""
+        total = sum(s.words for s in self.speakers.values())
+        student = sum(s.words for label, s in self.speakers.items() if self.is_student(label))
+        return {
+            'student_percentage': round(student / total * 100, 1) if total else 0.0,
+            'teacher_percentage': round((total - student) / total * 100, 1) if total else 0.0,
+        }
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            'speakers': {label: s.snapshot() for label, s in self.speakers.items()},
+            'talk_ratio': self.talk_ratio(),
+            'phenomena': dict(self.phenomena),
+        }
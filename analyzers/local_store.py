@@ -0,0 +1,57 @@
+"""
+Local Persistent Store.
+Small derived state that outlives a session (tutor baselines, per-student
+metrics, indexes) lives under one directory: `.semantic_store/` in the
+package root, or SEMANTIC_STORE_DIR. Everything in it can be rebuilt from
+the session files, so it is gitignored and safe to delete.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("LocalStore")
+
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+
+
+def store_dir() -> Path:
+    return Path(os.getenv("SEMANTIC_STORE_DIR") or PACKAGE_ROOT / ".semantic_store")
+
+
+def store_path(*parts: str) -> Path:
+    """Path inside the store; parent directories are created."""
+    path = store_dir().joinpath(*parts)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def read_json(path: str | Path, default: Any = None) -> Any:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Unreadable store file {path}: {e}")
+        return default
+
+
+def write_json(path: str | Path, data: Any) -> None:
+    """Atomic replace, so a crash mid-write never leaves a truncated file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
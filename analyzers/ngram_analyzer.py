@@ -1,15 +1,25 @@
 import logging
-from collections import Counter
+
+from .ngram_profile import NgramProfile, get_profile
+from .ngram_store import NgramStore, get_ngram_store
 
 logger = logging.getLogger("NgramAnalyzer")
 
+# Mean log10 probability per token mapped onto the 0-100 naturalness scale
+NATURAL_LOGPROB = -1.5    # ~perplexity 30: fluent conversational English
+UNNATURAL_LOGPROB = -5.0  # ~perplexity 100k: mostly unseen word sequences
+
 class NgramAnalyzer:
     """
     Performs N-gram analysis on text.
     Compares student n-grams against a baseline to identify unusual patterns.
     
-    Note: A full implementation would integrate with py-ngrams or COCA data.
-    This MVP uses a seed dataset of common English bigrams.
+    Naturalness uses the reference n-gram store (analyzers/ngram_store.py, built
+    from COCA-style frequency lists) when one is available, and falls back to a
+    seed dataset of common English bigrams otherwise.
+
+    Every method accepts raw text or an NgramProfile; text is profiled once
+    (1-4-grams in one pass) and the profile is shared by all of them.
     """
 
     # Common English bigrams (High-frequency list for linguistic grounding)
@@ -32,64 +42,105 @@ class NgramAnalyzer:
         ("you", "know"), ("you", "see"), ("i'm", "sure"), ("actually", "i"),
     }
 
-    def __init__(self):
-        pass
+    def __init__(self, store: NgramStore | None = None):
+        self.store = store if store is not None else get_ngram_store()
+
+    @staticmethod
+    def profile(text: str | NgramProfile) -> NgramProfile:
+        """The shared n-gram profile for `text` (punctuation stripped, lowercased)."""
+        return text if isinstance(text, NgramProfile) else get_profile(text)
 
-    def get_bigrams(self, text: str) -> list[tuple[str, str]]:
+    def get_bigrams(self, text: str | NgramProfile) -> list[tuple[str, str]]:
         """
         Extracts bigrams (pairs of consecutive words) from text.
         Strips punctuation for accurate matching.
         """
-        import re
-        # Strip punctuation and split
-        clean_text = re.sub(r'[^\w\s]', '', text.lower())
-        words = clean_text.split()
-        bigrams = [(words[i], words[i+1]) for i in range(len(words) - 1)]
+        bigrams = self.profile(text).sequence(2)
         # Log a small sample for debugging
         if bigrams:
             logger.debug(f"Bigram sample: {bigrams[:5]}")
-        return bigrams
+        return bigrams # type: ignore[return-value]
 
-    def get_trigrams(self, text: str) -> list[tuple[str, str, str]]:
+    def get_trigrams(self, text: str | NgramProfile) -> list[tuple[str, str, str]]:
         """
         Extracts trigrams (triplets of consecutive words) from text.
         Strips punctuation for accurate matching.
         """
-        import re
-        clean_text = re.sub(r'[^\w\s]', '', text.lower())
-        words = clean_text.split()
-        return [(words[i], words[i+1], words[i+2]) for i in range(len(words) - 2)]
+        return self.profile(text).sequence(3) # type: ignore[return-value]
 
-    def analyze_bigrams(self, text: str) -> dict[str, int]:
+    def analyze_bigrams(self, text: str | NgramProfile) -> dict[str, int]:
         """
         Returns frequency counts of bigrams in the text.
         """
-        bigrams = self.get_bigrams(text)
         # Join tuples into strings "word1 word2" to match dict[str, int] signature
-        return {f"{bg[0]} {bg[1]}": count for bg, count in Counter(bigrams).items()}
+        return {" ".join(bg): count for bg, count in self.profile(text).counts[2].items()}
 
-    def get_unusual_bigrams(self, text: str) -> list[tuple[str, str]]:
+    def get_unusual_bigrams(self, text: str | NgramProfile) -> list[tuple[str, str]]:
         """
-        Returns bigrams that are NOT in the common baseline.
+        Returns bigrams that are NOT in the reference model (or the common baseline).
         These may indicate non-native patterns or creative usage.
         """
         bigrams = self.get_bigrams(text)
+        if self.store is not None:
+            return [bg for bg in bigrams if bg not in self.store]
         return [bg for bg in bigrams if bg not in self.COMMON_BIGRAMS]
 
-    def get_naturalness_score(self, text: str) -> float:
+    def score_sentences(self, text: str | NgramProfile) -> list[dict[str, float | int | str]]:
+        """
+        Per-sentence naturalness from the reference model: mean log10 probability
+        per token, its perplexity, and the 0-100 score. Empty without a store.
+        """
+        if self.store is None:
+            return []
+        profile = self.profile(text)
+        results = []
+        for sentence, start, end in profile.sentences:
+            tokens = profile.tokens[start:end]
+            if not tokens:
+                continue
+            logprob = self.store.score_tokens(tokens)
+            results.append({
+                "sentence": sentence,
+                "tokens": len(tokens),
+                "logprob": round(logprob, 3),
+                "perplexity": round(10 ** (-logprob), 1),
+                "naturalness": self._logprob_to_score(logprob),
+            })
+        return results
+
+    def _mean_logprob(self, text: str | NgramProfile) -> float | None:
+        """Token-weighted mean of the per-sentence log-probabilities (None if no tokens)."""
+        sentences = self.score_sentences(text)
+        total_tokens = sum(int(s["tokens"]) for s in sentences)
+        if not total_tokens:
+            return None
+        return sum(float(s["logprob"]) * int(s["tokens"]) for s in sentences) / total_tokens
+
+    @staticmethod
+    def _logprob_to_score(logprob: float) -> float:
+        ratio = (logprob - UNNATURAL_LOGPROB) / (NATURAL_LOGPROB - UNNATURAL_LOGPROB)
+        return round(100.0 * min(1.0, max(0.0, ratio)), 1)
+
+    def get_naturalness_score(self, text: str | NgramProfile) -> float:
         """
         Returns a score 0-100 indicating how "natural" the text is.
-        Uses a weighted approach: presence of common bigrams vs unusual ones.
+        With the reference model: token-weighted mean log-probability across sentences.
+        Otherwise a weighted approach: presence of common bigrams vs unusual ones.
         Native speakers typically score 70-95. Students typically 20-50.
         """
-        bigrams = self.get_bigrams(text)
-        if not bigrams:
+        if self.store is not None:
+            mean_logprob = self._mean_logprob(text)
+            return self._logprob_to_score(mean_logprob) if mean_logprob is not None else 0.0
+
+        profile = self.profile(text)
+        total = profile.total(2)
+        if not total:
             return 0.0
             
-        common_count = sum(1 for bg in bigrams if bg in self.COMMON_BIGRAMS)
+        common_count = sum(count for bg, count in profile.counts[2].items() if bg in self.COMMON_BIGRAMS)
         
         # Calculate base ratio (0-1)
-        ratio = common_count / len(bigrams)
+        ratio = common_count / total
         
         # Scale to 0-100 with a non-linear boost for common patterns
         # Even native speech has many unique bigrams, so a raw 0.3 ratio
@@ -97,19 +148,30 @@ class NgramAnalyzer:
         score = (ratio * 250) # Simple linear scaling for now
         return min(100.0, round(score, 1))
 
-    def get_summary(self, text: str) -> dict[str, float | int]:
+    def get_summary(self, text: str | NgramProfile) -> dict[str, float | int]:
         """
         Returns a summary of n-gram analysis for the text.
         """
-        bigrams = self.get_bigrams(text)
-        unusual = self.get_unusual_bigrams(text)
+        profile = self.profile(text)
+        baseline = self.store if self.store is not None else self.COMMON_BIGRAMS
+        # Each distinct bigram is looked up once
+        unusual_count = sum(count for bg, count in profile.counts[2].items() if bg not in baseline)
         
+        if self.store is None:
+            return {
+                "total_bigrams": profile.total(2),
+                "unusual_bigram_count": unusual_count,
+                "naturalness_score": self.get_naturalness_score(profile),
+            }
+
+        mean_logprob = self._mean_logprob(profile)
         return {
-            "total_bigrams": len(bigrams),
-            "unusual_bigram_count": len(unusual),
-            "naturalness_score": self.get_naturalness_score(text),
+            "total_bigrams": profile.total(2),
+            "unusual_bigram_count": unusual_count,
+            "naturalness_score": self._logprob_to_score(mean_logprob) if mean_logprob is not None else 0.0,
+            "perplexity": round(10 ** (-mean_logprob), 1) if mean_logprob is not None else 0.0,
         }
 
-    def analyze(self, text: str) -> dict[str, float | int]:
+    def analyze(self, text: str | NgramProfile) -> dict[str, float | int]:
         """Alias for get_summary() for consistency with other analyzers"""
         return self.get_summary(text)
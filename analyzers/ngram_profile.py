@@ -0,0 +1,84 @@
+"""
+N-gram Profile.
+1- to 4-gram counts for one token stream, computed in a single pass and shared
+by every n-gram consumer (NgramAnalyzer naturalness and unusual bigrams,
+ComparativeAnalyzer tutor overlap, SessionAnalyzer formulaic sequences).
+"""
+
+from collections import Counter
+from functools import lru_cache
+from typing import Sequence
+
+from .ngram_store import normalize
+from .sentence_chunker import split_sentences
+
+MAX_ORDER = 4
+NGRAM_LABELS = {1: 'unigrams', 2: 'bigrams', 3: 'trigrams', 4: 'fourgrams'}
+
+
+class NgramProfile:
+    """
+    Tokens plus `counts[n]` (Counter of n-gram tuples) for n = 1..max_order, and
+    `sentences`: (sentence, first token, end token) slices of `tokens`.
+    """
+
+    def __init__(self, tokens: Sequence[str], text: str = "", max_order: int = MAX_ORDER,
+                 sentences: Sequence[tuple[str, int, int]] | None = None):
+        self.text = text
+        self.tokens = list(tokens)
+        self.max_order = max_order
+        if sentences is None:
+            sentences = [(text, 0, len(self.tokens))] if self.tokens else []
+        self.sentences = list(sentences)
+        self.counts: dict[int, Counter[tuple[str, ...]]] = {n: Counter() for n in range(1, max_order + 1)}
+
+        tokens = self.tokens
+        counts = [self.counts[n] for n in range(1, max_order + 1)]
+        for i in range(len(tokens)):
+            for n, counter in enumerate(counts[:len(tokens) - i], start=1):
+                counter[tuple(tokens[i:i + n])] += 1
+
+    @classmethod
+    def from_text(cls, text: str, max_order: int = MAX_ORDER) -> "NgramProfile":
+        """Lowercased, punctuation-stripped whitespace tokens (the NgramAnalyzer convention)."""
+        # Sentence boundaries fall on whitespace, so tokenizing per sentence gives the same token stream
+        tokens: list[str] = []
+        sentences = []
+        for _, _, sentence in split_sentences(text):
+            start = len(tokens)
+            tokens.extend(t for t in (normalize(w) for w in sentence.split()) if t)
+            sentences.append((sentence, start, len(tokens)))
+        return cls(tokens, text=text, max_order=max_order, sentences=sentences)
+
+    def sequence(self, n: int) -> list[tuple[str, ...]]:
+        """N-grams in text order, repeats included."""
+        return [tuple(self.tokens[i:i + n]) for i in range(len(self.tokens) - n + 1)]
+
+    def total(self, n: int) -> int:
+        return max(0, len(self.tokens) - n + 1)
+
+    def most_common(self, n: int, k: int = 15) -> list[dict[str, str | int]]:
+        return [{'phrase': ' '.join(gram), 'count': int(count)} for gram, count in self.counts[n].most_common(k)]
+
+    def formulaic_sequences(self, min_count: int = 3, orders: Sequence[int] = (2, 3, 4), limit: int = 10) -> list[dict[str, str | int]]:
+        """Recurrent multi-word sequences (used `min_count`+ times), most frequent first."""
+        formulaic: list[dict[str, str | int]] = []
+        for n in orders:
+            for gram, count in self.counts.get(n, Counter()).items():
+                if count >= min_count:
+                    formulaic.append({'phrase': ' '.join(gram), 'count': int(count), 'length': n})
+        return sorted(formulaic, key=lambda x: int(x['count']), reverse=True)[:limit]
+
+    def overlap(self, other: "NgramProfile", n: int = 2) -> float:
+        """Share of this profile's n-gram occurrences that also occur in `other` (0-1)."""
+        total = self.total(n)
+        if not total:
+            return 0.0
+        shared = sum(count for gram, count in self.counts[n].items() if gram in other.counts[n])
+        return shared / total
+
+
+@lru_cache(maxsize=64)
+def get_profile(text: str) -> NgramProfile:
+    """Profile for a text, reused when several analyzers look at the same text."""
+    return NgramProfile.from_text(text)
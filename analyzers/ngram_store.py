@@ -0,0 +1,267 @@
+"""
+Reference N-gram Store.
+A compact, memory-mapped n-gram language model for naturalness scoring.
+
+Built from local frequency lists (COCA n-gram style: `freq<TAB>w1<TAB>w2[...]`).
+Each n-gram is stored as a 64-bit hash in an open-addressing table (linear
+probing) with its conditional log10 probability quantized to one byte, so a
+slot costs 9 bytes (~12 per entry at 75% load) and lookups are O(1). It is memory-mapped:
+only the pages a lookup touches become resident, and forked workers share them.
+
+Scoring uses stupid backoff (trigram -> bigram -> unigram -> OOV floor).
+
+Usage:
+    python analyzers/ngram_store.py build --out data/ngrams/reference.ngs w1.txt w2.txt w3.txt
+    python analyzers/ngram_store.py info data/ngrams/reference.ngs
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import struct
+import sys
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("NgramStore")
+
+DEFAULT_STORE_PATH = Path(os.environ.get(
+    "NGRAM_STORE_PATH",
+    Path(__file__).resolve().parent.parent / "data" / "ngrams" / "reference.ngs",
+))
+
+MAGIC = b"NGS1"
+# magic, max_order, n_slots, n_entries, logprob floor
+_HEADER = struct.Struct("<4sIQQd")
+_HEADER_SIZE = 64  # padded so the uint64 key array stays aligned
+
+LOGPROB_FLOOR = -8.0        # log10 probability of an unseen unigram; also the quantization floor
+BACKOFF_LOG10 = math.log10(0.4)
+LOAD_FACTOR = 0.75
+
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+
+
+def normalize(token: str) -> str:
+    """Token normalization shared by the builder and NgramAnalyzer (lowercase, punctuation stripped)."""
+    return _NON_WORD_RE.sub("", token.lower())
+
+
+def ngram_hash(tokens: Sequence[str]) -> int:
+    """Stable 64-bit key (never 0, which marks an empty slot)."""
+    digest = hashlib.blake2b(" ".join(tokens).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class NgramStore:
+    """Read-only view over a built store file."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            magic, self.max_order, self.n_slots, self.n_entries, self.floor = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not an n-gram store")
+        self.keys = np.memmap(self.path, dtype=np.uint64, mode="r", offset=_HEADER_SIZE, shape=(self.n_slots,))
+        self.codes = np.memmap(self.path, dtype=np.uint8, mode="r", offset=_HEADER_SIZE + 8 * self.n_slots, shape=(self.n_slots,))
+        self._step = -self.floor / 255.0
+
+    def __len__(self) -> int:
+        return int(self.n_entries)
+
+    def _find(self, key: int) -> int:
+        keys = self.keys
+        slot = key % self.n_slots
+        while True:
+            probe = int(keys[slot])
+            if probe == key:
+                return slot
+            if probe == 0:
+                return -1
+            slot = (slot + 1) % self.n_slots
+
+    def logprob(self, tokens: Sequence[str]) -> float | None:
+        """Conditional log10 P(last token | preceding tokens), or None if the n-gram is not stored."""
+        slot = self._find(ngram_hash(tokens))
+        if slot < 0:
+            return None
+        return self.floor + int(self.codes[slot]) * self._step
+
+    def __contains__(self, tokens: Sequence[str]) -> bool:
+        return self._find(ngram_hash(tokens)) >= 0
+
+    def lookup_many(self, hashes: np.ndarray) -> np.ndarray:
+        """Vectorized lookup: quantized code per hash, -1 where missing."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        result = np.full(hashes.shape[0], -1, dtype=np.int16)
+        slots = (hashes % np.uint64(self.n_slots)).astype(np.int64)
+        pending = np.arange(hashes.shape[0])
+        while pending.size:
+            probe = np.asarray(self.keys[slots[pending]])
+            hit = probe == hashes[pending]
+            result[pending[hit]] = np.asarray(self.codes[slots[pending[hit]]])
+            pending = pending[~hit & (probe != 0)]
+            slots[pending] = (slots[pending] + 1) % self.n_slots
+        return result
+
+    def score_tokens(self, tokens: Sequence[str]) -> float:
+        """Mean log10 probability per token under stupid backoff (higher is more natural)."""
+        if not tokens:
+            return 0.0
+        total = 0.0
+        for i in range(len(tokens)):
+            penalty = 0.0
+            for order in range(min(self.max_order, i + 1), 0, -1):
+                lp = self.logprob(tokens[i - order + 1:i + 1])
+                if lp is not None:
+                    total += lp + penalty
+                    break
+                penalty += BACKOFF_LOG10
+            else:
+                total += self.floor + penalty
+        return total / len(tokens)
+
+    def perplexity(self, tokens: Sequence[str]) -> float:
+        return 10 ** (-self.score_tokens(tokens)) if tokens else 0.0
+
+
+# --- Building ---
+
+def read_frequency_list(path: str | Path) -> Iterable[tuple[tuple[str, ...], float]]:
+    """`freq<TAB>w1<TAB>w2...` lines (COCA n-gram layout); malformed lines are skipped."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 2:
+                continue
+            try:
+                freq = float(parts[0])
+            except ValueError:
+                continue
+            tokens = tuple(normalize(t) for t in parts[1:])
+            if freq > 0 and all(tokens):
+                yield tokens, freq
+
+
+def conditional_logprobs(counts: dict[tuple[str, ...], float]) -> dict[tuple[str, ...], float]:
+    """
+    log10 P(w_n | w_1..w_n-1) from n-gram counts. Context totals are summed over
+    the list itself; unigrams come from the list or, if absent, from bigram heads.
+    """
+    if not any(len(k) == 1 for k in counts):
+        for key, freq in list(counts.items()):
+            if len(key) == 2:
+                counts[(key[0],)] = counts.get((key[0],), 0.0) + freq
+
+    context_totals: dict[tuple[str, ...], float] = defaultdict(float)
+    for key, freq in counts.items():
+        context_totals[key[:-1]] += freq
+    return {key: math.log10(freq / context_totals[key[:-1]]) for key, freq in counts.items()}
+
+
+def build(sources: Sequence[str | Path], out_path: str | Path, floor: float = LOGPROB_FLOOR) -> dict[str, int]:
+    """Builds a store file from one or more frequency lists (any mix of orders)."""
+    counts: dict[tuple[str, ...], float] = defaultdict(float)
+    for source in sources:
+        for tokens, freq in read_frequency_list(source):
+            counts[tokens] += freq
+    logprobs = conditional_logprobs(counts)
+
+    n_entries = len(logprobs)
+    n_slots = max(8, int(n_entries / LOAD_FACTOR) + 1)
+    keys = np.zeros(n_slots, dtype=np.uint64)
+    codes = np.zeros(n_slots, dtype=np.uint8)
+    step = -floor / 255.0
+    hashes = np.fromiter((ngram_hash(tokens) for tokens in logprobs), dtype=np.uint64, count=n_entries)
+    values = np.fromiter(logprobs.values(), dtype=np.float64, count=n_entries)
+    quantized = np.rint((np.clip(values, floor, 0.0) - floor) / step).astype(np.uint8)
+
+    # Vectorized linear probing: each round, every pending entry whose slot is free
+    # claims it (first one wins on a tie); the rest move on to the next slot.
+    slots = (hashes % np.uint64(n_slots)).astype(np.int64)
+    pending = np.arange(n_entries)
+    while pending.size:
+        free = keys[slots[pending]] == 0
+        candidates = pending[free]
+        _, first = np.unique(slots[candidates], return_index=True)
+        placed = candidates[first]
+        keys[slots[placed]] = hashes[placed]
+        codes[slots[placed]] = quantized[placed]
+        placed_mask = np.zeros(n_entries, dtype=bool)
+        placed_mask[placed] = True
+        pending = pending[~placed_mask[pending]]
+        slots[pending] = (slots[pending] + 1) % n_slots
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+    max_order = max((len(k) for k in logprobs), default=0)
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, max_order, n_slots, n_entries, floor).ljust(_HEADER_SIZE, b"\0"))
+        f.write(keys.tobytes())
+        f.write(codes.tobytes())
+    os.replace(tmp_path, out_path)
+
+    orders: dict[int, int] = defaultdict(int)
+    for key in logprobs:
+        orders[len(key)] += 1
+    report = {"entries": n_entries, "slots": n_slots, "bytes": out_path.stat().st_size, **{f"order_{n}": c for n, c in sorted(orders.items())}}
+    logger.info(f"📦 Built n-gram store {out_path}: {report}")
+    return report
+
+
+_stores: dict[str, NgramStore | None] = {}
+_stores_lock = threading.Lock()
+
+
+def get_ngram_store(path: str | Path | None = None) -> NgramStore | None:
+    """Process-wide store per path; None when no store has been built."""
+    key = os.fspath(path or DEFAULT_STORE_PATH)
+    if key not in _stores:
+        with _stores_lock:
+            if key not in _stores:
+                store = None
+                if os.path.exists(key):
+                    try:
+                        store = NgramStore(key)
+                        logger.info(f"📚 Reference n-gram store: {len(store)} entries (order {store.max_order})")
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"⚠️ Could not open n-gram store {key}: {e}")
+                _stores[key] = store
+    return _stores[key]
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Build or inspect the reference n-gram store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="Build a store from freq<TAB>w1<TAB>w2... frequency lists")
+    p_build.add_argument("sources", nargs="+", help="Frequency list files (unigrams, bigrams, trigrams...)")
+    p_build.add_argument("--out", default=str(DEFAULT_STORE_PATH), help="Store file to write")
+    p_build.add_argument("--floor", type=float, default=LOGPROB_FLOOR, help="Lowest log10 probability kept")
+    p_info = sub.add_parser("info", help="Print store header information")
+    p_info.add_argument("path", nargs="?", default=str(DEFAULT_STORE_PATH))
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(json.dumps(build(args.sources, args.out, floor=args.floor), indent=2))
+    else:
+        try:
+            store = NgramStore(args.path)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(json.dumps({"path": str(store.path), "entries": len(store), "slots": int(store.n_slots),
+                          "max_order": store.max_order, "floor": store.floor}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Offline NLP Resource Bundle.
+NLTK/TextBlob data lives in a version-pinned bundle directory (default
+data/nlp, override with NLP_DATA_DIR) described by data/nlp_manifest.json.
+
+- `prepare` (one-shot, needs network) downloads every manifest resource into the bundle.
+- `verify` (startup) only checks the bundle on disk and never reaches the network.
+- `activate` points nltk.data at the bundle; it is cheap and safe at import time.
+
+Usage:
+    python analyzers/nlp_resources.py prepare [--force]
+    python analyzers/nlp_resources.py verify [--deep]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("NLPResources")
+
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+MANIFEST_PATH = PACKAGE_ROOT / "data" / "nlp_manifest.json"
+LOCK_FILENAME = "BUNDLE.lock.json"
+
+
+def bundle_dir() -> Path:
+    return Path(os.getenv("NLP_DATA_DIR") or PACKAGE_ROOT / "data" / "nlp")
+
+
+def load_manifest() -> dict[str, Any]:
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def activate() -> Path:
+    """Puts the bundle first on nltk.data.path. No filesystem probing, no downloads."""
+    path = bundle_dir()
+    import nltk # type: ignore
+    if str(path) not in nltk.data.path:
+        nltk.data.path.insert(0, str(path))
+    return path
+
+
+def _resource_location(root: Path, resource: dict[str, Any]) -> Path | None:
+    """Unzipped directory if present, else the downloaded zip."""
+    base = root / resource["path"]
+    if base.exists():
+        return base
+    zipped = base.with_name(base.name + ".zip")
+    return zipped if zipped.exists() else None
+
+
+def _digest(location: Path) -> str:
+    h = hashlib.sha256()
+    files = sorted(p for p in location.rglob("*") if p.is_file()) if location.is_dir() else [location]
+    for p in files:
+        h.update(str(p.relative_to(location.parent)).encode())
+        with open(p, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+def verify(deep: bool = False) -> dict[str, Any]:
+    """
+    Checks that every manifest resource is in the bundle.
+    With `deep=True` the recorded sha256 digests are recomputed as well.
+    """
+    root = bundle_dir()
+    manifest = load_manifest()
+    lock: dict[str, Any] = {}
+    lock_path = root / LOCK_FILENAME
+    if lock_path.exists():
+        with open(lock_path, "r", encoding="utf-8") as f:
+            lock = json.load(f)
+
+    missing: list[str] = []
+    mismatched: list[str] = []
+    for resource in manifest["resources"]:
+        location = _resource_location(root, resource)
+        if location is None:
+            missing.append(resource["id"])
+        elif deep and lock.get("resources", {}).get(resource["id"]) != _digest(location):
+            mismatched.append(resource["id"])
+
+    stale = lock.get("bundle_version") != manifest["bundle_version"]
+    return {
+        "ok": not missing and not mismatched and not stale,
+        "bundle_dir": str(root),
+        "bundle_version": lock.get("bundle_version"),
+        "expected_version": manifest["bundle_version"],
+        "nltk_version": lock.get("nltk_version"),
+        "missing": missing,
+        "mismatched": mismatched,
+    }
+
+
+def verify_or_warn() -> bool:
+    """Startup check: activates the bundle and logs (never raises, never downloads)."""
+    activate()
+    report = verify()
+    if report["ok"]:
+        logger.info(f"✅ NLP bundle v{report['bundle_version']} verified at {report['bundle_dir']}")
+    else:
+        logger.warning(
+            f"⚠️ NLP bundle incomplete at {report['bundle_dir']} (missing: {report['missing'] or 'none'}, "
+            f"version: {report['bundle_version']} vs {report['expected_version']}). "
+            f"Run 'python analyzers/nlp_resources.py prepare'."
+        )
+    return bool(report["ok"])
+
+
+def prepare(force: bool = False) -> dict[str, Any]:
+    """Downloads the manifest resources into the bundle and writes the lock file."""
+    import nltk # type: ignore
+
+    root = bundle_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest()
+    digests: dict[str, str] = {}
+    for resource in manifest["resources"]:
+        if force or _resource_location(root, resource) is None:
+            logger.info(f"⬇️ Downloading {resource['id']} -> {root}")
+            if not nltk.download(resource["id"], download_dir=str(root), quiet=True, raise_on_error=True):
+                raise RuntimeError(f"Download failed for {resource['id']}")
+        location = _resource_location(root, resource)
+        if location is None:
+            raise RuntimeError(f"{resource['id']} not found in {root} after download")
+        digests[resource["id"]] = _digest(location)
+
+    lock = {
+        "bundle_version": manifest["bundle_version"],
+        "nltk_version": nltk.__version__,
+        "prepared_at": datetime.now().isoformat(),
+        "resources": digests,
+    }
+    with open(root / LOCK_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(lock, f, indent=2)
+    logger.info(f"✅ NLP bundle v{manifest['bundle_version']} prepared at {root}")
+    return lock
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Manage the offline NLP data bundle.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_prepare = sub.add_parser("prepare", help="Download pinned resources into the bundle (needs network)")
+    p_prepare.add_argument("--force", action="store_true", help="Re-download resources already present")
+    p_verify = sub.add_parser("verify", help="Check the bundle on disk (offline)")
+    p_verify.add_argument("--deep", action="store_true", help="Recompute sha256 digests")
+    args = parser.parse_args()
+
+    if args.command == "prepare":
+        prepare(force=args.force)
+    else:
+        report = verify(deep=args.deep)
+        print(json.dumps(report, indent=2))
+        sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
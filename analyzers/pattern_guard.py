@@ -0,0 +1,127 @@
+"""
+Pattern Guard.
+Keeps pathological trigger patterns (catastrophic backtracking, mostly from
+LLM-generated rules) from stalling analysis:
+
+- Quarantine: data/quarantined_patterns.json lists rule hashes that
+  scripts/profile_patterns.py flagged as super-linear or over budget.
+  CompiledRules skips them; edit the rule (new hash) and re-profile to
+  bring it back.
+- Time budget: with RULE_PATTERN_TIMEOUT_MS set and the `regex` module
+  installed, every trigger pattern is compiled with `regex` and each scan
+  is cut off after the budget (the hits found so far are kept). Without
+  `regex` the budget is ignored and the stdlib `re` runs unguarded.
+  A cut-off scan is reported to the enclosing `watch_timeouts()` block, so
+  callers (the sentence cache) can avoid keeping the truncated result.
+"""
+
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Mapping, Sequence
+
+try:
+    import regex # type: ignore
+except ImportError:
+    regex = None # type: ignore
+
+logger = logging.getLogger("PatternGuard")
+
+QUARANTINE_PATH = Path(__file__).resolve().parent.parent / "data" / "quarantined_patterns.json"
+PATTERN_TIMEOUT_MS = float(os.getenv("RULE_PATTERN_TIMEOUT_MS", "0"))
+
+
+class TimeoutWatch:
+    """Counts pattern scans cut off by their budget inside a watch_timeouts() block."""
+
+    def __init__(self, parent: "TimeoutWatch | None" = None):
+        self.parent = parent
+        self.count = 0
+
+    def add(self) -> None:
+        watch: TimeoutWatch | None = self
+        while watch is not None:
+            watch.count += 1
+            watch = watch.parent
+
+
+_watch: ContextVar[TimeoutWatch | None] = ContextVar("pattern_timeout_watch", default=None)
+
+
+@contextmanager
+def watch_timeouts() -> Iterator[TimeoutWatch]:
+    """`watch.count` is the number of truncated scans in the block (nested blocks also count in the outer one)."""
+    watch = TimeoutWatch(_watch.get())
+    token = _watch.set(watch)
+    try:
+        yield watch
+    finally:
+        _watch.reset(token)
+
+
+class GuardedPattern:
+    """A `regex` pattern whose finditer() gives up after `timeout_ms` instead of backtracking forever."""
+
+    def __init__(self, compiled: Any, timeout_ms: float, label: str = ""):
+        self.compiled = compiled
+        self.pattern = compiled.pattern
+        self.timeout = timeout_ms / 1000
+        self.label = label
+        self.timeouts = 0
+
+    def finditer(self, text: str) -> Iterator[Any]:
+        try:
+            yield from self.compiled.finditer(text, timeout=self.timeout)
+        except TimeoutError:
+            self.timeouts += 1
+            watch = _watch.get()
+            if watch is not None:
+                watch.add()
+            if self.timeouts == 1:
+                logger.warning(f"⏱️ Pattern {self.label or self.pattern!r} hit its {self.timeout * 1000:g}ms budget on a {len(text)}-char text (quarantine candidate)")
+
+    def search(self, text: str) -> Any:
+        return next(iter(self.finditer(text)), None)
+
+
+def compile_pattern(pattern: str, flags: int = re.IGNORECASE, timeout_ms: float | None = None, label: str = "") -> "re.Pattern[str] | GuardedPattern":
+    """
+    `re.compile`, or a GuardedPattern when a time budget applies and `regex` is installed.
+    Raises re.error for patterns `re` rejects, so both paths accept the same rules.
+    """
+    compiled = re.compile(pattern, flags)
+    timeout_ms = PATTERN_TIMEOUT_MS if timeout_ms is None else timeout_ms
+    if timeout_ms <= 0 or regex is None:
+        return compiled
+    try:
+        return GuardedPattern(regex.compile(pattern, flags), timeout_ms, label)
+    except (regex.error, ValueError):
+        return compiled
+
+
+def load_quarantine(path: str | Path | None = None) -> dict[str, dict[str, Any]]:
+    """Quarantined rules by rule hash (empty when the file is missing or unreadable)."""
+    path = path or QUARANTINE_PATH
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Could not read pattern quarantine {path}: {e}")
+        return {}
+    return {e["rule_hash"]: e for e in entries if isinstance(e, dict) and e.get("rule_hash")}
+
+
+def save_quarantine(entries: Sequence[Mapping[str, Any]], path: str | Path | None = None) -> None:
+    path = Path(path or QUARANTINE_PATH)
+    stamped = [{**e, "quarantined_at": e.get("quarantined_at") or datetime.now().isoformat()} for e in entries]
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(sorted(stamped, key=lambda e: e["rule_hash"]), f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
@@ -0,0 +1,512 @@
+"""
+Phenomena Index.
+Local inverted index of phenomenon occurrences across every analysed session,
+so hits from ErrorPhenomenonMatcher, ArticleAnalyzer, PrepositionAnalyzer,
+VerbAnalyzer and LearnerErrorAnalyzer can be queried after the session
+captures are gone.
+
+SQLite (phenomena_index.sqlite3 under the local store):
+- phenomena: one row per phenomenon_id (item, category, source)
+- postings:  (phenomenon, student, session_id, turn, start, end, match, recorded_at),
+             indexed by phenomenon and by student, both ordered by time
+- students:  optional L1 per student, for "top phenomena by L1"
+- sessions:  the analysed student text and the rule-pack version applied to it
+
+Re-indexing a session replaces its postings, so re-runs never double count.
+Postings from unified_phenomena.json rules carry the rule's content hash, so
+when the rule pack changes `reanalyze` evaluates only the added/edited rules
+against the stored session texts and retracts hits of removed rules.
+
+Usage:
+    python -m analyzers.phenomena_index top --days 30 --by l1
+    python -m analyzers.phenomena_index students "article" --days 30 --min-sessions 2
+    python -m analyzers.phenomena_index postings art_a_an --student maria
+    python -m analyzers.phenomena_index set-l1 maria Spanish
+    python -m analyzers.phenomena_index reanalyze
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping, Sequence
+
+from .local_store import store_path
+from .pattern_guard import GuardedPattern, compile_pattern, load_quarantine
+from .rule_pack import RulePack, get_rule_pack, is_article_rule, is_trigger_rule, is_verb_rule, load_manifest
+from .sentence_cache import sentence_spans
+
+logger = logging.getLogger("PhenomenaIndex")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS phenomena (
+    id INTEGER PRIMARY KEY,
+    phenomenon_id TEXT NOT NULL UNIQUE,
+    item TEXT,
+    category TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS postings (
+    phenomenon INTEGER NOT NULL REFERENCES phenomena(id),
+    student TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    turn INTEGER,
+    start INTEGER,
+    end INTEGER,
+    match TEXT,
+    recorded_at TEXT NOT NULL,
+    rule_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_postings_phenomenon ON postings (phenomenon, recorded_at, student);
+CREATE INDEX IF NOT EXISTS idx_postings_student ON postings (student, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_postings_session ON postings (student, session_id);
+CREATE TABLE IF NOT EXISTS students (
+    student TEXT PRIMARY KEY,
+    l1 TEXT
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    student TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    turn_texts TEXT,
+    analyzers TEXT NOT NULL,
+    rule_pack TEXT,
+    recorded_at TEXT NOT NULL,
+    PRIMARY KEY (student, session_id)
+);
+"""
+
+# Analyzers whose hits come from rule-pack rules, and the rules each one runs
+RULE_ANALYZERS = {"phenomena": is_trigger_rule, "articles": is_article_rule, "verbs": is_verb_rule}
+
+GROUPINGS = ("phenomenon", "category", "l1", "student")
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_") or "unknown"
+
+
+def _student_key(name: str) -> str:
+    return name.strip().lower()
+
+
+def collect_postings(
+    phenomena: Iterable[Mapping[str, Any]] = (),
+    articles: Iterable[Mapping[str, Any]] = (),
+    prepositions: Iterable[Mapping[str, Any]] = (),
+    verbs: Mapping[str, Any] | None = None,
+    learner_errors: Iterable[Mapping[str, Any]] = (),
+) -> list[dict[str, Any]]:
+    """Normalizes the analyzers' hit lists into postings keyed by a phenomenon_id."""
+    postings: list[dict[str, Any]] = []
+
+    def add(phenomenon_id: str | None, fallback: str, hit: Mapping[str, Any], category: str | None, source: str, match: str | None = None) -> None:
+        postings.append({
+            "phenomenon_id": phenomenon_id or fallback,
+            "item": hit.get("item"),
+            "category": category,
+            "source": source,
+            "match": match if match is not None else hit.get("match"),
+            "start": hit.get("start"),
+            "end": hit.get("end"),
+            "rule_hash": hit.get("rule_hash"),
+        })
+
+    for hit in phenomena:
+        add(hit.get("phenomenon_id"), f"phen_{_slug(str(hit.get('item')))}", hit, hit.get("internal_category"), "ErrorPhenomenonMatcher")
+    for hit in articles:
+        add(hit.get("phenomenon_id"), f"art_{_slug(str(hit.get('item')))}", hit, "Articles", "ArticleAnalyzer")
+    for hit in prepositions:
+        add(None, f"prep_{_slug(str(hit.get('item')))}", hit, "Prepositions", "PrepositionAnalyzer")
+    for hit in (verbs or {}).get("pattern_matches", []):
+        add(hit.get("phenomenon_id"), f"verb_{_slug(str(hit.get('item')))}", hit, "Verbs", "VerbAnalyzer")
+    for hit in (verbs or {}).get("transitivity_mismatches", []):
+        add(None, f"verb_{_slug(str(hit.get('issue')))}", {"item": hit.get("issue")}, "Verbs", "VerbAnalyzer", match=hit.get("verb"))
+    for hit in learner_errors:
+        category = str(hit.get("category", "Other"))
+        add(hit.get("pattern_id"), f"lea_{_slug(category)}", hit, category, "LearnerErrorAnalyzer")
+    return postings
+
+
+def turn_offsets(turn_texts: Sequence[str]) -> list[int]:
+    """Start offset of each turn in `" ".join(turn_texts)` (how the student text is built)."""
+    offsets, pos = [], 0
+    for text in turn_texts:
+        offsets.append(pos)
+        pos += len(text) + 1
+    return offsets
+
+
+def _compile_rules(rules: Mapping[str, Mapping[str, Any]]) -> list[tuple[str, Mapping[str, Any], re.Pattern[str] | GuardedPattern]]:
+    """Like CompiledRules: quarantined rules are skipped, the pattern time budget applies."""
+    quarantine = load_quarantine()
+    compiled = []
+    for rule_hash, rule in rules.items():
+        if rule_hash in quarantine:
+            continue
+        try:
+            compiled.append((rule_hash, rule, compile_pattern(rule["triggerPattern"])))
+        except (re.error, KeyError, TypeError):
+            continue
+    return compiled
+
+
+def _evaluate_rules(
+    compiled: Sequence[tuple[str, Mapping[str, Any], re.Pattern[str] | GuardedPattern]],
+    text: str,
+    analyzers: Sequence[str],
+    article_matches: set[str],
+) -> list[dict[str, Any]]:
+    """
+    Postings of the given rules in a stored session text, as the live analyzers would report them
+    (sentence by sentence; first hit per rule for the matcher; no repeated match text for articles).
+    """
+    spans = sentence_spans(text)
+    lower_spans = sentence_spans(text.lower())
+    phenomena, articles, verbs = [], [], []
+    for rule_hash, rule, regex in compiled:
+        base = {"phenomenon_id": rule.get("phenomenon_id"), "item": rule.get("itemName"), "rule_hash": rule_hash}
+        if "phenomena" in analyzers and RULE_ANALYZERS["phenomena"](rule):
+            for offset, sentence in lower_spans:
+                m = regex.search(sentence)
+                if m:
+                    phenomena.append({**base, "internal_category": rule.get("publicCategory") or "Lexis", "match": m.group(0),
+                                      "start": offset + m.start(), "end": offset + m.end()})
+                    break
+        for name, hits in (("articles", articles), ("verbs", verbs)):
+            if name not in analyzers or not RULE_ANALYZERS[name](rule):
+                continue
+            for offset, sentence in spans:
+                for m in regex.finditer(sentence):
+                    if name == "articles":
+                        if m.group(0) in article_matches:
+                            continue
+                        article_matches.add(m.group(0))
+                    hits.append({**base, "match": m.group(0), "start": offset + m.start(), "end": offset + m.end()})
+    return collect_postings(phenomena=phenomena, articles=articles, verbs={"pattern_matches": verbs})
+
+
+def since_date(days: int | None = None, since: str | None = None) -> str | None:
+    """Lower bound for the query window: `since` (ISO date) as given, else `days` back from now, else None."""
+    if since:
+        return since
+    if days:
+        return (datetime.now() - timedelta(days=days)).isoformat()
+    return None
+
+
+class PhenomenaIndex:
+    """Inverted index: phenomenon -> postings of (student, session, turn, span)."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path else store_path("phenomena_index.sqlite3")
+        self._ids: dict[str, int] = {}
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            if "rule_hash" not in {r["name"] for r in conn.execute("PRAGMA table_info(postings)")}:
+                conn.execute("ALTER TABLE postings ADD COLUMN rule_hash TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_rule ON postings (rule_hash)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _phenomenon_id(self, conn: sqlite3.Connection, posting: Mapping[str, Any], new_ids: dict[str, int]) -> int:
+        key = posting["phenomenon_id"]
+        cached = self._ids.get(key) or new_ids.get(key)
+        if cached is not None:
+            return cached
+        conn.execute(
+            "INSERT OR IGNORE INTO phenomena (phenomenon_id, item, category, source) VALUES (?, ?, ?, ?)",
+            (key, posting.get("item"), posting.get("category"), posting.get("source")),
+        )
+        row = conn.execute("SELECT id FROM phenomena WHERE phenomenon_id = ?", (key,)).fetchone()
+        new_ids[key] = row[0]
+        return row[0]
+
+    # --- Updates ---
+
+    def index_session(
+        self,
+        student: str,
+        session_id: str,
+        postings: Sequence[Mapping[str, Any]],
+        turn_texts: Sequence[str] | None = None,
+        recorded_at: str | None = None,
+        l1: str | None = None,
+        text: str | None = None,
+        rule_pack: str | None = None,
+        rule_analyzers: Sequence[str] = ("phenomena", "articles"),
+    ) -> int:
+        """
+        Replaces the session's postings. Spans are mapped to turns when the turn texts are given.
+        With the analysed `text` and the `rule_pack` version, the session can later be brought up
+        to date by `apply_rule_pack` (`rule_analyzers`: which RULE_ANALYZERS produced the postings).
+        """
+        key = _student_key(student)
+        recorded_at = recorded_at or datetime.now().isoformat()
+        new_ids: dict[str, int] = {}  # cached only once the transaction has committed
+        with self._connect() as conn:
+            conn.execute("DELETE FROM postings WHERE student = ? AND session_id = ?", (key, session_id))
+            count = self._insert_postings(conn, key, session_id, postings, turn_texts, recorded_at, new_ids)
+            if text is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (student, session_id, text, turn_texts, analyzers, rule_pack, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, session_id, text, json.dumps(list(turn_texts)) if turn_texts else None, ",".join(rule_analyzers), rule_pack, recorded_at),
+                )
+            if l1:
+                conn.execute("INSERT OR REPLACE INTO students (student, l1) VALUES (?, ?)", (key, l1))
+        self._ids.update(new_ids)
+        logger.info(f"🗂️ Indexed {count} phenomenon hits for {student} ({session_id})")
+        return count
+
+    def _insert_postings(
+        self,
+        conn: sqlite3.Connection,
+        key: str,
+        session_id: str,
+        postings: Sequence[Mapping[str, Any]],
+        turn_texts: Sequence[str] | None,
+        recorded_at: str,
+        new_ids: dict[str, int],
+    ) -> int:
+        offsets = turn_offsets(turn_texts) if turn_texts else None
+        rows = []
+        for posting in postings:
+            start = posting.get("start")
+            turn = bisect.bisect_right(offsets, start) - 1 if offsets and isinstance(start, int) else None
+            rows.append((self._phenomenon_id(conn, posting, new_ids), key, session_id, turn, start, posting.get("end"), posting.get("match"), recorded_at, posting.get("rule_hash")))
+        conn.executemany(
+            "INSERT INTO postings (phenomenon, student, session_id, turn, start, end, match, recorded_at, rule_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        return len(rows)
+
+    def apply_rule_pack(self, pack: RulePack | None = None) -> dict[str, Any]:
+        """
+        Brings every stored session up to `pack` (default: the current rule pack) without a full
+        re-run: retracts postings of rules no longer in the pack, and evaluates only the rules added
+        (or edited) since the version each session was analysed with against its stored text.
+        Sessions whose version has no recorded manifest are left alone and reported as skipped.
+        """
+        pack = pack or get_rule_pack()
+        started = time.perf_counter()
+        current = pack.by_hash()
+        new_ids: dict[str, int] = {}
+        result = {"version": pack.version, "sessions_updated": 0, "sessions_skipped": 0, "rules_added": 0,
+                  "postings_added": 0, "postings_retracted": 0}
+        with self._connect() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS current_rules (rule_hash TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM current_rules")
+            conn.executemany("INSERT OR IGNORE INTO current_rules VALUES (?)", [(h,) for h in current])
+            result["postings_retracted"] = conn.execute(
+                "DELETE FROM postings WHERE rule_hash IS NOT NULL AND rule_hash NOT IN (SELECT rule_hash FROM current_rules)"
+            ).rowcount
+
+            versions = [r[0] for r in conn.execute("SELECT DISTINCT rule_pack FROM sessions WHERE rule_pack IS NOT ?", (pack.version,))]
+            added_hashes: set[str] = set()
+            for version in versions:
+                applied = load_manifest(version) if version else None
+                sessions = conn.execute("SELECT * FROM sessions WHERE rule_pack IS ?", (version,)).fetchall()
+                if applied is None:
+                    result["sessions_skipped"] += len(sessions)
+                    logger.warning(f"⚠️ No manifest for rule pack {version}; {len(sessions)} sessions need a full re-run")
+                    continue
+                added, _ = pack.diff(applied)
+                added_hashes.update(added)
+                compiled = _compile_rules(added)
+                for session in sessions:
+                    postings = _evaluate_rules(compiled, session["text"], session["analyzers"].split(","), self._article_matches(conn, session))
+                    turn_texts = json.loads(session["turn_texts"]) if session["turn_texts"] else None
+                    result["postings_added"] += self._insert_postings(conn, session["student"], session["session_id"], postings, turn_texts, session["recorded_at"], new_ids)
+                    result["sessions_updated"] += 1
+                conn.execute("UPDATE sessions SET rule_pack = ? WHERE rule_pack IS ?", (pack.version, version))
+            result["rules_added"] = len(added_hashes)
+        self._ids.update(new_ids)
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"♻️ Rule pack {pack.version}: {result['sessions_updated']} sessions updated, +{result['postings_added']} / -{result['postings_retracted']} postings")
+        return result
+
+    @staticmethod
+    def _article_matches(conn: sqlite3.Connection, session: sqlite3.Row) -> set[str]:
+        """Matched texts already reported by ArticleAnalyzer (it never reports the same text twice)."""
+        rows = conn.execute(
+            "SELECT p.match FROM postings p JOIN phenomena ph ON ph.id = p.phenomenon "
+            "WHERE p.student = ? AND p.session_id = ? AND ph.source = 'ArticleAnalyzer'",
+            (session["student"], session["session_id"]),
+        ).fetchall()
+        return {r[0] for r in rows}
+
+    def set_l1(self, student: str, l1: str) -> None:
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO students (student, l1) VALUES (?, ?)", (_student_key(student), l1))
+
+    # --- Queries ---
+
+    def resolve(self, query: str) -> list[int]:
+        """Phenomenon rows for an exact phenomenon_id, else an item/category substring."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id FROM phenomena WHERE phenomenon_id = ?", (query,)).fetchall()
+            if not rows:
+                like = f"%{query}%"
+                rows = conn.execute("SELECT id FROM phenomena WHERE item LIKE ? OR category LIKE ?", (like, like)).fetchall()
+        return [r[0] for r in rows]
+
+    @staticmethod
+    def _window(since: str | None, until: str | None) -> tuple[str, list[Any]]:
+        clauses, params = [], []
+        if since:
+            clauses.append("p.recorded_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("p.recorded_at < ?")
+            params.append(until)
+        return "".join(f" AND {c}" for c in clauses), params
+
+    def students(self, query: str, since: str | None = None, until: str | None = None, min_sessions: int = 2) -> list[dict[str, Any]]:
+        """Students who hit the phenomenon in at least `min_sessions` sessions in the window."""
+        ids = self.resolve(query)
+        if not ids:
+            return []
+        window, params = self._window(since, until)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT p.student, COUNT(DISTINCT p.session_id) AS sessions, COUNT(*) AS hits, MAX(p.recorded_at) AS last_seen "
+                f"FROM postings p WHERE p.phenomenon IN ({','.join('?' * len(ids))}){window} "
+                f"GROUP BY p.student HAVING sessions >= ? ORDER BY sessions DESC, hits DESC",
+                (*ids, *params, min_sessions),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def top(self, since: str | None = None, until: str | None = None, by: str = "phenomenon", limit: int = 10) -> list[dict[str, Any]]:
+        """Most frequent phenomena in the window; with by=l1/student/category, the top `limit` per group."""
+        if by not in GROUPINGS:
+            raise ValueError(f"by must be one of {GROUPINGS}")
+        window, params = self._window(since, until)
+        group = {"phenomenon": "''", "category": "ph.category", "l1": "COALESCE(s.l1, 'unknown')", "student": "p.student"}[by]
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {group} AS grp, ph.phenomenon_id, ph.item, ph.category, COUNT(*) AS hits, "
+                f"COUNT(DISTINCT p.student) AS students, COUNT(DISTINCT p.session_id) AS sessions "
+                f"FROM postings p JOIN phenomena ph ON ph.id = p.phenomenon LEFT JOIN students s ON s.student = p.student "
+                f"WHERE 1 = 1{window} GROUP BY grp, p.phenomenon ORDER BY grp, hits DESC",
+                params,
+            ).fetchall()
+        result: list[dict[str, Any]] = []
+        per_group: dict[str, int] = {}
+        for row in rows:
+            if per_group.get(row["grp"], 0) >= limit:
+                continue
+            per_group[row["grp"]] = per_group.get(row["grp"], 0) + 1
+            entry = dict(row)
+            grp = entry.pop("grp")
+            if by != "phenomenon":
+                entry[by] = grp
+            result.append(entry)
+        return result
+
+    def postings(self, query: str, student: str | None = None, since: str | None = None, until: str | None = None, limit: int = 100) -> list[dict[str, Any]]:
+        ids = self.resolve(query)
+        if not ids:
+            return []
+        window, params = self._window(since, until)
+        if student:
+            window += " AND p.student = ?"
+            params.append(_student_key(student))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT ph.phenomenon_id, ph.item, p.student, p.session_id, p.turn, p.start, p.end, p.match, p.recorded_at "
+                f"FROM postings p JOIN phenomena ph ON ph.id = p.phenomenon "
+                f"WHERE p.phenomenon IN ({','.join('?' * len(ids))}){window} ORDER BY p.recorded_at DESC LIMIT ?",
+                (*ids, *params, limit),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def stats(self) -> dict[str, int]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT (SELECT COUNT(*) FROM phenomena), COUNT(*), COUNT(DISTINCT student), COUNT(DISTINCT student || '/' || session_id) FROM postings"
+            ).fetchone()
+        return {"phenomena": row[0], "postings": row[1], "students": row[2], "sessions": row[3]}
+
+
+_index: PhenomenaIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_phenomena_index() -> PhenomenaIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = PhenomenaIndex()
+    return _index
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Query the local phenomena index.")
+    parser.add_argument("--db", help="Index file (default: the local store)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def window(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--days", type=int, help="Only the last N days")
+        p.add_argument("--since", help="ISO date/time lower bound")
+        p.add_argument("--until", help="ISO date/time upper bound (exclusive)")
+
+    p_top = sub.add_parser("top", help="Most frequent phenomena")
+    window(p_top)
+    p_top.add_argument("--by", choices=GROUPINGS, default="phenomenon")
+    p_top.add_argument("--limit", type=int, default=10)
+    p_students = sub.add_parser("students", help="Students who repeatedly hit a phenomenon")
+    p_students.add_argument("phenomenon", help="phenomenon_id, or an item/category substring")
+    window(p_students)
+    p_students.add_argument("--min-sessions", type=int, default=2)
+    p_postings = sub.add_parser("postings", help="Occurrences of a phenomenon")
+    p_postings.add_argument("phenomenon")
+    p_postings.add_argument("--student")
+    window(p_postings)
+    p_postings.add_argument("--limit", type=int, default=100)
+    p_l1 = sub.add_parser("set-l1", help="Record a student's first language")
+    p_l1.add_argument("student")
+    p_l1.add_argument("l1")
+    sub.add_parser("stats", help="Index size")
+    p_reanalyze = sub.add_parser("reanalyze", help="Apply rule-pack changes to every stored session")
+    p_reanalyze.add_argument("--pack", help="Rule pack file (default: data/unified_phenomena.json)")
+    args = parser.parse_args()
+
+    index = PhenomenaIndex(args.db) if args.db else get_phenomena_index()
+    if args.command == "set-l1":
+        index.set_l1(args.student, args.l1)
+        result: Any = {"student": args.student, "l1": args.l1}
+    elif args.command == "stats":
+        result = index.stats()
+    elif args.command == "reanalyze":
+        result = index.apply_rule_pack(RulePack.load(args.pack) if args.pack else None)
+    else:
+        since = since_date(args.days, args.since)
+        if args.command == "top":
+            result = index.top(since, args.until, by=args.by, limit=args.limit)
+        elif args.command == "students":
+            result = index.students(args.phenomenon, since, args.until, min_sessions=args.min_sessions)
+        else:
+            result = index.postings(args.phenomenon, student=args.student, since=since, until=args.until, limit=args.limit)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
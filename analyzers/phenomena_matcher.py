@@ -1,11 +1,11 @@
-import json
-import re
 import logging
 import httpx
 import os
 import asyncio
 from typing import Any
-from pathlib import Path
+
+from .rule_pack import get_rules, scan_rules
+from .sentence_cache import analyze_sentences, rules_version
 
 logger = logging.getLogger("ErrorPhenomenonMatcher")
 
@@ -15,7 +15,7 @@ class ErrorPhenomenonMatcher:
     Aligned 100% with gitenglishhub/lib/processing/phenomena-matcher.ts.
     Uses tiered detection: local triggerPatterns + remote Sanity cross-referencing.
     """
-    _local_patterns: list[dict[str, Any]] | None = None
+    _initialized: bool = False
     _sanity_phenomena: list[dict[str, Any]] | None = None
     _lock: asyncio.Lock = asyncio.Lock()
 
@@ -29,30 +29,14 @@ class ErrorPhenomenonMatcher:
     async def initialize(self) -> None:
         """Tiered initialization: Load local JSON + Fetch Sanity context."""
         async with self._lock:
-            if self._local_patterns is not None:
+            if self._initialized:
                 return
+            self._initialized = True
 
-            # 1. Load Local Unified Phenomena (The Bedrock)
+            # 1. Local Unified Phenomena (The Bedrock): the rule-pack snapshot, re-read on every match
             # Aligned with Hub path: data/unified_phenomena.json
-            local_path = Path(__file__).parent.parent / "data" / "unified_phenomena.json"
             try:
-                if local_path.exists():
-                    with open(local_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        self._local_patterns = []
-                        if isinstance(data, list):
-                            for p in data:
-                                if isinstance(p, dict):
-                                    trigger = p.get("triggerPattern")
-                                    if isinstance(trigger, str) and len(trigger) > 2:
-                                        try:
-                                            self._local_patterns.append({
-                                                "phenomenon": p,
-                                                "regex": re.compile(trigger, re.IGNORECASE)
-                                            })
-                                        except re.error:
-                                            continue
-                        logger.info(f"✅ Loaded {len(self._local_patterns)} local trigger patterns.")
+                logger.info(f"✅ Loaded {len(get_rules().trigger)} local trigger patterns.")
             except Exception as e:
                 logger.error(f"❌ Local phenomena load failed: {e}")
 
@@ -80,24 +64,36 @@ class ErrorPhenomenonMatcher:
         matches: list[dict[str, Any]] = []
         text_lower = text.lower()
 
-        # 1. Fast Trigger Matching
-        if self._local_patterns:
-            for item in self._local_patterns:
-                if item["regex"].search(text_lower):
-                    p: dict[str, Any] = item["phenomenon"]
-                    # Find semantic enrichment from Sanity if available
-                    enriched: dict[str, Any] | None = None
-                    if self._sanity_phenomena:
-                        enriched = next((s for s in self._sanity_phenomena if s.get("_id") == p.get("phenomenon_id")), None)
-                    
-                    matches.append({
-                        "phenomenon_id": p.get("phenomenon_id"),
-                        "item": p.get("itemName"),
-                        "internal_category": (enriched.get("publicCategory") if enriched else p.get("publicCategory", "Lexis")) or "Lexis",
-                        "explanation": (enriched.get("description") if enriched else p.get("explanation", "")) or "",
-                        "match_type": "triggerPattern",
-                        "confidence": 0.95 if enriched else 0.7
-                    })
+        # 1. Fast Trigger Matching (first hit per pattern; per-sentence hits via the sentence cache)
+        rules = get_rules()
+        patterns = rules.trigger
+        if patterns:
+            first_hits: dict[int, dict[str, Any]] = {}
+            version = rules_version(__file__, salt=rules.salt)
+            for hit in analyze_sentences(text_lower, "phenomena", version, lambda t: self._scan(t, patterns)):
+                if hit["rule"] not in first_hits or hit["start"] < first_hits[hit["rule"]]["start"]:
+                    first_hits[hit["rule"]] = hit
+            for rule in sorted(first_hits):
+                hit = first_hits[rule]
+                p: dict[str, Any] = patterns[rule]["meta"]
+                p_hash: str = patterns[rule]["hash"]
+                # Find semantic enrichment from Sanity if available
+                enriched: dict[str, Any] | None = None
+                if self._sanity_phenomena:
+                    enriched = next((s for s in self._sanity_phenomena if s.get("_id") == p.get("phenomenon_id")), None)
+
+                matches.append({
+                    "phenomenon_id": p.get("phenomenon_id"),
+                    "item": p.get("itemName"),
+                    "internal_category": (enriched.get("publicCategory") if enriched else p.get("publicCategory", "Lexis")) or "Lexis",
+                    "explanation": (enriched.get("description") if enriched else p.get("explanation", "")) or "",
+                    "match_type": "triggerPattern",
+                    "confidence": 0.95 if enriched else 0.7,
+                    "rule_hash": p_hash,
+                    "match": text_lower[hit["start"]:hit["end"]],
+                    "start": hit["start"],
+                    "end": hit["end"]
+                })
 
         # 2. Semantic Keyword Fallback (if no pattern hits)
         if not matches and self._sanity_phenomena:
@@ -115,8 +111,13 @@ class ErrorPhenomenonMatcher:
 
         return matches
 
+    @staticmethod
+    def _scan(text: str, patterns: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """(pattern index, span) of every trigger match in lowercased text."""
+        return scan_rules(patterns, text)
+
     def get_stats(self) -> dict[str, int]:
         return {
-            "local_patterns": len(self._local_patterns) if self._local_patterns is not None else 0,
+            "local_patterns": len(get_rules().trigger),
             "sanity_context": len(self._sanity_phenomena) if self._sanity_phenomena is not None else 0
         }
\ No newline at end of file
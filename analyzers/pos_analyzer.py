@@ -1,5 +1,7 @@
 import logging
 
+from .pos_tagger import get_pos_tagger
+
 logger = logging.getLogger("POSAnalyzer")
 
 class POSAnalyzer:
@@ -55,10 +57,8 @@ class POSAnalyzer:
         """
         Internal tagging logic using TextBlob.
         """
-        import nltk # type: ignore
         try:
-            tokens = nltk.word_tokenize(text) # type: ignore
-            tagged = nltk.pos_tag(tokens) # type: ignore
+            tagged = get_pos_tagger().tag_text(text)
         except Exception as e:
             logger.error(f"NLTK tagging failed: {e}")
             # Fallback to simple split if NLTK fails
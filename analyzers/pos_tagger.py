@@ -0,0 +1,160 @@
+"""
+POS Tagger Service.
+One loaded averaged-perceptron tagger per process, shared by every analyzer.
+Sentences are tagged in batches and short utterances ("yes", "I don't know")
+are memoized, since live lessons repeat them constantly.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Sequence
+
+from .nlp_resources import activate
+
+logger = logging.getLogger("POSTagger")
+
+Tagged = list[tuple[str, str]]
+
+
+class POSTaggerService:
+    """Process-wide tagger with batched tagging, an LRU memo and throughput counters."""
+
+    def __init__(self, tagger: Any | None = None, memo_size: int = 4096, memo_max_tokens: int = 12):
+        self._tagger = tagger
+        self._load_error: Exception | None = None
+        self._lock = threading.Lock()
+        self.memo_size = memo_size
+        self.memo_max_tokens = memo_max_tokens
+        self._memo: OrderedDict[tuple[str, ...], Tagged] = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+        # Counters
+        self.batches = 0
+        self.sentences = 0
+        self.tokens = 0
+        self.tagged_tokens = 0
+        self.memo_hits = 0
+        self.tag_seconds = 0.0
+
+    # --- Loading ---
+
+    def _get_tagger(self) -> Any:
+        if self._tagger is not None:
+            return self._tagger
+        with self._lock:
+            if self._tagger is None:
+                if self._load_error is not None:
+                    raise LookupError(f"POS tagger unavailable: {self._load_error}")
+                try:
+                    from nltk.tag.perceptron import PerceptronTagger # type: ignore
+                    activate()
+                    start = time.perf_counter()
+                    self._tagger = PerceptronTagger()
+                    logger.info(f"🏷️ POS tagger loaded in {(time.perf_counter() - start) * 1000:.0f}ms")
+                except Exception as e:
+                    # Remember the failure so callers don't re-probe nltk.data on every call
+                    self._load_error = e
+                    logger.error(f"❌ POS tagger load failed: {e}")
+                    raise LookupError(f"POS tagger unavailable: {e}") from e
+        return self._tagger
+
+    @property
+    def available(self) -> bool:
+        try:
+            self._get_tagger()
+            return True
+        except LookupError:
+            return False
+
+    def reload(self) -> None:
+        """Drops the loaded tagger (and any remembered load failure) so the next call reloads it."""
+        with self._lock:
+            self._tagger = None
+            self._load_error = None
+        with self._memo_lock:
+            self._memo.clear()
+
+    # --- Tagging ---
+
+    def tag_sents(self, sentences: Sequence[Sequence[str]]) -> list[Tagged]:
+        """Tags a batch of tokenized sentences. Raises LookupError if the tagger can't be loaded."""
+        results: list[Tagged | None] = [None] * len(sentences)
+        pending: list[int] = []
+        with self._memo_lock:
+            for i, sent in enumerate(sentences):
+                key = tuple(sent)
+                if len(key) <= self.memo_max_tokens and key in self._memo:
+                    self._memo.move_to_end(key)
+                    results[i] = list(self._memo[key])
+                    self.memo_hits += 1
+                else:
+                    pending.append(i)
+
+        if pending:
+            tagger = self._get_tagger()
+            start = time.perf_counter()
+            tagged_batch = tagger.tag_sents([list(sentences[i]) for i in pending])
+            self.tag_seconds += time.perf_counter() - start
+            self.tagged_tokens += sum(len(sentences[i]) for i in pending)
+            with self._memo_lock:
+                for i, tagged in zip(pending, tagged_batch):
+                    tagged = [(str(w), str(t)) for w, t in tagged]
+                    results[i] = tagged
+                    key = tuple(sentences[i])
+                    if len(key) <= self.memo_max_tokens:
+                        self._memo[key] = tagged
+                        if len(self._memo) > self.memo_size:
+                            self._memo.popitem(last=False)
+
+        self.batches += 1
+        self.sentences += len(sentences)
+        self.tokens += sum(len(s) for s in sentences)
+        return [r or [] for r in results]
+
+    def tag(self, tokens: Sequence[str]) -> Tagged:
+        """Tags one token sequence as a single sentence (same as `nltk.pos_tag`)."""
+        if not tokens:
+            return []
+        return self.tag_sents([tokens])[0]
+
+    def tag_text(self, text: str) -> Tagged:
+        """Sentence-splits and tokenizes `text`, then tags all sentences in one batch."""
+        import nltk # type: ignore
+        activate()
+        try:
+            sentences = [nltk.word_tokenize(s) for s in nltk.sent_tokenize(text)] # type: ignore
+        except LookupError:
+            sentences = [text.split()]
+        tagged: Tagged = []
+        for sent in self.tag_sents([s for s in sentences if s]):
+            tagged.extend(sent)
+        return tagged
+
+    def stats(self) -> dict[str, float | int]:
+        lookups = self.sentences
+        return {
+            'batches': self.batches,
+            'sentences': self.sentences,
+            'tokens': self.tokens,
+            'memo_hits': self.memo_hits,
+            'memo_hit_rate': round(self.memo_hits / lookups, 3) if lookups else 0.0,
+            'memo_entries': len(self._memo),
+            'tag_seconds': round(self.tag_seconds, 4),
+            'tokens_per_sec': round(self.tagged_tokens / self.tag_seconds, 1) if self.tag_seconds > 0 else 0.0,
+        }
+
+
+_service: POSTaggerService | None = None
+_service_lock = threading.Lock()
+
+
+def get_pos_tagger() -> POSTaggerService:
+    """Returns the shared per-process tagger service."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = POSTaggerService()
+    return _service
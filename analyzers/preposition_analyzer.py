@@ -1,8 +1,19 @@
+import json
 import logging
-import re
+import os
+from pathlib import Path
+from typing import Any
+
+from .sentence_cache import analyze_sentences, rules_version
+from .token_trie import TokenTrie
 
 logger = logging.getLogger("PrepositionAnalyzer")
 
+# Extra entries (PASTRIE-style exports): [{"pattern", "correction", "explanation"}, ...]
+DEFAULT_PATTERNS_PATH = Path(__file__).resolve().parent.parent / "data" / "preposition_errors.json"
+
+_TRIES: dict[str, TokenTrie] = {}
+
 class PrepositionAnalyzer:
     """
     Analyzes text for common preposition errors made by ESL learners.
@@ -49,28 +60,55 @@ class PrepositionAnalyzer:
         "according with": ("according to", "Use 'according to'"),
     }
 
-    def __init__(self):
-        pass
+    def __init__(self, patterns_path: str | Path | None = DEFAULT_PATTERNS_PATH):
+        self.trie = self.load_trie(patterns_path)
+        self.rules_version = rules_version(__file__, patterns_path)
+
+    @classmethod
+    def load_trie(cls, patterns_path: str | Path | None = DEFAULT_PATTERNS_PATH) -> TokenTrie:
+        """COMMON_ERRORS plus the external table, built once per process per file."""
+        key = os.fspath(patterns_path) if patterns_path else ""
+        if key in _TRIES:
+            return _TRIES[key]
 
-    def analyze(self, text: str) -> list[dict[str, str]]:
+        trie = TokenTrie()
+        for pattern, (correction, explanation) in cls.COMMON_ERRORS.items():
+            if explanation != "CORRECT":  # Skip baseline patterns
+                trie.add(pattern, (pattern, correction, explanation))
+        if patterns_path and os.path.exists(patterns_path):
+            try:
+                with open(patterns_path, "r", encoding="utf-8") as f:
+                    for entry in json.load(f):
+                        trie.add(entry["pattern"], (entry["pattern"].lower(), entry["correction"], entry["explanation"]))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"⚠️ Could not load preposition patterns from {patterns_path}: {e}")
+        logger.info(f"📚 Preposition trie: {len(trie)} patterns")
+        _TRIES[key] = trie
+        return trie
+
+    def analyze(self, text: str) -> list[dict[str, Any]]:
         """
         Analyzes text for preposition errors.
-        Returns a list of detected errors with corrections.
+        Returns every occurrence (word-bounded) with token and character offsets.
+        Sentences seen before (same patterns) come from the sentence cache.
         """
+        return analyze_sentences(text, "prepositions", self.rules_version, self._analyze_text)
+
+    def _analyze_text(self, text: str) -> list[dict[str, Any]]:
         errors = []
-        text_lower = text.lower()
-        
-        for pattern, (correction, explanation) in self.COMMON_ERRORS.items():
-            if correction == "CORRECT":
-                continue  # Skip baseline patterns
-            if pattern in text_lower:
-                errors.append({
-                    "item": pattern,
-                    "correction": correction,
-                    "explanation": explanation,
-                    "category": "Preposition"
-                })
-        
+        for hit in self.trie.find_all(text):
+            pattern, correction, explanation = hit["value"]
+            errors.append({
+                "item": pattern,
+                "match": hit["text"],
+                "correction": correction,
+                "explanation": explanation,
+                "category": "Preposition",
+                "start": hit["start"],
+                "end": hit["end"],
+                "token_start": hit["token_start"],
+                "token_end": hit["token_end"],
+            })
         return errors
 
     def get_summary(self, text: str) -> dict[str, int]:
@@ -0,0 +1,187 @@
+"""
+Roaring Bitmap.
+Compressed set of non-negative integer ids (< 2**32), after Roaring (Lemire et al.):
+ids are split on their high 16 bits into containers, and each container is
+either a sorted uint16 array (up to ARRAY_MAX ids) or a 65536-bit bitmap
+(1024 uint64 words, 8 KiB), whichever is smaller. Set operations run per
+container with numpy, so a union/intersection/difference over two 60k-word
+vocabularies is a handful of vectorized calls.
+
+Bitmaps are immutable values; operators return new bitmaps.
+"""
+
+import struct
+from typing import Iterable, Iterator
+
+import numpy as np
+
+MAGIC = b"RBM1"
+ARRAY_MAX = 4096          # above this, a bitmap container (8 KiB) is smaller than an array
+_BITMAP_WORDS = 1024
+_HEADER = struct.Struct("<4sI")
+_CONTAINER = struct.Struct("<HBI")  # key, kind (0 = array, 1 = bitmap), cardinality
+
+
+def _array_to_words(values: np.ndarray) -> np.ndarray:
+    bits = np.zeros(1 << 16, dtype=bool)
+    bits[values] = True
+    return np.packbits(bits, bitorder="little").view(np.uint64)
+
+
+def _words_to_array(words: np.ndarray) -> np.ndarray:
+    return np.flatnonzero(np.unpackbits(words.view(np.uint8), bitorder="little")).astype(np.uint16)
+
+
+def _cardinality(container: np.ndarray) -> int:
+    if container.dtype == np.uint16:
+        return int(container.shape[0])
+    return int(np.unpackbits(container.view(np.uint8)).sum())
+
+
+def _normalize(container: np.ndarray) -> np.ndarray | None:
+    """Picks the smaller representation; None for an empty container."""
+    card = _cardinality(container)
+    if card == 0:
+        return None
+    if container.dtype == np.uint64 and card <= ARRAY_MAX:
+        return _words_to_array(container)
+    if container.dtype == np.uint16 and card > ARRAY_MAX:
+        return _array_to_words(container)
+    return container
+
+
+def _as_words(container: np.ndarray) -> np.ndarray:
+    return container if container.dtype == np.uint64 else _array_to_words(container)
+
+
+class RoaringBitmap:
+    """Immutable compressed id set with |, &, - and ^."""
+
+    __slots__ = ("containers",)
+
+    def __init__(self, containers: dict[int, np.ndarray] | None = None):
+        self.containers: dict[int, np.ndarray] = dict(sorted((containers or {}).items()))
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int] | np.ndarray) -> "RoaringBitmap":
+        values = np.unique(np.fromiter(ids, dtype=np.int64) if not isinstance(ids, np.ndarray) else ids.astype(np.int64))
+        if values.size and (values[0] < 0 or values[-1] >= 1 << 32):
+            raise ValueError("ids must be in [0, 2**32)")
+        containers: dict[int, np.ndarray] = {}
+        highs = values >> 16
+        bounds = np.flatnonzero(np.diff(highs)) + 1
+        for chunk in np.split(values, bounds) if values.size else []:
+            container = _normalize((chunk & 0xFFFF).astype(np.uint16))
+            if container is not None:
+                containers[int(chunk[0] >> 16)] = container
+        return cls(containers)
+
+    # --- Set protocol ---
+
+    def __len__(self) -> int:
+        return sum(_cardinality(c) for c in self.containers.values())
+
+    def __bool__(self) -> bool:
+        return bool(self.containers)
+
+    def __contains__(self, value: int) -> bool:
+        container = self.containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if container.dtype == np.uint16:
+            i = int(np.searchsorted(container, low))
+            return i < container.shape[0] and int(container[i]) == low
+        return bool((int(container[low >> 6]) >> (low & 63)) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.to_array().tolist())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RoaringBitmap):
+            return NotImplemented
+        return self.containers.keys() == other.containers.keys() and all(
+            np.array_equal(c, other.containers[k]) for k, c in self.containers.items()
+        )
+
+    def __repr__(self) -> str:
+        return f"RoaringBitmap({len(self)} ids, {len(self.containers)} containers)"
+
+    def to_array(self) -> np.ndarray:
+        """All ids, ascending, as int64."""
+        parts = [
+            (np.int64(key) << 16) + (c if c.dtype == np.uint16 else _words_to_array(c)).astype(np.int64)
+            for key, c in self.containers.items()
+        ]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    # --- Set algebra ---
+
+    def _combine(self, other: "RoaringBitmap", op: str) -> "RoaringBitmap":
+        keys = set(self.containers)
+        if op in ("or", "xor"):
+            keys |= set(other.containers)
+        elif op == "and":
+            keys &= set(other.containers)
+
+        result: dict[int, np.ndarray] = {}
+        for key in keys:
+            a = self.containers.get(key)
+            b = other.containers.get(key)
+            if a is None or b is None:
+                # Only reachable for or/xor/andnot where the missing side is empty
+                merged = a if b is None else b
+            elif a.dtype == np.uint16 and b.dtype == np.uint16:
+                merged = {"or": np.union1d, "and": np.intersect1d, "andnot": np.setdiff1d, "xor": np.setxor1d}[op](a, b).astype(np.uint16)
+            else:
+                wa, wb = _as_words(a), _as_words(b)
+                merged = {"or": wa | wb, "and": wa & wb, "andnot": wa & ~wb, "xor": wa ^ wb}[op]
+            container = _normalize(merged)
+            if container is not None:
+                result[key] = container
+        return RoaringBitmap(result)
+
+    def __or__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        return self._combine(other, "or")
+
+    def __and__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        return self._combine(other, "and")
+
+    def __sub__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        return self._combine(other, "andnot")
+
+    def __xor__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        return self._combine(other, "xor")
+
+    def intersection_count(self, other: "RoaringBitmap") -> int:
+        return len(self & other)
+
+    # --- Serialization ---
+
+    def to_bytes(self) -> bytes:
+        out = [_HEADER.pack(MAGIC, len(self.containers))]
+        for key, container in self.containers.items():
+            kind = 0 if container.dtype == np.uint16 else 1
+            out.append(_CONTAINER.pack(key, kind, _cardinality(container)))
+            out.append(container.astype("<u2" if kind == 0 else "<u8").tobytes())
+        return b"".join(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "RoaringBitmap":
+        if not data:
+            return cls()
+        magic, count = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("not a serialized RoaringBitmap")
+        offset = _HEADER.size
+        containers: dict[int, np.ndarray] = {}
+        for _ in range(count):
+            key, kind, card = _CONTAINER.unpack_from(data, offset)
+            offset += _CONTAINER.size
+            if kind == 0:
+                containers[key] = np.frombuffer(data, dtype="<u2", count=card, offset=offset).astype(np.uint16)
+                offset += 2 * card
+            else:
+                containers[key] = np.frombuffer(data, dtype="<u8", count=_BITMAP_WORDS, offset=offset).astype(np.uint64)
+                offset += 8 * _BITMAP_WORDS
+        return cls(containers)
@@ -0,0 +1,181 @@
+"""
+Rule Canonicalization.
+Detects trigger patterns that always report the same spans, so copies of a
+rule imported from several corpora (or re-generated under another id) can
+be merged into one rule.
+
+Patterns are parsed with the stdlib regex parser and normalized the way the
+analyzers use them (IGNORECASE, only the match span matters):
+- literals and ASCII ranges are lowercased, character sets are sorted;
+- capturing and non-capturing groups are flattened (unless the pattern
+  uses backreferences);
+- alternations of plain words are sorted when none is a prefix of another
+  (only one can match at a given position, so the order is irrelevant).
+
+Two patterns with the same canonical form match exactly the same spans.
+Different canonical forms may still be equivalent; this errs on not merging.
+"""
+
+import re
+from typing import Any, Iterable, Mapping, Sequence
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse # type: ignore
+except ImportError: # Python < 3.11
+    import sre_constants # type: ignore
+    import sre_parse # type: ignore
+
+from .rule_pack import rule_hash
+
+_OP = sre_constants
+_LIST_FIELDS = ("exampleErrors", "exampleCorrections")
+
+
+def _lower(code: int) -> int:
+    lowered = chr(code).lower()
+    return ord(lowered) if len(lowered) == 1 else code
+
+
+_REPEATS = tuple(getattr(_OP, name) for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(_OP, name))
+_ATOMIC_GROUP = getattr(_OP, "ATOMIC_GROUP", None)
+
+
+def _has_groupref(items: Iterable[Any]) -> bool:
+    """Backreferences need the group numbers, so such patterns keep their groups."""
+    return "GROUPREF" in repr(list(items))
+
+
+def _normalize_set(items: Sequence[tuple[Any, Any]]) -> tuple[Any, ...]:
+    negate = [("NEGATE", None)] if items and items[0][0] is _OP.NEGATE else []
+    out = []
+    for op, av in items[len(negate):]:
+        if op is _OP.LITERAL:
+            out.append(("LITERAL", _lower(av)))
+        elif op is _OP.RANGE and ord("A") <= av[0] <= av[1] <= ord("Z"):
+            out.append(("RANGE", (_lower(av[0]), _lower(av[1]))))
+        else:
+            out.append((str(op), av if op is not _OP.CATEGORY else str(av)))
+    return tuple(negate) + tuple(sorted(set(out), key=repr))
+
+
+def _literal_word(seq: Sequence[tuple[Any, Any]]) -> str | None:
+    if all(op == "LITERAL" for op, _ in seq):
+        return "".join(chr(c) for _, c in seq)
+    return None
+
+
+def _normalize(items: Iterable[tuple[Any, Any]], flatten: bool) -> list[tuple[Any, Any]]:
+    out: list[tuple[Any, Any]] = []
+    for op, av in items:
+        if op is _OP.LITERAL or op is _OP.NOT_LITERAL:
+            out.append((str(op), _lower(av)))
+        elif op is _OP.IN:
+            out.append(("IN", _normalize_set(av)))
+        elif op is _OP.SUBPATTERN:
+            group, add_flags, del_flags, sub = av
+            body = _normalize(sub, flatten)
+            if flatten and not add_flags and not del_flags:
+                out.extend(body)
+            else:
+                out.append(("SUBPATTERN", (group if not flatten else None, add_flags, del_flags, tuple(body))))
+        elif op is _OP.BRANCH:
+            branches = [tuple(_normalize(b, flatten)) for b in av[1]]
+            words = [_literal_word(b) for b in branches]
+            if all(w is not None for w in words) and not any(
+                a != b and b.startswith(a) for a in words for b in words # type: ignore[union-attr]
+            ):
+                branches = sorted(set(branches), key=repr)
+            out.append(("BRANCH", tuple(branches)))
+        elif op in _REPEATS:
+            low, high, sub = av
+            out.append((str(op), (low, high, tuple(_normalize(sub, flatten)))))
+        elif op in (_OP.ASSERT, _OP.ASSERT_NOT):
+            direction, sub = av
+            out.append((str(op), (direction, tuple(_normalize(sub, flatten)))))
+        elif _ATOMIC_GROUP is not None and op is _ATOMIC_GROUP:
+            out.append(("ATOMIC_GROUP", tuple(_normalize(av, flatten))))
+        else:
+            out.append((str(op), repr(av)))
+    return out
+
+
+def canonical_pattern(pattern: str) -> str:
+    """Canonical form of a trigger pattern (compiled with IGNORECASE); raises re.error if it doesn't compile."""
+    re.compile(pattern, re.IGNORECASE)
+    parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    flatten = not _has_groupref(parsed.data)
+    # Global inline flags change what matches ((?s), (?m), (?a)); IGNORECASE is always on,
+    # UNICODE is the str default and VERBOSE was already applied by the parser
+    flags = int(parsed.state.flags) & ~(re.IGNORECASE | re.UNICODE | re.VERBOSE)
+    return repr((flags, _normalize(parsed.data, flatten)))
+
+
+def merge_rules(rules: Sequence[Mapping[str, Any]]) -> dict[str, Any]:
+    """
+    One rule from equivalent copies: the most complete copy (first on ties) wins,
+    empty fields are filled from the others and example lists are unioned.
+    """
+    primary = max(rules, key=lambda r: sum(1 for v in r.values() if v not in (None, "", [])))
+    merged = dict(primary)
+    for rule in rules:
+        for key, value in rule.items():
+            if value in (None, "", []):
+                continue
+            if key in _LIST_FIELDS and merged.get(key) and value != merged[key]:
+                seen = merged[key].split("|")
+                merged[key] = "|".join(seen + [v for v in value.split("|") if v not in seen])
+            elif merged.get(key) in (None, "", []):
+                merged[key] = value
+            elif key == "confidenceScore" and isinstance(value, (int, float)) and isinstance(merged[key], (int, float)):
+                merged[key] = max(merged[key], value)
+    return merged
+
+
+def dedupe(sources: Sequence[tuple[str, Sequence[Mapping[str, Any]]]]) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    """
+    Rules of every source (in order) merged by canonical trigger pattern; each output rule
+    records its `provenance` (source, phenomenon_id and rule hash of every copy).
+    Rules without a compilable pattern are kept as they are (first copy only).
+    """
+    groups: dict[str, list[tuple[str, Mapping[str, Any]]]] = {}
+    exact: dict[str, str] = {}
+    stats = {"rules_in": 0, "identical_copies": 0, "same_pattern": 0, "equivalent_pattern": 0, "uncompilable": 0}
+    canonical_by_pattern: dict[str, str] = {}
+    carried: dict[int, list[Any]] = {}  # provenance of an already deduplicated input
+    for source, rules in sources:
+        for original in rules:
+            stats["rules_in"] += 1
+            rule = {k: v for k, v in original.items() if k != "provenance"}
+            pattern = rule.get("triggerPattern")
+            h = rule_hash(rule)
+            if h in exact:
+                stats["identical_copies"] += 1
+                key = exact[h]
+            else:
+                try:
+                    if not isinstance(pattern, str) or not pattern:
+                        raise re.error("no pattern")
+                    key = canonical_by_pattern.get(pattern) or canonical_pattern(pattern)
+                    if key in groups:
+                        patterns = {r.get("triggerPattern") for _, r in groups[key]}
+                        stats["same_pattern" if pattern in patterns else "equivalent_pattern"] += 1
+                    canonical_by_pattern[pattern] = key
+                except re.error:
+                    stats["uncompilable"] += 1
+                    key = f"raw:{h}"
+                exact[h] = key
+            groups.setdefault(key, []).append((source, rule))
+            carried[id(rule)] = original.get("provenance") or []
+
+    merged_rules = []
+    for members in groups.values():
+        unique = list({rule_hash(r): r for _, r in members}.values())
+        merged = merge_rules(unique)
+        merged["provenance"] = [
+            entry
+            for source, rule in members
+            for entry in carried[id(rule)] or [{"source": source, "phenomenon_id": rule.get("phenomenon_id"), "rule_hash": rule_hash(rule)}]
+        ]
+        merged_rules.append(merged)
+    stats["rules_out"] = len(merged_rules)
+    return merged_rules, stats
@@ -0,0 +1,301 @@
+"""
+Rule Pack.
+The unified_phenomena.json rules as a versioned pack. Every rule gets a
+content hash (blake2b of its canonical JSON) and the pack version is the
+digest of the sorted rule hashes: reordering the file keeps the version,
+adding, editing or removing any rule changes it.
+
+Each version's rule hashes are kept under the local store
+(rule_packs/<version>.json), so the phenomena index can tell which rules
+were added or removed since a session was analyzed and re-evaluate only
+those (python -m analyzers.phenomena_index reanalyze).
+
+The analyzers select their rules with the predicates below, so live analysis
+and re-analysis agree on which rule feeds which analyzer.
+
+Hot reload: the analyzers read an immutable CompiledRules snapshot from
+`get_rules()`. `reload_rules()` (SIGHUP or a pack file change in the server)
+builds and validates the next snapshot off to the side, then swaps the
+module reference in one assignment. A request pins its snapshot with
+`pinned_rules()`, so work in flight finishes on the version it started with.
+
+Rules quarantined by scripts/profile_patterns.py are left out of the
+snapshot, and RULE_PATTERN_TIMEOUT_MS puts a time budget on every pattern
+(see pattern_guard).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping, Sequence
+
+from .local_store import read_json, store_path, write_json
+from .pattern_guard import PATTERN_TIMEOUT_MS, GuardedPattern, compile_pattern, load_quarantine
+
+logger = logging.getLogger("RulePack")
+
+DEFAULT_PACK_PATH = Path(__file__).resolve().parent.parent / "data" / "unified_phenomena.json"
+
+
+def rule_hash(rule: Mapping[str, Any]) -> str:
+    canonical = json.dumps(rule, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+
+# --- Which analyzer runs which rule ---
+
+def is_trigger_rule(rule: Mapping[str, Any]) -> bool:
+    """ErrorPhenomenonMatcher: every rule with a usable trigger."""
+    trigger = rule.get("triggerPattern")
+    return isinstance(trigger, str) and len(trigger) > 2
+
+
+def is_article_rule(rule: Mapping[str, Any]) -> bool:
+    """ArticleAnalyzer: Article/Grammar rules relevant to articles."""
+    return bool(rule.get("triggerPattern")) and (
+        "Article" in rule.get("subcategory", "") or
+        "Article" in rule.get("publicCategory", "") or
+        "article" in rule.get("itemName", "").lower()
+    )
+
+
+def is_verb_rule(rule: Mapping[str, Any]) -> bool:
+    """VerbAnalyzer: verb rules (many verb errors are just labeled Grammar)."""
+    trigger = rule.get("triggerPattern")
+    return bool(trigger) and len(trigger) > 3 and (
+        "Verb" in rule.get("subcategory", "") or
+        "Verb" in rule.get("publicCategory", "") or
+        "Grammar" in rule.get("subcategory", "")
+    )
+
+
+class RulePack:
+    """Rules in file order, their content hashes and the pack version."""
+
+    def __init__(self, rules: Sequence[Mapping[str, Any]], path: str | Path | None = None, stat: tuple[int, int] | None = None):
+        self.rules = [dict(r) for r in rules]
+        self.hashes = [rule_hash(r) for r in self.rules]
+        self.path = Path(path) if path else None
+        self.stat = stat  # (mtime_ns, size) of the file when it was read
+        self.version = hashlib.blake2b("\n".join(sorted(set(self.hashes))).encode("ascii"), digest_size=8).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_PACK_PATH) -> "RulePack":
+        """A missing file is an empty pack (the analyzers then run without unified rules)."""
+        path = Path(path)
+        stat = _file_stat(path)
+        if stat is None:
+            logger.warning(f"⚠️ Rule pack {path} not found. Advanced rules disabled.")
+            return cls([], path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([r for r in data if isinstance(r, dict)] if isinstance(data, list) else [], path, stat)
+
+    def entries(self) -> Iterable[tuple[dict[str, Any], str]]:
+        return zip(self.rules, self.hashes)
+
+    def by_hash(self) -> dict[str, dict[str, Any]]:
+        return dict(zip(self.hashes, self.rules))
+
+    def diff(self, applied: Iterable[str]) -> tuple[dict[str, dict[str, Any]], set[str]]:
+        """(rules added since `applied`, hashes removed since); an edited rule is both."""
+        applied = set(applied)
+        current = self.by_hash()
+        return {h: r for h, r in current.items() if h not in applied}, applied - current.keys()
+
+    def save_manifest(self) -> None:
+        """Records this version's rule hashes (once per version)."""
+        path = store_path("rule_packs", f"{self.version}.json")
+        if not path.exists():
+            write_json(path, {"version": self.version, "created_at": datetime.now().isoformat(), "rules": sorted(set(self.hashes))})
+            logger.info(f"📦 Rule pack {self.version}: {len(self)} rules")
+
+
+def load_manifest(version: str) -> set[str] | None:
+    """Rule hashes of a previously seen pack version, or None if it was never recorded."""
+    data = read_json(store_path("rule_packs", f"{version}.json"))
+    return set(data["rules"]) if data else None
+
+
+def _file_stat(path: Path) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class CompiledRules:
+    """A pack compiled for ErrorPhenomenonMatcher, ArticleAnalyzer and VerbAnalyzer; the rule lists never change once built."""
+
+    def __init__(self, pack: RulePack, quarantine: set[str] | None = None, timeout_ms: float | None = None):
+        self.pack = pack
+        self.loaded_at = datetime.now().isoformat()
+        self.quarantine = set(load_quarantine()) if quarantine is None else set(quarantine)
+        self.timeout_ms = PATTERN_TIMEOUT_MS if timeout_ms is None else timeout_ms
+        self.trigger: list[dict[str, Any]] = []
+        self.article: list[dict[str, Any]] = []
+        self.verb: list[dict[str, Any]] = []
+        self.invalid: list[str] = []
+        self.quarantined: list[str] = []
+        skipped: set[str] = set()
+        compiled: dict[str, Any] = {}
+        self._guarded: list[GuardedPattern] = []
+        for rule, hash_ in pack.entries():
+            targets = [rules for rules, wanted in ((self.trigger, is_trigger_rule), (self.article, is_article_rule), (self.verb, is_verb_rule)) if wanted(rule)]
+            if not targets:
+                continue
+            if hash_ in self.quarantine:
+                self.quarantined.append(str(rule.get("phenomenon_id")))
+                skipped.add(hash_)
+                continue
+            # Rules sharing a pattern share one compiled regex (scan_rules runs it once)
+            regex = compiled.get(rule["triggerPattern"])
+            if regex is None:
+                try:
+                    regex = compile_pattern(rule["triggerPattern"], timeout_ms=self.timeout_ms, label=str(rule.get("phenomenon_id")))
+                except (re.error, TypeError):
+                    self.invalid.append(str(rule.get("phenomenon_id")))
+                    continue
+                compiled[rule["triggerPattern"]] = regex
+                if isinstance(regex, GuardedPattern):
+                    self._guarded.append(regex)
+            for rules in targets:
+                rules.append({"regex": regex, "meta": rule, "hash": hash_})
+        self.patterns = len(compiled)
+        # Sentence-cache salt: cached hits index into the rule lists, which follow file order
+        # (the pack version doesn't) and quarantine
+        self.salt = pack.version + "-" + hashlib.blake2b("\n".join(pack.hashes).encode("ascii"), digest_size=4).hexdigest()
+        if skipped:
+            self.salt += "-" + hashlib.blake2b("\n".join(sorted(skipped)).encode("ascii"), digest_size=4).hexdigest()
+        logger.info(f"📚 Rule pack {pack.version}: {len(self.trigger)} trigger, {len(self.article)} article, {len(self.verb)} verb rules ({len(self.invalid)} invalid, {len(self.quarantined)} quarantined)")
+
+    def validate(self) -> list[str]:
+        """Reasons not to serve this snapshot (empty list: fine)."""
+        problems = []
+        if not self.trigger:
+            problems.append("no usable trigger rules")
+        if len(self.invalid) > len(self.trigger):
+            problems.append(f"{len(self.invalid)} rules fail to compile")
+        return problems
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "version": self.pack.version,
+            "rules": len(self.pack),
+            "loaded_at": self.loaded_at,
+            "trigger": len(self.trigger),
+            "article": len(self.article),
+            "verb": len(self.verb),
+            "invalid": len(self.invalid),
+            "distinct_patterns": self.patterns,
+            "quarantined": len(self.quarantined),
+            "pattern_timeout_ms": self.timeout_ms if self._guarded else None,
+            "pattern_timeouts": sum(p.timeouts for p in self._guarded),
+        }
+
+
+def scan_rules(rules: Sequence[Mapping[str, Any]], text: str) -> list[dict[str, Any]]:
+    """(rule index, span) of every match of a CompiledRules list; a regex shared by several rules runs once."""
+    hits = []
+    spans_by_regex: dict[int, list[tuple[int, int]]] = {}
+    for i, rule in enumerate(rules):
+        spans = spans_by_regex.get(id(rule["regex"]))
+        if spans is None:
+            spans = spans_by_regex[id(rule["regex"])] = [(m.start(), m.end()) for m in rule["regex"].finditer(text)]
+        hits.extend({"rule": i, "start": start, "end": end} for start, end in spans)
+    return hits
+
+
+_current: CompiledRules | None = None
+_pinned: ContextVar[CompiledRules | None] = ContextVar("pinned_rules", default=None)
+_build_lock = threading.Lock()
+
+
+def _save_manifest(pack: RulePack) -> None:
+    try:
+        pack.save_manifest()
+    except OSError as e:
+        logger.warning(f"⚠️ Rule pack manifest not saved: {e}")
+
+
+def get_rules() -> CompiledRules:
+    """The request's pinned snapshot, else the current one (built on first use)."""
+    global _current
+    rules = _pinned.get() or _current
+    if rules is None:
+        with _build_lock:
+            if _current is None:
+                try:
+                    pack = RulePack.load(DEFAULT_PACK_PATH)
+                except (OSError, ValueError) as e:
+                    logger.error(f"❌ Rule pack load failed: {e}")
+                    pack = RulePack([], DEFAULT_PACK_PATH)
+                _save_manifest(pack)
+                _current = CompiledRules(pack)
+            rules = _current
+    return rules
+
+
+def get_rule_pack() -> RulePack:
+    return get_rules().pack
+
+
+@contextmanager
+def pinned_rules(rules: CompiledRules | None = None) -> Iterator[CompiledRules]:
+    """Every get_rules() inside the block returns the same snapshot, whatever reloads happen meanwhile."""
+    rules = rules or get_rules()
+    token = _pinned.set(rules)
+    try:
+        yield rules
+    finally:
+        _pinned.reset(token)
+
+
+def pack_changed() -> bool:
+    """True when the current pack's file was modified since it was read."""
+    pack = get_rules().pack
+    return pack.path is not None and _file_stat(pack.path) != pack.stat
+
+
+def reload_rules(path: str | Path | None = None) -> CompiledRules | None:
+    """
+    Builds and validates a snapshot of the pack file and swaps it in. Returns it,
+    or None when the content is unchanged or the new pack is rejected (the current one keeps serving).
+    """
+    global _current
+    with _build_lock:
+        current = _current
+        path = Path(path) if path else (current.pack.path if current and current.pack.path else DEFAULT_PACK_PATH)
+        try:
+            pack = RulePack.load(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Rule pack reload rejected ({path}): {e}")
+            if current is not None:
+                current.pack.stat = _file_stat(path)  # don't retry until the file changes again
+            return None
+        if current is not None and pack.hashes == current.pack.hashes and set(load_quarantine()) == current.quarantine:
+            # Touched but unchanged (same rules in the same order): remember the new stat so the watcher settles
+            current.pack.stat = pack.stat
+            return None
+        rules = CompiledRules(pack)
+        problems = rules.validate()
+        if problems:
+            logger.error(f"❌ Rule pack {pack.version} rejected: {'; '.join(problems)}")
+            if current is not None:
+                current.pack.stat = pack.stat
+            return None
+        _save_manifest(pack)
+        _current = rules
+    logger.info(f"🔄 Rule pack swapped: {current.pack.version if current else None} -> {pack.version}")
+    return rules
@@ -0,0 +1,366 @@
+"""
+Sentence Analysis Cache.
+Learners repeat short utterances ("yes", "I think so", "okay teacher") every
+lesson, so rule-based analyzers cache their hits per sentence instead of
+re-running hundreds of regexes over them.
+
+Entries are content-addressed: blake2b(analyzer, rules version, sentence),
+where the rules version is a digest of the analyzer's rule data, so editing
+a rule file invalidates exactly that analyzer's entries. Hits are stored
+with sentence-relative offsets; `analyze_sentences()` splits a text with
+`split_sentences`, analyzes only the misses (joined into one text, so each
+regex table still runs once) and shifts the cached hits back into place.
+
+Two tiers, both size-bounded LRU: an in-process dict (MEMORY_MAX_BYTES) and a
+SQLite file under the local store (SENTENCE_CACHE_MAX_MB, 0 disables it) so
+short-lived ingest processes benefit too. Hit rates are counted per request
+through `track_usage()`.
+
+Only analyzer hits are cached here. POS tags come from the shared tagger's
+own memo (analyzers/pos_tagger.py), and lemmas from the suffix-stripping
+LexicalEngine.lemmatize, which is cheaper than a cache lookup.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Iterator, Sequence
+
+from .local_store import store_path
+from .pattern_guard import watch_timeouts
+from .sentence_chunker import split_sentences, word_spans
+
+logger = logging.getLogger("SentenceCache")
+
+CACHE_FORMAT = 1  # bump when the stored hit layout changes
+MEMORY_MAX_BYTES = 16 * 1024 * 1024
+DISK_MAX_BYTES = int(float(os.getenv("SENTENCE_CACHE_MAX_MB", "128")) * 1024 * 1024)
+_SEPARATOR = "\n"
+
+Hits = list[dict[str, Any]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key BLOB PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries (last_used);
+"""
+
+_file_versions: dict[tuple[str, int, int], str] = {}
+
+
+def rules_version(*paths: str | Path | None, salt: str = "") -> str:
+    """Digest of rule data files (re-hashed only when a file's mtime or size changes)."""
+    digest = hashlib.blake2b(f"{CACHE_FORMAT}:{salt}".encode("utf-8"), digest_size=8)
+    for path in paths:
+        if not path or not os.path.exists(path):
+            digest.update(b"-")
+            continue
+        stat = os.stat(path)
+        key = (os.fspath(path), stat.st_mtime_ns, stat.st_size)
+        if key not in _file_versions:
+            with open(path, "rb") as f:
+                _file_versions[key] = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+        digest.update(_file_versions[key].encode("ascii"))
+    return digest.hexdigest()
+
+
+def cache_key(analyzer: str, version: str, sentence: str) -> bytes:
+    return hashlib.blake2b(f"{analyzer}\0{version}\0{sentence}".encode("utf-8"), digest_size=16).digest()
+
+
+class CacheUsage:
+    """Hit/miss counts for one request (see `track_usage`)."""
+
+    def __init__(self) -> None:
+        self.by_analyzer: dict[str, list[int]] = {}
+
+    def add(self, analyzer: str, hits: int, misses: int) -> None:
+        counts = self.by_analyzer.setdefault(analyzer, [0, 0])
+        counts[0] += hits
+        counts[1] += misses
+
+    def to_dict(self) -> dict[str, Any]:
+        hits = sum(c[0] for c in self.by_analyzer.values())
+        misses = sum(c[1] for c in self.by_analyzer.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "by_analyzer": {
+                name: {"hits": h, "misses": m, "hit_rate": round(h / (h + m), 3) if h + m else 0.0}
+                for name, (h, m) in sorted(self.by_analyzer.items())
+            },
+        }
+
+
+_usage: ContextVar[CacheUsage | None] = ContextVar("sentence_cache_usage", default=None)
+
+
+@contextmanager
+def track_usage(usage: CacheUsage | None = None) -> Iterator[CacheUsage]:
+    """Collects cache hits/misses of every analyzer call made inside the block (into `usage` if given)."""
+    usage = usage or CacheUsage()
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+class SentenceCache:
+    """Size-bounded LRU of per-sentence hit lists, in memory and (optionally) on disk."""
+
+    def __init__(self, memory_max_bytes: int = MEMORY_MAX_BYTES, disk_path: str | Path | None = None, disk_max_bytes: int = DISK_MAX_BYTES):
+        self.memory_max_bytes = memory_max_bytes
+        self._memory: OrderedDict[bytes, tuple[Hits, int]] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.disk_path = Path(disk_path) if disk_path and disk_max_bytes > 0 else None
+        self.disk_max_bytes = disk_max_bytes
+        self._disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.disk_path:
+            try:
+                with self._connect() as conn:
+                    conn.executescript(_SCHEMA)
+                    self._disk_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Sentence cache disk tier disabled: {e}")
+                self.disk_path = None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.disk_path, timeout=10)  # type: ignore[arg-type]
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- Memory tier ---
+
+    def _remember(self, key: bytes, hits: Hits, size: int) -> None:
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+        self._memory[key] = (hits, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_max_bytes and self._memory:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted
+            self.evictions += 1
+
+    # --- Lookups ---
+
+    def get_many(self, keys: Sequence[bytes]) -> dict[bytes, Hits]:
+        found: dict[bytes, Hits] = {}
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = entry[0]
+        missing = list({k for k in keys if k not in found})
+        if missing and self.disk_path:
+            try:
+                with self._connect() as conn:
+                    rows = []
+                    for i in range(0, len(missing), 500):
+                        chunk = missing[i:i + 500]
+                        rows.extend(conn.execute(f"SELECT key, value FROM entries WHERE key IN ({','.join('?' * len(chunk))})", chunk).fetchall())
+                    if rows:
+                        conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(time.time(), r[0]) for r in rows])
+                with self._lock:
+                    for key, value in rows:
+                        hits = json.loads(value)
+                        found[bytes(key)] = hits
+                        self._remember(bytes(key), hits, len(value))
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Sentence cache read failed: {e}")
+        return found
+
+    def put_many(self, entries: dict[bytes, Hits]) -> None:
+        if not entries:
+            return
+        encoded = {key: json.dumps(hits, separators=(",", ":")) for key, hits in entries.items()}
+        with self._lock:
+            for key, hits in entries.items():
+                self._remember(key, hits, len(encoded[key]) + len(key))
+        if not self.disk_path:
+            return
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                    [(key, value, len(value) + len(key), now) for key, value in encoded.items()],
+                )
+                self._disk_bytes += sum(len(v) + len(k) for k, v in encoded.items())
+                if self._disk_bytes > self.disk_max_bytes:
+                    self._evict_disk(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Sentence cache write failed: {e}")
+
+    def _evict_disk(self, conn: sqlite3.Connection) -> None:
+        """Drops least recently used entries down to 90% of the budget."""
+        self._disk_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        excess = self._disk_bytes - int(self.disk_max_bytes * 0.9)
+        if excess <= 0:
+            return
+        victims, freed = [], 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._disk_bytes -= freed
+        self.evictions += len(victims)
+        logger.info(f"🧹 Sentence cache evicted {len(victims)} entries ({freed // 1024} KiB)")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.disk_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM entries")
+            self._disk_bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_bytes": self._disk_bytes if self.disk_path else None,
+            "evictions": self.evictions,
+        }
+
+
+def _split_joined(sentences: Sequence[str], hits: Hits) -> list[Hits]:
+    """Buckets hits from `_SEPARATOR.join(sentences)` by sentence; hits crossing a boundary are dropped."""
+    starts, pos = [], 0
+    for sentence in sentences:
+        starts.append(pos)
+        pos += len(sentence) + len(_SEPARATOR)
+    token_starts: list[int] | None = None
+    buckets: list[Hits] = [[] for _ in sentences]
+    for hit in hits:
+        i = bisect_right(starts, hit["start"]) - 1
+        if i < 0 or hit["end"] > starts[i] + len(sentences[i]):
+            continue
+        local = dict(hit, start=hit["start"] - starts[i], end=hit["end"] - starts[i])
+        if "token_start" in hit:
+            if token_starts is None:
+                token_starts, count = [], 0
+                for sentence in sentences:
+                    token_starts.append(count)
+                    count += len(word_spans(sentence))
+            local["token_start"] = hit["token_start"] - token_starts[i]
+            local["token_end"] = hit["token_end"] - token_starts[i]
+        buckets[i].append(local)
+    return buckets
+
+
+def sentence_spans(text: str) -> list[tuple[int, str]]:
+    """(offset, stripped sentence) for each sentence: the units analyzers see through the cache."""
+    spans = []
+    for start, _, sentence in split_sentences(text):
+        spans.append((start + len(sentence) - len(sentence.lstrip()), sentence.strip()))
+    return spans
+
+
+def analyze_sentences(
+    text: str,
+    analyzer: str,
+    version: str,
+    analyze_text: Callable[[str], Hits],
+    batch: bool = True,
+    cache: "SentenceCache | None" = None,
+) -> Hits:
+    """
+    Runs `analyze_text` (hits with character `start`/`end`, optionally
+    `token_start`/`token_end`) sentence by sentence through the cache and returns
+    the hits in text coordinates. With `batch`, all misses are analyzed in one call
+    on the joined sentences; otherwise one call per missed sentence.
+    """
+    cache = cache or get_sentence_cache()
+    spans = sentence_spans(text)
+    keys = [cache_key(analyzer, version, sentence) for _, sentence in spans]
+    found = cache.get_many(keys)
+
+    miss_keys = list(dict.fromkeys(k for k in keys if k not in found))
+    if miss_keys:
+        sentence_of = {key: sentence for key, (_, sentence) in zip(keys, spans)}
+        miss_sentences = [sentence_of[k] for k in miss_keys]
+        # Results of a scan cut off by a pattern time budget are used once but never cached
+        incomplete: set[bytes] = set()
+        if batch:
+            with watch_timeouts() as watch:
+                computed = _split_joined(miss_sentences, analyze_text(_SEPARATOR.join(miss_sentences)))
+            if watch.count:
+                incomplete.update(miss_keys)
+        else:
+            computed = []
+            for key, sentence in zip(miss_keys, miss_sentences):
+                with watch_timeouts() as watch:
+                    computed.append(analyze_text(sentence))
+                if watch.count:
+                    incomplete.add(key)
+        new_entries = dict(zip(miss_keys, computed))
+        cache.put_many({k: v for k, v in new_entries.items() if k not in incomplete})
+        found.update(new_entries)
+
+    n_misses = len(miss_keys)  # a sentence repeated within the text is computed once; the repeats count as hits
+    cache.hits += len(keys) - n_misses
+    cache.misses += n_misses
+    usage = _usage.get()
+    if usage is not None:
+        usage.add(analyzer, len(keys) - n_misses, n_misses)
+
+    results: Hits = []
+    token_offset: int | None = None
+    for key, (offset, sentence) in zip(keys, spans):
+        for hit in found[key]:
+            shifted = dict(hit, start=hit["start"] + offset, end=hit["end"] + offset)
+            if "token_start" in hit:
+                if token_offset is None:
+                    token_offset = len(word_spans(text, 0, offset))
+                shifted["token_start"] = hit["token_start"] + token_offset
+                shifted["token_end"] = hit["token_end"] + token_offset
+            results.append(shifted)
+        if token_offset is not None:
+            token_offset += len(word_spans(sentence))
+    return results
+
+
+_cache: SentenceCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_sentence_cache() -> SentenceCache:
+    """Process-wide cache; the disk tier lives under the local store."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SentenceCache(disk_path=store_path("sentence_cache.sqlite3") if DISK_MAX_BYTES > 0 else None)
+    return _cache
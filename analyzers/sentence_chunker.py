@@ -3,6 +3,28 @@ import re
 import json
 from typing import List, Dict, Any, Optional
 
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+_WORD_RE = re.compile(r"[A-Za-z0-9]+(?:'[A-Za-z]+)?")
+
+def split_sentences(text: str) -> List[tuple[int, int, str]]:
+    """
+    Shared sentence segmentation: (start, end, sentence) character spans,
+    split after . ! ? followed by whitespace (same rule as chunk_transcript).
+    """
+    spans = []
+    pos = 0
+    for boundary in _SENTENCE_END_RE.finditer(text):
+        if text[pos:boundary.start()].strip():
+            spans.append((pos, boundary.start(), text[pos:boundary.start()]))
+        pos = boundary.end()
+    if text[pos:].strip():
+        spans.append((pos, len(text.rstrip()), text[pos:].rstrip()))
+    return spans
+
+def word_spans(text: str, start: int = 0, end: Optional[int] = None) -> List[tuple[int, int, str]]:
+    """(start, end, word) for each word in text[start:end]; contractions stay one word."""
+    return [(m.start(), m.end(), m.group(0)) for m in _WORD_RE.finditer(text, start, len(text) if end is None else end)]
+
 def chunk_transcript(file_path_or_text: str, max_chunk_chars: int = 3000, sentence_overlap: int = 2) -> List[str]:
     """
     Splits a transcript into overlapping chunks based on sentence boundaries.
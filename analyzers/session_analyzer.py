@@ -19,11 +19,16 @@ import re
 from collections import Counter
 from pathlib import Path
 from typing import cast, Any, Callable, final
-from collections.abc import Mapping, Iterable
+from collections.abc import Mapping
 import sys
 import logging
+import numpy as np
 from AssemblyAIv2.analyzers.lexical_engine import LexicalEngine
 from AssemblyAIv2.analyzers.learner_error_analyzer import LearnerErrorAnalyzer
+from AssemblyAIv2.analyzers.word_timeline import WordTimeline
+from AssemblyAIv2.analyzers.pos_tagger import get_pos_tagger
+from AssemblyAIv2.analyzers.nlp_resources import activate as activate_nlp_bundle
+from AssemblyAIv2.analyzers.ngram_profile import NgramProfile, NGRAM_LABELS
 
 try:
     from textblob import TextBlob # type: ignore
@@ -37,29 +42,15 @@ except ImportError:
 try:
     import nltk # type: ignore
     from nltk.tokenize import word_tokenize, sent_tokenize # type: ignore
-    from nltk.util import ngrams # type: ignore
-    from nltk import pos_tag # type: ignore
     
     nltk_available = True
-    # Ensure required data is downloaded
-    for resource in ['punkt', 'averaged_perceptron_tagger', 'wordnet', 'punkt_tab', 'averaged_perceptron_tagger_eng']:
-        try:
-            # Safely check data via casted find
-            find_func: Callable[[str], object] = cast(Any, nltk.data).find
-            _ = find_func(f'tokenizers/{resource}' if 'punkt' in resource else f'taggers/{resource}' if 'tagger' in resource else f'corpora/{resource}')
-        except LookupError:
-            try:
-                download_func: Callable[[str], bool] = cast(Any, nltk).download
-                _ = download_func(resource)
-            except:
-                pass
+    # Data comes from the offline bundle (see nlp_resources.py); never download at import
+    activate_nlp_bundle()
 except ImportError:
     nltk_available = False
     print("WARNING: nltk not found. Run 'pip install nltk' for POS tagging and n-grams.")
     word_tokenize = None
     sent_tokenize = None
-    ngrams = None
-    pos_tag = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
@@ -162,25 +153,32 @@ class SessionAnalyzer:
         """
         Robustly populate missing metadata (timestamps, pauses, WPM) 
         derived from raw word-level data.
+        Built once per session on a columnar WordTimeline; per-turn dicts are
+        only written back for downstream JSON consumers.
         """
-        for turn in self.turns:
-            words = cast(list[dict[str, Any]], turn.get('words', []))
-            if not words: continue
+        self.timeline = WordTimeline.from_turns(self.turns)
+        self._turn_index = {id(t): i for i, t in enumerate(self.turns)}
+        self._turn_wpm = self.timeline.turn_wpm()
+        pauses_by_turn = self.timeline.pauses_by_turn(threshold_ms=300) # 300ms threshold for pause
+        word_counts = self.timeline.turn_word_counts()
+        # Pause durations of turns that arrived with upstream `analysis['pauses']`; those win over the timeline
+        self._upstream_pauses: dict[int, list[float]] = {}
+
+        for i, turn in enumerate(self.turns):
+            upstream = cast(dict[str, Any], turn.get('analysis') or {}).get('pauses')
+            if isinstance(upstream, list):
+                self._upstream_pauses[i] = [float(p.get('duration_ms', 0.0)) for p in upstream if isinstance(p, dict)]
+            if not word_counts[i]: continue
 
             # 1. Infer Turn Timestamps (if missing)
             start_key = 'start' if 'start' in turn else 'start_ms'
             end_key = 'end' if 'end' in turn else 'end_ms'
             
-            if turn.get(start_key) is None and words:
-                # Handle both 'start' and 'start_ms' in words
-                w_start = words[0].get('start') or words[0].get('start_ms')
-                if w_start is not None:
-                    turn[start_key] = w_start
+            if turn.get(start_key) is None and not np.isnan(self.timeline.turn_start[i]):
+                turn[start_key] = float(self.timeline.turn_start[i])
             
-            if turn.get(end_key) is None and words:
-                w_end = words[-1].get('end') or words[-1].get('end_ms')
-                if w_end is not None:
-                    turn[end_key] = w_end
+            if turn.get(end_key) is None and not np.isnan(self.timeline.turn_end[i]):
+                turn[end_key] = float(self.timeline.turn_end[i])
 
             # 2. Ensure Analysis Dict Exists
             if 'analysis' not in turn:
@@ -189,33 +187,18 @@ class SessionAnalyzer:
 
             # 3. Calculate Pauses (if missing)
             if 'pauses' not in analysis:
-                pauses = []
-                for i in range(len(words) - 1):
-                    w_curr = words[i]
-                    w_next = words[i+1]
-                    
-                    curr_end = w_curr.get('end') or w_curr.get('end_ms') or 0
-                    next_start = w_next.get('start') or w_next.get('start_ms') or 0
-                    
-                    gap = float(next_start) - float(curr_end)
-                    if gap > 300: # 300ms threshold for pause
-                        pauses.append({
-                            'start_ms': curr_end,
-                            'end_ms': next_start,
-                            'duration_ms': gap
-                        })
-                analysis['pauses'] = pauses
-
-            # 4. Calculate WPM (if missing)
+                analysis['pauses'] = pauses_by_turn[i]
+
+            # 4. Calculate WPM (if missing); upstream values win
             if 'speaking_rate_wpm' not in analysis:
-                t_start = turn.get(start_key)
-                t_end = turn.get(end_key)
-                if t_start is not None and t_end is not None:
-                    duration_min = (float(t_end) - float(t_start)) / 1000.0 / 60.0
-                    if duration_min > 0.001:
-                        analysis['speaking_rate_wpm'] = len(words) / duration_min
-                    else:
-                        analysis['speaking_rate_wpm'] = 0.0
+                if not np.isnan(self._turn_wpm[i]):
+                    analysis['speaking_rate_wpm'] = float(self._turn_wpm[i])
+            elif analysis['speaking_rate_wpm'] is not None:
+                self._turn_wpm[i] = float(analysis['speaking_rate_wpm'])
+
+    def _turn_indices(self, turns: list[dict[str, Any]]) -> list[int]:
+        """Maps turn dicts back to their row in the session timeline."""
+        return [self._turn_index[id(t)] for t in turns if id(t) in self._turn_index]
 
 
     def _analyze_learner_errors(self, text: str) -> list[dict[str, Any]]:
@@ -293,10 +276,11 @@ class SessionAnalyzer:
         deep_comparison = {}
         try:
             from AssemblyAIv2.analyzers.comparative_analyzer import ComparativeAnalyzer
+            from AssemblyAIv2.analyzers.tutor_baseline import get_tutor_baseline
             comp_analyzer = ComparativeAnalyzer()
-            # We need student and teacher text.
+            # We need student and teacher text (or the tutor's stored baseline).
             # Warning: self.teacher_full_text might be empty if no teacher turns found
-            deep_comparison = comp_analyzer.analyze(self.teacher_full_text, self.student_full_text)
+            deep_comparison = comp_analyzer.analyze(self.teacher_full_text, self.student_full_text, baseline=get_tutor_baseline(self.teacher_name))
         except Exception as e:
             logger.warning(f"ComparativeAnalyzer failed: {e}")
 
@@ -329,6 +313,8 @@ class SessionAnalyzer:
         """
         import uuid
         import os
+        from AssemblyAIv2.analyzers.student_vocabulary import get_student_vocabulary
+        from AssemblyAIv2.analyzers.transcript_search import lesson_key
         
         # 1. Extract Student Lemmas (using LexicalEngine)
         # Result is a Dict with keys: 'words', 'raw_text', 'unknown_ratio', etc.
@@ -346,8 +332,21 @@ class SessionAnalyzer:
             if w.get('is_whitelisted') and w.get('resolved_word')
         )))
 
+        # Lesson key, so re-running a lesson replaces its vocabulary session instead of adding one
+        session_id = str(self.session.get('session_id') or lesson_key(
+            "\n".join(f"{t.get('speaker', '')}: {t.get('transcript', t.get('text', ''))}" for t in self.session.get('turns', []))))
+
+        # Cumulative productive vocabulary: which of these words are first productions
+        # (no student words, e.g. /analyze on a bare transcript: nothing to record)
+        vocabulary_growth: dict[str, Any] = {}
+        if unique_lemmas:
+            try:
+                vocabulary_growth = get_student_vocabulary().record_session(self.student_name, session_id, unique_lemmas)
+            except Exception as e:
+                logger.warning(f"⚠️ Vocabulary tracking failed: {e}")
+
         review_packet = {
-            "session_id": self.session.get('session_id', str(uuid.uuid4())),
+            "session_id": session_id,
             "student_name": self.student_name,
             "timestamp": "Now",
             "injection_status": "PENDING_REVIEW",
@@ -355,6 +354,7 @@ class SessionAnalyzer:
             "validation_method": "Exact Dictionary Match + Fuzzy (Cognitive Effort Credit)",
             "raw_check": "Available in .session_captures",
             "proposed_corpus_additions": unique_lemmas, # List of resolved words
+            "vocabulary_growth": vocabulary_growth,
              # Snippets for quick context
             "transcript_snippet": self.student_full_text[:500] + "..." if len(self.student_full_text) > 500 else self.student_full_text
         }
@@ -377,7 +377,8 @@ class SessionAnalyzer:
     def _get_session_info(self) -> dict[str, object]:
         """Basic session information"""
         return {
-            'speaker_map': self.speaker_map
+            'speaker_map': self.speaker_map,
+            'speaker_timing': self.timeline.speaker_stats()
         }
 
     def _get_turns_for_speaker(self, speaker_label: str) -> list[dict[str, object]]:
@@ -441,32 +442,15 @@ class SessionAnalyzer:
         """Analyze words per minute over time"""
         if turns is None:
             turns = self.student_turns_list
-        rates: list[dict[str, int | float]] = []
-        for turn in turns:
-            # Now safely relies on enriched metadata
-            analysis = cast(dict[str, object], turn.get('analysis', {}))
-            wpm = analysis.get('speaking_rate_wpm')
-            
-            if wpm is not None and float(wpm) > 0:
-                rates.append({'turn_order': cast(int, turn.get('turn_order', 0)), 'wpm': float(wpm)})
-
-        if not rates: return {'error': 'No speaking rate data', 'average_wpm': 0.0}
+        wpms = self._turn_wpm[self._turn_indices(turns)]
+        wpms = wpms[~np.isnan(wpms) & (wpms > 0)]
 
-        wpms = [float(r['wpm']) for r in rates]
-        avg_wpm = sum(wpms) / len(wpms)
-        return {
-            'average_wpm': round(avg_wpm, 1),
-            'min_wpm': round(min(wpms), 1),
-            'max_wpm': round(max(wpms), 1),
-            'turn_count': len(turns)
-        }
+        if not wpms.size: return {'error': 'No speaking rate data', 'average_wpm': 0.0}
 
-        wpms = [float(r['wpm']) for r in rates]
-        avg_wpm = sum(wpms) / len(wpms)
         return {
-            'average_wpm': round(avg_wpm, 1),
-            'min_wpm': round(min(wpms), 1),
-            'max_wpm': round(max(wpms), 1),
+            'average_wpm': round(float(wpms.mean()), 1),
+            'min_wpm': round(float(wpms.min()), 1),
+            'max_wpm': round(float(wpms.max()), 1),
             'turn_count': len(turns)
         }
 
@@ -474,24 +458,12 @@ class SessionAnalyzer:
         """Analyze pause patterns"""
         if turns is None:
             turns = self.student_turns_list
-        all_pauses: list[float] = []
-        long_pauses: list[float] = []
-        for turn in turns:
-            analysis = cast(dict[str, object], turn.get('analysis', {})).get('pauses', [])
-            for pause in cast(list[dict[str, object]], analysis):
-                duration = float(cast(float, pause.get('duration_ms', 0.0)))
-                all_pauses.append(duration)
-                if duration > 1000:
-                    long_pauses.append(duration)
-
-        if not all_pauses: return {'message': 'No pause data'}
-
-        return {
-            'total_pauses': len(all_pauses),
-            'long_pauses_gt_1s': len(long_pauses),
-            'average_pause_ms': round(sum(all_pauses) / len(all_pauses), 1),
-            'total_pause_time_ms': sum(all_pauses)
-        }
+        indices = self._turn_indices(turns)
+        if not any(i in self._upstream_pauses for i in indices):
+            return self.timeline.pause_stats(indices, threshold_ms=300, long_threshold_ms=1000)
+        computed = self.timeline.pause_durations(300, [i for i in indices if i not in self._upstream_pauses])
+        upstream = [d for i in indices for d in self._upstream_pauses.get(i, [])]
+        return WordTimeline.summarize_pauses(np.concatenate([np.asarray(upstream, dtype=np.float64), computed]), long_threshold_ms=1000)
 
     def analyze_complexity(self, turns: list[dict[str, Any]] | None = None) -> dict[str, Any]:
         """Analyze vocabulary complexity"""
@@ -538,37 +510,36 @@ class SessionAnalyzer:
             'by_type': dict(filler_counts.most_common(5)),
         }
 
+    def _upstream_hesitations(self, turn_index: int, threshold_ms: float) -> list[dict[str, Any]]:
+        """Words ending within 200ms of the start of each upstream pause longer than `threshold_ms`."""
+        pauses = cast(dict[str, Any], self.turns[turn_index].get('analysis') or {}).get('pauses') or []
+        word_idx = np.flatnonzero(self.timeline.turn_id == turn_index)
+        ends = self.timeline.end[word_idx]
+        hesitations: list[dict[str, Any]] = []
+        for pause in pauses:
+            if not isinstance(pause, dict): continue
+            duration = float(pause.get('duration_ms', 0.0))
+            if duration <= threshold_ms: continue
+            with np.errstate(invalid='ignore'):
+                near = np.flatnonzero(np.abs(ends - float(pause.get('start_ms', 0.0))) < 200)
+            if near.size:
+                w = int(word_idx[near[0]])
+                hesitations.append({
+                    'word': self.timeline.texts[w],
+                    'pause_duration_ms': duration,
+                    'confidence': float(self.timeline.confidence[w])
+                })
+        return hesitations
+
     def analyze_hesitation_patterns(self, turns: list[dict[str, Any]] | None = None) -> dict[str, Any]:
         """Find words that precede long pauses - potential avoidance patterns"""
         if turns is None:
             turns = self.student_turns_list
         
-        hesitation_words: list[dict[str, str | float]] = []  # Words before long pauses
-        
-        for turn in turns:
-            words = cast(list[dict[str, object]], turn.get('words', []))
-            pauses = cast(list[dict[str, object]], cast(dict[str, object], turn.get('analysis', {})).get('pauses', []))
-            
-            if not words or not pauses:
-                continue
-            
-            # Create a map of word end times
-            for pause in pauses:
-                duration = cast(float, pause.get('duration_ms', 0))
-                if duration > 800:  # Long pause threshold
-                    pause_start = float(cast(float, pause.get('start_ms', 0)))
-                    
-                    # Find word that ended just before this pause
-                    for word in words:
-                        word_end = float(cast(float, word.get('end_ms', word.get('end', 0))))
-                        # If word ended within 200ms of pause start, it's the hesitation point
-                        if abs(word_end - pause_start) < 200:
-                            hesitation_words.append({
-                                'word': str(word.get('text', '')),
-                                'pause_duration_ms': float(duration),
-                                'confidence': float(cast(float, word.get('confidence', 1.0)))
-                            })
-                            break
+        indices = self._turn_indices(turns)
+        # Words before long pauses (800ms threshold); upstream pauses win, as in analyze_pauses
+        hesitation_words = [h for i in indices if i in self._upstream_pauses for h in self._upstream_hesitations(i, 800)]
+        hesitation_words += self.timeline.hesitations(threshold_ms=800, turn_indices=[i for i in indices if i not in self._upstream_pauses])
         
         # Count frequency of hesitation words
         word_freq: Counter[str] = Counter([str(w['word']).lower() for w in hesitation_words])
@@ -617,30 +588,17 @@ class SessionAnalyzer:
             # Filter out punctuation and short tokens
             tokens = [t for t in tokens if t.isalpha() and len(t) > 1]
             
-            results = {}
+            # All orders counted in one pass
+            profile = NgramProfile(tokens, text=text, max_order=max(4, n_range[1]))
+            
+            results: dict[str, object] = {}
             for n in range(n_range[0], n_range[1] + 1):
-                if ngrams is not None:
-                    grams_raw = ngrams(tokens, n)
-                    n_grams = list(grams_raw) if grams_raw else []
-                    # Count frequencies
-                    ngram_freq: Counter[str] = Counter([' '.join(cast(Iterable[str], gram)) for gram in n_grams])
-                    # Get top 15 most common
-                    top_ngrams = ngram_freq.most_common(15)
-                    
-                    label = {2: 'bigrams', 3: 'trigrams', 4: 'fourgrams'}.get(n, f'{n}grams')
-                    results[label] = [{'phrase': str(phrase), 'count': int(count)} for phrase, count in top_ngrams]
+                # Get top 15 most common
+                label = NGRAM_LABELS.get(n, f'{n}grams')
+                results[label] = profile.most_common(n, 15)
             
             # Identify formulaic sequences (repeated 3+ times)
-            formulaic: list[dict[str, str | int]] = []
-            for n in range(2, 5):
-                if ngrams is not None:
-                    n_grams = list(ngrams(tokens, n))
-                    ngram_freq = Counter([' '.join(cast(Iterable[str], gram)) for gram in n_grams])
-                    for phrase, count in ngram_freq.items():
-                        if count >= 3:
-                            formulaic.append({'phrase': phrase, 'count': int(count), 'length': n})
-            
-            results['formulaic_sequences'] = sorted(formulaic, key=lambda x: int(x.get('count', 0)), reverse=True)[:10]
+            results['formulaic_sequences'] = profile.formulaic_sequences(min_count=3, orders=(2, 3, 4), limit=10)
             
             return cast(dict[str, object], results)
             
@@ -653,12 +611,11 @@ class SessionAnalyzer:
         Penn Treebank POS tagging with WordNet lemmatization.
         Returns POS distribution and vocabulary by category.
         """
-        if not nltk_available or word_tokenize is None or pos_tag is None or not text:
+        if not nltk_available or not text:
             return {'error': 'NLTK not available or no text'}
             
         try:
-            tokens = word_tokenize(text) if word_tokenize is not None else []
-            tagged = pos_tag(tokens) if pos_tag is not None else []
+            tagged = get_pos_tagger().tag_text(text)
             
             # Categorize by Penn Treebank tags
             pos_categories: dict[str, list[str]] = {
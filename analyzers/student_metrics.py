@@ -0,0 +1,336 @@
+"""
+Student Metrics Store.
+Longitudinal per-student metrics in SQLite under the local store
+(student_metrics.sqlite3). Each analysed session appends one summary vector
+(WPM, lexical diversity, CAF measures, error and phenomena counts, register)
+and updates running aggregates in the same transaction:
+
+- mean / std (Welford), last, min, max
+- EWMA (recent-weighted level, EWMA_ALPHA)
+- P10 / P50 / P90 via the P² streaming quantile estimator (no history scan)
+
+Trend queries read the aggregates row plus the last N values from an
+indexed (student, metric, recorded_at) table, so they stay in the
+millisecond range regardless of how many sessions a student has.
+Session captures can be purged; this store keeps the summaries.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Mapping, Sequence
+
+from .local_store import store_path
+from .tutor_baseline import RunningStat
+
+logger = logging.getLogger("StudentMetrics")
+
+EWMA_ALPHA = 0.3
+QUANTILES = (0.1, 0.5, 0.9)
+# Per-category counts summarize_session leaves out when zero
+COUNT_PREFIXES = ("errors.", "phenomena.")
+_NOT_COUNTS = {"errors.total", "errors.per_100_words"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    student TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    PRIMARY KEY (student, session_id)
+);
+CREATE TABLE IF NOT EXISTS session_metrics (
+    student TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    recorded_at TEXT NOT NULL,
+    PRIMARY KEY (student, session_id, metric)
+);
+CREATE INDEX IF NOT EXISTS idx_session_metrics_series ON session_metrics (student, metric, recorded_at);
+CREATE TABLE IF NOT EXISTS aggregates (
+    student TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    ewma REAL NOT NULL,
+    last REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    quantiles TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (student, metric)
+);
+"""
+
+
+class P2Quantile:
+    """
+    P² streaming quantile estimate (Jain & Chlamtac): five markers, O(1) per
+    observation, exact for the first five values.
+    """
+
+    def __init__(self, p: float):
+        self.p = p
+        self.q: list[float] = []  # marker heights (raw sorted values until 5 are seen)
+        self.n = [0, 1, 2, 3, 4]  # marker positions
+        self.np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]  # desired positions
+        self.dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x: float) -> None:
+        q = self.q
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(k + 1, 5):
+            self.n[i] += 1
+        for i in range(5):
+            self.np[i] += self.dn[i]
+
+        n = self.n
+        for i in (1, 2, 3):
+            d = self.np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                parabolic = q[i] + step / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    q[i] = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                n[i] += step
+
+    def value(self) -> float | None:
+        if not self.q:
+            return None
+        if len(self.q) < 5 or len(self.q) == 5 and self.n[4] == 4:
+            # Exact (linear interpolation) while the markers are still the raw values
+            pos = self.p * (len(self.q) - 1)
+            lo = int(pos)
+            hi = min(lo + 1, len(self.q) - 1)
+            return self.q[lo] + (self.q[hi] - self.q[lo]) * (pos - lo)
+        return self.q[2]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"p": self.p, "q": self.q, "n": self.n, "np": self.np}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "P2Quantile":
+        est = cls(float(data["p"]))
+        est.q = list(data["q"])
+        est.n = list(data["n"])
+        est.np = list(data["np"])
+        return est
+
+
+def _student_key(name: str) -> str:
+    return name.strip().lower()
+
+
+def summarize_session(
+    student_metrics: Mapping[str, Any] | None = None,
+    student_text: str = "",
+    learner_errors: Sequence[Mapping[str, Any]] = (),
+    phenomena: Sequence[Mapping[str, Any]] = (),
+    register: Mapping[str, Any] | None = None,
+    hesitation_count: int | None = None,
+) -> dict[str, float]:
+    """Flat numeric summary vector of one session (missing parts and zero category counts are left out)."""
+    summary: dict[str, float] = {}
+    metrics = student_metrics or {}
+
+    wpm = (metrics.get("speaking_rate") or {}).get("average_wpm")
+    if wpm:
+        summary["wpm"] = float(wpm)
+    caf = metrics.get("caf_metrics") or {}
+    for group, keys in (("complexity", ("mean_length_t_unit", "clauses_per_t_unit")),
+                        ("fluency", ("mean_length_run",)),
+                        ("accuracy_approximation", ("error_free_t_units_pct",))):
+        for key in keys:
+            value = (caf.get(group) or {}).get(key)
+            if isinstance(value, (int, float)):
+                summary[key] = float(value)
+
+    words = [w.lower() for w in student_text.split()]
+    if words:
+        summary["word_count"] = float(len(words))
+        summary["lexical_diversity"] = round(len(set(words)) / len(words), 4)
+
+    errors = Counter(str(e.get("category", "Other")) for e in learner_errors)
+    summary["errors.total"] = float(sum(errors.values()))
+    if words:
+        summary["errors.per_100_words"] = round(100.0 * summary["errors.total"] / len(words), 3)
+    for category, count in errors.items():
+        summary[f"errors.{category}"] = float(count)
+    for category, count in Counter(str(p.get("category", "Other")) for p in phenomena).items():
+        summary[f"phenomena.{category}"] = float(count)
+
+    scores = (register or {}).get("scores") or {}
+    for name in ("academic", "conversational"):
+        if isinstance(scores.get(name), (int, float)):
+            summary[f"register.{name}"] = float(scores[name])
+    if hesitation_count is not None:
+        summary["hesitation_count"] = float(hesitation_count)
+    return summary
+
+
+def _is_category_count(metric: str) -> bool:
+    return metric.startswith(COUNT_PREFIXES) and metric not in _NOT_COUNTS
+
+
+class StudentMetricsStore:
+    """Append-only session summaries plus incrementally maintained aggregates."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path else store_path("student_metrics.sqlite3")
+        self._write_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record_session(self, student: str, session_id: str, summary: Mapping[str, float], recorded_at: str | None = None) -> bool:
+        """Appends one session and folds it into the aggregates. False if it was already recorded."""
+        key = _student_key(student)
+        recorded_at = recorded_at or datetime.now().isoformat()
+        with self._write_lock, self._connect() as conn:
+            try:
+                conn.execute("INSERT INTO sessions (student, session_id, recorded_at) VALUES (?, ?, ?)", (key, session_id, recorded_at))
+            except sqlite3.IntegrityError:
+                return False
+            summary = self._zero_fill_counts(conn, key, session_id, summary)
+            conn.executemany(
+                "INSERT INTO session_metrics (student, session_id, metric, value, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                [(key, session_id, metric, float(value), recorded_at) for metric, value in summary.items()],
+            )
+            for metric, value in summary.items():
+                self._update_aggregate(conn, key, metric, float(value), recorded_at)
+        logger.info(f"📊 Recorded {len(summary)} metrics for {student} ({session_id})")
+        return True
+
+    def _zero_fill_counts(self, conn: sqlite3.Connection, student: str, session_id: str, summary: Mapping[str, float]) -> dict[str, float]:
+        """
+        Per-category counts are only summarized when non-zero: categories the student had before
+        count as 0 in this session, and a category seen for the first time gets 0 for every earlier
+        session, so its aggregates and trend cover all sessions.
+        """
+        filled = dict(summary)
+        known = {row["metric"] for row in conn.execute("SELECT metric FROM aggregates WHERE student = ?", (student,))}
+        for metric in known:
+            if _is_category_count(metric) and metric not in filled:
+                filled[metric] = 0.0
+        new = [m for m in filled if _is_category_count(m) and m not in known]
+        if new:
+            earlier = conn.execute(
+                "SELECT session_id, recorded_at FROM sessions WHERE student = ? AND session_id != ? ORDER BY recorded_at",
+                (student, session_id),
+            ).fetchall()
+            for metric in new:
+                for row in earlier:
+                    conn.execute(
+                        "INSERT INTO session_metrics (student, session_id, metric, value, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                        (student, row["session_id"], metric, 0.0, row["recorded_at"]),
+                    )
+                    self._update_aggregate(conn, student, metric, 0.0, row["recorded_at"])
+        return filled
+
+    @staticmethod
+    def _update_aggregate(conn: sqlite3.Connection, student: str, metric: str, value: float, recorded_at: str) -> None:
+        row = conn.execute("SELECT * FROM aggregates WHERE student = ? AND metric = ?", (student, metric)).fetchone()
+        if row is None:
+            stat = RunningStat()
+            ewma, lo, hi = value, value, value
+            estimators = [P2Quantile(p) for p in QUANTILES]
+        else:
+            stat = RunningStat(row["n"], row["mean"], row["m2"])
+            ewma = EWMA_ALPHA * value + (1 - EWMA_ALPHA) * row["ewma"]
+            lo, hi = min(row["min"], value), max(row["max"], value)
+            estimators = [P2Quantile.from_dict(d) for d in json.loads(row["quantiles"])]
+        stat.add(value)
+        for est in estimators:
+            est.add(value)
+        conn.execute(
+            "INSERT OR REPLACE INTO aggregates (student, metric, n, mean, m2, ewma, last, min, max, quantiles, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (student, metric, stat.n, stat.mean, stat.m2, ewma, value, lo, hi,
+             json.dumps([est.to_dict() for est in estimators]), recorded_at),
+        )
+
+    def trends(self, student: str, metrics: Sequence[str] | None = None, last: int = 20) -> dict[str, Any]:
+        """Aggregates and the last `last` values per metric (all metrics if none are named)."""
+        key = _student_key(student)
+        with self._connect() as conn:
+            sessions = conn.execute("SELECT COUNT(*) FROM sessions WHERE student = ?", (key,)).fetchone()[0]
+            if metrics:
+                placeholders = ",".join("?" * len(metrics))
+                rows = conn.execute(f"SELECT * FROM aggregates WHERE student = ? AND metric IN ({placeholders}) ORDER BY metric", (key, *metrics)).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM aggregates WHERE student = ? ORDER BY metric", (key,)).fetchall()
+
+            result: dict[str, Any] = {}
+            for row in rows:
+                stat = RunningStat(row["n"], row["mean"], row["m2"])
+                series = conn.execute(
+                    "SELECT recorded_at, session_id, value FROM session_metrics WHERE student = ? AND metric = ? "
+                    "ORDER BY recorded_at DESC LIMIT ?",
+                    (key, row["metric"], last),
+                ).fetchall()
+                quantiles = [P2Quantile.from_dict(d) for d in json.loads(row["quantiles"])]
+                result[row["metric"]] = {
+                    "n": stat.n,
+                    "mean": round(stat.mean, 4),
+                    "std": round(stat.std, 4),
+                    "ewma": round(row["ewma"], 4),
+                    "last": row["last"],
+                    "min": row["min"],
+                    "max": row["max"],
+                    **{f"p{int(est.p * 100)}": round(est.value() or 0.0, 4) for est in quantiles},
+                    # Positive when the recent level is above the long-run mean
+                    "trend": round(row["ewma"] - stat.mean, 4),
+                    "series": [{"recorded_at": r["recorded_at"], "session_id": r["session_id"], "value": r["value"]} for r in reversed(series)],
+                }
+        return {"student": student, "sessions": sessions, "metrics": result}
+
+    def students(self) -> list[dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT student, COUNT(*) AS sessions, MAX(recorded_at) AS last_session FROM sessions GROUP BY student ORDER BY student").fetchall()
+        return [dict(r) for r in rows]
+
+
+_store: StudentMetricsStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_student_metrics_store() -> StudentMetricsStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = StudentMetricsStore()
+    return _store
@@ -0,0 +1,266 @@
+"""
+Student Vocabulary.
+Cumulative productive vocabulary per student as compressed bitsets.
+
+Every NGSL/COCA entry gets a stable integer id (VocabularyIndex): ids are
+assigned in LexicalEngine rank order (NGSL first, then COCA) and persisted
+append-only under the local store (vocabulary/ids.json), so a word keeps its
+id when the lists are updated. Each student's produced words are one
+RoaringBitmap in SQLite (student_vocabulary.sqlite3), plus the produced/new
+bitmaps of every recorded session. "New words this session", "never
+produced", NGSL band coverage and class-wide overlap are set operations.
+"""
+
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping, Sequence
+
+import numpy as np
+
+from .local_store import read_json, store_path, write_json
+from .roaring_bitmap import RoaringBitmap
+
+logger = logging.getLogger("StudentVocabulary")
+
+NGSL_BAND_SIZE = 1000  # NGSL headwords per band (band 1 = ranks 1-1000)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vocabulary (
+    student TEXT PRIMARY KEY,
+    produced BLOB NOT NULL,
+    sessions INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_vocabulary (
+    student TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    produced BLOB NOT NULL,
+    new BLOB NOT NULL,
+    recorded_at TEXT NOT NULL,
+    PRIMARY KEY (student, session_id)
+);
+"""
+
+
+class VocabularyIndex:
+    """Word <-> stable id mapping, with NGSL band membership as bitmaps."""
+
+    def __init__(self, words: Sequence[str], ngsl_rank: Mapping[str, int] | None = None):
+        self.words = list(words)
+        self._ids = {word: i for i, word in enumerate(self.words)}
+        band_ids: dict[int, list[int]] = {}
+        for word, rank in (ngsl_rank or {}).items():
+            word_id = self._ids.get(word)
+            if word_id is not None:
+                band_ids.setdefault((rank - 1) // NGSL_BAND_SIZE + 1, []).append(word_id)
+        self._bands = {band: RoaringBitmap.from_ids(ids) for band, ids in band_ids.items()}
+        self.all = RoaringBitmap.from_ids(np.arange(len(self.words)))
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @classmethod
+    def load(cls, ranked_words: Iterable[str], ngsl_rank: Mapping[str, int] | None = None, path: str | Path | None = None) -> "VocabularyIndex":
+        """Persisted ids, extended (never renumbered) with any words new to the lists."""
+        path = Path(path) if path else store_path("vocabulary", "ids.json")
+        words: list[str] = list(read_json(path, default=[]) or [])
+        known = set(words)
+        added: list[str] = []
+        for word in ranked_words:
+            if word not in known:
+                known.add(word)
+                added.append(word)
+        if added:
+            words.extend(added)
+            write_json(path, words)
+            logger.info(f"🔢 Vocabulary ids: {len(added)} new words ({len(words)} total)")
+        return cls(words, ngsl_rank)
+
+    def id_of(self, word: str) -> int | None:
+        return self._ids.get(word.lower())
+
+    def bitmap(self, words: Iterable[str]) -> RoaringBitmap:
+        """Ids of the listed words; words outside the lists are ignored."""
+        ids = [i for i in (self._ids.get(w.lower()) for w in words) if i is not None]
+        return RoaringBitmap.from_ids(ids)
+
+    def words_for(self, bitmap: RoaringBitmap, limit: int | None = None) -> list[str]:
+        """Words in id (rank) order."""
+        ids = bitmap.to_array()
+        if limit is not None:
+            ids = ids[:limit]
+        return [self.words[i] for i in ids.tolist() if i < len(self.words)]
+
+    @property
+    def bands(self) -> list[int]:
+        return sorted(self._bands)
+
+    def band(self, band: int) -> RoaringBitmap:
+        return self._bands.get(band, RoaringBitmap())
+
+
+def _student_key(name: str) -> str:
+    return name.strip().lower()
+
+
+class StudentVocabulary:
+    """Per-student produced-word bitmaps in SQLite."""
+
+    def __init__(self, index: VocabularyIndex, path: str | Path | None = None):
+        self.index = index
+        self.path = Path(path) if path else store_path("student_vocabulary.sqlite3")
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record_session(self, student: str, session_id: str, words: Iterable[str], recorded_at: str | None = None) -> dict[str, Any]:
+        """
+        Adds one session's produced words. Returns the session's new words (first
+        production ever); a session already recorded returns its stored result.
+        """
+        key = _student_key(student)
+        words = list(words)
+        produced = self.index.bitmap(words)
+        recorded_at = recorded_at or datetime.now().isoformat()
+        with self._connect() as conn:
+            try:
+                # Inserting first takes the write lock, so the read-modify-write below is serialized
+                conn.execute(
+                    "INSERT INTO session_vocabulary (student, session_id, produced, new, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, session_id, produced.to_bytes(), b"", recorded_at),
+                )
+            except sqlite3.IntegrityError:
+                return self.session(student, session_id) or {}
+            row = conn.execute("SELECT produced, sessions FROM vocabulary WHERE student = ?", (key,)).fetchone()
+            before = RoaringBitmap.from_bytes(row[0]) if row else RoaringBitmap()
+            new = produced - before
+            total = before | produced
+            conn.execute("UPDATE session_vocabulary SET new = ? WHERE student = ? AND session_id = ?", (new.to_bytes(), key, session_id))
+            conn.execute(
+                "INSERT OR REPLACE INTO vocabulary (student, produced, sessions, updated_at) VALUES (?, ?, ?, ?)",
+                (key, total.to_bytes(), (row[1] if row else 0) + 1, recorded_at),
+            )
+        logger.info(f"🔤 {student}: {len(new)} new words this session ({len(total)} produced overall)")
+        return self._session_result(session_id, produced, new, total, unlisted=len({w.lower() for w in words}) - len(produced))
+
+    def _session_result(self, session_id: str, produced: RoaringBitmap, new: RoaringBitmap, total: RoaringBitmap | None = None, unlisted: int | None = None) -> dict[str, Any]:
+        result: dict[str, Any] = {
+            "session_id": session_id,
+            "produced_count": len(produced),
+            "new_count": len(new),
+            "new_words": self.index.words_for(new),
+        }
+        if total is not None:
+            result["total_produced"] = len(total)
+        if unlisted is not None:
+            result["unlisted_count"] = unlisted
+        return result
+
+    def session(self, student: str, session_id: str) -> dict[str, Any] | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT produced, new FROM session_vocabulary WHERE student = ? AND session_id = ?",
+                (_student_key(student), session_id),
+            ).fetchone()
+        if row is None:
+            return None
+        return self._session_result(session_id, RoaringBitmap.from_bytes(row[0]), RoaringBitmap.from_bytes(row[1]))
+
+    def produced(self, student: str) -> RoaringBitmap:
+        with self._connect() as conn:
+            row = conn.execute("SELECT produced FROM vocabulary WHERE student = ?", (_student_key(student),)).fetchone()
+        return RoaringBitmap.from_bytes(row[0]) if row else RoaringBitmap()
+
+    def never_produced(self, student: str, band: int | None = None, limit: int | None = 50) -> list[str]:
+        """Listed words the student has not produced, most frequent first (optionally one NGSL band)."""
+        pool = self.index.band(band) if band is not None else self.index.all
+        return self.index.words_for(pool - self.produced(student), limit=limit)
+
+    def coverage(self, student: str, bands: Sequence[int] = (1, 2, 3)) -> dict[str, Any]:
+        """Share of each NGSL band (and of the bands combined) the student has produced."""
+        produced = self.produced(student)
+        result: dict[str, Any] = {}
+        combined = RoaringBitmap()
+        for band in bands:
+            members = self.index.band(band)
+            combined = combined | members
+            known = produced.intersection_count(members)
+            result[f"band_{band}"] = {"produced": known, "total": len(members), "pct": round(100.0 * known / len(members), 1) if members else 0.0}
+        known = produced.intersection_count(combined)
+        result["combined"] = {"produced": known, "total": len(combined), "pct": round(100.0 * known / len(combined), 1) if combined else 0.0}
+        return result
+
+    def class_overlap(self, students: Sequence[str] | None = None, limit: int = 50) -> dict[str, Any]:
+        """Words every listed student (default: all) has produced, and the class-wide union."""
+        with self._connect() as conn:
+            if students:
+                keys = [_student_key(s) for s in students]
+                rows = conn.execute(f"SELECT student, produced FROM vocabulary WHERE student IN ({','.join('?' * len(keys))})", keys).fetchall()
+            else:
+                rows = conn.execute("SELECT student, produced FROM vocabulary").fetchall()
+        if not rows:
+            return {"students": [], "shared_count": 0, "union_count": 0, "jaccard": 0.0, "shared_words": []}
+
+        bitmaps = [RoaringBitmap.from_bytes(r[1]) for r in rows]
+        shared, union = bitmaps[0], bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            shared = shared & bitmap
+            union = union | bitmap
+        return {
+            "students": sorted(r[0] for r in rows),
+            "shared_count": len(shared),
+            "union_count": len(union),
+            "jaccard": round(len(shared) / len(union), 3) if union else 0.0,
+            "shared_words": self.index.words_for(shared, limit=limit),
+        }
+
+    def report(self, student: str) -> dict[str, Any]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT sessions, updated_at FROM vocabulary WHERE student = ?", (_student_key(student),)).fetchone()
+        return {
+            "student": student,
+            "sessions": row[0] if row else 0,
+            "updated_at": row[1] if row else None,
+            "total_produced": len(self.produced(student)),
+            "coverage": self.coverage(student),
+        }
+
+
+_index: VocabularyIndex | None = None
+_vocabulary: StudentVocabulary | None = None
+_lock = threading.Lock()
+
+
+def get_vocabulary_index() -> VocabularyIndex:
+    """Process-wide index over the LexicalEngine word lists."""
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                from .lexical_engine import LexicalEngine
+                engine = LexicalEngine()
+                _index = VocabularyIndex.load(engine.combined_vocab_list, engine.ngsl_rank)
+    return _index
+
+
+def get_student_vocabulary() -> StudentVocabulary:
+    global _vocabulary
+    if _vocabulary is None:
+        index = get_vocabulary_index()
+        with _lock:
+            if _vocabulary is None:
+                _vocabulary = StudentVocabulary(index)
+    return _vocabulary
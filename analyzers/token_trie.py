@@ -0,0 +1,84 @@
+"""
+Token Trie.
+Multi-word phrase matcher over a token stream. Phrases are inserted as token
+tuples; `find_all` walks the tokens once and, at each position, follows the
+trie only as deep as the text allows, so the cost depends on the text length
+and the longest phrase, not on the number of phrases in the table.
+A walk never crosses sentence punctuation (. ! ?) or a line break, since
+`word_spans` drops punctuation and "I depend. Of course" would otherwise
+read as "depend of".
+"""
+
+import re
+from typing import Any, Collection, Iterable, Iterator, Sequence
+
+from .sentence_chunker import word_spans
+
+_VALUE = object()  # key under which a node stores the value of the phrase ending there
+_BOUNDARY_RE = re.compile(r"[.!?\n]")
+
+
+class TokenTrie:
+    """Lowercased token phrases -> arbitrary values (e.g. a correction entry)."""
+
+    def __init__(self, phrases: Iterable[tuple[str, Any]] = ()):
+        self.root: dict[Any, Any] = {}
+        self.size = 0
+        self.max_depth = 0
+        for phrase, value in phrases:
+            self.add(phrase, value)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @staticmethod
+    def tokenize(text: str) -> list[tuple[int, int, str]]:
+        """(start, end, lowercased token) with the shared word segmentation."""
+        return [(s, e, w.lower()) for s, e, w in word_spans(text)]
+
+    def add(self, phrase: str | Sequence[str], value: Any) -> None:
+        """Inserts a phrase (string or token sequence). Re-adding a phrase replaces its value."""
+        tokens = [t for _, _, t in self.tokenize(phrase)] if isinstance(phrase, str) else [t.lower() for t in phrase]
+        if not tokens:
+            return
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if _VALUE not in node:
+            self.size += 1
+        node[_VALUE] = value
+        self.max_depth = max(self.max_depth, len(tokens))
+
+    def iter_matches(self, tokens: Sequence[str], breaks: Collection[int] = ()) -> Iterator[tuple[int, int, Any]]:
+        """
+        (token_start, token_end, value) for every phrase occurrence, overlapping ones included.
+        `breaks` holds the indices j where a sentence boundary separates token j-1 from token j.
+        """
+        root = self.root
+        for i in range(len(tokens)):
+            node = root.get(tokens[i])
+            j = i + 1
+            while node is not None:
+                if _VALUE in node:
+                    yield i, j, node[_VALUE]
+                if j == len(tokens) or j in breaks:
+                    break
+                node = node.get(tokens[j])
+                j += 1
+
+    def find_all(self, text: str) -> list[dict[str, Any]]:
+        """Every occurrence in `text` with token and character offsets."""
+        spans = self.tokenize(text)
+        tokens = [t for _, _, t in spans]
+        breaks = {j for j in range(1, len(spans)) if _BOUNDARY_RE.search(text, spans[j - 1][1], spans[j][0])}
+        return [
+            {
+                "value": value,
+                "token_start": i,
+                "token_end": j,
+                "start": spans[i][0],
+                "end": spans[j - 1][1],
+                "text": text[spans[i][0]:spans[j - 1][1]],
+            }
+            for i, j, value in self.iter_matches(tokens, breaks)
+        ]
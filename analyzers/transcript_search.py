@@ -0,0 +1,321 @@
+"""
+Transcript Search.
+Full-text index of every ingested turn (speaker, role, timestamps, student) in
+SQLite FTS5 under the local store (transcripts.sqlite3), so "when did the
+student say X" no longer means grepping `.session_captures` — and keeps
+working after the capture retention purge.
+
+Sessions are indexed on ingest; re-indexing a session replaces its turns.
+Queries use FTS5 syntax, so phrases ("have twenty years") and proximity
+(NEAR(have years, 3)) work as-is; each hit carries its start time for
+jumping back into the recording, and `context()` returns the surrounding turns.
+The student is also an FTS column, so a per-student search intersects posting
+lists instead of filtering every hit. Results come newest first (cheap: FTS5
+walks its rowids backwards and stops at `limit`) or by bm25 relevance.
+
+Usage:
+    python -m analyzers.transcript_search search "have twenty years" --student maria --phrase
+    python -m analyzers.transcript_search search "have years" --near 3
+    python -m analyzers.transcript_search context 1234
+    python -m analyzers.transcript_search import AssemblyAIv2/.session_captures
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Mapping, Sequence
+
+from .local_store import store_path
+
+logger = logging.getLogger("TranscriptSearch")
+
+DEFAULT_TUTOR_NAME = "Aaron"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    session_key TEXT NOT NULL UNIQUE,
+    student TEXT NOT NULL,
+    session_date TEXT,
+    source TEXT,
+    indexed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_student ON sessions (student, session_date);
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY,
+    session INTEGER NOT NULL REFERENCES sessions(id),
+    student TEXT NOT NULL,
+    turn_index INTEGER NOT NULL,
+    speaker TEXT,
+    speaker_name TEXT,
+    role TEXT,
+    start_ms REAL,
+    end_ms REAL,
+    timestamp TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_turns_session ON turns (session, turn_index);
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(
+    text, student, content='turns', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS turns_ai AFTER INSERT ON turns BEGIN
+    INSERT INTO turns_fts(rowid, text, student) VALUES (new.id, new.text, new.student);
+END;
+CREATE TRIGGER IF NOT EXISTS turns_ad AFTER DELETE ON turns BEGIN
+    INSERT INTO turns_fts(turns_fts, rowid, text, student) VALUES ('delete', old.id, old.text, old.student);
+END;
+"""
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def phrase_query(text: str) -> str:
+    """Exact phrase (punctuation ignored)."""
+    return '"' + " ".join(_TOKEN_RE.findall(text)) + '"'
+
+
+def near_query(text: str, distance: int = 5) -> str:
+    """All words within `distance` tokens of each other, in any order."""
+    return f"NEAR({' '.join(_TOKEN_RE.findall(text))}, {distance})"
+
+
+def format_timestamp(ms: float | None) -> str | None:
+    if ms is None:
+        return None
+    seconds = int(ms // 1000)
+    return f"{seconds // 3600:d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}" if seconds >= 3600 else f"{seconds // 60:d}:{seconds % 60:02d}"
+
+
+def _student_key(name: str) -> str:
+    return name.strip().lower()
+
+
+def _ms(turn: Mapping[str, Any], *keys: str) -> float | None:
+    for key in keys:
+        value = turn.get(key)
+        if isinstance(value, (int, float)):
+            return float(value)
+    return None
+
+
+def lesson_key(transcript_text: str, transcript_id: str | None = None) -> str:
+    """One key per lesson for ingest and /analyze alike: the AssemblyAI transcript id, else sha1 of the transcript."""
+    return transcript_id or hashlib.sha1(transcript_text.encode("utf-8")).hexdigest()
+
+
+def lesson_speaker_map(student: str, tutor: str = DEFAULT_TUTOR_NAME) -> dict[str, str]:
+    """Diarized speakers are relabeled in order of appearance, and the tutor opens the lesson: A = tutor, B = student."""
+    return {"A": tutor, "B": student}
+
+
+class TranscriptSearch:
+    """FTS5 index of turns, grouped by session."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path else store_path("transcripts.sqlite3")
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def index_session(
+        self,
+        session_key: str,
+        student: str,
+        turns: Sequence[Mapping[str, Any]],
+        speaker_map: Mapping[str, str] | None = None,
+        session_date: str | None = None,
+        source: str | None = None,
+    ) -> int:
+        """
+        Indexes (or re-indexes) one session's turns. Speakers are resolved through
+        `speaker_map`; the speaker mapped to `student` gets role "student".
+        """
+        speaker_map = speaker_map or {}
+        key = _student_key(student)
+        rows = []
+        for i, turn in enumerate(turns):
+            text = str(turn.get("transcript", turn.get("text", "")) or "").strip()
+            if not text:
+                continue
+            speaker = turn.get("speaker")
+            name = speaker_map.get(str(speaker), str(speaker) if speaker is not None else None)
+            start = _ms(turn, "start", "start_ms")
+            role = "student" if name and _student_key(name) == key else "tutor"
+            rows.append((i, speaker, name, role, start, _ms(turn, "end", "end_ms"),
+                         format_timestamp(start) or turn.get("timestamp"), text))
+
+        with self._connect() as conn:
+            old = conn.execute("SELECT id FROM sessions WHERE session_key = ?", (session_key,)).fetchone()
+            if old:
+                conn.execute("DELETE FROM turns WHERE session = ?", (old[0],))
+                conn.execute("DELETE FROM sessions WHERE id = ?", (old[0],))
+            cur = conn.execute(
+                "INSERT INTO sessions (session_key, student, session_date, source, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (session_key, key, session_date or datetime.now().isoformat(), source, datetime.now().isoformat()),
+            )
+            session = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO turns (session, student, turn_index, speaker, speaker_name, role, start_ms, end_ms, timestamp, text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(session, key, *row) for row in rows],
+            )
+        logger.info(f"🔎 Indexed {len(rows)} turns for {student} ({session_key})")
+        return len(rows)
+
+    def search(
+        self,
+        query: str,
+        student: str | None = None,
+        role: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 20,
+        order: str = "recent",
+    ) -> list[dict[str, Any]]:
+        """
+        FTS5 query over the turn text, newest first (order="relevance" for bm25);
+        each hit has a highlighted snippet and its start time.
+        """
+        match = f"text : ({query})"
+        clauses, params = ["turns_fts MATCH ?"], []
+        if student:
+            match += f" AND student : {phrase_query(_student_key(student))}"
+            clauses.append("t.student = ?")
+            params.append(_student_key(student))
+        if role:
+            clauses.append("t.role = ?")
+            params.append(role)
+        if since:
+            clauses.append("s.session_date >= ?")
+            params.append(since)
+        if until:
+            clauses.append("s.session_date < ?")
+            params.append(until)
+        with self._connect() as conn:
+            try:
+                rows = conn.execute(
+                    "SELECT t.id AS turn_id, s.session_key, s.student, s.session_date, t.turn_index, t.speaker, t.speaker_name, "
+                    "t.role, t.start_ms, t.end_ms, t.timestamp, snippet(turns_fts, 0, '[', ']', '…', 16) AS snippet, "
+                    "bm25(turns_fts) AS rank "
+                    "FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid JOIN sessions s ON s.id = t.session "
+                    f"WHERE {' AND '.join(clauses)} ORDER BY {'rank' if order == 'relevance' else 'turns_fts.rowid DESC'} LIMIT ?",
+                    (match, *params, limit),
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                # Malformed FTS5 syntax (unbalanced quotes, bare operators)
+                raise ValueError(f"Invalid search query {query!r}: {e}") from e
+        return [dict(r) for r in rows]
+
+    def context(self, turn_id: int, before: int = 2, after: int = 2) -> list[dict[str, Any]]:
+        """The turn and its neighbours in the same session, in order."""
+        with self._connect() as conn:
+            anchor = conn.execute("SELECT session, turn_index FROM turns WHERE id = ?", (turn_id,)).fetchone()
+            if anchor is None:
+                return []
+            rows = conn.execute(
+                "SELECT id AS turn_id, turn_index, speaker, speaker_name, role, start_ms, end_ms, timestamp, text "
+                "FROM turns WHERE session = ? AND turn_index BETWEEN ? AND ? ORDER BY turn_index",
+                (anchor["session"], anchor["turn_index"] - before, anchor["turn_index"] + after),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def import_captures(self, captures_root: str | Path, teacher_name: str = DEFAULT_TUTOR_NAME) -> int:
+        """Backfills from `.session_captures/<student>/<date>/<time>_<student>_words.json` files."""
+        count = 0
+        for words_file in sorted(Path(captures_root).glob("*/*/*_words.json")):
+            student = words_file.parent.parent.name
+            try:
+                with open(words_file, "r", encoding="utf-8") as f:
+                    turns = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Skipping {words_file}: {e}")
+                continue
+            if not turns:
+                continue
+            time_part = words_file.name.split("_", 1)[0].replace("-", ":")
+            self.index_session(
+                hashlib.sha1(str(words_file.relative_to(captures_root)).encode("utf-8")).hexdigest(),
+                student, turns, speaker_map=lesson_speaker_map(student, teacher_name),
+                session_date=f"{words_file.parent.name}T{time_part}", source=str(words_file.name),
+            )
+            count += 1
+        return count
+
+    def stats(self) -> dict[str, int]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT (SELECT COUNT(*) FROM sessions), COUNT(*) FROM turns").fetchone()
+        return {"sessions": row[0], "turns": row[1]}
+
+
+_search: TranscriptSearch | None = None
+_search_lock = threading.Lock()
+
+
+def get_transcript_search() -> TranscriptSearch:
+    global _search
+    if _search is None:
+        with _search_lock:
+            if _search is None:
+                _search = TranscriptSearch()
+    return _search
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Search indexed session transcripts.")
+    parser.add_argument("--db", help="Index file (default: the local store)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_search = sub.add_parser("search", help="Full-text search (FTS5 syntax)")
+    p_search.add_argument("query")
+    p_search.add_argument("--phrase", action="store_true", help="Match the words as an exact phrase")
+    p_search.add_argument("--near", type=int, metavar="N", help="Match the words within N tokens of each other")
+    p_search.add_argument("--student")
+    p_search.add_argument("--role", choices=("student", "tutor"))
+    p_search.add_argument("--since")
+    p_search.add_argument("--until")
+    p_search.add_argument("--limit", type=int, default=20)
+    p_search.add_argument("--order", choices=("recent", "relevance"), default="recent")
+    p_context = sub.add_parser("context", help="Turns around a search hit")
+    p_context.add_argument("turn_id", type=int)
+    p_context.add_argument("--window", type=int, default=2)
+    p_import = sub.add_parser("import", help="Backfill from a .session_captures directory")
+    p_import.add_argument("captures_root")
+    sub.add_parser("stats", help="Index size")
+    args = parser.parse_args()
+
+    search = TranscriptSearch(args.db) if args.db else get_transcript_search()
+    if args.command == "search":
+        query = phrase_query(args.query) if args.phrase else near_query(args.query, args.near) if args.near else args.query
+        try:
+            result: Any = search.search(query, student=args.student, role=args.role, since=args.since, until=args.until, limit=args.limit, order=args.order)
+        except ValueError as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+    elif args.command == "context":
+        result = search.context(args.turn_id, before=args.window, after=args.window)
+    elif args.command == "import":
+        result = {"sessions_indexed": search.import_captures(args.captures_root)}
+    else:
+        result = search.stats()
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
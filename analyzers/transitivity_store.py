@@ -0,0 +1,173 @@
+"""
+Verb Transitivity Store.
+Compiles data/verb_patterns/verb_transitivity.tsv into a sorted verb array plus
+numpy columns, loaded once per process. All verbs of a tagged session are
+looked up in one `np.searchsorted` call.
+
+A compiled `.npz` next to the TSV (gitignored) skips CSV parsing on later
+starts; it is rebuilt whenever the TSV is newer.
+"""
+
+import csv
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("TransitivityStore")
+
+DEFAULT_TSV = Path(__file__).resolve().parent.parent / "data" / "verb_patterns" / "verb_transitivity.tsv"
+
+# Mismatch flagging: a verb needs this many corpus observations to be trusted,
+# and the observed frame must be rarer than RARE_FRAME_RATE in the corpus.
+MIN_CORPUS_TOTAL = 100
+RARE_FRAME_RATE = 0.05
+
+
+class TransitivityStore:
+    """Sorted `verbs` array with aligned float64 columns (corpus counts and shares)."""
+
+    COLUMNS = ("intrans", "trans", "ditrans", "total", "percent_intrans", "percent_trans", "percent_ditrans")
+
+    def __init__(self, verbs: np.ndarray, columns: dict[str, np.ndarray]):
+        order = np.argsort(verbs, kind="stable")
+        sorted_verbs = verbs[order]
+        # The TSV repeats some verbs; keep the last row, as the old dict loader did
+        keep = np.append(sorted_verbs[1:] != sorted_verbs[:-1], True) if len(sorted_verbs) else np.ones(0, dtype=bool)
+        self.verbs = sorted_verbs[keep]
+        self.columns = {name: col[order][keep] for name, col in columns.items()}
+
+    def __len__(self) -> int:
+        return int(self.verbs.shape[0])
+
+    # --- Loading ---
+
+    @classmethod
+    def from_tsv(cls, path: str | Path) -> "TransitivityStore":
+        verbs: list[str] = []
+        values: dict[str, list[float]] = {name: [] for name in cls.COLUMNS}
+        with open(path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f, delimiter="\t"):
+                try:
+                    parsed = {name: float(row[name]) for name in cls.COLUMNS}
+                except (KeyError, TypeError, ValueError):
+                    continue
+                verbs.append(row["verb"])
+                for name, value in parsed.items():
+                    values[name].append(value)
+        return cls(np.asarray(verbs, dtype=str), {name: np.asarray(v, dtype=np.float64) for name, v in values.items()})
+
+    @classmethod
+    def from_npz(cls, path: str | Path) -> "TransitivityStore":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["verbs"], {name: data[name] for name in cls.COLUMNS})
+
+    def save_npz(self, path: str | Path) -> None:
+        np.savez(path, verbs=self.verbs, **self.columns)
+
+    @classmethod
+    def load(cls, tsv_path: str | Path = DEFAULT_TSV, use_cache: bool = True) -> "TransitivityStore":
+        """Loads from the compiled cache when it is fresh, else parses the TSV (and refreshes the cache)."""
+        tsv_path = Path(tsv_path)
+        cache_path = tsv_path.with_suffix(".npz")
+        if use_cache and cache_path.exists() and cache_path.stat().st_mtime >= tsv_path.stat().st_mtime:
+            try:
+                store = cls.from_npz(cache_path)
+                logger.info(f"Loaded transitivity data for {len(store)} verbs (compiled)")
+                return store
+            except Exception as e:
+                logger.warning(f"Compiled transitivity cache unreadable, rebuilding: {e}")
+        store = cls.from_tsv(tsv_path)
+        logger.info(f"Loaded transitivity data for {len(store)} verbs")
+        if use_cache:
+            try:
+                store.save_npz(cache_path)
+            except OSError as e:
+                logger.warning(f"Could not write transitivity cache {cache_path}: {e}")
+        return store
+
+    # --- Lookup ---
+
+    def lookup(self, words: Sequence[str]) -> np.ndarray:
+        """Row index per word (lowercased), -1 where the verb is unknown."""
+        if len(words) == 0 or len(self) == 0:
+            return np.full(len(words), -1, dtype=np.int64)
+        keys = np.char.lower(np.asarray(words, dtype=str))
+        idx = np.searchsorted(self.verbs, keys)
+        idx_clipped = np.minimum(idx, len(self) - 1)
+        found = self.verbs[idx_clipped] == keys
+        return np.where(found, idx_clipped, -1)
+
+    def get(self, verb: str) -> dict[str, float] | None:
+        """Single-verb stats in the legacy VerbStats shape."""
+        idx = int(self.lookup([verb])[0])
+        if idx < 0:
+            return None
+        return self._stats(idx)
+
+    def _stats(self, idx: int) -> dict[str, float]:
+        return {
+            "intransitive": float(self.columns["percent_intrans"][idx]),
+            "transitive": float(self.columns["percent_trans"][idx]),
+            "ditransitive": float(self.columns["percent_ditrans"][idx]),
+        }
+
+    def stats_many(self, words: Sequence[str]) -> list[dict[str, float] | None]:
+        return [self._stats(int(i)) if i >= 0 else None for i in self.lookup(words)]
+
+    # --- Mismatches ---
+
+    def flag_mismatches(
+        self,
+        verbs: Sequence[str],
+        has_object: Sequence[bool],
+        min_total: float = MIN_CORPUS_TOTAL,
+        rare_rate: float = RARE_FRAME_RATE,
+    ) -> list[dict[str, Any]]:
+        """
+        Compares observed object presence with the corpus distribution.
+        A verb used with an object that is almost always intransitive ("she arrived the station"),
+        or without one when it is almost always transitive ("I enjoyed"), is flagged.
+        """
+        if len(verbs) == 0:
+            return []
+        idx = self.lookup(verbs)
+        known = idx >= 0
+        safe = np.where(known, idx, 0)
+        with_obj = np.asarray(has_object, dtype=bool)
+        object_rate = self.columns["percent_trans"][safe] + self.columns["percent_ditrans"][safe]
+        intrans_rate = self.columns["percent_intrans"][safe]
+        trusted = known & (self.columns["total"][safe] >= min_total)
+
+        unexpected_object = trusted & with_obj & (object_rate < rare_rate)
+        missing_object = trusted & ~with_obj & (intrans_rate < rare_rate)
+
+        flags: list[dict[str, Any]] = []
+        for i in np.flatnonzero(unexpected_object | missing_object).tolist():
+            flags.append({
+                "verb": verbs[i],
+                "position": i,
+                "observed": "object" if with_obj[i] else "no_object",
+                "issue": "unexpected_object" if unexpected_object[i] else "missing_object",
+                "expected_object_rate": round(float(object_rate[i]), 4),
+                "expected_intransitive_rate": round(float(intrans_rate[i]), 4),
+                "corpus_total": int(self.columns["total"][idx[i]]),
+            })
+        return flags
+
+
+_stores: dict[str, TransitivityStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_transitivity_store(tsv_path: str | Path | None = None) -> TransitivityStore:
+    """Process-wide store per TSV path (loaded on first use)."""
+    key = os.fspath(tsv_path or DEFAULT_TSV)
+    if key not in _stores:
+        with _stores_lock:
+            if key not in _stores:
+                _stores[key] = TransitivityStore.load(key)
+    return _stores[key]
@@ -0,0 +1,218 @@
+"""
+Tutor Baseline.
+The tutor is the same speaker across hundreds of lessons, so their native
+reference (POS ratios, naturalness, lexical diversity, sentence length, WPM,
+bigram inventory) is kept as a persistent running profile instead of being
+recomputed from each session's tutor turns.
+
+Each metric is a Welford running mean/variance; bigram counts accumulate
+(pruned to the most frequent MAX_BIGRAMS). A session is merged once, keyed
+by a hash of its tutor text (so re-runs of the same lesson don't double
+count). Once the baseline is ready, a session without already computed
+metrics only adds its WPM: the tutor is not tagged and profiled again.
+Stored as JSON under the local store (baselines/<tutor>.json).
+"""
+
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+
+from .local_store import read_json, store_path, write_json
+
+logger = logging.getLogger("TutorBaseline")
+
+# Below this many merged sessions, comparisons fall back to the live tutor turns
+MIN_BASELINE_SESSIONS = 3
+MAX_BIGRAMS = 20000
+MAX_SESSION_IDS = 2000
+
+BASELINE_METRICS = (
+    "word_count", "avg_word_length", "avg_sentence_length", "lexical_diversity",
+    "naturalness_score", "verb_ratio", "noun_ratio", "adjective_ratio", "wpm",
+)
+
+
+class RunningStat:
+    """Welford's online mean/variance."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value: float) -> None:
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return {"n": self.n, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "RunningStat":
+        return cls(int(data.get("n", 0)), float(data.get("mean", 0.0)), float(data.get("m2", 0.0)))
+
+
+def _mtime(path: Path) -> float | None:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9_-]+", "_", name.strip().lower()) or "tutor"
+
+
+class TutorBaseline:
+    """Running profile of one tutor, persisted to `path`."""
+
+    def __init__(self, tutor_name: str, path: str | Path | None = None):
+        self.tutor_name = tutor_name
+        self.path = Path(path) if path else store_path("baselines", f"{_slug(tutor_name)}.json")
+        self.stats: dict[str, RunningStat] = {name: RunningStat() for name in BASELINE_METRICS}
+        self.bigrams: Counter[str] = Counter()
+        self.session_ids: list[str] = []
+        self.updated_at: str | None = None
+        self.loaded_mtime: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def sessions(self) -> int:
+        return len(self.session_ids)
+
+    @property
+    def ready(self) -> bool:
+        return self.sessions >= MIN_BASELINE_SESSIONS
+
+    # --- Persistence ---
+
+    @classmethod
+    def load(cls, tutor_name: str, path: str | Path | None = None) -> "TutorBaseline":
+        baseline = cls(tutor_name, path)
+        data = read_json(baseline.path, default=None)
+        if data:
+            for name, stat in data.get("stats", {}).items():
+                baseline.stats[name] = RunningStat.from_dict(stat)
+            baseline.bigrams = Counter(data.get("bigrams", {}))
+            baseline.session_ids = list(data.get("session_ids", []))
+            baseline.updated_at = data.get("updated_at")
+        baseline.loaded_mtime = _mtime(baseline.path)
+        return baseline
+
+    def save(self) -> None:
+        write_json(self.path, {
+            "tutor_name": self.tutor_name,
+            "updated_at": self.updated_at,
+            "session_ids": self.session_ids,
+            "stats": {name: stat.to_dict() for name, stat in self.stats.items()},
+            "bigrams": dict(self.bigrams),
+        })
+        self.loaded_mtime = _mtime(self.path)
+
+    # --- Updates ---
+
+    def merge(self, session_id: str, metrics: Mapping[str, float | None], bigrams: Iterable[tuple[tuple[str, ...], int]] = ()) -> bool:
+        """Folds one session's tutor metrics into the baseline. Returns False if already merged."""
+        with self._lock:
+            if session_id in self.session_ids:
+                return False
+            for name in BASELINE_METRICS:
+                value = metrics.get(name)
+                # Missing/zero timing or tagging (no words, no tagger) would drag the mean down
+                if value is None or (name in ("wpm", "verb_ratio", "noun_ratio", "adjective_ratio") and not value):
+                    continue
+                self.stats[name].add(float(value))
+            for gram, count in bigrams:
+                self.bigrams[" ".join(gram)] += int(count)
+            if len(self.bigrams) > MAX_BIGRAMS:
+                self.bigrams = Counter(dict(self.bigrams.most_common(MAX_BIGRAMS)))
+            self.session_ids = (self.session_ids + [session_id])[-MAX_SESSION_IDS:]
+            self.updated_at = datetime.now().isoformat()
+            return True
+
+    def merge_session(
+        self,
+        session_id: str,
+        tutor_text: str,
+        tutor_words: list[dict[str, Any]] | None = None,
+        metrics: Mapping[str, Any] | None = None,
+        save: bool = True,
+    ) -> bool:
+        """
+        Merges this session's tutor metrics: `metrics` from a live comparison when passed in;
+        otherwise computed here while the baseline is still warming up, and once it is ready
+        only the WPM from the word timings (no per-session tagging or n-gram profiling).
+        The tutor's bigrams come from the shared profile whenever the text is profiled.
+        """
+        if not tutor_text.strip() or session_id in self.session_ids:
+            return False
+        from .comparative_analyzer import ComparativeAnalyzer
+        from .ngram_analyzer import NgramAnalyzer
+        from .word_timeline import WordTimeline
+
+        bigrams: Iterable[tuple[tuple[str, ...], int]] = ()
+        if metrics is not None:
+            bigrams = NgramAnalyzer.profile(tutor_text).counts[2].items()
+        elif not self.ready:
+            metrics, profile = ComparativeAnalyzer.speaker_metrics(tutor_text)
+            bigrams = profile.counts[2].items()
+        values = dict(metrics or {})
+        values["wpm"] = WordTimeline.from_words(tutor_words).wpm() if tutor_words else None
+
+        merged = self.merge(session_id, values, bigrams)
+        if merged and save:
+            self.save()
+            logger.info(f"📈 Tutor baseline '{self.tutor_name}' updated ({self.sessions} sessions)")
+        return merged
+
+    # --- Reads ---
+
+    def mean(self, name: str) -> float:
+        return self.stats[name].mean
+
+    def reference(self) -> dict[str, Any]:
+        """Mean tutor metrics in the shape of ComparativeAnalyzer's per-speaker block."""
+        ref: dict[str, Any] = {
+            "word_count": round(self.mean("word_count")),
+            "avg_word_length": round(self.mean("avg_word_length"), 2),
+            "avg_sentence_length": round(self.mean("avg_sentence_length"), 2),
+            "lexical_diversity": round(self.mean("lexical_diversity"), 3),
+            "naturalness_score": round(self.mean("naturalness_score"), 1),
+            "verb_ratio": round(self.mean("verb_ratio"), 3),
+            "noun_ratio": round(self.mean("noun_ratio"), 3),
+            "adjective_ratio": round(self.mean("adjective_ratio"), 3),
+        }
+        ref["std"] = {name: round(stat.std, 3) for name, stat in self.stats.items() if stat.n > 1}
+        return ref
+
+    def describe(self) -> dict[str, Any]:
+        return {"source": "baseline", "tutor": self.tutor_name, "sessions": self.sessions, "updated_at": self.updated_at}
+
+
+_baselines: dict[str, TutorBaseline] = {}
+_baselines_lock = threading.Lock()
+
+
+def get_tutor_baseline(tutor_name: str) -> TutorBaseline:
+    """Process-wide baseline per tutor; reloaded when another process has saved a newer file."""
+    key = _slug(tutor_name)
+    cached = _baselines.get(key)
+    if cached is None or cached.loaded_mtime != _mtime(cached.path):
+        with _baselines_lock:
+            cached = _baselines.get(key)
+            if cached is None or cached.loaded_mtime != _mtime(cached.path):
+                _baselines[key] = TutorBaseline.load(tutor_name)
+    return _baselines[key]
@@ -1,10 +1,11 @@
-import os
-import csv
-import json
 import re
 import logging
-from pathlib import Path
-from typing import TypedDict, cast, Any
+from typing import TypedDict, Any, cast
+
+from .pos_tagger import get_pos_tagger
+from .rule_pack import get_rules, scan_rules
+from .sentence_cache import analyze_sentences, rules_version
+from .transitivity_store import TransitivityStore, get_transitivity_store
 
 logger = logging.getLogger(__name__)
 
@@ -18,99 +19,97 @@ class IrregularErrorDetails(TypedDict):
     tag: str
     stats: VerbStats
 
+class TransitivityMismatch(TypedDict):
+    verb: str
+    tag: str
+    observed: str
+    issue: str
+    expected_object_rate: float
+    expected_intransitive_rate: float
+    corpus_total: int
+
 class AnalysisOutput(TypedDict):
     irregular_errors: list[IrregularErrorDetails]
+    transitivity_mismatches: list[TransitivityMismatch]
     pattern_matches: list[dict[str, Any]]
     total_verbs_found: int
 
+# Auxiliaries/copulas carry no transitivity signal of their own
+_AUXILIARIES = {
+    "be", "am", "is", "are", "was", "were", "been", "being", "'m", "'s", "'re",
+    "have", "has", "had", "having", "'ve", "'d",
+    "do", "does", "did",
+}
+# Tags that start a direct object after the verb (adverbs/particles are skipped first)
+_OBJECT_TAGS = {"DT", "PDT", "PRP", "PRP$", "NN", "NNS", "NNP", "NNPS", "CD", "JJ", "JJR", "JJS", "WP"}
+# Verbal/clausal complements: object presence is undecidable, skip the verb
+_COMPLEMENT_TAGS = {"TO", "VB", "VBD", "VBG", "VBN", "VBP", "VBZ", "MD", "WDT", "WRB"}
+_SKIP_TAGS = {"RB", "RBR", "RBS", "RP"}
+# Nouns that act as adverbials after motion/intransitive verbs ("go home", "arrived yesterday")
+_ADVERBIAL_NOUNS = {"home", "today", "yesterday", "tomorrow", "tonight", "downtown", "abroad", "upstairs", "downstairs", "outside", "inside"}
+_TIME_NOUNS = {
+    "day", "days", "week", "weeks", "month", "months", "year", "years", "time", "times",
+    "morning", "afternoon", "evening", "night", "weekend", "summer", "winter", "spring", "autumn", "fall",
+}
+
 class VerbAnalyzer:
     """
     Advanced Verb Analyzer.
     Combines:
-    1. Statistical Transitivity Analysis (via verb_transitivity.tsv)
+    1. Statistical Transitivity Analysis (via verb_transitivity.tsv, compiled by TransitivityStore)
     2. Rule-based detection using 'unified_phenomena.json' (PATSI Rules)
     """
 
     def __init__(self, data_path: str | None = None):
-        self.verbs: dict[str, VerbStats] = {}
-        self.json_rules: list[dict[str, Any]] = []
-        
-        # 1. Load Transitivity Data
-        if data_path is None:
-            # Resolve relative to the AssemblyAIv2 package root
-            # This file is at AssemblyAIv2/analyzers/verb_analyzer.py
-            # We want AssemblyAIv2/data/verb_patterns/verb_transitivity.tsv
-            base = Path(__file__).resolve().parent.parent 
-            data_path = str(base / "data/verb_patterns/verb_transitivity.tsv")
-        
-        self._load_transitivity_data(data_path)
-        
-        # 2. Load Unified Phenomena Rules
-        self._load_unified_rules()
-
-    def _load_transitivity_data(self, path: str):
-        if not os.path.exists(path):
-            logger.error(f"Verb transitivity data not found at {path}")
-            return
-
+        # 1. Load Transitivity Data (one compiled store per process)
+        self.transitivity: TransitivityStore | None = None
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f, delimiter='\t')
-                for row in reader:
-                    verb = row['verb']
-                    try:
-                        self.verbs[verb] = {
-                            "intransitive": float(row['percent_intrans']),
-                            "transitive": float(row['percent_trans']),
-                            "ditransitive": float(row['percent_ditrans'])
-                        }
-                    except ValueError:
-                        continue
-            logger.info(f"Loaded transitivity data for {len(self.verbs)} verbs")
+            self.transitivity = get_transitivity_store(data_path)
         except Exception as e:
-            logger.error(f"Failed to load verb data: {e}")
+            logger.error(f"Verb transitivity data not available: {e}")
 
-    def _load_unified_rules(self):
-        """Loads verb-related rules from unified_phenomena.json."""
-        try:
-            base_path = Path(__file__).resolve().parent.parent / "data" / "unified_phenomena.json"
-            if base_path.exists():
-                with open(base_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                count = 0
-                for item in data:
-                    # Filter for Verb-related rules
-                    subcat = item.get("subcategory", "")
-                    cat = item.get("publicCategory", "")
-                    name = item.get("itemName", "").lower()
-                    
-                    is_verb_rule = (
-                        "Verb" in subcat or 
-                        "Verb" in cat or
-                        "Grammar" in subcat # Many verb errors are just labeled Grammar
-                    )
-                    
-                    # Only add if it looks like a regex pattern we can use
-                    if is_verb_rule and item.get("triggerPattern") and len(item["triggerPattern"]) > 3:
-                        try:
-                            self.json_rules.append({
-                                "regex": re.compile(item["triggerPattern"], re.IGNORECASE),
-                                "meta": item
-                            })
-                            count += 1
-                        except re.error:
-                            continue
-                            
-                logger.info(f"📚 VerbAnalyzer loaded {count} advanced rules from Unified Phenomena.")
-            else:
-                logger.warning("⚠️ unified_phenomena.json not found. Advanced verb rules disabled.")
-                
-        except Exception as e:
-            logger.error(f"Failed to load unified verb rules: {e}")
+        # 2. Unified Phenomena Rules (the current rule-pack snapshot, shared read-only)
+        rules = get_rules()
+        self.json_rules: list[dict[str, Any]] = rules.verb
+        self.rules_version = rules_version(__file__, salt=rules.salt)
+
+    def _scan_patterns(self, text: str) -> list[dict[str, Any]]:
+        """(json_rules index, span) of every rule match."""
+        return scan_rules(self.json_rules, text)
 
     def get_stats(self, verb: str) -> VerbStats | None:
-        return self.verbs.get(verb.lower())
+        if self.transitivity is None:
+            return None
+        return cast(VerbStats | None, self.transitivity.get(verb))
+
+    @staticmethod
+    def _verb_frames(tagged: list[tuple[str, str]]) -> list[tuple[int, bool]]:
+        """
+        (token index, has_object) for each lexical verb whose frame can be read off the tags:
+        the first token after the verb (skipping adverbs/particles) decides.
+        """
+        frames: list[tuple[int, bool]] = []
+        for i, (word, tag) in enumerate(tagged):
+            if not tag.startswith('VB') or word.lower() in _AUXILIARIES:
+                continue
+            j = i + 1
+            while j < len(tagged) and tagged[j][1] in _SKIP_TAGS:
+                j += 1
+            next_tag = tagged[j][1] if j < len(tagged) else "."
+            if next_tag in _COMPLEMENT_TAGS:
+                continue
+            has_object = next_tag in _OBJECT_TAGS and not VerbAnalyzer._is_adverbial(tagged, j)
+            frames.append((i, has_object))
+        return frames
+
+    @staticmethod
+    def _is_adverbial(tagged: list[tuple[str, str]], j: int) -> bool:
+        """'home', 'yesterday', 'last week', 'every day' look like objects but aren't."""
+        word = tagged[j][0].lower()
+        if word in _ADVERBIAL_NOUNS:
+            return True
+        following = tagged[j + 1][0].lower() if j + 1 < len(tagged) else ""
+        return word in {"last", "next", "every", "this", "that", "all", "one"} and following in _TIME_NOUNS
 
     def analyze(self, text: str) -> AnalysisOutput:
         """
@@ -118,48 +117,56 @@ class VerbAnalyzer:
         """
         # --- Part 1: Transitivity/POS Scan ---
         irregular_errors: list[IrregularErrorDetails] = []
+        mismatches: list[TransitivityMismatch] = []
         try:
-            import nltk # type: ignore
-            try:
-                tokens = cast(list[str], nltk.word_tokenize(text)) # type: ignore
-                tagged = cast(list[tuple[str, str]], nltk.pos_tag(tokens)) # type: ignore
-            except LookupError:
-                nltk.download('punkt') # type: ignore
-                nltk.download('averaged_perceptron_tagger') # type: ignore
-                tokens = cast(list[str], nltk.word_tokenize(text)) # type: ignore
-                tagged = cast(list[tuple[str, str]], nltk.pos_tag(tokens)) # type: ignore
-                
-            for word, tag in tagged:
-                if tag.startswith('VB'):
-                    word_lower = word.lower()
-                    stats = self.get_stats(word_lower)
+            # Missing tagger data surfaces as LookupError (run nlp_resources.py prepare)
+            tagged = get_pos_tagger().tag_text(text)
+
+            if self.transitivity is not None:
+                verb_positions = [i for i, (_, tag) in enumerate(tagged) if tag.startswith('VB')]
+                # One vectorized lookup for every verb in the text
+                all_stats = self.transitivity.stats_many([tagged[i][0] for i in verb_positions])
+                for i, stats in zip(verb_positions, all_stats):
                     if stats:
                         irregular_errors.append({
-                            "verb": word,
-                            "tag": tag,
-                            "stats": stats
+                            "verb": tagged[i][0],
+                            "tag": tagged[i][1],
+                            "stats": cast(VerbStats, stats)
                         })
+
+                frames = self._verb_frames(tagged)
+                flags = self.transitivity.flag_mismatches(
+                    [tagged[i][0] for i, _ in frames],
+                    [has_obj for _, has_obj in frames]
+                )
+                for flag in flags:
+                    token_idx = frames[flag.pop("position")][0]
+                    flag["tag"] = tagged[token_idx][1]
+                    mismatches.append(cast(TransitivityMismatch, flag))
         except Exception as e:
             logger.warning(f"NLTK tagging failed in VerbAnalyzer: {e}")
 
-        # --- Part 2: Unified Phenomena Regex Scan ---
+        # --- Part 2: Unified Phenomena Regex Scan (per-sentence hits via the sentence cache) ---
         pattern_matches = []
-        for rule in self.json_rules:
-            pattern = rule["regex"]
+        hits = analyze_sentences(text, "verb_patterns", self.rules_version, self._scan_patterns)
+        for hit in sorted(hits, key=lambda h: (h["rule"], h["start"])):
+            rule = self.json_rules[hit["rule"]]
             p_meta = rule["meta"]
-            
-            p_matches = pattern.finditer(text)
-            for pm in p_matches:
-                 pattern_matches.append({
-                    "item": p_meta.get("itemName"),
-                    "match": pm.group(0),
-                    "correction": p_meta.get("exampleCorrections", "").split('|')[0],
-                    "explanation": p_meta.get("explanation") or p_meta.get("l1Interference") or "Verb usage error.",
-                    "source": "UnifiedPhenomena"
-                })
+            pattern_matches.append({
+                "item": p_meta.get("itemName"),
+                "match": text[hit["start"]:hit["end"]],
+                "correction": p_meta.get("exampleCorrections", "").split('|')[0],
+                "explanation": p_meta.get("explanation") or p_meta.get("l1Interference") or "Verb usage error.",
+                "source": "UnifiedPhenomena",
+                "phenomenon_id": p_meta.get("phenomenon_id"),
+                "rule_hash": rule["hash"],
+                "start": hit["start"],
+                "end": hit["end"]
+            })
 
         return {
             "irregular_errors": irregular_errors,
+            "transitivity_mismatches": mismatches,
             "pattern_matches": pattern_matches,
             "total_verbs_found": len(irregular_errors)
         }
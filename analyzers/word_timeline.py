@@ -0,0 +1,290 @@
+"""
+Columnar Word Timeline.
+Flattens per-turn word dicts into numpy arrays once per session so that gaps,
+pauses, speaking rates and per-speaker stats are computed as vectorized operations.
+"""
+
+import logging
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger("WordTimeline")
+
+
+def _timestamp(obj: Mapping[str, Any], key: str) -> float:
+    """Reads `key` (or its `<key>_ms` twin). Missing values become NaN."""
+    value = obj.get(key)
+    if value is None:
+        value = obj.get(f"{key}_ms")
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class WordTimeline:
+    """
+    Session-wide word timing arrays (start, end, confidence, speaker id, turn id).
+    Word arrays are aligned by word index; `turn_start` / `turn_end` by turn index.
+    All times are in milliseconds.
+    """
+
+    def __init__(
+        self,
+        start: np.ndarray,
+        end: np.ndarray,
+        confidence: np.ndarray,
+        speaker_id: np.ndarray,
+        turn_id: np.ndarray,
+        texts: list[str],
+        speakers: list[str],
+        turn_start: np.ndarray,
+        turn_end: np.ndarray,
+    ):
+        self.start = start
+        self.end = end
+        self.confidence = confidence
+        self.speaker_id = speaker_id
+        self.turn_id = turn_id
+        self.texts = texts
+        self.speakers = speakers
+        self.turn_start = turn_start
+        self.turn_end = turn_end
+        self._gaps: np.ndarray | None = None
+
+    # --- Construction ---
+
+    @classmethod
+    def from_turns(cls, turns: Sequence[Mapping[str, Any]]) -> "WordTimeline":
+        """Builds the timeline from diarized turns (each with an optional 'words' list)."""
+        speakers: list[str] = []
+        speaker_index: dict[str, int] = {}
+        starts: list[float] = []
+        ends: list[float] = []
+        confidences: list[float] = []
+        speaker_ids: list[int] = []
+        turn_ids: list[int] = []
+        texts: list[str] = []
+        turn_start = np.full(len(turns), np.nan)
+        turn_end = np.full(len(turns), np.nan)
+
+        for t_idx, turn in enumerate(turns):
+            label = str(turn.get('speaker', 'Unknown'))
+            if label not in speaker_index:
+                speaker_index[label] = len(speakers)
+                speakers.append(label)
+            s_id = speaker_index[label]
+            turn_start[t_idx] = _timestamp(turn, 'start')
+            turn_end[t_idx] = _timestamp(turn, 'end')
+
+            for w in turn.get('words') or []:
+                starts.append(_timestamp(w, 'start'))
+                ends.append(_timestamp(w, 'end'))
+                confidences.append(float(w.get('confidence', 1.0) or 0.0))
+                speaker_ids.append(s_id)
+                turn_ids.append(t_idx)
+                texts.append(str(w.get('text', '')))
+
+        timeline = cls(
+            start=np.asarray(starts, dtype=np.float64),
+            end=np.asarray(ends, dtype=np.float64),
+            confidence=np.asarray(confidences, dtype=np.float64),
+            speaker_id=np.asarray(speaker_ids, dtype=np.int32),
+            turn_id=np.asarray(turn_ids, dtype=np.int32),
+            texts=texts,
+            speakers=speakers,
+            turn_start=turn_start,
+            turn_end=turn_end,
+        )
+        timeline._fill_turn_bounds()
+        return timeline
+
+    @classmethod
+    def from_words(cls, words: Sequence[Mapping[str, Any]]) -> "WordTimeline":
+        """Builds a single-turn timeline from a flat word list (word-level 'speaker' labels)."""
+        speakers: list[str] = []
+        speaker_index: dict[str, int] = {}
+        speaker_ids: list[int] = []
+        for w in words:
+            label = str(w.get('speaker', 'Unknown'))
+            if label not in speaker_index:
+                speaker_index[label] = len(speakers)
+                speakers.append(label)
+            speaker_ids.append(speaker_index[label])
+
+        timeline = cls(
+            start=np.asarray([_timestamp(w, 'start') for w in words], dtype=np.float64),
+            end=np.asarray([_timestamp(w, 'end') for w in words], dtype=np.float64),
+            confidence=np.asarray([float(w.get('confidence', 1.0) or 0.0) for w in words], dtype=np.float64),
+            speaker_id=np.asarray(speaker_ids, dtype=np.int32),
+            turn_id=np.zeros(len(words), dtype=np.int32),
+            texts=[str(w.get('text', '')) for w in words],
+            speakers=speakers,
+            turn_start=np.full(1, np.nan),
+            turn_end=np.full(1, np.nan),
+        )
+        timeline._fill_turn_bounds()
+        return timeline
+
+    def _fill_turn_bounds(self) -> None:
+        """Infers missing turn start/end from the first/last word of each turn."""
+        if len(self) == 0:
+            return
+        counts = self.turn_word_counts()
+        has_words = counts > 0
+        last_idx = np.cumsum(counts) - 1
+        first_idx = last_idx - counts + 1
+        first_start = np.where(has_words, self.start[np.clip(first_idx, 0, None)], np.nan)
+        last_end = np.where(has_words, self.end[np.clip(last_idx, 0, None)], np.nan)
+        self.turn_start = np.where(np.isnan(self.turn_start), first_start, self.turn_start)
+        self.turn_end = np.where(np.isnan(self.turn_end), last_end, self.turn_end)
+
+    def __len__(self) -> int:
+        return int(self.start.shape[0])
+
+    @property
+    def turn_count(self) -> int:
+        return int(self.turn_start.shape[0])
+
+    # --- Core vectors ---
+
+    def gaps(self) -> np.ndarray:
+        """
+        Inter-word gaps (ms), length len-1. Gap i sits between word i and word i+1.
+        Gaps across turn boundaries (or with missing timestamps) are NaN.
+        """
+        if self._gaps is None:
+            if len(self) < 2:
+                self._gaps = np.empty(0, dtype=np.float64)
+            else:
+                gaps = self.start[1:] - self.end[:-1]
+                gaps[self.turn_id[1:] != self.turn_id[:-1]] = np.nan
+                self._gaps = gaps
+        return self._gaps
+
+    def turn_word_counts(self) -> np.ndarray:
+        return np.bincount(self.turn_id, minlength=self.turn_count)
+
+    def word_mask(self, turn_indices: Sequence[int] | None = None) -> np.ndarray:
+        """Boolean mask over words belonging to `turn_indices` (all words if None)."""
+        if turn_indices is None:
+            return np.ones(len(self), dtype=bool)
+        return np.isin(self.turn_id, np.asarray(list(turn_indices), dtype=np.int32))
+
+    def _gap_mask(self, threshold_ms: float, word_mask: np.ndarray | None = None) -> np.ndarray:
+        gaps = self.gaps()
+        with np.errstate(invalid='ignore'):
+            mask = gaps > threshold_ms
+        if word_mask is not None and gaps.size:
+            mask &= word_mask[:-1]
+        return mask
+
+    # --- Pauses ---
+
+    def pause_durations(self, threshold_ms: float = 300, turn_indices: Sequence[int] | None = None) -> np.ndarray:
+        """Durations (ms) of within-turn gaps longer than `threshold_ms`."""
+        mask = self._gap_mask(threshold_ms, None if turn_indices is None else self.word_mask(turn_indices))
+        return self.gaps()[mask]
+
+    def pauses_by_turn(self, threshold_ms: float = 300) -> list[list[dict[str, float]]]:
+        """Per-turn pause records in the legacy `analysis['pauses']` shape."""
+        result: list[list[dict[str, float]]] = [[] for _ in range(self.turn_count)]
+        idx = np.flatnonzero(self._gap_mask(threshold_ms))
+        for i, t_id, p_start, p_end, dur in zip(
+            idx, self.turn_id[idx], self.end[idx], self.start[idx + 1], self.gaps()[idx]
+        ):
+            result[int(t_id)].append({
+                'start_ms': float(p_start),
+                'end_ms': float(p_end),
+                'duration_ms': float(dur)
+            })
+        return result
+
+    def pause_stats(self, turn_indices: Sequence[int] | None = None, threshold_ms: float = 300, long_threshold_ms: float = 1000) -> dict[str, Any]:
+        return self.summarize_pauses(self.pause_durations(threshold_ms, turn_indices), long_threshold_ms)
+
+    @staticmethod
+    def summarize_pauses(durations: np.ndarray, long_threshold_ms: float = 1000) -> dict[str, Any]:
+        """Pause statistics over a set of pause durations (ms)."""
+        if durations.size == 0:
+            return {'message': 'No pause data'}
+        return {
+            'total_pauses': int(durations.size),
+            'long_pauses_gt_1s': int(np.count_nonzero(durations > long_threshold_ms)),
+            'average_pause_ms': round(float(durations.mean()), 1),
+            'total_pause_time_ms': float(durations.sum())
+        }
+
+    def hesitations(self, threshold_ms: float = 800, turn_indices: Sequence[int] | None = None) -> list[dict[str, Any]]:
+        """Words immediately preceding a within-turn gap longer than `threshold_ms`."""
+        mask = self._gap_mask(threshold_ms, None if turn_indices is None else self.word_mask(turn_indices))
+        idx = np.flatnonzero(mask)
+        gaps = self.gaps()
+        return [
+            {
+                'word': self.texts[i],
+                'pause_duration_ms': float(gaps[i]),
+                'confidence': float(self.confidence[i])
+            }
+            for i in idx.tolist()
+        ]
+
+    # --- Rates ---
+
+    def turn_wpm(self) -> np.ndarray:
+        """Words per minute per turn from turn bounds. NaN when bounds are unknown."""
+        duration_min = (self.turn_end - self.turn_start) / 60000.0
+        counts = self.turn_word_counts().astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            wpm = np.where(duration_min > 0.001, counts / duration_min, 0.0)
+        wpm[np.isnan(duration_min)] = np.nan
+        return wpm
+
+    def wpm(self, word_mask: np.ndarray | None = None) -> float:
+        """Span-based words per minute (first start to last end) over the selected words."""
+        start = self.start if word_mask is None else self.start[word_mask]
+        end = self.end if word_mask is None else self.end[word_mask]
+        if start.size == 0:
+            return 0.0
+        duration_ms = float(np.nan_to_num(end[-1]) - np.nan_to_num(start[0]))
+        if duration_ms == 0:
+            return 0.0
+        return start.size / (duration_ms / 60000)
+
+    def articulation_rate(self, pause_threshold_ms: float = 300, word_mask: np.ndarray | None = None) -> float:
+        """Words per minute of phonation time: sum of word durations plus sub-threshold gaps."""
+        mask = np.ones(len(self), dtype=bool) if word_mask is None else word_mask
+        n_words = int(np.count_nonzero(mask))
+        if n_words == 0:
+            return 0.0
+        speech_ms = float(np.nansum((self.end - self.start)[mask]))
+        gaps = self.gaps()
+        if gaps.size:
+            with np.errstate(invalid='ignore'):
+                short = (gaps >= 0) & (gaps <= pause_threshold_ms) & mask[:-1] & mask[1:]
+            speech_ms += float(gaps[short].sum())
+        if speech_ms <= 0:
+            return 0.0
+        return n_words / (speech_ms / 60000)
+
+    def speaker_stats(self, pause_threshold_ms: float = 300) -> dict[str, dict[str, float | int]]:
+        """Per-speaker word counts, speaking time, pauses and rates."""
+        stats: dict[str, dict[str, float | int]] = {}
+        for s_id, label in enumerate(self.speakers):
+            mask = self.speaker_id == s_id
+            turns = np.unique(self.turn_id[mask])
+            durations = self.pause_durations(pause_threshold_ms, turns.tolist())
+            stats[label] = {
+                'words': int(np.count_nonzero(mask)),
+                'turns': int(turns.size),
+                'speaking_time_ms': float(np.nansum((self.end - self.start)[mask])),
+                'pauses': int(durations.size),
+                'mean_pause_ms': round(float(durations.mean()), 1) if durations.size else 0.0,
+                'articulation_rate': round(self.articulation_rate(pause_threshold_ms, mask), 2),
+                'mean_confidence': round(float(self.confidence[mask].mean()), 3) if mask.any() else 0.0,
+            }
+        return stats
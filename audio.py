@@ -0,0 +1,206 @@
+"""
+Non-blocking audio capture for the live streaming client.
+
+The capture path is split into three stages so that a slow disk can never
+delay audio delivery to the transcriber:
+
+1. Producer thread: blocking `stream.read()` -> mono downmix -> ring buffer.
+2. Consumer: `__next__` pops the oldest chunk (this is what StreamingClient iterates).
+3. Writer thread: drains a bounded queue into the session WAV file.
+
+When the ring buffer is full the oldest chunk is dropped; when the writer
+queue is full the chunk is skipped on disk only. Both are counted in `stats()`.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+import wave
+from collections import deque
+from typing import Any
+
+import numpy as np
+
+try:
+    import pyaudio # type: ignore
+except ImportError:
+    pyaudio = None # type: ignore
+
+logger = logging.getLogger("AudioCapture")
+
+RATE = 16000
+FRAMES_PER_BUFFER = 8000
+SAMPLE_WIDTH = 2 # paInt16
+PA_INT16 = 0x00000008 # PortAudio paInt16, used when pyaudio is not importable (fake devices)
+
+
+class MonoMicrophoneStream:
+    """Iterable of mono int16 PCM chunks captured from a (multi-channel) input device."""
+
+    def __init__(
+        self,
+        device_index: int = 7,
+        channel_indices: list[int] | None = None,
+        audio_path: str | None = None,
+        frames_per_buffer: int = FRAMES_PER_BUFFER,
+        rate: int = RATE,
+        ring_capacity: int = 32,
+        writer_queue_size: int = 256,
+        audio_interface: Any | None = None,
+    ):
+        if audio_interface is None:
+            if pyaudio is None:
+                raise RuntimeError("pyaudio is not installed. Run 'pip install pyaudio'.")
+            audio_interface = pyaudio.PyAudio()
+        self.p = audio_interface
+
+        info = self.p.get_device_info_by_index(device_index)
+        self.channels = int(info.get('maxInputChannels', 0))
+        if self.channels < 1:
+            self.p.terminate()
+            raise ValueError(f"Device {device_index} ({info.get('name')}) has no input channels.")
+        self.channel_indices = channel_indices
+        self.frames_per_buffer = frames_per_buffer
+
+        self.stream = self.p.open(
+            format=pyaudio.paInt16 if pyaudio is not None else PA_INT16,
+            channels=self.channels,
+            rate=rate,
+            input=True,
+            input_device_index=device_index,
+            frames_per_buffer=frames_per_buffer
+        )
+
+        self.audio_path = audio_path or f"sessions/audio_{int(time.time())}.wav"
+        os.makedirs(os.path.dirname(self.audio_path) or ".", exist_ok=True)
+        self.wf = wave.open(self.audio_path, 'wb')
+        self.wf.setnchannels(1)
+        self.wf.setsampwidth(SAMPLE_WIDTH)
+        self.wf.setframerate(rate)
+
+        # Stage buffers
+        self._ring: deque[tuple[float, bytes]] = deque()
+        self._ring_capacity = ring_capacity
+        self._ring_cond = threading.Condition()
+        self._write_queue: queue.Queue[bytes | None] = queue.Queue(maxsize=writer_queue_size)
+
+        # Counters
+        self.captured_chunks = 0
+        self.delivered_chunks = 0
+        self.dropped_frames = 0
+        self.writer_dropped_frames = 0
+        self.read_errors = 0
+        self._latency_total_ms = 0.0
+        self._latency_max_ms = 0.0
+
+        self.active = True
+        self._producer = threading.Thread(target=self._capture_loop, name="audio-capture", daemon=True)
+        self._writer = threading.Thread(target=self._writer_loop, name="audio-writer", daemon=True)
+        self._writer.start()
+        self._producer.start()
+
+    # --- Stage 1: Producer ---
+
+    def _to_mono(self, data: bytes) -> bytes:
+        if self.channels == 1:
+            return data
+        samples = np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels)
+        if self.channel_indices:
+            samples = samples[:, self.channel_indices]
+        return samples.mean(axis=1).astype(np.int16).tobytes()
+
+    def _capture_loop(self) -> None:
+        while self.active:
+            try:
+                data = self.stream.read(self.frames_per_buffer, exception_on_overflow=False)
+            except Exception as e:
+                if not self.active:
+                    break
+                self.read_errors += 1
+                logger.warning(f"Audio read failed: {e}")
+                time.sleep(0.01)
+                continue
+
+            chunk = self._to_mono(data)
+            frames = len(chunk) // SAMPLE_WIDTH
+            with self._ring_cond:
+                if len(self._ring) >= self._ring_capacity:
+                    self._ring.popleft()
+                    self.dropped_frames += frames
+                self._ring.append((time.monotonic(), chunk))
+                self.captured_chunks += 1
+                self._ring_cond.notify()
+
+            try:
+                self._write_queue.put_nowait(chunk)
+            except queue.Full:
+                self.writer_dropped_frames += frames
+
+        with self._ring_cond:
+            self._ring_cond.notify_all()
+
+    # --- Stage 2: Consumer ---
+
+    def __iter__(self): return self
+
+    def __next__(self) -> bytes:
+        with self._ring_cond:
+            while not self._ring:
+                if not self.active:
+                    raise StopIteration
+                self._ring_cond.wait(timeout=0.5)
+            captured_at, chunk = self._ring.popleft()
+
+        latency_ms = (time.monotonic() - captured_at) * 1000
+        self.delivered_chunks += 1
+        self._latency_total_ms += latency_ms
+        self._latency_max_ms = max(self._latency_max_ms, latency_ms)
+        return chunk
+
+    # --- Stage 3: Writer ---
+
+    def _writer_loop(self) -> None:
+        while True:
+            chunk = self._write_queue.get()
+            if chunk is None:
+                break
+            try:
+                self.wf.writeframes(chunk)
+            except Exception as e:
+                logger.error(f"Audio write failed: {e}")
+
+    def stats(self) -> dict[str, float | int]:
+        """Dropped-frame and latency counters for the capture pipeline."""
+        return {
+            'captured_chunks': self.captured_chunks,
+            'delivered_chunks': self.delivered_chunks,
+            'dropped_frames': self.dropped_frames,
+            'writer_dropped_frames': self.writer_dropped_frames,
+            'read_errors': self.read_errors,
+            'ring_depth': len(self._ring),
+            'writer_queue_depth': self._write_queue.qsize(),
+            'avg_latency_ms': round(self._latency_total_ms / self.delivered_chunks, 2) if self.delivered_chunks else 0.0,
+            'max_latency_ms': round(self._latency_max_ms, 2),
+        }
+
+    def close(self):
+        if not self.active and not self._writer.is_alive():
+            return
+        self.active = False
+        with self._ring_cond:
+            self._ring_cond.notify_all()
+        self._producer.join(timeout=2.0)
+        try:
+            self.stream.stop_stream()
+            self.stream.close()
+        except: pass
+        # Writer drains whatever is queued before the sentinel
+        self._write_queue.put(None)
+        self._writer.join(timeout=5.0)
+        try:
+            self.wf.close()
+            self.p.terminate()
+        except: pass
+        logger.info(f"🎙️ Capture stats: {self.stats()}")
@@ -0,0 +1,173 @@
+"""
+Backpressure-aware websocket fan-out.
+
+Every connected client gets a bounded outbound queue drained by its own
+sender task, so one slow UI can no longer stall broadcasts to the rest:
+
+- Payloads are serialized once per message, not once per client.
+- A queued `partial` transcript is replaced by the next one (only the latest is kept).
+- Above the high-water mark new partials are throttled (skipped).
+- When the queue is full the oldest message is dropped; a client that keeps
+  overflowing is disconnected as a slow consumer.
+
+All methods must be called from the event loop thread.
+"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, Iterable
+
+logger = logging.getLogger("Broadcaster")
+
+COALESCED_TYPES = frozenset({"partial"})
+SLOW_CONSUMER_CLOSE_CODE = 1013 # Try Again Later
+
+
+class ClientChannel:
+    """Bounded outbound queue and sender task for one websocket."""
+
+    def __init__(self, websocket: Any, max_queue: int = 64, max_overflow: int = 256):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.high_water = max(1, max_queue // 2)
+        self.max_overflow = max_overflow
+        self._queue: deque[tuple[str, str]] = deque()
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.closed = False
+
+        # Counters
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.throttled = 0
+        self.max_depth = 0
+        self._overflow_streak = 0
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, message_type: str, payload: str, coalesce_key: str | None = None) -> None:
+        """`coalesce_key` scopes partial replacement (e.g. per live session); defaults to the type."""
+        if self.closed:
+            return
+        key = coalesce_key or message_type
+        if message_type in COALESCED_TYPES:
+            if self._replace_pending(key, payload):
+                return
+            if len(self._queue) >= self.high_water:
+                self.throttled += 1
+                return
+
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self.dropped += 1
+            self._overflow_streak += 1
+            if self._overflow_streak >= self.max_overflow:
+                self._disconnect_slow_consumer()
+                return
+
+        self._queue.append((key, payload))
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._ready.set()
+
+    def _replace_pending(self, key: str, payload: str) -> bool:
+        """Removes a queued message with the same key and appends the new one at the tail."""
+        for i, (queued_key, _) in enumerate(self._queue):
+            if queued_key == key:
+                del self._queue[i]
+                self._queue.append((key, payload))
+                self.coalesced += 1
+                return True
+        return False
+
+    def _disconnect_slow_consumer(self) -> None:
+        logger.warning(f"🐢 Dropping slow websocket client after {self.dropped} dropped messages")
+        self.closed = True
+        self._queue.clear()
+        self._ready.set()
+        asyncio.create_task(self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="slow consumer"))
+
+    async def _run(self) -> None:
+        while not self.closed:
+            await self._ready.wait()
+            while self._queue and not self.closed:
+                _, payload = self._queue.popleft()
+                try:
+                    await self.websocket.send(payload)
+                except Exception as e:
+                    logger.info(f"Websocket send failed, closing channel: {e}")
+                    self.closed = True
+                    break
+                self.sent += 1
+                self._overflow_streak = 0
+            self._ready.clear()
+
+    async def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            'depth': len(self._queue),
+            'max_depth': self.max_depth,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'throttled': self.throttled,
+            'closed': self.closed,
+        }
+
+
+class Broadcaster:
+    """Registry of per-client channels. `publish()` serializes once and enqueues everywhere."""
+
+    def __init__(self, max_queue: int = 64, max_overflow: int = 256):
+        self.max_queue = max_queue
+        self.max_overflow = max_overflow
+        self.channels: dict[Any, ClientChannel] = {}
+        self.published = 0
+
+    def register(self, websocket: Any) -> ClientChannel:
+        channel = ClientChannel(websocket, max_queue=self.max_queue, max_overflow=self.max_overflow)
+        self.channels[websocket] = channel
+        channel.start()
+        return channel
+
+    async def unregister(self, websocket: Any) -> None:
+        channel = self.channels.pop(websocket, None)
+        if channel is not None:
+            await channel.close()
+
+    def publish(self, message: dict[str, Any], clients: Iterable[Any] | None = None) -> int:
+        """Enqueues `message` for `clients` (all registered clients if None). Returns the fan-out."""
+        targets = self.channels.keys() if clients is None else clients
+        channels = [self.channels[c] for c in targets if c in self.channels]
+        if not channels:
+            return 0
+        payload = json.dumps(message)
+        message_type = str(message.get("message_type", ""))
+        session_id = message.get("session_id")
+        coalesce_key = f"{message_type}:{session_id}" if session_id else message_type
+        for channel in channels:
+            channel.enqueue(message_type, payload, coalesce_key)
+        self.published += 1
+        return len(channels)
+
+    def stats(self) -> dict[str, Any]:
+        per_client = [c.stats() for c in self.channels.values()]
+        return {
+            'clients': len(per_client),
+            'published': self.published,
+            'total_depth': sum(s['depth'] for s in per_client),
+            'max_depth': max((s['max_depth'] for s in per_client), default=0),
+            'dropped': sum(s['dropped'] for s in per_client),
+            'coalesced': sum(s['coalesced'] for s in per_client),
+            'throttled': sum(s['throttled'] for s in per_client),
+            'per_client': per_client,
+        }
@@ -0,0 +1,122 @@
+"""
+Startup warm-up phases.
+Components (imports, corpora, taggers, vocabularies) register a loader and
+are warmed in the background after the server starts accepting connections.
+`report()` backs the `/ready` endpoint: per-component state and timings,
+plus the total cold start measured against COLD_START_BUDGET_MS.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger("Warmup")
+
+COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "20000"))
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class WarmupComponent:
+    def __init__(self, name: str, loader: Callable[[], Any | Awaitable[Any]], required: bool = True):
+        self.name = name
+        self.loader = loader
+        self.required = required
+        self.state = PENDING
+        self.duration_ms: float | None = None
+        self.error: str | None = None
+        self.result: Any = None
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            'state': self.state,
+            'required': self.required,
+            'duration_ms': self.duration_ms,
+            'error': self.error,
+        }
+
+
+class WarmupManager:
+    """Runs registered loaders in order; sync loaders run in a worker thread."""
+
+    def __init__(self, budget_ms: float = COLD_START_BUDGET_MS):
+        self.budget_ms = budget_ms
+        self.components: dict[str, WarmupComponent] = {}
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def register(self, name: str, loader: Callable[[], Any | Awaitable[Any]], required: bool = True) -> None:
+        self.components[name] = WarmupComponent(name, loader, required)
+
+    def get(self, name: str) -> Any:
+        """Loader result for a warm component, None otherwise."""
+        component = self.components.get(name)
+        return component.result if component and component.state == READY else None
+
+    async def _load(self, component: WarmupComponent) -> None:
+        component.state = LOADING
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(component.loader):
+                component.result = await component.loader()
+            else:
+                component.result = await asyncio.to_thread(component.loader)
+            component.state = READY
+        except Exception as e:
+            component.state = FAILED
+            component.error = str(e)
+            logger.error(f"❌ Warm-up of {component.name} failed: {e}")
+        component.duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(f"🔥 {component.name}: {component.state} in {component.duration_ms}ms")
+
+    async def run(self) -> None:
+        self.started_at = time.perf_counter()
+        for component in self.components.values():
+            if component.state != READY: # already preloaded before fork
+                await self._load(component)
+        self.finished_at = time.perf_counter()
+        elapsed = self.elapsed_ms()
+        if elapsed > self.budget_ms:
+            logger.warning(f"⚠️ Cold start took {elapsed:.0f}ms (budget {self.budget_ms:.0f}ms)")
+        else:
+            logger.info(f"✅ Warm in {elapsed:.0f}ms (budget {self.budget_ms:.0f}ms)")
+
+    def preload(self) -> None:
+        """Loads every component synchronously (pre-fork master, no running event loop)."""
+        asyncio.run(self.run())
+        # Workers measure their own warm-up from fork time
+        self.started_at = self.finished_at = None
+
+    def start(self) -> asyncio.Task:
+        """Schedules `run()` in the background and returns the task."""
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def elapsed_ms(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return round((end - self.started_at) * 1000, 1)
+
+    @property
+    def ready(self) -> bool:
+        return all(c.state == READY for c in self.components.values() if c.required)
+
+    def report(self) -> dict[str, Any]:
+        return {
+            'ready': self.ready,
+            'components': {name: c.describe() for name, c in self.components.items()},
+            'cold_start_ms': self.elapsed_ms(),
+            'budget_ms': self.budget_ms,
+            'within_budget': self.elapsed_ms() <= self.budget_ms,
+            'finished': self.finished_at is not None,
+        }
@@ -10,6 +10,7 @@ import threading
 import gc
 from datetime import datetime
 from pathlib import Path
+from functools import partial
 from typing import Any, cast, List, Optional, TypedDict, Dict
 
 # --- 0. CRITICAL SYSTEM ENFORCEMENT ---
@@ -56,7 +57,6 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import httpx
-import pyaudio
 import websockets
 from assemblyai.streaming.v3 import (
     BeginEvent,
@@ -71,6 +71,12 @@ from assemblyai.streaming.v3 import (
 
 # --- CONFIG & ANALYZERS (Lazy Loaded) ---
 from analyzers.llm_gateway import run_llm_gateway_query
+from analyzers.nlp_resources import verify_or_warn as verify_nlp_bundle
+from analyzers.phenomena_matcher import ErrorPhenomenonMatcher
+from audio import MonoMicrophoneStream
+from broadcaster import Broadcaster
+from lib.warmup import WarmupManager
+from session_manager import LiveSession, SessionLimitError, SessionManager, SessionTurn
 from upload_audio_aai import (
     process_and_upload,
     get_existing_students
@@ -84,37 +90,23 @@ api_key = os.getenv("ASSEMBLYAI_API_KEY")
 GITENGLISH_API_BASE = os.getenv("GITENGLISH_API_BASE", "https://gitenglish.com")
 GITENGLISH_MCP_SECRET = os.getenv("MCP_SECRET")
 
-# --- TYPES ---
-class SessionTurn(TypedDict):
-    turn_order: int
-    transcript: str
-    speaker: str
-    words: List[Dict[str, Any]]
-    timestamp: str
-
-class SessionData(TypedDict):
-    session_id: Optional[str]
-    start_time: Optional[str]
-    student_name: str
-    turns: List[SessionTurn]
-    file_path: Optional[str]
-    notes: str
-    audio_path: Optional[str]
-
 # Global State
 connected_clients = set()
 main_loop = None
-audio_stream_manager = None
-
-current_session: SessionData = {
-    "session_id": None,
-    "start_time": None,
-    "student_name": "Unknown",
-    "turns": [],
-    "file_path": None,
-    "notes": "",
-    "audio_path": None 
-}
+phenomena_matcher = ErrorPhenomenonMatcher()
+session_manager = SessionManager()  # live phenomena matching starts once the matcher is warm
+broadcaster = Broadcaster()
+
+# --- WARM-UP ---
+# Runs in the background so the websocket server accepts clients right away;
+# "get_ready" reports progress (same report as the HTTP server's /ready).
+async def _load_phenomena_matcher():
+    await phenomena_matcher.initialize()
+    session_manager.set_matcher(phenomena_matcher)
+    return phenomena_matcher
+
+warmup = WarmupManager()
+warmup.register("phenomena_matcher", _load_phenomena_matcher)
 
 # --- RESOURCE CLEANUP ---
 
@@ -122,13 +114,11 @@ def cleanup_resources():
     """Release all hardware and network locks."""
     logger.info("🧹 Commencing Deep Resource Cleanup...")
     
-    # 1. Close Audio
-    global audio_stream_manager
-    if audio_stream_manager:
-        try:
-            audio_stream_manager.close()
-            logger.info("✅ Audio stream released")
-        except: pass
+    # 1. Close Audio (every live session)
+    try:
+        session_manager.close_all()
+        logger.info("✅ Audio streams released")
+    except: pass
 
     # 2. Clear temp files
     try:
@@ -181,20 +171,46 @@ from analyzers.schemas import Turn
 # Global list of connected clients (websockets)
 connected_clients = set()
 
-async def broadcast_message(message):
+async def broadcast_message(message, session_id: str | None = None):
     """
-    Sends a JSON message to all connected WebSocket clients.
+    Queues a JSON message for the clients subscribed to `session_id`,
+    or for all connected WebSocket clients when no session is given.
+    Delivery happens on each client's sender task (see broadcaster.py).
     """
-    if connected_clients:
-        msg = json.dumps(message)
-        # Create tasks for all sends
-        tasks = [asyncio.create_task(client.send(msg)) for client in connected_clients]
-        # Wait for all to complete, ignoring errors
-        await asyncio.gather(*tasks, return_exceptions=True)
+    targets = session_manager.subscribers(session_id) if session_id else None
+    broadcaster.publish(message, targets)
+
+
+def _schedule_broadcast(message, session_id: str | None = None):
+    """Thread-safe broadcast from streaming threads."""
+    if main_loop:
+        asyncio.run_coroutine_threadsafe(broadcast_message(message, session_id), main_loop)
+
+
+async def _end_session(session: LiveSession):
+    """Stops capture, hands the recording off for full analysis and frees the slot (once per session)."""
+    if not session.claim_handoff():
+        return
+    logger.info(f"🛑 Stopping session {session.session_id[:8]} ({session.data['student_name']})")
+    # Joining the streaming thread blocks, keep it off the event loop
+    await asyncio.to_thread(session.stop)
+    session_manager.remove(session.session_id)
+
+    audio_p = session.data.get("audio_path")
+    student = session.data.get("student_name", "Unknown")
+    notes = session.data.get("notes", "")
+    if audio_p and os.path.exists(audio_p):
+        logger.info(f"🚚 Initiating Full Handoff for {student} via {audio_p}...")
+        asyncio.create_task(process_and_upload(audio_p, student, notes))
+    else:
+        logger.warning("⚠️ No audio file found for session handoff.")
+
+    await broadcast_message({"message_type": "session_ended", "session_id": session.session_id})
 
 
 async def websocket_handler(websocket):
     connected_clients.add(websocket)
+    broadcaster.register(websocket)
     logger.info("🔌 UI Connected via WebSocket")
     try:
         # Send initial list
@@ -212,120 +228,126 @@ async def websocket_handler(websocket):
                 await websocket.send(json.dumps({"message_type": "student_list", "students": students}))
             
             elif m_type == "start_session":
-                current_session["student_name"] = str(data.get("student_name", "Unknown"))
-                current_session["turns"] = []
-                logger.info(f"🚀 Starting session for: {current_session['student_name']}")
-                threading.Thread(target=run_streaming_client, daemon=True).start()
-                
+                student_name = str(data.get("student_name", "Unknown"))
+                device_index = data.get("device_index")
+                try:
+                    session = session_manager.create(student_name, device_index=device_index, owner=websocket,
+                                                     speaker_map=data.get("speaker_map"))
+                except SessionLimitError as e:
+                    logger.warning(f"⚠️ {e}")
+                    await websocket.send(json.dumps({"message_type": "error", "error": str(e)}))
+                    continue
+                # The creator follows its own session by default
+                session_manager.subscribe(websocket, session.session_id)
+                await websocket.send(json.dumps({"message_type": "session_created", **session.describe()}))
+                session.thread = threading.Thread(target=run_streaming_client, args=(session,), daemon=True)
+                session.thread.start()
+
+            elif m_type == "subscribe":
+                ok = session_manager.subscribe(websocket, str(data.get("session_id")))
+                await websocket.send(json.dumps({"message_type": "subscribed", "session_id": data.get("session_id"), "ok": ok}))
+
+            elif m_type == "unsubscribe":
+                session_manager.unsubscribe(websocket, str(data.get("session_id")))
+
+            elif m_type == "list_sessions":
+                await websocket.send(json.dumps({"message_type": "session_list", "sessions": session_manager.list()}))
+
+            elif m_type == "get_audio_stats":
+                stats = {
+                    s.session_id: s.audio.stats()
+                    for s in session_manager.sessions_for(websocket)
+                    if s.audio is not None
+                }
+                await websocket.send(json.dumps({"message_type": "audio_stats", "stats": stats}))
+
+            elif m_type == "get_ready":
+                await websocket.send(json.dumps({"message_type": "ready", **warmup.report()}))
+
+            elif m_type == "get_broadcast_stats":
+                await websocket.send(json.dumps({"message_type": "broadcast_stats", "stats": broadcaster.stats()}))
+
             elif m_type == "end_session":
                 logger.info("🛑 Stop requested by UI")
-                # Trigger Handoff via Audio Pipeline if audio exists
-                audio_p = current_session.get("audio_path")
-                student = current_session.get("student_name", "Unknown")
-                notes = current_session.get("notes", "")
-
-                if audio_p and os.path.exists(audio_p):
-                    logger.info(f"🚚 Initiating Full Handoff for {student} via {audio_p}...")
-                    # Run async process in a thread to avoid blocking WS loop?
-                    # Actually, process_and_upload is async. We can schedule it on the loop.
-                    asyncio.create_task(process_and_upload(audio_p, student, notes))
+                session_id = data.get("session_id")
+                if session_id:
+                    session = session_manager.get(session_id)
+                    if session is None:
+                        await websocket.send(json.dumps({"message_type": "error", "error": f"Unknown or already ended session {session_id}"}))
+                        continue
+                    targets = [session]
                 else:
-                    logger.warning("⚠️ No audio file found for session handoff.")
-                
-                # Termination handled via stream close in run_streaming_client
+                    targets = session_manager.owned_by(websocket)
+                for s in targets:
+                    await _end_session(s)
                 
     except websockets.exceptions.ConnectionClosed:
         pass
     finally:
+        session_manager.drop_client(websocket)
+        await broadcaster.unregister(websocket)
         connected_clients.remove(websocket)
 
 # --- AUDIO STREAMING ---
+# Callbacks are bound per session with functools.partial so concurrent
+# streaming clients never share state.
 
-class MonoMicrophoneStream:
-    def __init__(self, device_index=7):
-        self.p = pyaudio.PyAudio()
-        self.stream = self.p.open(
-            format=pyaudio.paInt16, 
-            channels=1, 
-            rate=16000, 
-            input=True, 
-            input_device_index=device_index, 
-            frames_per_buffer=8000
-        )
-        self.audio_path = f"sessions/audio_{int(time.time())}.wav"
-        os.makedirs("sessions", exist_ok=True)
-        self.wf = wave.open(self.audio_path, 'wb')
-        self.wf.setnchannels(1)
-        self.wf.setsampwidth(self.p.get_sample_size(pyaudio.paInt16))
-        self.wf.setframerate(16000)
-        current_session['audio_path'] = self.audio_path
-        self.active = True
-
-    def __iter__(self): return self
-    def __next__(self):
-        if not self.active: raise StopIteration
-        data = self.stream.read(8000, exception_on_overflow=False)
-        self.wf.writeframes(data)
-        return data
-
-    def close(self):
-        self.active = False
-        try:
-            self.stream.stop_stream()
-            self.stream.close()
-            self.wf.close()
-            self.p.terminate()
-        except: pass
-
-def on_begin(self, event: BeginEvent):
-    logger.info(f"✅ AssemblyAI Session Started: {event.id}")
-    current_session["session_id"] = event.id
-    current_session["start_time"] = datetime.now().isoformat()
-    if main_loop:
-        asyncio.run_coroutine_threadsafe(broadcast_message({"message_type": "session_start", "session_id": event.id}), main_loop)
+def on_begin(session: LiveSession, client, event: BeginEvent):
+    logger.info(f"✅ AssemblyAI Session Started: {event.id} ({session.session_id[:8]})")
+    session.aai_session_id = event.id
+    session.data["start_time"] = datetime.now().isoformat()
+    _schedule_broadcast({"message_type": "session_start", "session_id": session.session_id, "aai_session_id": event.id}, session.session_id)
 
-def on_turn(self, event: TurnEvent):
+def on_turn(session: LiveSession, client, event: TurnEvent):
     if not getattr(event, "end_of_turn", False):
-        if main_loop:
-            asyncio.run_coroutine_threadsafe(broadcast_message({"message_type": "partial", "text": event.transcript}), main_loop)
+        _schedule_broadcast({"message_type": "partial", "session_id": session.session_id, "text": event.transcript}, session.session_id)
         return
 
-    turns_list = current_session.get("turns") or []
     turn_data: SessionTurn = {
-        "turn_order": len(turns_list) + 1,
+        "turn_order": 0, # assigned under the session lock
         "transcript": event.transcript,
-        "speaker": "Speaker B", # Heuristic for student
+        "speaker": "Speaker B", # Heuristic for student; resolved through the session's speaker map
         "words": [{"text": w.text, "start": w.start, "end": w.end, "confidence": w.confidence} for w in (event.words or [])],
         "timestamp": datetime.now().isoformat()
     }
-    
-    # We defined turns as List[SessionTurn], so we can append directly
-    current_session["turns"].append(turn_data)
 
-    if main_loop:
-        asyncio.run_coroutine_threadsafe(broadcast_message({"message_type": "transcript", **turn_data}), main_loop)
+    # Incremental analytics run here on the streaming thread (O(turn)), off the event loop
+    metrics_delta = session.add_turn(turn_data)
+
+    _schedule_broadcast({"message_type": "transcript", "session_id": session.session_id, **turn_data}, session.session_id)
+    _schedule_broadcast({"session_id": session.session_id, **metrics_delta}, session.session_id)
 
-def on_error(self, error: StreamingError):
-    logger.error(f"💥 AssemblyAI Error: {error}")
+def on_error(session: LiveSession, client, error: StreamingError):
+    logger.error(f"💥 AssemblyAI Error ({session.session_id[:8]}): {error}")
 
-def run_streaming_client():
-    global audio_stream_manager
+def run_streaming_client(session: LiveSession):
     client = StreamingClient(StreamingClientOptions(api_key=api_key))
-    client.on(StreamingEvents.Begin, on_begin)
-    client.on(StreamingEvents.Turn, on_turn)
-    client.on(StreamingEvents.Error, on_error)
-    
-    client.connect(StreamingParameters(sample_rate=16000))
-    audio_stream_manager = MonoMicrophoneStream()
+    client.on(StreamingEvents.Begin, partial(on_begin, session))
+    client.on(StreamingEvents.Turn, partial(on_turn, session))
+    client.on(StreamingEvents.Error, partial(on_error, session))
     
     try:
-        client.stream(audio_stream_manager)
+        client.connect(StreamingParameters(sample_rate=16000))
+        device = {} if session.device_index is None else {"device_index": int(session.device_index)}
+        # end_session may arrive while connecting: then the mic is never opened
+        audio = session.attach_audio(lambda: MonoMicrophoneStream(audio_path=f"sessions/audio_{session.session_id}.wav", **device))
+        if audio is None:
+            logger.info(f"🛑 Session {session.session_id[:8]} stopped before streaming")
+        else:
+            session.data['audio_path'] = audio.audio_path
+            client.stream(audio)
     except Exception as e:
-        logger.error(f"❌ Session Error: {e}")
+        logger.error(f"❌ Session Error ({session.session_id[:8]}): {e}")
     finally:
         # Cleanup
-        if audio_stream_manager:
-            audio_stream_manager.close()
+        if session.audio:
+            session.audio.close()
+        # The stream may end on its own (error, server close): hand the recording off and free
+        # the MAX_LIVE_SESSIONS slot as end_session would; a no-op if end_session already ran
+        if main_loop:
+            asyncio.run_coroutine_threadsafe(_end_session(session), main_loop)
+        else:
+            session_manager.remove(session.session_id)
         logger.info("🔴 Session Closed.")
         client.disconnect()
         logger.info("🎬 Stream Closed")
@@ -333,6 +355,10 @@ def run_streaming_client():
 async def main():
     global main_loop
     main_loop = asyncio.get_running_loop()
+    # Offline check only; missing NLP data is reported, never downloaded here
+    verify_nlp_bundle()
+    # Trigger patterns load in the background; live turns are matched once they are warm
+    warmup.start()
     logger.info("🛰️ Semantic Server starting on port 8765...")
     async with websockets.serve(websocket_handler, "localhost", 8765):
         await asyncio.Future()
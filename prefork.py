@@ -0,0 +1,158 @@
+"""
+Pre-fork server mode.
+
+The master process loads every read-only linguistic resource once (phenomena
+corpora, verb transitivity, COCA/NGSL vocabularies, tagger weights), freezes
+the GC so refcount/GC bookkeeping doesn't dirty those pages, binds the
+listening socket and forks N uvicorn workers that share the data
+copy-on-write.
+
+Each worker reports its startup time to the master over a pipe; the master
+then logs per-worker RSS / USS / PSS (needs psutil) so the sharing can be
+checked. Crashed workers are not restarted; that is left to the orchestrator.
+SIGHUP sent to the master is forwarded to every worker (rule-pack reload).
+"""
+
+import gc
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Any, Callable
+
+try:
+    import psutil # type: ignore
+except ImportError:
+    psutil = None # type: ignore
+
+logger = logging.getLogger("Prefork")
+
+
+def memory_info(pid: int) -> dict[str, float | None]:
+    """RSS plus unique/proportional set size (MB). PSS/USS show what is actually shared."""
+    if psutil is None:
+        return {'rss_mb': None, 'uss_mb': None, 'pss_mb': None}
+    try:
+        process = psutil.Process(pid)
+        try:
+            info = process.memory_full_info()
+        except psutil.AccessDenied:
+            info = process.memory_info()
+    except psutil.Error:
+        return {'rss_mb': None, 'uss_mb': None, 'pss_mb': None}
+    mb = 1024 * 1024
+    return {
+        'rss_mb': round(info.rss / mb, 1),
+        'uss_mb': round(info.uss / mb, 1) if hasattr(info, 'uss') else None,
+        'pss_mb': round(info.pss / mb, 1) if hasattr(info, 'pss') else None,
+    }
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app: Any, sock: socket.socket, report_fd: int, forked_at: float) -> None:
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, log_level="info"))
+
+    def report_startup():
+        while not server.started and not server.should_exit:
+            time.sleep(0.01)
+        payload = {'pid': os.getpid(), 'startup_ms': round((time.perf_counter() - forked_at) * 1000, 1)}
+        os.write(report_fd, (json.dumps(payload) + "\n").encode())
+        os.close(report_fd)
+
+    threading.Thread(target=report_startup, daemon=True).start()
+    server.run(sockets=[sock])
+
+
+def serve(
+    app: Any,
+    host: str = "0.0.0.0",
+    port: int = 8080,
+    workers: int = 2,
+    preload: Callable[[], None] | None = None,
+    report_path: str | None = None,
+) -> None:
+    """Preloads in the master, then forks `workers` uvicorn servers on a shared socket."""
+    master_start = time.perf_counter()
+    if preload is not None:
+        preload()
+    # Move everything loaded so far into the permanent generation: the collector
+    # no longer touches (and so no longer un-shares) these objects in workers.
+    gc.collect()
+    gc.freeze()
+    preload_ms = round((time.perf_counter() - master_start) * 1000, 1)
+    logger.info(f"📦 Master preloaded in {preload_ms}ms, {gc.get_freeze_count()} objects frozen. Master memory: {memory_info(os.getpid())}")
+
+    sock = _bind(host, port)
+    read_fd, write_fd = os.pipe()
+    children: list[int] = []
+    for _ in range(workers):
+        forked_at = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            try:
+                _run_worker(app, sock, write_fd, forked_at)
+            finally:
+                os._exit(0)
+        children.append(pid)
+    os.close(write_fd)
+    logger.info(f"🍴 Forked {workers} workers on {host}:{port}: {children}")
+
+    def shutdown(sig, frame):
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def forward(sig, frame):
+        # SIGHUP (rule-pack reload) goes to every worker; each swaps its own copy
+        for child in children:
+            try:
+                os.kill(child, sig)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGHUP, forward)
+
+    # Collect startup reports, then measure each worker once it is serving
+    startup: dict[int, float] = {}
+    with os.fdopen(read_fd) as reports:
+        for line in reports:
+            entry = json.loads(line)
+            startup[entry['pid']] = entry['startup_ms']
+            if len(startup) == len(children):
+                break
+
+    report = {
+        'master': {'pid': os.getpid(), 'preload_ms': preload_ms, **memory_info(os.getpid())},
+        'workers': [{'pid': pid, 'startup_ms': startup.get(pid), **memory_info(pid)} for pid in children],
+    }
+    for worker in report['workers']:
+        logger.info(f"👷 Worker {worker['pid']}: startup {worker['startup_ms']}ms, rss {worker['rss_mb']}MB, uss {worker['uss_mb']}MB, pss {worker['pss_mb']}MB")
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    for child in children:
+        try:
+            os.waitpid(child, 0)
+        except ChildProcessError:
+            pass
+    sock.close()
+    logger.info("🛑 All workers exited")
@@ -2,8 +2,8 @@ import sys
 import os
 import json
 import logging
-import uuid
-import uuid
+import hashlib
+import time
 from datetime import datetime
 from typing import Any, cast, Mapping, Sequence, Dict, List
 
@@ -28,6 +28,13 @@ from AssemblyAIv2.analyzers.preposition_analyzer import PrepositionAnalyzer
 from AssemblyAIv2.analyzers.learner_error_analyzer import LearnerErrorAnalyzer
 from AssemblyAIv2.analyzers.lexical_engine import LexicalEngine
 from AssemblyAIv2.analyzers.fluency_analyzer import FluencyAnalyzer
+from AssemblyAIv2.analyzers.word_timeline import WordTimeline
+from AssemblyAIv2.analyzers.tutor_baseline import get_tutor_baseline
+from AssemblyAIv2.analyzers.student_metrics import get_student_metrics_store, summarize_session
+from AssemblyAIv2.analyzers.phenomena_index import collect_postings, get_phenomena_index
+from AssemblyAIv2.analyzers.rule_pack import get_rule_pack
+from AssemblyAIv2.analyzers.sentence_cache import get_sentence_cache, track_usage
+from AssemblyAIv2.analyzers.transcript_search import DEFAULT_TUTOR_NAME, lesson_key, lesson_speaker_map
 
 def run_tiered_analysis(
     student_name: str, 
@@ -35,7 +42,8 @@ def run_tiered_analysis(
     notes: str = "Tutor notes",
     sentences: List[Any] | None = None,
     punctuated_text: str | None = None,
-    raw_text: str | None = None
+    raw_text: str | None = None,
+    session_id: str | None = None
 ) -> Dict[str, Any]:
     """
     Runs the full deterministic analysis suite (POS, Ngrams, Verbs, etc.) locally.
@@ -44,15 +52,22 @@ def run_tiered_analysis(
     2. Sentences
     3. Punctuated Text (Diarized)
     4. Raw Text
+
+    session_id is the lesson's key (transcript_search.lesson_key) so re-runs of the
+    same lesson update the student's stores instead of adding to them.
     """
     logger.info(f"🧠 Running Tiered Analysis Suite for {student_name}...")
 
+    # One key for every per-lesson store below (vocabulary, metrics, phenomena index);
+    # without one, derive the same key ingest would from the speaker-labelled turns
+    session_id = session_id or lesson_key("\n".join(f"{t['speaker']}: {t.get('transcript', '')}" for t in all_turns))
+
     # Construct unified JSON structure expected by SessionAnalyzer
     session_json = {
-        "session_id": str(uuid.uuid4()),
+        "session_id": session_id,
         "student_name": student_name,
-        "teacher_name": "Aaron",
-        "speaker_map": {"A": "Aaron", "B": student_name}, # Heuristic, assuming normalized speakers
+        "teacher_name": DEFAULT_TUTOR_NAME,
+        "speaker_map": lesson_speaker_map(student_name), # Heuristic, assuming normalized speakers
         "start_time": datetime.now().isoformat(),
         "turns": all_turns,
         "notes": notes,
@@ -76,29 +91,31 @@ def run_tiered_analysis(
     prep_data: Sequence[object] = []
     learner_data: Sequence[object] = []
 
-    try:
-        pos_counts = POSAnalyzer().analyze(student_text)
-        pos_ratios = POSAnalyzer().get_ratios(student_text)
-        ngram_data = NgramAnalyzer().analyze(student_text)
-        verb_data = VerbAnalyzer().analyze(student_text)
-        article_data = ArticleAnalyzer().analyze(student_text)
-        prep_data = PrepositionAnalyzer().analyze(student_text)
-        learner_data = LearnerErrorAnalyzer().analyze(student_text)
-    except ModuleNotFoundError as e:
-        logger.warning(f"⚠️ Optional NLP dependency missing; continuing without full tiered suite: {e}")
-    except Exception as e:
-        logger.error(f"⚠️ Error during NLP analysis sub-modules: {e}")
+    # Rule-based analyzers reuse per-sentence results for sentences seen before
+    sub_started = time.perf_counter()
+    with track_usage() as cache_usage:
+        try:
+            pos_counts = POSAnalyzer().analyze(student_text)
+            pos_ratios = POSAnalyzer().get_ratios(student_text)
+            ngram_data = NgramAnalyzer().analyze(student_text)
+            verb_data = VerbAnalyzer().analyze(student_text)
+            article_data = ArticleAnalyzer().analyze(student_text)
+            prep_data = PrepositionAnalyzer().analyze(student_text)
+            learner_data = LearnerErrorAnalyzer().analyze(student_text)
+        except ModuleNotFoundError as e:
+            logger.warning(f"⚠️ Optional NLP dependency missing; continuing without full tiered suite: {e}")
+        except Exception as e:
+            logger.error(f"⚠️ Error during NLP analysis sub-modules: {e}")
+    sub_analyzers_ms = round((time.perf_counter() - sub_started) * 1000, 1)
 
-    # 3. Comparative Analysis
+    # 3. Comparative Analysis (tutor side from the persistent baseline once it has enough sessions)
+    tutor_baseline = get_tutor_baseline(session_json["teacher_name"])
     comp_data: Dict[str, Any] = {}
     try:
         comp_data = cast(Dict[str, Any], ComparativeAnalyzer().compare(
             student_data={"pos": pos_counts, "ngrams": ngram_data, "text": student_text},
-            tutor_data={
-                "pos": POSAnalyzer().analyze(tutor_text),
-                "ngrams": NgramAnalyzer().analyze(tutor_text),
-                "text": tutor_text,
-            },
+            tutor_data={"text": tutor_text},
+            baseline=tutor_baseline,
         ))
     except ModuleNotFoundError as e:
         logger.warning(f"⚠️ Comparative analysis skipped: {e}")
@@ -116,6 +133,9 @@ def run_tiered_analysis(
     verb_errs = cast(Dict[str, object], verb_data).get('irregular_errors', [])
     if isinstance(verb_errs, list):
         detected_errors.extend([{'error_type': 'Verb Error', 'text': cast(Dict[str, object], e)['verb']} for e in verb_errs])
+    transitivity_errs = cast(Dict[str, object], verb_data).get('transitivity_mismatches', [])
+    if isinstance(transitivity_errs, list):
+        detected_errors.extend([{'error_type': f"Transitivity: {cast(Dict[str, object], e)['issue']}", 'text': cast(Dict[str, object], e)['verb']} for e in transitivity_errs])
 
     # Standardize Preposition Errors
     detected_errors.extend([{'error_type': 'Preposition Error', 'text': cast(Dict[str, object], e)['item']} for e in prep_data])
@@ -124,8 +144,10 @@ def run_tiered_analysis(
     detected_errors.extend([{'error_type': f"Learner: {cast(Dict[str, object], e).get('category')}", 'text': cast(Dict[str, object], e)['item']} for e in learner_data])
     
     # Pattern Matching
+    pattern_matches: List[Dict[str, Any]] = []
     try:
-        pattern_matches = ErrorPhenomenonMatcher().match(student_text)
+        with track_usage(cache_usage):
+            pattern_matches = ErrorPhenomenonMatcher().match(student_text)
         for m in pattern_matches:
             detected_errors.append({'error_type': f"Pattern: {m.get('category')}", 'text': m.get('item')})
     except: pass
@@ -133,21 +155,71 @@ def run_tiered_analysis(
     # 5. Final Context Construction
     fluency_analyzer = FluencyAnalyzer()
     student_words = [w for t in main_analyzer.student_turns_list for w in t.get('words', [])]
+    student_timeline = WordTimeline.from_words(student_words) # Built once, shared by both fluency metrics
+    tutor_words = [w for t in main_analyzer.teacher_turns for w in t.get('words', [])]
+
+    amalgum = AmalgumAnalyzer()
+    register_analysis = {
+        **amalgum.register_profile(student_text),
+        "turns": amalgum.analyze_turns([cast(str, t.get('transcript', t.get('text', ''))) for t in main_analyzer.student_turns_list]),
+    }
 
     analysis_context = {
         "caf_metrics": cast(Dict[str, Any], basic_metrics).get('student_metrics', {}).get('caf_metrics') or "DATA_MISSING",
         "student_metrics": cast(Dict[str, Any], basic_metrics).get('student_metrics', {}),
         "teacher_metrics": cast(Dict[str, Any], basic_metrics).get('teacher_metrics', {}),
         "comparison": comp_data,
-        "register_analysis": {"scores": AmalgumAnalyzer().analyze_register(student_text), "classification": AmalgumAnalyzer().get_genre_classification(student_text)},
+        "register_analysis": register_analysis,
         "detected_errors": detected_errors,
         "pos_summary": pos_ratios,
         "lexical_analysis": LexicalEngine().analyze_production(student_words),
         "fluency_analysis": {
-            "hesitation": fluency_analyzer.analyze_hesitation(student_words),
-            "articulation_rate": fluency_analyzer.calculate_articulation_rate(student_words)
+            "hesitation": fluency_analyzer.analyze_hesitation(student_timeline),
+            "articulation_rate": fluency_analyzer.calculate_articulation_rate(student_timeline),
+            "native_comparison": fluency_analyzer.compare_to_native(student_timeline, tutor_words, baseline=tutor_baseline)
+        },
+        "timings": {
+            "sub_analyzers_ms": sub_analyzers_ms,
+            "sentence_cache": {**cache_usage.to_dict(), "process": get_sentence_cache().stats()},
         }
     }
+
+    # 6. Fold this session's tutor speech into the baseline (keyed by content, so re-runs don't double count)
+    try:
+        live_tutor = comp_data.get('tutor') if comp_data.get('reference', {}).get('source') == 'session' else None
+        tutor_session_id = hashlib.sha1(tutor_text.encode('utf-8')).hexdigest()
+        tutor_baseline.merge_session(tutor_session_id, tutor_text, tutor_words, metrics=live_tutor)
+    except Exception as e:
+        logger.warning(f"⚠️ Tutor baseline update failed: {e}")
+
+    # 7. Append the student's session summary to their longitudinal metrics
+    try:
+        summary = summarize_session(
+            cast(Dict[str, Any], basic_metrics).get('student_metrics', {}),
+            student_text,
+            learner_errors=cast(List[Dict[str, Any]], learner_data),
+            phenomena=pattern_matches,
+            register=register_analysis,
+            hesitation_count=analysis_context["fluency_analysis"]["hesitation"]["hesitation_count"],
+        )
+        get_student_metrics_store().record_session(student_name, session_id, summary)
+    except Exception as e:
+        logger.warning(f"⚠️ Student metrics update failed: {e}")
+
+    # 8. Index every phenomenon hit (student, session, turn, span) for cross-session queries
+    try:
+        postings = collect_postings(
+            phenomena=pattern_matches,
+            articles=cast(List[Dict[str, Any]], article_data),
+            prepositions=cast(List[Dict[str, Any]], prep_data),
+            verbs=cast(Dict[str, Any], verb_data),
+            learner_errors=cast(List[Dict[str, Any]], learner_data),
+        )
+        turn_texts = [cast(str, t.get('transcript', t.get('text', ''))) for t in main_analyzer.student_turns_list]
+        get_phenomena_index().index_session(student_name, session_id, postings, turn_texts=turn_texts,
+                                            text=student_text, rule_pack=get_rule_pack().version, rule_analyzers=("phenomena", "articles", "verbs"))
+    except Exception as e:
+        logger.warning(f"⚠️ Phenomena index update failed: {e}")
     
     logger.info("✅ Tiered Analysis Complete")
     return analysis_context
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite.
+Micro-benchmarks for the hot analysis paths, run against the sample lesson in
+test_session.json. Each benchmark returns a dict of metrics; unavailable
+dependencies (e.g. missing NLTK data) are reported as skipped.
+
+Usage:
+    python scripts/benchmark_suite.py                 # run everything
+    python scripts/benchmark_suite.py --only pos_tagging --repeat 20
+    python scripts/benchmark_suite.py --json results.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+SAMPLE_SESSION = ROOT / "test_session.json"
+
+
+def load_sample_sentences() -> list[str]:
+    with open(SAMPLE_SESSION, "r", encoding="utf-8") as f:
+        session = json.load(f)
+    return [seg["text"] for seg in session.get("speaker_segments", []) if seg.get("text")]
+
+
+# --- Benchmarks ---
+
+def bench_pos_tagging(sentences: list[str], repeat: int) -> dict[str, Any]:
+    """Tokens/sec for batched tagging, with and without the short-utterance memo."""
+    from analyzers.pos_tagger import POSTaggerService
+
+    token_sents = [s.split() for s in sentences]
+    results: dict[str, Any] = {}
+    for label, memo_size in (("cold", 0), ("memoized", 4096)):
+        service = POSTaggerService(memo_size=memo_size)
+        if not service.available:
+            return {"skipped": "POS tagger data not installed"}
+        start = time.perf_counter()
+        for _ in range(repeat):
+            service.tag_sents(token_sents)
+        elapsed = time.perf_counter() - start
+        results[label] = {
+            "tokens": service.tokens,
+            "seconds": round(elapsed, 4),
+            "tokens_per_sec": round(service.tokens / elapsed, 1) if elapsed > 0 else 0.0,
+            "memo_hit_rate": service.stats()["memo_hit_rate"],
+        }
+    return results
+
+
+def bench_prepositions(sentences: list[str], repeat: int) -> dict[str, Any]:
+    """Trie matching throughput as the error table grows (synthetic filler phrases)."""
+    from analyzers.preposition_analyzer import PrepositionAnalyzer
+    from analyzers.token_trie import TokenTrie
+
+    text = " ".join(sentences)
+    results: dict[str, Any] = {}
+    for size in (30, 3000, 30000):
+        trie = TokenTrie((pattern, entry) for pattern, entry in PrepositionAnalyzer.COMMON_ERRORS.items())
+        for i in range(size - len(trie)):
+            trie.add(f"filler{i} to", ("filler", "", ""))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            hits = trie.find_all(text)
+        elapsed = time.perf_counter() - start
+        results[str(size)] = {
+            "hits": len(hits),
+            "seconds": round(elapsed, 4),
+            "chars_per_sec": round(len(text) * repeat / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+    return results
+
+
+def bench_register(sentences: list[str], repeat: int) -> dict[str, Any]:
+    """Per-turn register scoring throughput (each sample segment is one turn)."""
+    from analyzers.amalgum_analyzer import AmalgumAnalyzer
+
+    analyzer = AmalgumAnalyzer()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        analyzer.analyze_turns(sentences)
+    elapsed = time.perf_counter() - start
+    return {
+        "markers": len(analyzer.lexicon),
+        "turns": len(sentences) * repeat,
+        "seconds": round(elapsed, 4),
+        "turns_per_sec": round(len(sentences) * repeat / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def bench_ngram_lookups(sentences: list[str], repeat: int) -> dict[str, Any]:
+    """Reference n-gram store lookups/sec (synthetic 1M-entry store when none is built)."""
+    import tempfile
+
+    import numpy as np
+
+    from analyzers.ngram_store import NgramStore, build, get_ngram_store, ngram_hash
+
+    store = get_ngram_store()
+    tmp = None
+    if store is None:
+        tmp = tempfile.TemporaryDirectory()
+        source = Path(tmp.name) / "2grams.txt"
+        with open(source, "w", encoding="utf-8") as f:
+            for i in range(1_000_000):
+                f.write(f"{i % 997 + 1}\tw{i % 5000}\tw{i // 5000}\n")
+        build([source], Path(tmp.name) / "synthetic.ngs")
+        store = NgramStore(Path(tmp.name) / "synthetic.ngs")
+
+    tokens = [t.lower() for s in sentences for t in s.split()]
+    queries = [(tokens[i], tokens[i + 1]) for i in range(len(tokens) - 1)] * repeat
+    try:
+        start = time.perf_counter()
+        for query in queries:
+            store.logprob(query)
+        single = time.perf_counter() - start
+
+        hashes = np.fromiter((ngram_hash(q) for q in queries), dtype=np.uint64, count=len(queries))
+        start = time.perf_counter()
+        store.lookup_many(hashes)
+        batched = time.perf_counter() - start
+        return {
+            "entries": len(store),
+            "synthetic": tmp is not None,
+            "lookups": len(queries),
+            "lookups_per_sec": round(len(queries) / single, 1) if single > 0 else 0.0,
+            "batched_lookups_per_sec": round(len(queries) / batched, 1) if batched > 0 else 0.0,
+        }
+    finally:
+        if tmp is not None:
+            del store
+            tmp.cleanup()
+
+
+def bench_sentence_cache(sentences: list[str], repeat: int) -> dict[str, Any]:
+    """Verb rule scan over the sample lesson: uncached vs cold vs warm sentence cache (memory tier only)."""
+    from analyzers.sentence_cache import SentenceCache, analyze_sentences
+    from analyzers.verb_analyzer import VerbAnalyzer
+
+    analyzer = VerbAnalyzer()
+    text = " ".join(sentences)
+    cache = SentenceCache(disk_path=None)
+    results: dict[str, Any] = {"rules": len(analyzer.json_rules), "sentences": len(sentences)}
+    runs: list[tuple[str, Callable[[], Any]]] = [
+        ("uncached", lambda: analyzer._scan_patterns(text)),
+        ("cold", lambda: (cache.clear(), analyze_sentences(text, "verb_patterns", analyzer.rules_version, analyzer._scan_patterns, cache=cache))),
+        ("warm", lambda: analyze_sentences(text, "verb_patterns", analyzer.rules_version, analyzer._scan_patterns, cache=cache)),
+    ]
+    for label, fn in runs:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        elapsed = time.perf_counter() - start
+        results[f"{label}_ms"] = round(elapsed * 1000 / repeat, 3)
+    results["hit_rate"] = cache.stats()["hit_rate"]
+    return results
+
+
+BENCHMARKS: dict[str, Callable[[list[str], int], dict[str, Any]]] = {
+    "pos_tagging": bench_pos_tagging,
+    "prepositions": bench_prepositions,
+    "register": bench_register,
+    "ngram_lookups": bench_ngram_lookups,
+    "sentence_cache": bench_sentence_cache,
+}
+
+
+def run(names: list[str], repeat: int) -> dict[str, Any]:
+    sentences = load_sample_sentences()
+    report: dict[str, Any] = {}
+    for name in names:
+        try:
+            report[name] = BENCHMARKS[name](sentences, repeat)
+        except Exception as e:
+            report[name] = {"error": str(e)}
+        print(f"{name}: {json.dumps(report[name])}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run analysis micro-benchmarks.")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=10, help="Iterations over the sample corpus")
+    parser.add_argument("--json", dest="json_path", help="Write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.only or list(BENCHMARKS), args.repeat)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
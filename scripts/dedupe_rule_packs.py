@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Rule Pack Deduplication.
+Merges the phenomena corpora into one rule pack: byte-identical files are
+read once, identical rules and rules whose trigger patterns are equivalent
+(see analyzers/rule_canon.py) become one rule that keeps the most complete
+metadata and lists every copy under "provenance".
+
+The report compares the regex evaluations one /analyze call makes on a cold
+sentence cache (one pattern scan per analyzer rule list: the phenomena
+matcher, ArticleAnalyzer and VerbAnalyzer) and times them on the sample
+lesson, before and after.
+
+The output is a separate file; review it, then copy it over
+data/unified_phenomena.json and re-analyze stored sessions
+(python -m analyzers.phenomena_index reanalyze).
+
+Usage:
+    python scripts/dedupe_rule_packs.py
+    python scripts/dedupe_rule_packs.py --sources data/unified_phenomena.json data/error_bedrock.json --out /tmp/pack.json
+    python scripts/dedupe_rule_packs.py --json report.json
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from analyzers.rule_canon import dedupe # noqa: E402
+from analyzers.rule_pack import DEFAULT_PACK_PATH, CompiledRules, RulePack, scan_rules # noqa: E402
+
+DATA = ROOT / "data"
+DEFAULT_SOURCES = [DEFAULT_PACK_PATH, DATA / "holy_corpus.json", DATA / "error_phenomena.json", DATA / "error_bedrock.json"]
+DEFAULT_OUT = DATA / "unified_phenomena.dedup.json"
+SAMPLE_SESSION = ROOT / "test_session.json"
+
+
+def load_sources(paths: list[Path]) -> tuple[list[tuple[str, list[dict[str, Any]]]], list[dict[str, Any]]]:
+    """(name, rules) per distinct file, plus a row per file (byte-identical files point at the first copy)."""
+    sources, files = [], []
+    by_digest: dict[str, str] = {}
+    for path in paths:
+        raw = path.read_bytes()
+        digest = hashlib.blake2b(raw, digest_size=8).hexdigest()
+        name = str(path.relative_to(ROOT)) if path.is_relative_to(ROOT) else str(path)
+        row: dict[str, Any] = {"source": name, "bytes": len(raw), "digest": digest}
+        if digest in by_digest:
+            row["identical_to"] = by_digest[digest]
+        else:
+            by_digest[digest] = name
+            data = json.loads(raw)
+            rules = [r for r in data if isinstance(r, dict)] if isinstance(data, list) else []
+            row["rules"] = len(rules)
+            sources.append((name, rules))
+        files.append(row)
+    return sources, files
+
+
+def evaluations(rules: CompiledRules) -> dict[str, int]:
+    """
+    Pattern scans per analysis: one per rule; with scan_rules sharing a regex within each analyzer;
+    and the floor if the three analyzers shared one scan (their rule lists overlap).
+    """
+    lists = {"phenomena": rules.trigger, "articles": rules.article, "verbs": rules.verb}
+    per_rule = {name: len(items) for name, items in lists.items()}
+    distinct = {name: len({id(r["regex"]) for r in items}) for name, items in lists.items()}
+    return {
+        **per_rule,
+        "total": sum(per_rule.values()),
+        "shared_within_analyzer": sum(distinct.values()),
+        "shared_across_analyzers": len({id(r["regex"]) for items in lists.values() for r in items}),
+    }
+
+
+def time_scans(rules: CompiledRules, text: str, repeat: int = 3) -> float:
+    """Best-of-n ms for the three analyzers' rule scans over one text."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for items in (rules.trigger, rules.article, rules.verb):
+            scan_rules(items, text)
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the phenomena corpora into one deduplicated rule pack.")
+    parser.add_argument("--sources", nargs="+", type=Path, default=DEFAULT_SOURCES, help="Rule pack JSON files, highest priority first")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="Where to write the merged pack")
+    parser.add_argument("--json", dest="json_path", help="Write the report to this file")
+    args = parser.parse_args()
+
+    sources, files = load_sources([p.resolve() for p in args.sources])
+    merged, stats = dedupe(sources)
+
+    before_pack = RulePack.load(args.sources[0])
+    after_pack = RulePack(merged, args.out)
+    before, after = CompiledRules(before_pack, quarantine=set(), timeout_ms=0), CompiledRules(after_pack, quarantine=set(), timeout_ms=0)
+    session = json.loads(SAMPLE_SESSION.read_text(encoding="utf-8"))
+    text = " ".join(s["text"] for s in session.get("speaker_segments", []) if s.get("text")).lower()
+
+    report = {
+        "files": files,
+        "rules": stats,
+        "pack": {"before": before_pack.version, "after": after_pack.version},
+        "evaluations_per_session": {
+            "before": evaluations(before),
+            "after": evaluations(after),
+        },
+        "sample_lesson_scan_ms": {"before": time_scans(before, text), "after": time_scans(after, text)},
+    }
+    removed = report["evaluations_per_session"]["before"]["total"] - report["evaluations_per_session"]["after"]["total"]
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(merged, f, indent=2, ensure_ascii=False)
+
+    for row in files:
+        note = f"identical to {row['identical_to']}" if "identical_to" in row else f"{row['rules']} rules"
+        print(f"📄 {row['source']}: {row['bytes']} bytes, {note}")
+    print(f"🧹 {stats['rules_in']} rules in -> {stats['rules_out']} out "
+          f"({stats['identical_copies']} identical copies, {stats['same_pattern']} same pattern, {stats['equivalent_pattern']} equivalent pattern)")
+    ev = report["evaluations_per_session"]
+    print(f"⚡ Regex evaluations per session: {ev['before']['total']} -> {ev['after']['total']} ({removed} removed; "
+          f"{ev['after']['shared_across_analyzers']} if the three analyzers shared one scan)")
+    print(f"   Sample lesson scan: {report['sample_lesson_scan_ms']['before']}ms -> {report['sample_lesson_scan_ms']['after']}ms")
+    print(f"📦 Pack {after_pack.version} written to {args.out}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -95,6 +95,7 @@ def merge():
         json.dump(phenomena, f, indent=2)
     
     print(f"Final count: {len(phenomena)} items saved to {output_path}")
+    print("Apply the changes to stored sessions with: python -m analyzers.phenomena_index reanalyze")
 
 if __name__ == "__main__":
     merge()
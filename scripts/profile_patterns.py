@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Pattern Profiler.
+Times every trigger pattern of a rule pack against real transcripts (the
+sample lesson plus any --corpus files) and against synthetic texts of
+growing size, then flags patterns whose cost grows super-linearly with the
+input (catastrophic backtracking) or that blow the time budget.
+
+Patterns run with the stdlib `re`, exactly as the analyzers run them, in a
+worker process: a pattern that hangs is killed after --budget-ms x the
+number of measurements and recorded as a timeout.
+
+Flagged rules can be written to data/quarantined_patterns.json, which
+CompiledRules skips (see analyzers/pattern_guard.py). Reload the server
+(SIGHUP) to apply.
+
+Usage:
+    python scripts/profile_patterns.py                              # data/unified_phenomena.json
+    python scripts/profile_patterns.py --pack data/generated_patterns.json --limit 200
+    python scripts/profile_patterns.py --json report.json --quarantine
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from analyzers.pattern_guard import QUARANTINE_PATH, load_quarantine, save_quarantine # noqa: E402
+from analyzers.rule_pack import DEFAULT_PACK_PATH, RulePack, is_article_rule, is_trigger_rule, is_verb_rule # noqa: E402
+
+SAMPLE_SESSION = ROOT / "test_session.json"
+SIZES = (256, 1024, 4096, 16384)
+# Near-miss inputs that make backtracking patterns explode (lowercased, as the matcher sees text)
+SYNTHETIC: dict[str, str] = {
+    "word_run": "very ",
+    "letter_run": "a",
+    "digit_run": "1 ",
+    "punct_run": "so, ",
+    "space_run": "i   ",
+}
+TIMING_FLOOR_S = 0.0005  # below this, growth ratios are noise
+
+
+def load_corpus(paths: list[str]) -> list[str]:
+    """Transcript texts: session JSON (speaker_segments / raw_transcript) or plain text files."""
+    texts = []
+    for path in [SAMPLE_SESSION, *map(Path, paths)]:
+        raw = Path(path).read_text(encoding="utf-8")
+        if Path(path).suffix == ".json":
+            data = json.loads(raw)
+            segments = [s.get("text", "") for s in data.get("speaker_segments", [])] if isinstance(data, dict) else []
+            raw = " ".join(s for s in segments if s) or (data.get("raw_transcript", "") if isinstance(data, dict) else "")
+        if raw:
+            texts.append(raw.lower())
+    return texts
+
+
+def build_inputs(corpus: list[str], sizes: tuple[int, ...]) -> dict[str, dict[int, str]]:
+    """family -> size -> text; "transcript" is the real corpus repeated to size."""
+    units = {"transcript": " ".join(corpus) + " ", **SYNTHETIC}
+    return {family: {size: (unit * (size // len(unit) + 1))[:size] for size in sizes} for family, unit in units.items()}
+
+
+# --- Worker side ---
+
+_CORPUS: list[str] = []
+_INPUTS: dict[str, dict[int, str]] = {}
+
+
+def _init_worker(corpus: list[str], inputs: dict[str, dict[int, str]]) -> None:
+    global _CORPUS, _INPUTS
+    _CORPUS, _INPUTS = corpus, inputs
+
+
+def _time_scan(regex: re.Pattern[str], text: str, runs: int = 3) -> float:
+    best = math.inf
+    for _ in range(runs):
+        started = time.perf_counter()
+        for _m in regex.finditer(text):
+            pass
+        best = min(best, time.perf_counter() - started)
+        if best > 0.01:
+            break
+    return best
+
+
+def _profile_pattern(pattern: str, budget_s: float) -> dict[str, Any]:
+    regex = re.compile(pattern, re.IGNORECASE)
+    corpus_s = sum(_time_scan(regex, text) for text in _CORPUS)
+    scaling: dict[str, list[float]] = {}
+    for family, texts in _INPUTS.items():
+        times = scaling[family] = []
+        for size in sorted(texts):
+            times.append(_time_scan(regex, texts[size]))
+            if times[-1] > budget_s:
+                break
+    return {"corpus_s": corpus_s, "scaling": scaling}
+
+
+# --- Analysis ---
+
+def growth_exponent(sizes: tuple[int, ...], times: list[float]) -> float | None:
+    """Log-log slope between the two largest sizes measured above the noise floor (1 = linear)."""
+    points = [(s, t) for s, t in zip(sizes, times) if t >= TIMING_FLOOR_S]
+    if len(points) < 2:
+        return None
+    (s1, t1), (s2, t2) = points[-2], points[-1]
+    return math.log(t2 / t1) / math.log(s2 / s1)
+
+
+def classify(result: dict[str, Any], sizes: tuple[int, ...], budget_s: float, max_exponent: float) -> str | None:
+    """Why the pattern is flagged, or None."""
+    if result.get("timeout"):
+        return "timeout"
+    worst = None
+    for family, times in result["scaling"].items():
+        if times[-1] > budget_s:
+            return f"over budget on {family} ({times[-1] * 1000:.0f}ms at {sizes[len(times) - 1]} chars)"
+        exponent = growth_exponent(sizes, times)
+        if exponent is not None and exponent > max_exponent and (worst is None or exponent > worst[1]):
+            worst = (family, exponent)
+    if worst:
+        return f"super-linear on {worst[0]} (n^{worst[1]:.1f})"
+    return None
+
+
+def profile(pack: RulePack, corpus: list[str], sizes: tuple[int, ...], budget_ms: float, max_exponent: float, limit: int | None = None) -> dict[str, Any]:
+    # Same pattern text is profiled once, whichever rules share it
+    rules_by_pattern: dict[str, list[tuple[dict[str, Any], str]]] = {}
+    for rule, rule_hash in pack.entries():
+        if not (is_trigger_rule(rule) or is_article_rule(rule) or is_verb_rule(rule)):
+            continue
+        pattern = rule["triggerPattern"]
+        try:
+            re.compile(pattern, re.IGNORECASE)
+        except (re.error, TypeError):
+            continue
+        rules_by_pattern.setdefault(pattern, []).append((rule, rule_hash))
+    patterns = list(rules_by_pattern)[:limit] if limit else list(rules_by_pattern)
+
+    budget_s = budget_ms / 1000
+    # Every measurement may use the full budget (x3 runs); anything longer is a hang
+    kill_after = budget_s * 3 * (len(sizes) * (len(SYNTHETIC) + 1) + len(corpus)) + 5
+    inputs = build_inputs(corpus, sizes)
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    pool = context.Pool(1, initializer=_init_worker, initargs=(corpus, inputs))
+    results: dict[str, dict[str, Any]] = {}
+    started = time.perf_counter()
+    try:
+        for i, pattern in enumerate(patterns, 1):
+            try:
+                results[pattern] = pool.apply_async(_profile_pattern, (pattern, budget_s)).get(timeout=kill_after)
+            except multiprocessing.TimeoutError:
+                pool.terminate()
+                pool = context.Pool(1, initializer=_init_worker, initargs=(corpus, inputs))
+                results[pattern] = {"timeout": True, "scaling": {}, "corpus_s": None}
+            if i % 500 == 0:
+                print(f"  {i}/{len(patterns)} patterns ({time.perf_counter() - started:.0f}s)", file=sys.stderr)
+    finally:
+        pool.terminate()
+
+    quarantined = load_quarantine()
+    report_rows = []
+    for pattern, result in results.items():
+        reason = classify(result, sizes, budget_s, max_exponent)
+        exponents = {f: growth_exponent(sizes, t) for f, t in result["scaling"].items()}
+        for rule, rule_hash in rules_by_pattern[pattern]:
+            report_rows.append({
+                "rule_hash": rule_hash,
+                "phenomenon_id": rule.get("phenomenon_id"),
+                "pattern": pattern,
+                "corpus_ms": round(result["corpus_s"] * 1000, 3) if result["corpus_s"] is not None else None,
+                "worst_ms": round(max((t[-1] for t in result["scaling"].values()), default=0) * 1000, 3),
+                "exponent": round(max((e for e in exponents.values() if e is not None), default=0.0), 2),
+                "flagged": reason,
+                "quarantined": rule_hash in quarantined,
+            })
+    report_rows.sort(key=lambda r: (r["flagged"] is None, -(r["corpus_ms"] or math.inf)))
+    corpus_total = sum(r["corpus_ms"] or 0 for r in report_rows)
+    return {
+        "pack": pack.version,
+        "patterns": len(patterns),
+        "rules": len(report_rows),
+        "sizes": list(sizes),
+        "budget_ms": budget_ms,
+        "max_exponent": max_exponent,
+        "seconds": round(time.perf_counter() - started, 1),
+        "corpus_chars": sum(len(t) for t in corpus),
+        "corpus_ms_total": round(corpus_total, 1),
+        "flagged": [r for r in report_rows if r["flagged"]],
+        "rules_profile": report_rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile trigger patterns and flag catastrophic backtracking.")
+    parser.add_argument("--pack", default=str(DEFAULT_PACK_PATH), help="Rule pack JSON (default: data/unified_phenomena.json)")
+    parser.add_argument("--corpus", nargs="*", default=[], help="Extra transcripts (session JSON or plain text)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Synthetic input sizes in chars")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="Max time for one scan of one input")
+    parser.add_argument("--max-exponent", type=float, default=1.5, help="Flag growth above n^x between the two largest sizes")
+    parser.add_argument("--limit", type=int, help="Only the first N distinct patterns")
+    parser.add_argument("--json", dest="json_path", help="Write the full report to this file")
+    parser.add_argument("--quarantine", action="store_true", help=f"Add flagged rules to {QUARANTINE_PATH.relative_to(ROOT)}")
+    args = parser.parse_args()
+
+    pack = RulePack.load(args.pack)
+    sizes = tuple(sorted(args.sizes))
+    report = profile(pack, load_corpus(args.corpus), sizes, args.budget_ms, args.max_exponent, args.limit)
+
+    print(f"📏 {report['patterns']} patterns ({report['rules']} rules) of pack {report['pack']} in {report['seconds']}s")
+    print(f"   Real corpus: {report['corpus_chars']} chars, {report['corpus_ms_total']}ms across all patterns")
+    print("   Slowest on the corpus:")
+    for row in sorted(report["rules_profile"], key=lambda r: -(r["corpus_ms"] or 0))[:10]:
+        print(f"     {row['corpus_ms']:>8}ms  {row['phenomenon_id']}  {row['pattern'][:70]}")
+    print(f"🚩 {len(report['flagged'])} flagged:")
+    for row in report["flagged"]:
+        print(f"     {row['phenomenon_id']}  {row['flagged']}  {row['pattern'][:70]}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.quarantine and report["flagged"]:
+        entries = load_quarantine()
+        for row in report["flagged"]:
+            entries.setdefault(row["rule_hash"], {
+                "rule_hash": row["rule_hash"],
+                "phenomenon_id": row["phenomenon_id"],
+                "pattern": row["pattern"],
+                "reason": row["flagged"],
+            })
+        save_quarantine(list(entries.values()))
+        print(f"🔒 {len(entries)} rules quarantined in {QUARANTINE_PATH} (SIGHUP the server to apply)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,132 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import os
 import logging
 import json
+import time
+import asyncio
+import signal
 from analyzers.llm_gateway import generate_analysis
 from analyzers.schemas import Turn
+from lib.warmup import WarmupManager
 
 # Initialize Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("SemanticServer")
 
-app = FastAPI(title="Semantic Server (MiniGuru)", version="2.0.0")
+# --- STARTUP PHASES ---
+# Heavy imports and data loads happen here, in the background, instead of on the first request.
+
+def _verify_nlp_bundle():
+    from analyzers.nlp_resources import verify_or_warn
+    if not verify_or_warn():
+        raise RuntimeError("NLP bundle incomplete (run analyzers/nlp_resources.py prepare)")
+
+def _import_analyzers():
+    import analyzers.session_analyzer # TextBlob + NLTK
+    import analyzers.fluency_analyzer
+    import analyzers.amalgum_analyzer
+    import analyzers.article_analyzer
+    import analyzers.preposition_analyzer
+    import analyzers.learner_error_analyzer
+
+def _load_pos_tagger():
+    from analyzers.pos_tagger import get_pos_tagger
+    tagger = get_pos_tagger()
+    tagger.tag(["warm", "up"])
+    return tagger
+
+def _load_rule_pack():
+    from analyzers.rule_pack import get_rules
+    return get_rules()
+
+async def _load_phenomena_matcher():
+    from analyzers.phenomena_matcher import ErrorPhenomenonMatcher
+    matcher = ErrorPhenomenonMatcher()
+    await matcher.initialize()
+    return matcher
+
+def _load_vocabularies():
+    # The class SessionAnalyzer uses, so its per-request engines hit the shared cache
+    from analyzers.session_analyzer import LexicalEngine
+    return LexicalEngine()
+
+def _load_register_lexicon():
+    from analyzers.amalgum_analyzer import load_lexicon
+    return load_lexicon()
+
+def _load_verb_transitivity():
+    from analyzers.verb_analyzer import VerbAnalyzer
+    return VerbAnalyzer()
+
+warmup = WarmupManager()
+warmup.register("nlp_bundle", _verify_nlp_bundle, required=False)
+warmup.register("analyzers", _import_analyzers)
+warmup.register("pos_tagger", _load_pos_tagger, required=False)
+warmup.register("rule_pack", _load_rule_pack)
+warmup.register("phenomena_matcher", _load_phenomena_matcher)
+warmup.register("vocabularies", _load_vocabularies, required=False)
+warmup.register("verb_transitivity", _load_verb_transitivity, required=False)
+warmup.register("register_lexicon", _load_register_lexicon, required=False)
+
+# --- RULE-PACK HOT RELOAD ---
+# SIGHUP, or a change to data/unified_phenomena.json (polled every RULE_PACK_POLL_SECONDS, 0 disables),
+# builds the new rule engine in a worker thread and swaps it in; requests in flight keep their snapshot.
+RULE_PACK_POLL_SECONDS = float(os.getenv("RULE_PACK_POLL_SECONDS", "10"))
+_reload_task: asyncio.Task | None = None
+
+def _schedule_rule_reload():
+    global _reload_task
+    if _reload_task is None or _reload_task.done():
+        from analyzers.rule_pack import reload_rules
+        _reload_task = asyncio.create_task(asyncio.to_thread(reload_rules))
+
+async def _watch_rule_pack():
+    from analyzers.rule_pack import pack_changed
+    while True:
+        await asyncio.sleep(RULE_PACK_POLL_SECONDS)
+        if warmup.get("rule_pack") is not None and await asyncio.to_thread(pack_changed):
+            _schedule_rule_reload()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup.start()
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, _schedule_rule_reload)
+    except (NotImplementedError, AttributeError, RuntimeError):
+        logger.warning("⚠️ SIGHUP rule-pack reload unavailable on this platform")
+    watcher = asyncio.create_task(_watch_rule_pack()) if RULE_PACK_POLL_SECONDS > 0 else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+        await asyncio.gather(watcher, return_exceptions=True)
+    await warmup.stop()
+
+app = FastAPI(title="Semantic Server (MiniGuru)", version="2.0.0", lifespan=lifespan)
 
 class AnalysisRequest(BaseModel):
     student_name: str
     transcript_text: str
     turns: list[Turn] # Raw turns or simplified
     system_prompt: str | None = None
+    student_l1: str | None = None  # First language, for the phenomena index's by-L1 queries
+    session_id: str | None = None  # Lesson key from ingest (transcript id); defaults to a hash of the transcript
+    speaker_map: dict[str, str] | None = None  # Diarization label -> name; defaults to A = tutor, B = student
 
 @app.get("/health")
 async def health_check():
+    """Liveness only. Use /ready to know whether the analyzers are warm."""
     return {"status": "ok", "service": "Semantic Server", "version": "2.0.0"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once every required component is warm, 503 until then."""
+    report = warmup.report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
 @app.post("/analyze")
 async def analyze_session(request: AnalysisRequest):
     """
@@ -29,6 +134,10 @@ async def analyze_session(request: AnalysisRequest):
     """
     logger.info(f"🧠 Analysis requested for student: {request.student_name}")
 
+    # The whole request runs on one rule-pack snapshot, even if a reload lands meanwhile
+    from analyzers.rule_pack import get_rules
+    rules = get_rules()
+
     # --- 1. LOCAL ANALYSIS (The Deterministic Layer) ---
     logger.info("⚙️ Running Local Analysis Suite...")
     local_insights = {
@@ -40,59 +149,124 @@ async def analyze_session(request: AnalysisRequest):
     }
     
     try:
+        # Same lesson = same session (ingest passes its key), so retries don't double count in the student stores
+        from analyzers.transcript_search import DEFAULT_TUTOR_NAME, lesson_key, lesson_speaker_map
+        session_id = request.session_id or lesson_key(request.transcript_text)
+        speaker_map = request.speaker_map or lesson_speaker_map(request.student_name)
+
         # Prepare data structure for SessionAnalyzer
         session_data = {
             "turns": [t.dict() for t in request.turns] if request.turns else [],
             "transcript": request.transcript_text,
             "student_name": request.student_name,
-            "speaker_map": {"A": request.student_name, "B": "Tutor"} # Assumption for now
+            "teacher_name": next((n for n in speaker_map.values() if n != request.student_name), DEFAULT_TUTOR_NAME),
+            "session_id": session_id,
+            "speaker_map": speaker_map,
         }
         
-        # 1.1 Session & Metrics (Core CAF)
-        from analyzers.session_analyzer import SessionAnalyzer
-        core_analyzer = SessionAnalyzer(session_data)
-        local_insights["metrics"] = core_analyzer.analyze_all()
-        student_text = core_analyzer.student_full_text
-
-        # 1.2 Phenomena Matcher (Static Patterns)
-        from analyzers.phenomena_matcher import ErrorPhenomenonMatcher
-        matcher = ErrorPhenomenonMatcher()
-        await matcher.initialize()
-        local_insights["phenomena"] = matcher.match(student_text)
-
-        # 1.3 Fluency Analysis (Timing/Hesitation)
-        from analyzers.fluency_analyzer import FluencyAnalyzer
-        fluency = FluencyAnalyzer()
-        # Extract word timing from turns if available
-        # This assumes Turns provided in request have word-level data
-        all_words = []
-        for turn in request.turns:
-            if hasattr(turn, 'words') and turn.words:
-                all_words.extend([w.dict() if hasattr(w, 'dict') else w for w in turn.words])
-        if all_words:
-            local_insights["fluency"] = fluency.analyze_hesitation(all_words)
-
-        # 1.4 Register & Genre (Amalgum)
-        from analyzers.amalgum_analyzer import AmalgumAnalyzer
-        amalgum = AmalgumAnalyzer()
-        local_insights["register"] = {
-            "scores": amalgum.analyze_register(student_text),
-            "classification": amalgum.get_genre_classification(student_text)
-        }
+        # Stages 1.1-1.5 (rule-based analyzers reuse per-sentence results via the sentence cache)
+        from analyzers.rule_pack import pinned_rules
+        from analyzers.sentence_cache import get_sentence_cache, track_usage
+        timings = {}
+        stage_started = suite_started = time.perf_counter()
+        with track_usage() as cache_usage, pinned_rules(rules):
+            # 1.1 Session & Metrics (Core CAF)
+            from analyzers.session_analyzer import SessionAnalyzer
+            core_analyzer = SessionAnalyzer(session_data)
+            local_insights["metrics"] = core_analyzer.analyze_all()
+            student_text = core_analyzer.student_full_text
+            timings["session_ms"] = _elapsed_ms(stage_started)
+
+            # 1.2 Phenomena Matcher (Static Patterns)
+            stage_started = time.perf_counter()
+            matcher = warmup.get("phenomena_matcher")
+            if matcher is None:
+                from analyzers.phenomena_matcher import ErrorPhenomenonMatcher
+                matcher = ErrorPhenomenonMatcher()
+                await matcher.initialize()
+            local_insights["phenomena"] = matcher.match(student_text)
+            timings["phenomena_ms"] = _elapsed_ms(stage_started)
+
+            # 1.3 Fluency Analysis (Timing/Hesitation)
+            stage_started = time.perf_counter()
+            from analyzers.fluency_analyzer import FluencyAnalyzer
+            fluency = FluencyAnalyzer()
+            # Word timing of the student's turns only (tutor hesitations aren't the student's)
+            student_words = [w for t in core_analyzer.student_turns_list for w in (t.get('words') or [])]
+            if student_words:
+                local_insights["fluency"] = fluency.analyze_hesitation(student_words)
+            timings["fluency_ms"] = _elapsed_ms(stage_started)
 
-        # 1.5 Granular Grammar Checks
-        from analyzers.article_analyzer import ArticleAnalyzer
-        from analyzers.preposition_analyzer import PrepositionAnalyzer
-        from analyzers.learner_error_analyzer import LearnerErrorAnalyzer
+            # 1.4 Register & Genre (Amalgum)
+            stage_started = time.perf_counter()
+            from analyzers.amalgum_analyzer import AmalgumAnalyzer
+            amalgum = AmalgumAnalyzer()
+            local_insights["register"] = {
+                **amalgum.register_profile(student_text),
+                "turns": amalgum.analyze_turns([t.get('transcript', t.get('text', '')) for t in core_analyzer.student_turns_list])
+            }
+            timings["register_ms"] = _elapsed_ms(stage_started)
+
+            # 1.5 Granular Grammar Checks
+            stage_started = time.perf_counter()
+            from analyzers.article_analyzer import ArticleAnalyzer
+            from analyzers.preposition_analyzer import PrepositionAnalyzer
+            from analyzers.learner_error_analyzer import LearnerErrorAnalyzer
         
-        local_insights["grammar_checks"] = {
-            "articles": ArticleAnalyzer().analyze(student_text),
-            "prepositions": PrepositionAnalyzer().analyze(student_text),
-            "learner_errors": LearnerErrorAnalyzer().analyze(student_text)
-        }
+            local_insights["grammar_checks"] = {
+                "articles": ArticleAnalyzer().analyze(student_text),
+                "prepositions": PrepositionAnalyzer().analyze(student_text),
+                "learner_errors": LearnerErrorAnalyzer().analyze(student_text)
+            }
+            timings["grammar_ms"] = _elapsed_ms(stage_started)
+        timings["local_suite_ms"] = _elapsed_ms(suite_started)
+        timings["sentence_cache"] = {**cache_usage.to_dict(), "process": get_sentence_cache().stats()}
+        local_insights["timings"] = timings
 
         logger.info(f"✅ Local Suite Complete. Register: {local_insights['register']['classification']}")
 
+        # 1.6-1.7 need student speech: ingest's transcript-only pass has none (its lesson is recorded by the tiered suite)
+        if not student_text.strip():
+            logger.info("ℹ️ No student speech; skipping longitudinal metrics and phenomena index")
+        else:
+            # 1.6 Longitudinal metrics
+            try:
+                from analyzers.student_metrics import get_student_metrics_store, summarize_session
+                summary = summarize_session(
+                    local_insights["metrics"].get("student_metrics"),
+                    student_text,
+                    learner_errors=local_insights["grammar_checks"]["learner_errors"],
+                    phenomena=local_insights["phenomena"],
+                    register=local_insights["register"],
+                    hesitation_count=local_insights["fluency"].get("hesitation_count"),
+                )
+                get_student_metrics_store().record_session(request.student_name, session_id, summary)
+            except Exception as e:
+                logger.warning(f"⚠️ Student metrics update failed: {e}")
+
+            # 1.7 Phenomena index (postings per student/session/turn)
+            try:
+                from analyzers.phenomena_index import collect_postings, get_phenomena_index
+                postings = collect_postings(
+                    phenomena=local_insights["phenomena"],
+                    articles=local_insights["grammar_checks"]["articles"],
+                    prepositions=local_insights["grammar_checks"]["prepositions"],
+                    learner_errors=local_insights["grammar_checks"]["learner_errors"],
+                )
+                turn_texts = [t.get('transcript', t.get('text', '')) for t in core_analyzer.student_turns_list]
+                get_phenomena_index().index_session(request.student_name, session_id, postings, turn_texts=turn_texts, l1=request.student_l1,
+                                                    text=student_text, rule_pack=rules.pack.version, rule_analyzers=("phenomena", "articles"))
+            except Exception as e:
+                logger.warning(f"⚠️ Phenomena index update failed: {e}")
+
+        # 1.8 Transcript search (ingest sends only the transcript text and indexes its own turns under the same key)
+        if session_data["turns"]:
+            try:
+                from analyzers.transcript_search import get_transcript_search
+                get_transcript_search().index_session(session_id, request.student_name, session_data["turns"], speaker_map=speaker_map, source="analyze")
+            except Exception as e:
+                logger.warning(f"⚠️ Transcript search indexing failed: {e}")
+
     except Exception as e:
         logger.error(f"❌ Local Analysis Failed: {e}")
         local_insights["error"] = str(e)
@@ -138,6 +312,7 @@ Ensure you cross-reference the 'phenomena' found by the local matcher.
 
         return {
             "student": request.student_name,
+            "rule_pack": {"version": rules.pack.version, "loaded_at": rules.loaded_at},
             "local_analysis": local_insights,
             "llm_analysis": llm_result
         }
@@ -146,6 +321,85 @@ Ensure you cross-reference the 'phenomena' found by the local matcher.
         logger.error(f"Analysis failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+@app.get("/rules")
+async def rule_pack_status():
+    """The rule pack new requests run on (version, rule counts, when it was loaded)."""
+    from analyzers.rule_pack import get_rules
+    return get_rules().describe()
+
+@app.get("/students/{name}/trends")
+async def student_trends(name: str, metrics: str | None = None, last: int = 20):
+    """
+    Longitudinal metrics for one student: running mean/std, EWMA, P10/P50/P90
+    and the last `last` values per metric. `metrics` is a comma-separated filter.
+    """
+    from analyzers.student_metrics import get_student_metrics_store
+    wanted = [m.strip() for m in metrics.split(",") if m.strip()] if metrics else None
+    report = get_student_metrics_store().trends(name, wanted, last=max(1, min(last, 500)))
+    if not report["sessions"]:
+        raise HTTPException(status_code=404, detail=f"No recorded sessions for student '{name}'")
+    return report
+
+@app.get("/students/{name}/vocabulary")
+async def student_vocabulary(name: str, band: int | None = None, limit: int = 50):
+    """
+    Cumulative productive vocabulary: NGSL band coverage and the most frequent
+    words not yet produced (optionally within one NGSL band).
+    """
+    from analyzers.student_vocabulary import get_student_vocabulary
+    vocabulary = get_student_vocabulary()
+    report = vocabulary.report(name)
+    if not report["sessions"]:
+        raise HTTPException(status_code=404, detail=f"No recorded sessions for student '{name}'")
+    report["never_produced"] = vocabulary.never_produced(name, band=band, limit=max(1, min(limit, 1000)))
+    return report
+
+@app.get("/phenomena/top")
+async def phenomena_top(by: str = "phenomenon", days: int | None = None, since: str | None = None, until: str | None = None, limit: int = 10):
+    """Most frequent phenomena in the window, optionally the top `limit` per category, L1 or student."""
+    from analyzers.phenomena_index import GROUPINGS, get_phenomena_index, since_date
+    if by not in GROUPINGS:
+        raise HTTPException(status_code=400, detail=f"'by' must be one of {list(GROUPINGS)}")
+    return get_phenomena_index().top(since_date(days, since), until, by=by, limit=max(1, min(limit, 100)))
+
+@app.get("/phenomena/{phenomenon}/students")
+async def phenomena_students(phenomenon: str, days: int | None = None, since: str | None = None, until: str | None = None, min_sessions: int = 2):
+    """Students who hit a phenomenon (id, or item/category substring) in at least `min_sessions` sessions."""
+    from analyzers.phenomena_index import get_phenomena_index, since_date
+    return get_phenomena_index().students(phenomenon, since_date(days, since), until, min_sessions=max(1, min_sessions))
+
+@app.get("/phenomena/{phenomenon}/postings")
+async def phenomena_postings(phenomenon: str, student: str | None = None, days: int | None = None, since: str | None = None, until: str | None = None, limit: int = 100):
+    """Occurrences of a phenomenon: student, session, turn and character span."""
+    from analyzers.phenomena_index import get_phenomena_index, since_date
+    return get_phenomena_index().postings(phenomenon, student=student, since=since_date(days, since), until=until, limit=max(1, min(limit, 1000)))
+
+@app.get("/search")
+async def search_transcripts(q: str, student: str | None = None, role: str | None = None, phrase: bool = False, near: int | None = None,
+                             since: str | None = None, until: str | None = None, limit: int = 20, order: str = "recent"):
+    """
+    Full-text search over every indexed turn. `q` is FTS5 syntax unless `phrase`
+    (exact phrase) or `near` (words within N tokens) is given. Newest first, or order=relevance.
+    """
+    from analyzers.transcript_search import get_transcript_search, near_query, phrase_query
+    query = phrase_query(q) if phrase else near_query(q, near) if near else q
+    try:
+        return get_transcript_search().search(query, student=student, role=role, since=since, until=until, limit=max(1, min(limit, 200)), order=order)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/search/turns/{turn_id}/context")
+async def search_turn_context(turn_id: int, window: int = 2):
+    """The turns around a search hit, with timestamps for jumping back into the recording."""
+    from analyzers.transcript_search import get_transcript_search
+    turns = get_transcript_search().context(turn_id, before=window, after=window)
+    if not turns:
+        raise HTTPException(status_code=404, detail=f"Unknown turn {turn_id}")
+    return turns
+
 # --- 3. OPTIONAL CALENDAR INTEGRATION ---
 @app.post("/calendar/create-event")
 async def create_event(summary: str, description: str, start_time: str, end_time: str):
@@ -184,6 +438,13 @@ async def get_next_lesson():
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
-    import uvicorn
     port = int(os.getenv("PORT", 8080))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        # Pre-fork: load read-only corpora once in the master, share them copy-on-write
+        import prefork
+        prefork.serve(app, host="0.0.0.0", port=port, workers=workers, preload=warmup.preload,
+                      report_path=os.getenv("PREFORK_REPORT_PATH"))
+    else:
+        import uvicorn
+        uvicorn.run(app, host="0.0.0.0", port=port)
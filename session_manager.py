@@ -0,0 +1,185 @@
+"""
+Live Session Manager.
+Owns every concurrent live lesson in the websocket server: per-session
+streaming client, audio capture, turn buffer, live analytics and the set of
+websocket clients subscribed to it.
+"""
+
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, TypedDict
+
+from analyzers.live_analytics import LiveSessionAnalytics
+from analyzers.transcript_search import lesson_speaker_map
+
+logger = logging.getLogger("SessionManager")
+
+MAX_LIVE_SESSIONS = int(os.getenv("MAX_LIVE_SESSIONS", "4"))
+
+
+# --- TYPES ---
+class SessionTurn(TypedDict):
+    turn_order: int
+    transcript: str
+    speaker: str
+    words: List[Dict[str, Any]]
+    timestamp: str
+
+class SessionData(TypedDict):
+    session_id: Optional[str]
+    start_time: Optional[str]
+    student_name: str
+    turns: List[SessionTurn]
+    file_path: Optional[str]
+    notes: str
+    audio_path: Optional[str]
+
+
+class SessionLimitError(RuntimeError):
+    """Raised when a new live session would exceed MAX_LIVE_SESSIONS."""
+
+
+class LiveSession:
+    """State for one live lesson. Mutated from its streaming thread and the event loop."""
+
+    def __init__(self, student_name: str, device_index: int | None = None, matcher: Any | None = None, owner: Any | None = None,
+                 speaker_map: Mapping[str, str] | None = None):
+        self.session_id = uuid.uuid4().hex
+        self.device_index = device_index
+        self.owner = owner  # websocket client that started the session
+        self.speaker_map = dict(speaker_map or lesson_speaker_map(student_name))
+        self.data: SessionData = {
+            "session_id": self.session_id,
+            "start_time": None,
+            "student_name": student_name,
+            "turns": [],
+            "file_path": None,
+            "notes": "",
+            "audio_path": None
+        }
+        self.aai_session_id: str | None = None
+        self.analytics = LiveSessionAnalytics(student_name, speaker_map=self.speaker_map, matcher=matcher)
+        self.audio: Any | None = None
+        self.thread: threading.Thread | None = None
+        self.subscribers: set[Any] = set()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.handed_off = False  # recording passed on for full analysis (exactly once per session)
+
+    def add_turn(self, turn: SessionTurn) -> dict[str, Any]:
+        """Appends a finished turn and returns the live metrics delta for it."""
+        with self.lock:
+            turn["turn_order"] = len(self.data["turns"]) + 1
+            self.data["turns"].append(turn)
+        return self.analytics.update_turn(dict(turn))
+
+    def attach_audio(self, open_stream: Any) -> Any | None:
+        """Opens capture via `open_stream()` unless the session was stopped first (e.g. during connect)."""
+        with self.lock:
+            if self.stopped.is_set():
+                return None
+            self.audio = open_stream()
+            return self.audio
+
+    def claim_handoff(self) -> bool:
+        """True for the first caller only: the UI's end_session and the stream ending on its own may race."""
+        with self.lock:
+            if self.handed_off:
+                return False
+            self.handed_off = True
+            return True
+
+    def stop(self) -> None:
+        """Closes audio capture; the streaming thread then drains and disconnects."""
+        with self.lock:
+            self.stopped.set()
+            audio = self.audio
+        if audio is not None:
+            try:
+                audio.close()
+            except Exception as e:
+                logger.warning(f"Audio close failed for {self.session_id}: {e}")
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=10.0)
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "aai_session_id": self.aai_session_id,
+            "student_name": self.data["student_name"],
+            "start_time": self.data["start_time"],
+            "turns": len(self.data["turns"]),
+            "subscribers": len(self.subscribers),
+        }
+
+
+class SessionManager:
+    """Registry of live sessions keyed by session id, with websocket subscriptions."""
+
+    def __init__(self, max_sessions: int = MAX_LIVE_SESSIONS, matcher: Any | None = None):
+        self.max_sessions = max_sessions
+        self.matcher = matcher
+        self.sessions: dict[str, LiveSession] = {}
+        self._lock = threading.Lock()
+
+    def set_matcher(self, matcher: Any | None) -> None:
+        """Phenomena matcher for live turns; set once warm-up finishes, running sessions pick it up."""
+        with self._lock:
+            self.matcher = matcher
+            for session in self.sessions.values():
+                session.analytics.matcher = matcher
+
+    def create(self, student_name: str, device_index: int | None = None, owner: Any | None = None,
+               speaker_map: Mapping[str, str] | None = None) -> LiveSession:
+        with self._lock:
+            if len(self.sessions) >= self.max_sessions:
+                raise SessionLimitError(f"Live session limit reached ({self.max_sessions}).")
+            session = LiveSession(student_name, device_index=device_index, matcher=self.matcher, owner=owner, speaker_map=speaker_map)
+            session.data["start_time"] = datetime.now().isoformat()
+            self.sessions[session.session_id] = session
+        logger.info(f"🚀 Session {session.session_id[:8]} created for {student_name} ({len(self.sessions)}/{self.max_sessions})")
+        return session
+
+    def get(self, session_id: str | None) -> LiveSession | None:
+        return self.sessions.get(session_id) if session_id else None
+
+    def remove(self, session_id: str) -> LiveSession | None:
+        with self._lock:
+            return self.sessions.pop(session_id, None)
+
+    def subscribe(self, client: Any, session_id: str) -> bool:
+        session = self.get(session_id)
+        if session is None:
+            return False
+        session.subscribers.add(client)
+        return True
+
+    def unsubscribe(self, client: Any, session_id: str) -> None:
+        session = self.get(session_id)
+        if session is not None:
+            session.subscribers.discard(client)
+
+    def drop_client(self, client: Any) -> None:
+        for session in list(self.sessions.values()):
+            session.subscribers.discard(client)
+
+    def sessions_for(self, client: Any) -> list[LiveSession]:
+        return [s for s in self.sessions.values() if client in s.subscribers]
+
+    def owned_by(self, client: Any) -> list[LiveSession]:
+        """Sessions the client started (not the ones it only follows)."""
+        return [s for s in self.sessions.values() if s.owner is client]
+
+    def subscribers(self, session_id: str) -> set[Any]:
+        session = self.get(session_id)
+        return set(session.subscribers) if session else set()
+
+    def list(self) -> list[dict[str, Any]]:
+        return [s.describe() for s in self.sessions.values()]
+
+    def close_all(self) -> None:
+        for session in list(self.sessions.values()):
+            session.stop()
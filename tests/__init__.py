@@ -0,0 +1,10 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Analyzers keep derived state (sentence cache, rule pack snapshots) in the local store;
+# point it at a throwaway directory so test runs never write into the repo's .semantic_store.
+_store = tempfile.mkdtemp(prefix="semantic_store_tests_")
+os.environ["SEMANTIC_STORE_DIR"] = _store
+atexit.register(shutil.rmtree, _store, True)
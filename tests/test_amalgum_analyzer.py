@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.amalgum_analyzer import AmalgumAnalyzer
+
+LEXICON = """marker\tregister\tweight
+moreover\tacademic\t1.0
+in conclusion\tacademic\t2.0
+like\tconversational\t0.5
+you know\tconversational\t1.0
+"""
+
+
+class TestAmalgumAnalyzer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with tempfile.NamedTemporaryFile("w", suffix=".tsv", delete=False) as f:
+            f.write(LEXICON)
+        cls.analyzer = AmalgumAnalyzer(lexicon_path=f.name)
+        os.unlink(f.name)
+
+    def test_word_bounded_counts_per_thousand_tokens(self):
+        # "likely" is not "like"; "like" twice counts twice; 10 tokens
+        profile = self.analyzer.register_profile("It is likely, like, you know, like that thing here")
+        self.assertEqual(profile["tokens"], 10)
+        scores = profile["scores"]
+        self.assertEqual(set(scores), {"academic", "conversational"})
+        self.assertEqual(scores["conversational"], 200.0)
+        self.assertEqual(scores["academic"], 0.0)
+
+    def test_per_turn_matches_single_text_scoring(self):
+        turns = ["Moreover, in conclusion the data hold.", "You know, like, whatever.", ""]
+        results = self.analyzer.analyze_turns(turns)
+        self.assertEqual([r["classification"] for r in results], ["Academic", "Conversational", "Neutral"])
+        for turn, result in zip(turns, results):
+            self.assertEqual({k: v for k, v in result.items() if k != "turn"}, self.analyzer.register_profile(turn))
+
+
+if __name__ == '__main__':
+    unittest.main()
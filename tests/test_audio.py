@@ -3,6 +3,9 @@ from unittest.mock import patch, MagicMock
 import numpy as np
 import sys
 import os
+import tempfile
+import time
+import wave
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -76,5 +79,82 @@ class TestMonoMicrophoneStream(unittest.TestCase):
         with self.assertRaises(ValueError):
             MonoMicrophoneStream(device_index=0)
 
+class FakeInputStream:
+    """Stands in for a PyAudio input stream: returns a fixed mono chunk every `period` seconds."""
+
+    def __init__(self, frames, period=0.001):
+        self.chunk = np.arange(frames, dtype=np.int16).tobytes()
+        self.period = period
+
+    def read(self, frames, exception_on_overflow=False):
+        time.sleep(self.period)
+        return self.chunk
+
+    def stop_stream(self): pass
+    def close(self): pass
+
+
+class FakePyAudio:
+    def __init__(self, channels=1, period=0.001):
+        self.channels = channels
+        self.period = period
+
+    def get_device_info_by_index(self, index):
+        return {'maxInputChannels': self.channels, 'name': 'fake_device'}
+
+    def open(self, **kwargs):
+        return FakeInputStream(kwargs['frames_per_buffer'], self.period)
+
+    def terminate(self): pass
+
+
+class TestCapturePipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.audio_path = os.path.join(self.tmp.name, "session.wav")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_disk_stall_does_not_block_delivery(self):
+        """A writer stuck on disk must not delay chunks handed to the transcriber."""
+        stream = MonoMicrophoneStream(device_index=0, audio_path=self.audio_path, frames_per_buffer=160,
+                                      writer_queue_size=4, audio_interface=FakePyAudio())
+        stream.wf.writeframes = lambda data: time.sleep(0.2)
+
+        started = time.monotonic()
+        chunks = [next(stream) for _ in range(20)]
+        elapsed = time.monotonic() - started
+        stream.close()
+
+        self.assertEqual(len(chunks), 20)
+        self.assertLess(elapsed, 1.0)
+        self.assertGreater(stream.stats()['writer_dropped_frames'], 0)
+
+    def test_ring_buffer_drops_oldest_when_consumer_lags(self):
+        stream = MonoMicrophoneStream(device_index=0, audio_path=self.audio_path, frames_per_buffer=160,
+                                      ring_capacity=2, audio_interface=FakePyAudio())
+        deadline = time.monotonic() + 2.0
+        while stream.captured_chunks < 10 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        stream.close()
+
+        stats = stream.stats()
+        self.assertLessEqual(stats['ring_depth'], 2)
+        self.assertEqual(stats['dropped_frames'], (stats['captured_chunks'] - stats['ring_depth']) * 160)
+
+    def test_writer_persists_captured_audio(self):
+        stream = MonoMicrophoneStream(device_index=0, audio_path=self.audio_path, frames_per_buffer=160,
+                                      audio_interface=FakePyAudio(period=0.005))
+        for _ in range(5):
+            next(stream)
+        stream.close()
+
+        with wave.open(self.audio_path, 'rb') as wf:
+            self.assertEqual(wf.getnchannels(), 1)
+            self.assertEqual(wf.getnframes(), stream.stats()['captured_chunks'] * 160)
+        self.assertGreaterEqual(stream.stats()['avg_latency_ms'], 0.0)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from broadcaster import Broadcaster
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.close_code = None
+
+    async def send(self, payload):
+        await self.gate.wait()
+        self.sent.append(json.loads(payload))
+
+    async def close(self, code=1000, reason=""):
+        self.close_code = code
+
+
+class TestBroadcaster(unittest.IsolatedAsyncioTestCase):
+    async def test_partials_are_coalesced_for_blocked_client(self):
+        broadcaster = Broadcaster()
+        fast, slow = FakeWebSocket(), FakeWebSocket()
+        slow.gate.clear()
+        broadcaster.register(fast)
+        broadcaster.register(slow)
+        await asyncio.sleep(0)
+
+        # First partial is picked up by the blocked sender; the rest queue up
+        for i in range(5):
+            broadcaster.publish({"message_type": "partial", "text": str(i)})
+            await asyncio.sleep(0)
+        broadcaster.publish({"message_type": "transcript", "transcript": "done"})
+        await asyncio.sleep(0)
+
+        self.assertEqual(len(fast.sent), 6)
+        slow.gate.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual([m.get("text") for m in slow.sent if m["message_type"] == "partial"], ["0", "4"])
+        self.assertEqual(slow.sent[-1]["message_type"], "transcript")
+        self.assertEqual(broadcaster.stats()["coalesced"], 3)
+
+    async def test_slow_consumer_is_dropped(self):
+        broadcaster = Broadcaster(max_queue=4, max_overflow=3)
+        slow = FakeWebSocket()
+        slow.gate.clear()
+        channel = broadcaster.register(slow)
+        await asyncio.sleep(0)
+
+        for i in range(10):
+            broadcaster.publish({"message_type": "transcript", "turn_order": i})
+        await asyncio.sleep(0)
+
+        stats = channel.stats()
+        self.assertTrue(stats["closed"])
+        self.assertEqual(stats["dropped"], 3)
+        self.assertEqual(slow.close_code, 1013)
+        await broadcaster.unregister(slow)
+        self.assertEqual(broadcaster.stats()["clients"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
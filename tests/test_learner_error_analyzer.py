@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.learner_error_analyzer import LearnerErrorAnalyzer
+from analyzers.sentence_chunker import split_sentences
+
+
+class TestLearnerErrorAnalyzer(unittest.TestCase):
+    def test_reports_spans_and_overlapping_patterns(self):
+        text = "Yesterday they is having informations and she is have fun. Is raining. Is he here?"
+        errors = LearnerErrorAnalyzer().analyze(text)
+        by_category = {e["category"]: e for e in errors}
+
+        progressive = by_category["Progressive Tense (Possible)"]
+        self.assertEqual(progressive["match"], "they is having")
+        self.assertEqual(text[progressive["start"]:progressive["end"]].lower(), "they is having")
+        self.assertEqual(by_category["Uncountable Noun"]["match"], "informations")
+        # Anchored on "is" (same bucket as the progressive rule's second word)
+        self.assertEqual(by_category["Double Verb Error"]["match"], "is have")
+
+        missing = [e for e in errors if e["category"] == "Missing Subject"]
+        self.assertEqual(len(missing), 1)
+        self.assertEqual(text[missing[0]["start"]:missing[0]["end"]], "Is")
+
+    def test_patterns_load_from_data_file(self):
+        patterns = [
+            {"id": "t1", "pattern": r"\b(go|went) to home\b", "category": "Home", "explanation": "No 'to'."},
+            {"id": "t2", "pattern": r"\b\w+ness\b", "category": "Unanchored", "explanation": "Fallback scan."},
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(patterns, f)
+        try:
+            errors = LearnerErrorAnalyzer(patterns_path=f.name)._check_regex_errors("I went to home in sadness")
+        finally:
+            os.unlink(f.name)
+        self.assertEqual([(e["pattern_id"], e["match"]) for e in errors], [("t1", "went to home"), ("t2", "sadness")])
+
+    def test_group_references_scan_on_their_own(self):
+        patterns = [
+            {"id": "t1", "pattern": r"\b(the|a) \1\b", "category": "Repeated Article", "explanation": "Doubled word."},
+            {"id": "t2", "pattern": r"\bthe (?P<w>\w+) (?P=w)\b", "category": "Repeated Noun", "explanation": "Doubled word."},
+            {"id": "t3", "pattern": r"\bthe (?P<w>\w+) of\b", "category": "Of Phrase", "explanation": "Same group name."},
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(patterns, f)
+        try:
+            errors = LearnerErrorAnalyzer(patterns_path=f.name)._check_regex_errors("I saw the the cat cat and the top of it")
+        finally:
+            os.unlink(f.name)
+        self.assertEqual([(e["pattern_id"], e["match"]) for e in errors],
+                         [("t1", "the the"), ("t2", "the cat cat"), ("t3", "the top of")])
+
+    def test_split_sentences_spans(self):
+        text = "Hello there.  How are you? Fine"
+        self.assertEqual([text[s:e] for s, e, _ in split_sentences(text)], ["Hello there.", "How are you?", "Fine"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.live_analytics import LiveSessionAnalytics
+
+
+class FakeMatcher:
+    def match(self, text):
+        return [{"phenomenon_id": "phen_modal_to", "item": "Modal + to"}] if "can to" in text.lower() else []
+
+
+def _turn(order, speaker, text, start=0, step=400):
+    words = [{"text": w, "start": start + i * step, "end": start + i * step + 300, "confidence": 0.9}
+             for i, w in enumerate(text.split())]
+    return {"turn_order": order, "speaker": speaker, "transcript": text, "words": words}
+
+
+class TestLiveSessionAnalytics(unittest.TestCase):
+
+    def test_running_totals_and_delta(self):
+        analytics = LiveSessionAnalytics("Maria", speaker_map={"A": "Aaron", "B": "Maria"}, matcher=FakeMatcher())
+        analytics.update_turn(_turn(1, "A", "what did you do yesterday"))
+        delta = analytics.update_turn(_turn(2, "B", "um I can to go um home", step=1000))
+
+        self.assertEqual(delta["message_type"], "live_metrics")
+        self.assertEqual(delta["turn"]["fillers"], {"um": 2})
+        self.assertEqual(delta["turn"]["pauses"], 6)
+        self.assertEqual(delta["turn"]["phenomena"][0]["phenomenon_id"], "phen_modal_to")
+
+        totals = delta["totals"]
+        self.assertEqual(totals["talk_ratio"]["student_percentage"], round(7 / 12 * 100, 1))
+        self.assertEqual(totals["speakers"]["B"]["pause_histogram"]["500-1000ms"], 6)
+        self.assertEqual(totals["top_phenomena"], {"phen_modal_to": 1})
+
+    def test_talk_ratio_follows_speaker_map(self):
+        # Student speaks first here: A is the student, "Speaker B" labels resolve too
+        analytics = LiveSessionAnalytics("Maria", speaker_map={"A": "Maria", "B": "Aaron"})
+        analytics.update_turn(_turn(1, "Speaker A", "I went to the market"))
+        delta = analytics.update_turn(_turn(2, "Speaker B", "nice"))
+        self.assertEqual(delta["totals"]["talk_ratio"]["student_percentage"], round(5 / 6 * 100, 1))
+
+    def test_lexical_diversity_accumulates(self):
+        analytics = LiveSessionAnalytics("Maria", speaker_map={"A": "Aaron", "B": "Maria"})
+        analytics.update_turn(_turn(1, "B", "I like cats"))
+        delta = analytics.update_turn(_turn(2, "B", "I like dogs"))
+        self.assertEqual(delta["turn"]["new_types"], 1)
+        self.assertEqual(delta["totals"]["speakers"]["B"]["lexical_diversity"], round(4 / 6, 3))
+
+if __name__ == '__main__':
+    unittest.main()
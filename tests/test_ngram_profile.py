@@ -0,0 +1,48 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.ngram_analyzer import NgramAnalyzer
+from analyzers.ngram_profile import NgramProfile, get_profile
+
+
+class TestNgramProfile(unittest.TestCase):
+    def test_one_pass_counts_all_orders(self):
+        profile = NgramProfile.from_text("You know, I think... you know I think so. You know I think!")
+        self.assertEqual(profile.tokens[:4], ["you", "know", "i", "think"])
+        self.assertEqual(profile.counts[1][("you",)], 3)
+        self.assertEqual(profile.counts[4][("you", "know", "i", "think")], 3)
+        self.assertEqual(profile.total(2), len(profile.tokens) - 1)
+        self.assertEqual(profile.formulaic_sequences(limit=3)[0], {"phrase": "you know", "count": 3, "length": 2})
+
+    def test_sentences_slice_the_token_stream(self):
+        text = "You know, I think... you know I think so.  OK! "
+        profile = NgramProfile.from_text(text)
+        self.assertEqual(profile.tokens, NgramProfile([t for t in (w.strip(".,!").lower() for w in text.split()) if t]).tokens)
+        self.assertEqual([(s, profile.tokens[a:b]) for s, a, b in profile.sentences], [
+            ("You know, I think...", ["you", "know", "i", "think"]),
+            ("you know I think so.", ["you", "know", "i", "think", "so"]),
+            ("OK!", ["ok"]),
+        ])
+
+    def test_overlap_counts_occurrences(self):
+        student = NgramProfile.from_text("I go to home, I go to school")
+        tutor = NgramProfile.from_text("I go to school every day")
+        # Student bigrams: i go x2, go to x2, to home, home i, to school -> 5 of 7 used by the tutor
+        self.assertAlmostEqual(student.overlap(tutor), 5 / 7)
+
+    def test_analyzer_reads_shared_profile(self):
+        text = "There is a lot of things. It is a lot."
+        analyzer = NgramAnalyzer()
+        analyzer.store = None  # seed-bigram path regardless of a built store
+        self.assertIs(analyzer.profile(text), get_profile(text))
+        summary = analyzer.get_summary(text)
+        self.assertEqual(summary["total_bigrams"], 9)
+        self.assertEqual(summary["unusual_bigram_count"], len(analyzer.get_unusual_bigrams(text)))
+        self.assertEqual(summary["naturalness_score"], analyzer.get_naturalness_score(analyzer.profile(text)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import math
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.ngram_analyzer import NgramAnalyzer
+from analyzers.ngram_store import NgramStore, build, ngram_hash
+
+UNIGRAMS = "60\ti\n30\tlike\n10\tcoffee\n"
+BIGRAMS = "50\ti\tlike\n30\tlike\tcoffee\n10\tcoffee\ti\n"
+
+
+class TestNgramStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        (root / "1grams.txt").write_text(UNIGRAMS)
+        (root / "2grams.txt").write_text(BIGRAMS + "bad line\n")
+        self.path = root / "reference.ngs"
+        self.report = build([root / "1grams.txt", root / "2grams.txt"], self.path)
+        self.store = NgramStore(self.path)
+
+    def tearDown(self):
+        del self.store
+        self.tmp.cleanup()
+
+    def test_quantized_conditional_logprobs(self):
+        self.assertEqual(self.report["entries"], 6)
+        self.assertEqual(self.store.max_order, 2)
+        self.assertAlmostEqual(self.store.logprob(("i", "like")), math.log10(50 / 50), delta=0.02)
+        self.assertAlmostEqual(self.store.logprob(("coffee",)), math.log10(10 / 100), delta=0.02)
+        self.assertIsNone(self.store.logprob(("coffee", "like")))
+        codes = self.store.lookup_many(np.array([ngram_hash(("like", "coffee")), ngram_hash(("tea",))], dtype=np.uint64))
+        self.assertGreaterEqual(codes[0], 0)
+        self.assertEqual(codes[1], -1)
+
+    def test_naturalness_uses_reference_model(self):
+        analyzer = NgramAnalyzer(store=self.store)
+        natural = analyzer.get_summary("I like coffee.")
+        scrambled = analyzer.get_summary("Coffee like I.")
+        self.assertGreaterEqual(natural["naturalness_score"], scrambled["naturalness_score"])
+        self.assertLess(natural["perplexity"], scrambled["perplexity"])
+        self.assertEqual(analyzer.get_unusual_bigrams("coffee like"), [("coffee", "like")])
+        self.assertEqual(len(analyzer.score_sentences("I like coffee. Coffee i.")), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers import nlp_resources
+
+
+class TestNLPBundle(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.env = patch.dict(os.environ, {"NLP_DATA_DIR": self.tmp.name})
+        self.env.start()
+        self.manifest = nlp_resources.load_manifest()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def _populate(self):
+        digests = {}
+        for resource in self.manifest["resources"]:
+            path = self.root / resource["path"]
+            path.mkdir(parents=True)
+            (path / "data.txt").write_text(resource["id"])
+            digests[resource["id"]] = nlp_resources._digest(path)
+        lock = {"bundle_version": self.manifest["bundle_version"], "nltk_version": "3.9", "resources": digests}
+        (self.root / nlp_resources.LOCK_FILENAME).write_text(json.dumps(lock))
+
+    def test_empty_bundle_reports_missing(self):
+        report = nlp_resources.verify()
+        self.assertFalse(report["ok"])
+        self.assertEqual(len(report["missing"]), len(self.manifest["resources"]))
+
+    def test_prepared_bundle_verifies_offline(self):
+        self._populate()
+        with patch("nltk.download", side_effect=AssertionError("network access")):
+            self.assertTrue(nlp_resources.verify(deep=True)["ok"])
+            self.assertTrue(nlp_resources.verify_or_warn())
+
+    def test_deep_verify_detects_modified_resource(self):
+        self._populate()
+        first = self.manifest["resources"][0]
+        (self.root / first["path"] / "data.txt").write_text("tampered")
+        self.assertTrue(nlp_resources.verify()["ok"])
+        self.assertEqual(nlp_resources.verify(deep=True)["mismatched"], [first["id"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
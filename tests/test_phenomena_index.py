@@ -0,0 +1,99 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.article_analyzer import ArticleAnalyzer
+from analyzers.phenomena_index import PhenomenaIndex, _compile_rules, _evaluate_rules, collect_postings, since_date, turn_offsets
+from analyzers.rule_pack import RulePack
+
+AGE = {"phenomenon_id": "phen_age", "itemName": "Age with Have", "publicCategory": "Grammar", "subcategory": "Grammar",
+       "triggerPattern": r"\b(i|she)\s+(have|has)\s+\d+\s+years\b"}
+TEACHER = {"phenomenon_id": "phen_teacher", "itemName": "Teacher", "publicCategory": "Lexis", "triggerPattern": r"\bteacher\b"}
+ARTICLE = {"phenomenon_id": "art_missing", "itemName": "Missing article", "publicCategory": "Grammar", "subcategory": "Article",
+           "triggerPattern": r"\bis teacher\b"}
+
+
+class TestPhenomenaIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = PhenomenaIndex(Path(self.tmp.name) / "index.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _article_postings(self, text):
+        return collect_postings(articles=ArticleAnalyzer().analyze(text))
+
+    def test_collect_postings_keys(self):
+        postings = collect_postings(
+            phenomena=[{"phenomenon_id": "phen_1", "item": "Age with have", "internal_category": "Lexis", "match": "i have 20 years", "start": 0, "end": 15}],
+            prepositions=[{"item": "depend of", "match": "depend of", "start": 3, "end": 12}],
+            verbs={"pattern_matches": [], "transitivity_mismatches": [{"verb": "arrive", "issue": "Unexpected object"}]},
+            learner_errors=[{"category": "Double Verb Error", "pattern_id": None, "match": "is have", "start": 1, "end": 8}],
+        )
+        self.assertEqual([p["phenomenon_id"] for p in postings], ["phen_1", "prep_depend_of", "verb_unexpected_object", "lea_double_verb_error"])
+        self.assertEqual(postings[2]["match"], "arrive")
+
+    def test_turns_from_spans(self):
+        turns = ["I have a apple.", "She is nice.", "He bought an car."]
+        text = " ".join(turns)
+        self.assertEqual(turn_offsets(turns), [0, 16, 29])
+        self.index.index_session("Maria", "s1", self._article_postings(text), turn_texts=turns)
+        hits = self.index.postings("art_a_an")
+        self.assertEqual(sorted(h["turn"] for h in hits), [0, 2])
+        self.assertEqual({text[h["start"]:h["end"]] for h in hits}, {"a apple", "an car"})
+
+    def test_reindex_replaces_and_repeat_students(self):
+        for session, day in (("s1", "2026-10-01"), ("s2", "2026-10-08")):
+            self.index.index_session("Maria", session, self._article_postings("I ate a apple."), recorded_at=f"{day}T10:00:00")
+        self.index.index_session("Maria", "s2", self._article_postings("I ate a apple and a egg."), recorded_at="2026-10-08T10:00:00")
+        self.index.index_session("Ken", "k1", self._article_postings("It was a orange."), recorded_at="2026-10-02T10:00:00")
+
+        self.assertEqual(self.index.stats()["postings"], 4)
+        repeat = self.index.students("article", since="2026-10-01")
+        self.assertEqual([(r["student"], r["sessions"], r["hits"]) for r in repeat], [("maria", 2, 3)])
+        self.assertEqual(self.index.students("article", since="2026-10-05", min_sessions=1)[0]["hits"], 2)
+        self.assertEqual(since_date(days=30, since="2026-10-05"), "2026-10-05")
+        self.assertEqual(self.index.students("article", since=since_date(days=3650))[0]["sessions"], 2)
+
+    def test_top_by_l1(self):
+        self.index.index_session("Maria", "s1", self._article_postings("a apple"), l1="Spanish")
+        self.index.index_session("Ken", "k1", self._article_postings("a egg, a owl"))
+        self.index.set_l1("Ken", "Japanese")
+        top = {row["l1"]: row["hits"] for row in self.index.top(by="l1")}
+        self.assertEqual(top, {"Japanese": 2, "Spanish": 1})
+
+
+    def test_apply_rule_pack_differential(self):
+        text = "I have 20 years. She is teacher. She is teacher."
+        old, new = RulePack([AGE, TEACHER]), RulePack([ARTICLE, AGE])
+        with mock.patch.dict(os.environ, {"SEMANTIC_STORE_DIR": self.tmp.name}):
+            old.save_manifest()
+            live = _evaluate_rules(_compile_rules(old.by_hash()), text, ["phenomena", "articles"], set())
+            self.index.index_session("Maria", "s1", live, text=text, rule_pack=old.version)
+            self.index.index_session("Ken", "k1", [], text=text, rule_pack="unknown")
+
+            result = self.index.apply_rule_pack(new)
+            self.assertEqual((result["sessions_updated"], result["sessions_skipped"], result["rules_added"]), (1, 1, 1))
+            self.assertEqual(result["postings_retracted"], 1)
+            self.assertEqual(self.index.postings("phen_teacher"), [])
+            # Matcher: first hit only; ArticleAnalyzer: the repeated match text once
+            self.assertEqual(len(self.index.postings("art_missing")), 2)
+            self.assertEqual(len(self.index.postings("phen_age")), 1)
+            self.assertEqual(self.index.apply_rule_pack(new)["sessions_updated"], 0)
+
+    def test_rule_pack_version(self):
+        self.assertEqual(RulePack([AGE, TEACHER]).version, RulePack([TEACHER, AGE]).version)
+        edited = dict(AGE, triggerPattern=r"\bi have \d+ years\b")
+        added, removed = RulePack([edited, TEACHER]).diff(RulePack([AGE, TEACHER]).hashes)
+        self.assertEqual([r["phenomenon_id"] for r in added.values()], ["phen_age"])
+        self.assertEqual(len(removed), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.pos_tagger import POSTaggerService
+
+
+class CountingTagger:
+    def __init__(self):
+        self.batches = []
+
+    def tag_sents(self, sentences):
+        self.batches.append(len(sentences))
+        return [[(w, 'VB' if w == 'go' else 'NN') for w in s] for s in sentences]
+
+
+class FailingTagger:
+    def tag_sents(self, sentences):
+        raise AssertionError("should not be called")
+
+
+class TestPOSTaggerService(unittest.TestCase):
+    def test_batches_and_memoizes_short_utterances(self):
+        tagger = CountingTagger()
+        service = POSTaggerService(tagger=tagger, memo_max_tokens=3)
+        long_sent = "I go to the shop every day".split()
+
+        first = service.tag_sents([["yes"], ["I", "go"], long_sent])
+        second = service.tag_sents([["yes"], ["I", "go"], long_sent])
+
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], [("I", "NN"), ("go", "VB")])
+        # One batch per call; the second only re-tags the sentence too long to memoize
+        self.assertEqual(tagger.batches, [3, 1])
+        stats = service.stats()
+        self.assertEqual(stats['memo_hits'], 2)
+        self.assertEqual(stats['tokens'], 2 * (1 + 2 + len(long_sent)))
+
+    def test_memo_is_bounded(self):
+        service = POSTaggerService(tagger=CountingTagger(), memo_size=2)
+        service.tag_sents([["a"], ["b"], ["c"]])
+        self.assertEqual(service.stats()['memo_entries'], 2)
+
+    def test_empty_input_skips_tagger(self):
+        service = POSTaggerService(tagger=FailingTagger())
+        self.assertEqual(service.tag([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
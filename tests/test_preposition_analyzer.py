@@ -0,0 +1,49 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.preposition_analyzer import PrepositionAnalyzer
+from analyzers.token_trie import TokenTrie
+
+
+class TestTokenTrie(unittest.TestCase):
+    def test_overlapping_and_nested_phrases(self):
+        trie = TokenTrie([("in my opinion", "a"), ("my opinion to", "b"), ("in my", "c")])
+        hits = [(i, j, v) for i, j, v in trie.iter_matches("in my opinion to go".split())]
+        self.assertEqual(hits, [(0, 2, "c"), (0, 3, "a"), (1, 4, "b")])
+
+    def test_walk_stops_at_sentence_punctuation(self):
+        trie = TokenTrie([("depend of", "x")])
+        self.assertEqual(trie.find_all("I depend. Of course!\nDepend\nof it"), [])
+        self.assertEqual([h["text"] for h in trie.find_all("Of course... I depend of you")], ["depend of"])
+
+
+class TestPrepositionAnalyzer(unittest.TestCase):
+    def test_word_bounded_every_occurrence(self):
+        text = "Within nights we go to home. I depend of you and I go to home again. In night I sleep."
+        errors = PrepositionAnalyzer(patterns_path=None).analyze(text)
+        self.assertEqual([e["item"] for e in errors], ["go to home", "depend of", "go to home", "in night"])
+        first = errors[0]
+        self.assertEqual(text[first["start"]:first["end"]], "go to home")
+        self.assertEqual((first["token_start"], first["token_end"]), (3, 6))
+        self.assertEqual(errors[-1]["match"], "In night")
+
+    def test_baseline_patterns_are_not_errors(self):
+        self.assertEqual(PrepositionAnalyzer(patterns_path=None).analyze("I run in the morning."), [])
+
+    def test_external_patterns(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump([{"pattern": "Similar with", "correction": "similar to", "explanation": "Use 'similar to'"}], f)
+        try:
+            errors = PrepositionAnalyzer(patterns_path=f.name).analyze("It is similar with mine")
+        finally:
+            os.unlink(f.name)
+        self.assertEqual([(e["item"], e["correction"]) for e in errors], [("similar with", "similar to")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers import pattern_guard, rule_pack
+from analyzers.pattern_guard import GuardedPattern, compile_pattern, save_quarantine
+from analyzers.phenomena_matcher import ErrorPhenomenonMatcher
+from analyzers.rule_canon import canonical_pattern, dedupe
+from analyzers.rule_pack import CompiledRules, RulePack, get_rules, pack_changed, pinned_rules, reload_rules, rule_hash, scan_rules
+
+AGE = {"phenomenon_id": "phen_age", "itemName": "Age with Have", "publicCategory": "Grammar", "subcategory": "Grammar",
+       "triggerPattern": r"\b(i|she)\s+(have|has)\s+\d+\s+years\b"}
+TEACHER = {"phenomenon_id": "phen_teacher", "itemName": "Teacher", "publicCategory": "Lexis", "triggerPattern": r"\bteacher\b"}
+BROKEN = {"phenomenon_id": "phen_broken", "itemName": "Broken", "publicCategory": "Lexis", "triggerPattern": r"(unclosed"}
+
+
+class TestRulePackReload(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pack_path = Path(self.tmp.name) / "unified_phenomena.json"
+        self._write([AGE])
+        patches = [
+            mock.patch.dict(os.environ, {"SEMANTIC_STORE_DIR": os.path.join(self.tmp.name, "store")}),
+            mock.patch.object(rule_pack, "DEFAULT_PACK_PATH", self.pack_path),
+            mock.patch.object(rule_pack, "_current", None),
+            mock.patch.object(pattern_guard, "QUARANTINE_PATH", Path(self.tmp.name) / "quarantined_patterns.json"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, rules):
+        self.pack_path.write_text(json.dumps(rules), encoding="utf-8")
+        # Force a visible change even within the filesystem's mtime resolution
+        st = os.stat(self.pack_path)
+        os.utime(self.pack_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def _matched(self, text):
+        return [m["phenomenon_id"] for m in ErrorPhenomenonMatcher().match(text)]
+
+    def test_reload_swaps_and_pinned_requests_keep_their_snapshot(self):
+        text = "My teacher says I have 20 years."
+        old = get_rules()
+        self.assertEqual(self._matched(text), ["phen_age"])
+        self.assertFalse(pack_changed())
+
+        self._write([AGE, TEACHER])
+        self.assertTrue(pack_changed())
+        with pinned_rules(old):
+            new = reload_rules()
+            # In flight: still the old version
+            self.assertIs(get_rules(), old)
+            self.assertEqual(self._matched(text), ["phen_age"])
+        self.assertIs(get_rules(), new)
+        self.assertNotEqual(new.pack.version, old.pack.version)
+        self.assertEqual(self._matched(text), ["phen_age", "phen_teacher"])
+        self.assertFalse(pack_changed())
+
+        # Touched but identical: nothing to swap
+        self._write([AGE, TEACHER])
+        self.assertIsNone(reload_rules())
+        self.assertFalse(pack_changed())
+
+    def test_reorder_swaps_and_never_reuses_cached_indices(self):
+        self._write([AGE, TEACHER])
+        text = "My teacher is nice."
+        first = get_rules()
+        self.assertEqual(self._matched(text), ["phen_teacher"])
+
+        # Same version (sorted hashes), but the rule lists and so the cached indices change
+        self._write([TEACHER, AGE])
+        reordered = reload_rules()
+        self.assertIsNotNone(reordered)
+        self.assertEqual(reordered.pack.version, first.pack.version)
+        self.assertNotEqual(reordered.salt, first.salt)
+        self.assertEqual(self._matched(text), ["phen_teacher"])
+
+    def test_invalid_pack_is_rejected(self):
+        current = get_rules()
+        for rules in ([], [BROKEN]):
+            self._write(rules)
+            self.assertIsNone(reload_rules())
+            self.assertIs(get_rules(), current)
+        self.pack_path.write_text("[{not json", encoding="utf-8")
+        self.assertIsNone(reload_rules())
+        self.assertIs(get_rules(), current)
+
+    def test_quarantine_skips_rules_and_reloads(self):
+        self._write([AGE, TEACHER])
+        text = "My teacher says I have 20 years."
+        before = get_rules()
+        self.assertEqual(self._matched(text), ["phen_age", "phen_teacher"])
+
+        save_quarantine([{"rule_hash": rule_hash(AGE), "phenomenon_id": "phen_age", "reason": "timeout"}])
+        after = reload_rules()  # same pack, new quarantine
+        self.assertEqual(after.quarantined, ["phen_age"])
+        self.assertNotEqual(after.salt, before.salt)
+        self.assertEqual(self._matched(text), ["phen_teacher"])
+
+
+class TestPatternGuard(unittest.TestCase):
+    @unittest.skipIf(pattern_guard.regex is None, "regex module not installed")
+    def test_timeout_cuts_off_backtracking(self):
+        guarded = compile_pattern(r"(a|aa)+$", timeout_ms=20)
+        self.assertIsInstance(guarded, GuardedPattern)
+        self.assertEqual([m.group(0) for m in guarded.finditer("xx aaa")], ["aaa"])
+        self.assertEqual(list(guarded.finditer("a" * 60 + "!")), [])
+        self.assertEqual(guarded.timeouts, 1)
+
+        rules = CompiledRules(RulePack([AGE]), quarantine=set(), timeout_ms=20)
+        self.assertEqual(rules.describe()["pattern_timeout_ms"], 20)
+
+    def test_no_budget_is_plain_re(self):
+        self.assertIsNone(CompiledRules(RulePack([AGE]), quarantine=set(), timeout_ms=0).describe()["pattern_timeout_ms"])
+        self.assertNotIsInstance(compile_pattern(r"\bteacher\b", timeout_ms=0), GuardedPattern)
+        with self.assertRaises(Exception):
+            compile_pattern(r"(unclosed", timeout_ms=20)
+
+
+class TestRuleDedupe(unittest.TestCase):
+    def test_canonical_pattern(self):
+        same = [
+            (r"\b(He|she)\s+have\b", r"\b(?:she|he)\s+HAVE\b"),
+            (r"[A-Z]+ing", r"[a-z]+ING"),
+            (r"\bteacher\b", r" \bteacher\b".strip()),
+        ]
+        for a, b in same:
+            self.assertEqual(canonical_pattern(a), canonical_pattern(b), (a, b))
+        # Order matters when one alternative is a prefix of another; backreferences keep their groups
+        self.assertNotEqual(canonical_pattern(r"\b(he|her)"), canonical_pattern(r"\b(her|he)"))
+        self.assertNotEqual(canonical_pattern(r"(\w+) \1"), canonical_pattern(r"\w+ \w+"))
+        # Surrounding spaces are part of the pattern; global flags change what matches
+        self.assertNotEqual(canonical_pattern(" the "), canonical_pattern("the"))
+        self.assertNotEqual(canonical_pattern(r"(?s)a.b"), canonical_pattern(r"a.b"))
+        self.assertNotEqual(canonical_pattern(r"(?m)^foo"), canonical_pattern(r"^foo"))
+        self.assertEqual(canonical_pattern(r"(?i)teacher"), canonical_pattern(r"teacher"))
+
+    def test_dedupe_merges_with_provenance(self):
+        copy = dict(TEACHER, phenomenon_id="phen_teacher_2", triggerPattern=r"\bTEACHER\b", explanation="Profession noun.")
+        merged, stats = dedupe([("a.json", [AGE, TEACHER]), ("b.json", [TEACHER, copy, BROKEN])])
+        self.assertEqual((stats["rules_in"], stats["rules_out"]), (5, 3))
+        self.assertEqual((stats["identical_copies"], stats["equivalent_pattern"], stats["uncompilable"]), (1, 1, 1))
+        teacher = next(r for r in merged if r["itemName"] == "Teacher")
+        self.assertEqual(teacher["explanation"], "Profession noun.")
+        self.assertEqual([(p["source"], p["phenomenon_id"]) for p in teacher["provenance"]],
+                         [("a.json", "phen_teacher"), ("b.json", "phen_teacher"), ("b.json", "phen_teacher_2")])
+        # Idempotent on its own output
+        self.assertEqual(dedupe([("out.json", merged)])[1]["rules_out"], 3)
+
+    def test_shared_regex_runs_once(self):
+        rules = CompiledRules(RulePack([TEACHER, dict(TEACHER, phenomenon_id="phen_teacher_2")]), quarantine=set(), timeout_ms=0)
+        self.assertEqual(rules.patterns, 1)
+        self.assertIs(rules.trigger[0]["regex"], rules.trigger[1]["regex"])
+        self.assertEqual(scan_rules(rules.trigger, "my teacher"), [{"rule": 0, "start": 3, "end": 10}, {"rule": 1, "start": 3, "end": 10}])
+
+
+if __name__ == '__main__':
+    unittest.main()
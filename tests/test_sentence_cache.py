@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers import sentence_cache
+from analyzers.sentence_cache import SentenceCache, get_sentence_cache, analyze_sentences, cache_key, track_usage
+from analyzers.pattern_guard import compile_pattern, regex
+from analyzers.preposition_analyzer import PrepositionAnalyzer
+
+TEXT = "I arrive to the office. Okay.  I depend of my family! Okay. We discuss about it"
+
+
+class TestSentenceCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = SentenceCache(disk_path=Path(self.tmp.name) / "cache.sqlite3")
+        self.analyzer = PrepositionAnalyzer(patterns_path=None)
+        # The process-wide cache is rebuilt under a temp store, never the repo's .semantic_store
+        patches = [
+            mock.patch.dict(os.environ, {"SEMANTIC_STORE_DIR": os.path.join(self.tmp.name, "store")}),
+            mock.patch.object(sentence_cache, "_cache", None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _analyze(self, text, cache=None, batch=True):
+        return analyze_sentences(text, "prepositions", "v1", self.analyzer._analyze_text, batch=batch, cache=cache or self.cache)
+
+    def test_matches_uncached_offsets(self):
+        expected = self.analyzer._analyze_text(TEXT)
+        self.assertEqual(self._analyze(TEXT), expected)      # cold, batched misses
+        self.assertEqual(self._analyze(TEXT), expected)      # warm
+        self.assertEqual(self._analyze(TEXT, cache=SentenceCache(), batch=False), expected)
+        for hit in expected:
+            self.assertEqual(TEXT[hit["start"]:hit["end"]].lower(), hit["match"])
+
+    def test_hits_and_usage(self):
+        with track_usage() as usage:
+            self._analyze(TEXT)
+            self._analyze("Okay. I arrive to the office.")
+        stats = usage.to_dict()
+        # 5 sentences (one repeated within the text) then 2 seen before
+        self.assertEqual((stats["hits"], stats["misses"]), (3, 4))
+        self.assertEqual(stats["by_analyzer"]["prepositions"]["hit_rate"], round(3 / 7, 3))
+
+    def test_disk_tier_survives_process(self):
+        self._analyze(TEXT)
+        fresh = SentenceCache(disk_path=Path(self.tmp.name) / "cache.sqlite3")
+        key = cache_key("prepositions", "v1", "I depend of my family!")
+        self.assertEqual(fresh.get_many([key])[key][0]["item"], "depend of")
+        self.assertEqual(fresh.get_many([cache_key("prepositions", "v2", "I depend of my family!")]), {})
+
+    @unittest.skipIf(sentence_cache.DISK_MAX_BYTES <= 0, "disk tier disabled")
+    def test_default_cache_lives_in_the_store_dir(self):
+        self.analyzer.analyze(TEXT)
+        self.assertEqual(get_sentence_cache().disk_path, Path(self.tmp.name) / "store" / "sentence_cache.sqlite3")
+        self.assertTrue(get_sentence_cache().disk_path.exists())
+
+    def test_size_bounded_eviction(self):
+        cache = SentenceCache(memory_max_bytes=2000, disk_path=Path(self.tmp.name) / "small.sqlite3", disk_max_bytes=4000)
+        for i in range(200):
+            cache.put_many({cache_key("a", "v1", f"sentence {i}"): [{"start": 0, "end": i}]})
+        stats = cache.stats()
+        self.assertLessEqual(stats["memory_bytes"], 2000)
+        self.assertLessEqual(stats["disk_bytes"], 4000)
+        self.assertGreater(stats["evictions"], 0)
+        # Most recent entries are kept
+        self.assertIn(cache_key("a", "v1", "sentence 199"), cache.get_many([cache_key("a", "v1", "sentence 199")]))
+
+    @unittest.skipIf(regex is None, "regex module not installed")
+    def test_timed_out_scan_is_not_cached(self):
+        slow = compile_pattern(r"(a|aa)+$", timeout_ms=20)
+        scan = lambda t: [{"start": m.start(), "end": m.end()} for m in slow.finditer(t)]
+        text = "Fine sentence. " + "a" * 60 + "!"
+        for batch in (True, False):
+            cache = SentenceCache()
+            for _ in range(2):
+                with track_usage() as usage:
+                    analyze_sentences(text, "slow", "v1", scan, batch=batch, cache=cache)
+            # Second pass: the clean sentence is a hit (unbatched) and the truncated one is retried
+            self.assertEqual(usage.to_dict()["misses"], 2 if batch else 1)
+        self.assertGreaterEqual(slow.timeouts, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -37,7 +37,7 @@ sys.modules["AssemblyAIv2.analyzers.learner_error_analyzer"] = mock_analyzers
 # Import functions to test
 from AssemblyAIv2.main import (
     get_existing_students,
-    current_session
+    session_manager
 )
 from AssemblyAIv2.upload_audio_aai import calculate_file_hash
 import AssemblyAIv2.main as main
@@ -65,16 +65,8 @@ class TestPreSession(unittest.IsolatedAsyncioTestCase):
 
 class TestIntraSession(unittest.TestCase):
     def setUp(self):
-        # Reset current_session before each test
-        main.current_session = {
-            "session_id": None,
-            "start_time": None,
-            "student_name": "Unknown",
-            "turns": [],
-            "file_path": None,
-            "notes": "",
-            "audio_path": None
-        }
+        # Reset live sessions before each test
+        main.session_manager.sessions.clear()
 
     # Removed: start_new_session, save_turn_to_session (logic partially integrated into event handlers)
 
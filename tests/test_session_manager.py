@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from session_manager import SessionLimitError, SessionManager
+
+
+def _turn(text):
+    words = [{"text": w, "start": i * 400, "end": i * 400 + 300, "confidence": 0.9} for i, w in enumerate(text.split())]
+    return {"turn_order": 0, "transcript": text, "speaker": "Speaker B", "words": words, "timestamp": ""}
+
+
+class TestSessionManager(unittest.TestCase):
+    def test_limit(self):
+        manager = SessionManager(max_sessions=2)
+        manager.create("Alice")
+        manager.create("Bob")
+        with self.assertRaises(SessionLimitError):
+            manager.create("Carol")
+
+    def test_sessions_are_isolated(self):
+        manager = SessionManager()
+        a = manager.create("Alice")
+        b = manager.create("Bob")
+        a.add_turn(_turn("I go home"))
+        delta = a.add_turn(_turn("I went home"))
+        b.add_turn(_turn("hello"))
+
+        self.assertEqual(delta["turn_order"], 2)
+        self.assertEqual([t["turn_order"] for t in a.data["turns"]], [1, 2])
+        self.assertEqual(len(b.data["turns"]), 1)
+        self.assertEqual(b.analytics.summary()["speakers"]["Speaker B"]["turns"], 1)
+
+    def test_speaker_map_and_late_matcher(self):
+        manager = SessionManager()
+        a = manager.create("Alice")
+        b = manager.create("Bob", speaker_map={"A": "Bob", "B": "Aaron"})
+        self.assertEqual(a.add_turn(_turn("I go home"))["totals"]["talk_ratio"]["student_percentage"], 100.0)
+        self.assertEqual(b.add_turn(_turn("I go home"))["totals"]["talk_ratio"]["student_percentage"], 0.0)
+
+        class Matcher:
+            def match(self, text):
+                return [{"phenomenon_id": "phen_go_home", "item": "go home"}]
+
+        # Warm-up finishing mid-lesson turns on matching for sessions already running
+        manager.set_matcher(Matcher())
+        self.assertEqual(a.add_turn(_turn("I go home"))["turn"]["phenomena"][0]["phenomenon_id"], "phen_go_home")
+
+    def test_subscriptions(self):
+        manager = SessionManager()
+        a = manager.create("Alice")
+        b = manager.create("Bob")
+        client, observer = object(), object()
+        manager.subscribe(client, a.session_id)
+        manager.subscribe(observer, a.session_id)
+        manager.subscribe(observer, b.session_id)
+        self.assertFalse(manager.subscribe(client, "missing"))
+
+        self.assertEqual(manager.subscribers(a.session_id), {client, observer})
+        self.assertEqual({s.session_id for s in manager.sessions_for(observer)}, {a.session_id, b.session_id})
+
+        manager.drop_client(observer)
+        self.assertEqual(manager.subscribers(b.session_id), set())
+        manager.remove(a.session_id)
+        self.assertEqual(manager.subscribers(a.session_id), set())
+        self.assertEqual(len(manager.list()), 1)
+
+    def test_end_targets_only_owned_sessions(self):
+        manager = SessionManager()
+        teacher, observer = object(), object()
+        a = manager.create("Alice", owner=teacher)
+        manager.create("Bob", owner=observer)
+        manager.subscribe(teacher, a.session_id)
+        manager.subscribe(observer, a.session_id)
+        self.assertEqual([s.session_id for s in manager.owned_by(teacher)], [a.session_id])
+        self.assertEqual(len(manager.sessions_for(observer)), 1)
+        self.assertEqual([s.data["student_name"] for s in manager.owned_by(observer)], ["Bob"])
+
+    def test_handoff_is_claimed_once(self):
+        session = SessionManager().create("Alice")
+        self.assertTrue(session.claim_handoff())   # e.g. the stream ended on its own
+        self.assertFalse(session.claim_handoff())  # the UI's end_session arriving later
+
+    def test_stop_before_audio_never_opens_mic(self):
+        session = SessionManager().create("Alice")
+        opened = []
+        session.stop()  # e.g. end_session during connect
+        self.assertIsNone(session.attach_audio(lambda: opened.append(1) or object()))
+        self.assertEqual(opened, [])
+        self.assertIsNone(session.audio)
+
+
+if __name__ == '__main__':
+    unittest.main()
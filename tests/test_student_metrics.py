@@ -0,0 +1,88 @@
+import os
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.student_metrics import P2Quantile, StudentMetricsStore, summarize_session
+
+
+class TestStudentMetrics(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = StudentMetricsStore(Path(self.tmp.name) / "metrics.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_p2_quantile_tracks_numpy(self):
+        rng = random.Random(7)
+        values = [rng.gauss(120, 15) for _ in range(2000)]
+        for p in (0.1, 0.5, 0.9):
+            est = P2Quantile(p)
+            for v in values:
+                est.add(v)
+            self.assertAlmostEqual(est.value(), float(np.quantile(values, p)), delta=2.0)
+
+    def test_p2_quantile_exact_for_few_values(self):
+        est = P2Quantile(0.5)
+        for v in (3.0, 1.0, 2.0):
+            est.add(v)
+        self.assertEqual(est.value(), 2.0)
+
+    def test_record_once_and_trends(self):
+        wpms = [100.0, 100.0, 110.0, 140.0]
+        for i, wpm in enumerate(wpms):
+            self.assertTrue(self.store.record_session("Maria", f"s{i}", {"wpm": wpm}, recorded_at=f"2026-01-0{i + 1}T10:00:00"))
+        self.assertFalse(self.store.record_session("maria", "s0", {"wpm": 999.0}))
+
+        report = self.store.trends("Maria", ["wpm"], last=2)
+        self.assertEqual(report["sessions"], 4)
+        wpm = report["metrics"]["wpm"]
+        self.assertEqual(wpm["n"], 4)
+        self.assertAlmostEqual(wpm["mean"], float(np.mean(wpms)))
+        self.assertAlmostEqual(wpm["std"], float(np.std(wpms, ddof=1)), places=3)
+        self.assertEqual(wpm["last"], 140.0)
+        self.assertEqual([s["value"] for s in wpm["series"]], [110.0, 140.0])
+        self.assertGreater(wpm["trend"], 0)
+        self.assertEqual(wpm["p50"], 105.0)
+
+    def test_absent_category_counts_as_zero(self):
+        sessions = [{"errors.total": 0.0}, {"errors.total": 3.0, "errors.Articles": 3.0}, {"errors.total": 0.0}]
+        for i, summary in enumerate(sessions):
+            self.store.record_session("Maria", f"s{i}", summary, recorded_at=f"2026-01-0{i + 1}T10:00:00")
+
+        articles = self.store.trends("Maria", ["errors.Articles"])["metrics"]["errors.Articles"]
+        self.assertEqual(articles["n"], 3)
+        self.assertAlmostEqual(articles["mean"], 1.0)
+        self.assertEqual(articles["last"], 0.0)
+        self.assertEqual([s["value"] for s in articles["series"]], [0.0, 3.0, 0.0])
+
+    def test_unknown_student(self):
+        self.assertEqual(self.store.trends("Nobody")["sessions"], 0)
+
+    def test_summarize_session(self):
+        summary = summarize_session(
+            {"speaking_rate": {"average_wpm": 96.0}, "caf_metrics": {"complexity": {"mean_length_t_unit": 7.5}}},
+            "I go to the the store",
+            learner_errors=[{"category": "Articles"}, {"category": "Articles"}],
+            phenomena=[{"category": "Repetition"}],
+            register={"scores": {"academic": 1.0, "conversational": 12.0}},
+            hesitation_count=3,
+        )
+        self.assertEqual(summary["wpm"], 96.0)
+        self.assertEqual(summary["mean_length_t_unit"], 7.5)
+        self.assertEqual(summary["word_count"], 6.0)
+        self.assertEqual(summary["errors.Articles"], 2.0)
+        self.assertEqual(summary["phenomena.Repetition"], 1.0)
+        self.assertEqual(summary["register.conversational"], 12.0)
+        self.assertEqual(summary["hesitation_count"], 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
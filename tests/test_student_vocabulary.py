@@ -0,0 +1,88 @@
+import os
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.roaring_bitmap import ARRAY_MAX, RoaringBitmap
+from analyzers.student_vocabulary import StudentVocabulary, VocabularyIndex
+
+
+class TestRoaringBitmap(unittest.TestCase):
+    def test_set_algebra_matches_python_sets(self):
+        rng = random.Random(3)
+        for size_a, size_b in ((50, 80), (6000, 300), (9000, 12000)):
+            a = {rng.randrange(0, 140000) for _ in range(size_a)}
+            b = {rng.randrange(0, 140000) for _ in range(size_b)}
+            ra, rb = RoaringBitmap.from_ids(a), RoaringBitmap.from_ids(b)
+            self.assertEqual(set(ra | rb), a | b)
+            self.assertEqual(set(ra & rb), a & b)
+            self.assertEqual(set(ra - rb), a - b)
+            self.assertEqual(set(ra ^ rb), a ^ b)
+            self.assertEqual(len(ra), len(a))
+
+    def test_containers_switch_representation(self):
+        dense = RoaringBitmap.from_ids(range(ARRAY_MAX + 1))
+        self.assertEqual(dense.containers[0].shape[0], 1024)  # bitmap words
+        sparse = dense - RoaringBitmap.from_ids([0, 1])
+        self.assertEqual(len(sparse.containers[0]), ARRAY_MAX - 1)  # back to an array
+        self.assertIn(ARRAY_MAX, sparse)
+        self.assertNotIn(1, sparse)
+
+    def test_serialization_roundtrip(self):
+        bitmap = RoaringBitmap.from_ids(list(range(0, 70000, 3)) + [2 ** 31])
+        self.assertEqual(RoaringBitmap.from_bytes(bitmap.to_bytes()), bitmap)
+        self.assertEqual(len(RoaringBitmap.from_bytes(b"")), 0)
+
+
+class TestStudentVocabulary(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmp.name)
+        words = ["the", "be", "go", "went", "house", "talk", "serendipity"]
+        ngsl_rank = {"the": 1, "be": 2, "go": 3, "went": 3, "house": 1500, "talk": 1600}
+        self.index = VocabularyIndex.load(words, ngsl_rank, path=tmp / "ids.json")
+        self.vocab = StudentVocabulary(self.index, tmp / "vocab.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_ids_are_stable_when_lists_grow(self):
+        path = Path(self.tmp.name) / "ids.json"
+        grown = VocabularyIndex.load(["zebra", "the", "house"], path=path)
+        self.assertEqual(grown.id_of("house"), self.index.id_of("house"))
+        self.assertEqual(grown.id_of("zebra"), len(self.index))
+
+    def test_new_words_per_session(self):
+        first = self.vocab.record_session("Maria", "s1", ["the", "go", "xyzzy"])
+        self.assertEqual(first["new_words"], ["the", "go"])
+        self.assertEqual(first["unlisted_count"], 1)
+        second = self.vocab.record_session("maria", "s2", ["go", "went", "house"])
+        self.assertEqual(second["new_words"], ["went", "house"])
+        self.assertEqual(second["total_produced"], 4)
+        # Re-recording a session returns its original result without changing totals
+        self.assertEqual(self.vocab.record_session("Maria", "s2", ["talk"])["new_words"], ["went", "house"])
+        self.assertEqual(len(self.vocab.produced("Maria")), 4)
+
+    def test_never_produced_and_coverage(self):
+        self.vocab.record_session("Maria", "s1", ["the", "go", "house"])
+        self.assertEqual(self.vocab.never_produced("Maria"), ["be", "went", "talk", "serendipity"])
+        self.assertEqual(self.vocab.never_produced("Maria", band=2), ["talk"])
+        coverage = self.vocab.coverage("Maria", bands=(1, 2))
+        self.assertEqual(coverage["band_1"], {"produced": 2, "total": 4, "pct": 50.0})
+        self.assertEqual(coverage["combined"]["total"], 6)
+
+    def test_class_overlap(self):
+        self.vocab.record_session("Maria", "s1", ["the", "go", "house"])
+        self.vocab.record_session("Ken", "k1", ["the", "house", "talk"])
+        overlap = self.vocab.class_overlap()
+        self.assertEqual(overlap["students"], ["ken", "maria"])
+        self.assertEqual(overlap["shared_words"], ["the", "house"])
+        self.assertEqual(overlap["union_count"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
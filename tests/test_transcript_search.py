@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.transcript_search import TranscriptSearch, format_timestamp, lesson_key, lesson_speaker_map, near_query, phrase_query
+
+TURNS = [
+    {"speaker": "A", "transcript": "How old is your brother?", "start": 1000, "end": 2500},
+    {"speaker": "B", "transcript": "My brother have twenty years, he is older.", "start": 63000, "end": 66000},
+    {"speaker": "A", "transcript": "He is twenty years old.", "start": 67000, "end": 68500},
+    {"speaker": "B", "transcript": "Yes, twenty years old, I have a car too.", "start": 70000, "end": 73000},
+]
+
+
+class TestTranscriptSearch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.search = TranscriptSearch(Path(self.tmp.name) / "transcripts.sqlite3")
+        self.search.index_session("s1", "Maria", TURNS, speaker_map={"A": "Aaron", "B": "Maria"}, session_date="2026-10-01T10:00:00")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_phrase_and_role(self):
+        hits = self.search.search(phrase_query("have twenty years"))
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(hits[0]["role"], "student")
+        self.assertEqual(hits[0]["timestamp"], "1:03")
+        self.assertIn("[have twenty years]", hits[0]["snippet"])
+        self.assertEqual(len(self.search.search(phrase_query("twenty years old"), role="tutor")), 1)
+
+    def test_near(self):
+        self.assertEqual({h["turn_index"] for h in self.search.search(near_query("have years", 1))}, {1})
+        self.assertEqual({h["turn_index"] for h in self.search.search(near_query("have years", 6))}, {1, 3})
+
+    def test_reindex_replaces_and_context(self):
+        self.search.index_session("s1", "Maria", TURNS[:2], speaker_map={"A": "Aaron", "B": "Maria"})
+        self.assertEqual(self.search.stats(), {"sessions": 1, "turns": 2})
+        self.assertEqual(self.search.search('"twenty years old"'), [])
+        hit = self.search.search("brother", role="student")[0]
+        self.assertEqual([t["turn_index"] for t in self.search.context(hit["turn_id"], before=1, after=1)], [0, 1])
+
+    def test_one_entry_per_lesson(self):
+        transcript = "\n".join(f"{t['speaker']}: {t['transcript']}" for t in TURNS)
+        self.assertEqual(lesson_key(transcript, "tx_123"), "tx_123")
+        key = lesson_key(transcript)
+        # Ingest and /analyze derive the same key and speaker roles, so the second index replaces the first
+        self.search.index_session(key, "Maria", TURNS, speaker_map=lesson_speaker_map("Maria"), source="lesson.mp3")
+        self.search.index_session(key, "Maria", TURNS, speaker_map=lesson_speaker_map("Maria"), source="analyze")
+        self.assertEqual(self.search.stats(), {"sessions": 2, "turns": 8})
+        self.assertEqual({h["role"] for h in self.search.search("brother", student="maria") if h["turn_index"] == 1}, {"student"})
+
+    def test_invalid_query(self):
+        with self.assertRaises(ValueError):
+            self.search.search('"unbalanced')
+
+    def test_import_captures(self):
+        day = Path(self.tmp.name) / "captures" / "Ken" / "2026-09-30"
+        day.mkdir(parents=True)
+        (day / "14-05-00_Ken_words.json").write_text(json.dumps(TURNS))
+        self.assertEqual(self.search.import_captures(day.parent.parent), 1)
+        hits = self.search.search("car", student="ken")
+        self.assertEqual(hits[0]["session_date"], "2026-09-30T14:05:00")
+
+    def test_format_timestamp(self):
+        self.assertEqual(format_timestamp(3725000), "1:02:05")
+        self.assertIsNone(format_timestamp(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
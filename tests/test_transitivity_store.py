@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.transitivity_store import TransitivityStore
+from analyzers.verb_analyzer import VerbAnalyzer
+
+TSV = """verb\tintrans\ttrans\txtrans\tditrans\ttotal\tpercent_intrans\tpercent_trans\tpercent_ditrans
+happen\t990.0\t10.0\t0.0\t0.0\t1000.0\t0.99\t0.01\t0.0
+enjoy\t20.0\t980.0\t0.0\t0.0\t1000.0\t0.02\t0.98\t0.0
+eat\t400.0\t600.0\t0.0\t0.0\t1000.0\t0.4\t0.6\t0.0
+rare\t1.0\t0.0\t0.0\t0.0\t1.0\t1.0\t0.0\t0.0
+eat\t500.0\t500.0\t0.0\t0.0\t1000.0\t0.5\t0.5\t0.0
+"""
+
+
+class TestTransitivityStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tsv = Path(self.tmp.name) / "verb_transitivity.tsv"
+        self.tsv.write_text(TSV)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookup_and_legacy_stats(self):
+        store = TransitivityStore.load(self.tsv)
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store.lookup(["Enjoy", "missing", "happen"]).tolist()[1], -1)
+        self.assertEqual(store.get("ENJOY"), {"intransitive": 0.02, "transitive": 0.98, "ditransitive": 0.0})
+        # Duplicate rows: last one wins
+        self.assertEqual(store.get("eat")["transitive"], 0.5)
+
+    def test_compiled_cache_round_trip(self):
+        first = TransitivityStore.load(self.tsv)
+        cache = self.tsv.with_suffix(".npz")
+        self.assertTrue(cache.exists())
+        second = TransitivityStore.load(self.tsv)
+        self.assertEqual(second.verbs.tolist(), first.verbs.tolist())
+        self.assertEqual(second.get("happen"), first.get("happen"))
+
+    def test_flag_mismatches(self):
+        store = TransitivityStore.load(self.tsv, use_cache=False)
+        flags = store.flag_mismatches(["happened", "happen", "enjoy", "eat", "rare"], [True, True, False, False, True])
+        self.assertEqual([(f["verb"], f["issue"]) for f in flags], [("happen", "unexpected_object"), ("enjoy", "missing_object")])
+
+    def test_verb_frames(self):
+        tagged = [("I", "PRP"), ("went", "VBD"), ("home", "NN"), ("and", "CC"), ("ate", "VBD"), ("the", "DT"),
+                  ("cake", "NN"), ("I", "PRP"), ("want", "VBP"), ("to", "TO"), ("sleep", "VB"), (".", ".")]
+        self.assertEqual(VerbAnalyzer._verb_frames(tagged), [(1, False), (4, True), (10, False)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.fluency_analyzer import FluencyAnalyzer
+from analyzers.tutor_baseline import MIN_BASELINE_SESSIONS, RunningStat, TutorBaseline
+
+
+class TestTutorBaseline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "aaron.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_running_stat_matches_batch(self):
+        values = [112.0, 140.5, 98.25, 131.0, 120.0]
+        stat = RunningStat()
+        for v in values:
+            stat.add(v)
+        self.assertAlmostEqual(stat.mean, float(np.mean(values)))
+        self.assertAlmostEqual(stat.std, float(np.std(values, ddof=1)))
+
+    def test_merge_once_and_persist(self):
+        baseline = TutorBaseline("Aaron", self.path)
+        self.assertTrue(baseline.merge("s1", {"lexical_diversity": 0.5, "wpm": 150.0}, [(("you", "know"), 2)]))
+        self.assertFalse(baseline.merge("s1", {"lexical_diversity": 0.9}))
+        baseline.merge("s2", {"lexical_diversity": 0.7, "wpm": 0.0})  # zero WPM = no timing data
+        baseline.save()
+
+        loaded = TutorBaseline.load("Aaron", self.path)
+        self.assertEqual(loaded.sessions, 2)
+        self.assertAlmostEqual(loaded.mean("lexical_diversity"), 0.6)
+        self.assertEqual(loaded.stats["wpm"].n, 1)
+        self.assertEqual(loaded.bigrams["you know"], 2)
+        self.assertFalse(loaded.ready)
+
+    def test_fluency_reads_ready_baseline(self):
+        baseline = TutorBaseline("Aaron", self.path)
+        for i in range(MIN_BASELINE_SESSIONS):
+            baseline.merge(f"s{i}", {"wpm": 140.0 + 10 * i})
+        student = [{"text": "hi", "start": 0, "end": 500}, {"text": "there", "start": 30000, "end": 60000}]
+        result = FluencyAnalyzer().compare_to_native(student, baseline=baseline)
+        self.assertEqual(result["tutor_wpm_source"], "baseline")
+        self.assertEqual(result["tutor_wpm"], 150.0)
+        self.assertEqual(result["student_wpm"], 2.0)
+
+    def test_ready_baseline_skips_tutor_reanalysis(self):
+        from unittest import mock
+
+        baseline = TutorBaseline("Aaron", self.path)
+        for i in range(MIN_BASELINE_SESSIONS):
+            baseline.merge(f"s{i}", {"lexical_diversity": 0.5, "wpm": 140.0})
+        words = [{"text": "hello", "start": 0, "end": 400}, {"text": "there", "start": 500, "end": 60000}]
+        with mock.patch("analyzers.comparative_analyzer.ComparativeAnalyzer.speaker_metrics") as speaker_metrics:
+            self.assertTrue(baseline.merge_session("s-new", "Hello there.", words, save=False))
+        speaker_metrics.assert_not_called()
+        self.assertEqual(baseline.stats["lexical_diversity"].n, MIN_BASELINE_SESSIONS)
+        self.assertEqual(baseline.stats["wpm"].n, MIN_BASELINE_SESSIONS + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lib.warmup import WarmupManager
+
+
+def _fail():
+    raise RuntimeError("bundle missing")
+
+
+async def _async_loader():
+    return "matcher"
+
+
+class TestWarmupManager(unittest.IsolatedAsyncioTestCase):
+    async def test_ready_after_required_components(self):
+        warmup = WarmupManager(budget_ms=60000)
+        warmup.register("corpus", lambda: {"loaded": True})
+        warmup.register("matcher", _async_loader)
+        warmup.register("optional", _fail, required=False)
+
+        self.assertFalse(warmup.ready)
+        await warmup.start()
+
+        report = warmup.report()
+        self.assertTrue(report["ready"])
+        self.assertTrue(report["within_budget"])
+        self.assertEqual(report["components"]["optional"]["state"], "failed")
+        self.assertEqual(report["components"]["optional"]["error"], "bundle missing")
+        self.assertEqual(warmup.get("matcher"), "matcher")
+        self.assertIsNone(warmup.get("optional"))
+
+    async def test_required_failure_blocks_readiness(self):
+        warmup = WarmupManager(budget_ms=0)
+        warmup.register("analyzers", _fail)
+        await warmup.run()
+        report = warmup.report()
+        self.assertFalse(report["ready"])
+        self.assertTrue(report["finished"])
+
+
+if __name__ == '__main__':
+    unittest.main()
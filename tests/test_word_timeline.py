@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyzers.word_timeline import WordTimeline
+from analyzers.fluency_analyzer import FluencyAnalyzer
+
+
+def _turn(speaker, words):
+    return {
+        "speaker": speaker,
+        "transcript": " ".join(w[0] for w in words),
+        "words": [{"text": t, "start": s, "end": e, "confidence": 0.9} for t, s, e in words],
+    }
+
+
+class TestWordTimeline(unittest.TestCase):
+
+    def setUp(self):
+        self.turns = [
+            _turn("A", [("hello", 0, 400), ("there", 500, 900)]),
+            _turn("B", [("I", 2000, 2100), ("um", 2200, 2400), ("went", 3400, 3700), ("home", 4700, 5000)]),
+        ]
+        self.timeline = WordTimeline.from_turns(self.turns)
+
+    def test_gaps_do_not_cross_turns(self):
+        """The gap between the last word of a turn and the next turn is NaN."""
+        gaps = self.timeline.gaps()
+        self.assertEqual(len(gaps), 5)
+        self.assertEqual(gaps[0], 100)
+        self.assertTrue(gaps[1] != gaps[1])  # NaN
+        self.assertEqual(list(gaps[2:]), [100, 1000, 1000])
+
+    def test_pauses_by_turn_matches_legacy_shape(self):
+        pauses = self.timeline.pauses_by_turn(threshold_ms=300)
+        self.assertEqual(pauses[0], [])
+        self.assertEqual(pauses[1][0], {"start_ms": 2400.0, "end_ms": 3400.0, "duration_ms": 1000.0})
+        self.assertEqual(len(pauses[1]), 2)
+
+    def test_pause_stats_and_hesitations(self):
+        stats = self.timeline.pause_stats([1])
+        self.assertEqual(stats["total_pauses"], 2)
+        self.assertEqual(stats["long_pauses_gt_1s"], 0)
+        # Upstream pause lists are summarized the same way
+        self.assertEqual(WordTimeline.summarize_pauses(self.timeline.pause_durations(300, [1])), stats)
+        words = [h["word"] for h in self.timeline.hesitations(threshold_ms=800, turn_indices=[1])]
+        self.assertEqual(words, ["um", "went"])
+
+    def test_turn_bounds_and_wpm(self):
+        """Missing turn bounds are inferred from the first/last word."""
+        self.assertEqual(list(self.timeline.turn_start), [0, 2000])
+        self.assertEqual(list(self.timeline.turn_end), [900, 5000])
+        self.assertAlmostEqual(self.timeline.turn_wpm()[1], 4 / (3000 / 60000))
+
+    def test_speaker_stats(self):
+        stats = self.timeline.speaker_stats()
+        self.assertEqual(stats["A"]["words"], 2)
+        self.assertEqual(stats["B"]["pauses"], 2)
+        # Phonation time excludes the two 1s pauses: 900ms of words + one 100ms gap
+        self.assertAlmostEqual(stats["B"]["articulation_rate"], round(4 / (1000 / 60000), 2))
+
+    def test_fluency_analyzer_on_flat_words(self):
+        words = [w for t in self.turns for w in t["words"]]
+        result = FluencyAnalyzer().analyze_hesitation(words)
+        self.assertEqual([p["word"] for p in result["struggle_points"]], ["I", "went", "home"])
+        self.assertEqual(result["total_pause_ms"], 1100 + 1000 + 1000)
+        self.assertAlmostEqual(FluencyAnalyzer().calculate_articulation_rate(words), 6 / (5000 / 60000))
+
+    def test_empty_timeline(self):
+        timeline = WordTimeline.from_turns([])
+        self.assertEqual(len(timeline), 0)
+        self.assertEqual(timeline.pause_stats(), {"message": "No pause data"})
+        self.assertEqual(timeline.wpm(), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -34,6 +34,7 @@ import asyncio
 from AssemblyAIv2.analyzers.sentence_chunker import chunk_transcript
 from AssemblyAIv2.analyzers.lexical_engine import LexicalEngine
 from AssemblyAIv2.run_local_analysis import run_tiered_analysis
+from AssemblyAIv2.analyzers.transcript_search import get_transcript_search, lesson_key, lesson_speaker_map
 
 # --- Setup Logging ---
 logging.basicConfig(
@@ -166,10 +167,12 @@ async def generate_llm_analysis(
     student_name: str, 
     transcript_text: str, 
     user_notes: str, 
-    analysis_context: dict[str, Any]
+    analysis_context: dict[str, Any],
+    session_id: str | None = None,
 ):
     """
     Hands off analysis to the local Semantic Server (The Brain).
+    `session_id` is the lesson key, so the server's stores and indexes use the same entry as ingest.
     """
     logger.info(f"🧠 Handing off analysis to Semantic Server for {student_name}...")
     
@@ -177,7 +180,9 @@ async def generate_llm_analysis(
     payload = {
         "student_name": student_name,
         "transcript_text": transcript_text,
-        "turns": [] # We pass transcript_text for now
+        "turns": [], # We pass transcript_text for now
+        "session_id": session_id,
+        "speaker_map": lesson_speaker_map(student_name),
     }
     
     try:
@@ -541,6 +546,10 @@ async def process_and_upload(audio_path: str, student_name: str, notes: str = ""
                 if 'speaker' in w:
                      w['speaker'] = speaker_remap.get(w['speaker'], w['speaker'])
 
+    # One key per lesson for every store (metrics, phenomena, search, /analyze)
+    transcript_full = "\n".join([f"{t['speaker']}: {t['transcript']}" for t in all_turns])
+    session_key = lesson_key(transcript_full, transcript_id)
+
     # 2. Local Analysis (Tiered Suite)
     # Refactored to separate module per architecture guidelines
     # Passing "all 4 transcripts" (Turns, Sentences, Punctuated, Raw)
@@ -550,11 +559,23 @@ async def process_and_upload(audio_path: str, student_name: str, notes: str = ""
         notes=notes,
         sentences=diar_result.get("sentences"),
         punctuated_text=diar_result.get("punctuated_text"),
-        raw_text=diar_result.get("raw_transcript_text")
+        raw_text=diar_result.get("raw_transcript_text"),
+        session_id=session_key
     )
 
     # 3. LLM_ANALYSIS (Gemini 3 Flash Preview)
-    transcript_full = "\n".join([f"{t['speaker']}: {t['transcript']}" for t in all_turns])
+
+    # Full-text index of the turns (kept after the capture retention purge)
+    try:
+        get_transcript_search().index_session(
+            session_key,
+            student_name,
+            cast(list[dict[str, Any]], all_turns),
+            speaker_map=lesson_speaker_map(student_name),
+            source=os.path.basename(audio_path) if audio_path else transcript_id,
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Transcript search indexing failed (non-blocking): {e}")
     llm_analysis = diar_result.get('llm_analysis')
     
     if llm_analysis:
@@ -566,7 +587,8 @@ async def process_and_upload(audio_path: str, student_name: str, notes: str = ""
             student_name=student_name,
             transcript_text=transcript_full,
             user_notes=notes,
-            analysis_context=analysis_context
+            analysis_context=analysis_context,
+            session_id=session_key,
         )
         
         # Save LLM result to cache